@@ -0,0 +1,28 @@
+"""Add per-user due queue index on flashcards
+
+Revision ID: 2026_10_17_0900
+Revises: 2025_08_21_1918
+Create Date: 2026-10-17 09:00:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '2026_10_17_0900'
+down_revision = '2025_08_21_1918'
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    # Serves "next N due cards" and due counts for one user as a range scan,
+    # with id as the keyset pagination tie-breaker
+    op.create_index(
+        'ix_flashcards_user_due',
+        'flashcards',
+        ['user_id', 'due_date', 'id'],
+        unique=False
+    )
+
+def downgrade():
+    op.drop_index('ix_flashcards_user_due', table_name='flashcards')
@@ -0,0 +1,24 @@
+"""Add full-text search index over sessions and tasks
+
+Revision ID: 2026_10_17_1000
+Revises: 2026_10_17_0900
+Create Date: 2026-10-17 10:00:00
+
+"""
+from alembic import op
+
+from app.services.search_index import drop_search_index, install_search_index
+
+# revision identifiers, used by Alembic.
+revision = '2026_10_17_1000'
+down_revision = '2026_10_17_0900'
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    # FTS5 (SQLite) or a GIN-indexed tsvector table (PostgreSQL), kept current
+    # by triggers on sessions and user_tasks, and backfilled from existing rows
+    install_search_index(op.get_bind())
+
+def downgrade():
+    drop_search_index(op.get_bind())
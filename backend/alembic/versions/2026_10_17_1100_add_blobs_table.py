@@ -0,0 +1,33 @@
+"""Add blobs table for blob store reference counts
+
+Revision ID: 2026_10_17_1100
+Revises: 2026_10_17_1000
+Create Date: 2026-10-17 11:00:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from datetime import datetime
+
+# revision identifiers, used by Alembic.
+revision = '2026_10_17_1100'
+down_revision = '2026_10_17_1000'
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    # Create blobs table
+    op.create_table(
+        'blobs',
+        sa.Column('sha256', sa.String(64), nullable=False),
+        sa.Column('size', sa.BigInteger(), nullable=False, default=0),
+        sa.Column('ref_count', sa.Integer(), nullable=False, default=0),
+        sa.Column('created_at', sa.DateTime(), nullable=False, default=datetime.utcnow),
+        sa.Column('unreferenced_at', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('sha256')
+    )
+    op.create_index('idx_blobs_unreferenced_at', 'blobs', ['unreferenced_at'])
+
+def downgrade():
+    op.drop_index('idx_blobs_unreferenced_at', table_name='blobs')
+    op.drop_table('blobs')
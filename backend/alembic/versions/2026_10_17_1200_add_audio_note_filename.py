@@ -0,0 +1,22 @@
+"""Add original filename to audio notes
+
+Revision ID: 2026_10_17_1200
+Revises: 2026_10_17_1100
+Create Date: 2026-10-17 12:00:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '2026_10_17_1200'
+down_revision = '2026_10_17_1100'
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    # Audio files are stored under their content hash, so keep the uploaded name for downloads
+    op.add_column('audio_notes', sa.Column('filename', sa.String(), nullable=True))
+
+def downgrade():
+    op.drop_column('audio_notes', 'filename')
@@ -5,7 +5,7 @@ This module imports and includes all API route modules.
 """
 
 # Import all route modules here
-from .endpoints import audio_upload, audio_to_notes, video_jobs, ai_models, video
+from .endpoints import audio_upload, audio_to_notes, video_jobs, ai_models, video, uploads
 from .endpoints.ai_settings import router as ai_settings_router
 <<<<<<< HEAD
 from .routes import audio as audio_routes
@@ -20,6 +20,7 @@ routers = [
     ai_models.router,
     ai_settings_router,
     video.router,  # Add video generation endpoints
+    uploads.router,  # Resumable uploads
 <<<<<<< HEAD
     audio_routes.router,  # Add audio processing endpoints
 =======
@@ -1,5 +1,6 @@
 from fastapi import APIRouter, UploadFile, File, HTTPException
 from fastapi.responses import JSONResponse
+import asyncio
 import os
 import tempfile
 from pydub import AudioSegment, effects
@@ -33,7 +34,8 @@ async def audio_to_notes(file: UploadFile = File(...)):
             temp.flush()
             temp_path = temp.name
         cleaned_path = preprocess_audio(temp_path)
-        transcript = transcriber.transcribe(cleaned_path)
+        # Waits off the event loop while the batcher decodes alongside other uploads
+        transcript = await asyncio.to_thread(transcriber.transcribe, cleaned_path)
         # Use your AI note generation (FusionService) to create notes from transcript
         notes = fusion_service.generate_notes_from_text(transcript)
         os.remove(temp_path)
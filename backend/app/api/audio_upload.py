@@ -1,5 +1,6 @@
 from fastapi import APIRouter, UploadFile, File, HTTPException
 from fastapi.responses import JSONResponse
+import asyncio
 import os
 import tempfile
 from pydub import AudioSegment, effects
@@ -32,7 +33,8 @@ async def upload_audio(file: UploadFile = File(...)):
             temp_path = temp.name
         cleaned_path = preprocess_audio(temp_path)
         # Transcribe with Whisper
-        transcript = transcriber.transcribe(cleaned_path)
+        # Waits off the event loop while the batcher decodes alongside other uploads
+        transcript = await asyncio.to_thread(transcriber.transcribe, cleaned_path)
         os.remove(temp_path)
         if cleaned_path != temp_path:
             os.remove(cleaned_path)
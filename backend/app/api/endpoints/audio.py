@@ -4,6 +4,7 @@ Audio processing API endpoints.
 from fastapi import APIRouter, UploadFile, File, HTTPException, Depends, Body, status
 from fastapi.responses import FileResponse, JSONResponse, StreamingResponse
 from pathlib import Path
+import asyncio
 import os
 import uuid
 import json
@@ -15,6 +16,7 @@ import numpy as np
 from pydub import AudioSegment
 
 from app.services.audio import AudioService
+from app.services.file_upload import copy_to_path
 from app.services.whisper_service import get_whisper_service
 from app.core.security import get_current_user
 from app.models.user import User
@@ -50,12 +52,13 @@ def save_audio_file(file: UploadFile) -> Path:
         filename = f"{uuid.uuid4()}{file_ext}"
         file_path = AUDIO_UPLOAD_DIR / filename
         
-        # Save the file
-        with open(file_path, "wb") as buffer:
-            content = file.file.read()
-            buffer.write(content)
+        # Copy the file to disk in chunks
+        file.file.seek(0)
+        copy_to_path(file.file, file_path)
             
         return file_path
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -111,8 +114,9 @@ async def transcribe_audio_chunk(
         # Read audio data
         audio_data = await chunk.read()
         
-        # Transcribe the chunk
-        result = whisper_service.transcribe_audio_chunk(
+        # Transcribe the chunk; concurrent chunks share batched decoder passes
+        result = await asyncio.to_thread(
+            whisper_service.transcribe_audio_chunk,
             audio_data=audio_data,
             language=language
         )
@@ -1,17 +1,22 @@
 """
 API endpoints for audio notes with pagination support.
 """
+import asyncio
 import os
+from datetime import datetime
 from pathlib import Path
 from typing import List, Optional
 from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, status
-from fastapi.responses import FileResponse
 from sqlalchemy.orm import Session
 
 from app import crud, models, schemas
 from app.api import deps
 from app.core.config import settings
 from app.services.audio import AudioService
+from app.services.blob_store import get_blob_store
+from app.services.file_upload import save_upload
+from app.services.media import MediaFileResponse
+from app.services.resumable_upload import get_resumable_upload_store
 
 router = APIRouter()
 
@@ -22,30 +27,50 @@ audio_service = AudioService()
 async def upload_audio_note(
     *,
     title: str,
-    file: UploadFile = File(...),
+    file: Optional[UploadFile] = File(None),
+    upload_id: Optional[str] = None,
     current_user: models.User = Depends(deps.get_current_active_user),
     db: Session = Depends(deps.get_db),
 ):
     """
     Upload a new audio note.
+    
+    Either post the file, or pass the ``upload_id`` of a completed resumable
+    upload (see /api/v1/uploads) for recordings too large to send in one go.
     """
+    if (file is None) == (upload_id is None):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Provide either a file or an upload_id"
+        )
+    
     # Create upload directory if it doesn't exist
     upload_dir = Path(settings.UPLOAD_DIR) / "audio_notes"
     upload_dir.mkdir(parents=True, exist_ok=True)
     
     # Generate a unique filename
-    file_ext = Path(file.filename).suffix if file.filename else ".wav"
+    if file is not None:
+        original_name = file.filename
+    else:
+        store = get_resumable_upload_store()
+        original_name = store.get(upload_id, current_user.id).metadata.get("filename")
+    file_ext = Path(original_name).suffix if original_name else ".wav"
     filename = f"{current_user.id}_{int(datetime.utcnow().timestamp())}{file_ext}"
     file_path = upload_dir / filename
     
     try:
-        # Save the file
-        with open(file_path, "wb") as buffer:
-            content = await file.read()
-            buffer.write(content)
+        # Stream the file to disk, or move the finished resumable upload into place
+        if file is not None:
+            stored = await save_upload(file, file_path)
+        else:
+            stored = store.claim(upload_id, file_path, current_user.id)
+        file_size = stored.size
         
-        # Get file size
-        file_size = os.path.getsize(file_path)
+        # Keep one copy per distinct recording
+        blob = await asyncio.to_thread(
+            get_blob_store().put_file, file_path, move=True, sha256=stored.sha256
+        )
+        file_path = blob.path
         
         # Get audio duration
         duration = audio_service.get_audio_duration(file_path)
@@ -54,6 +79,7 @@ async def upload_audio_note(
         note_in = schemas.AudioNoteCreate(
             title=title,
             file_path=str(file_path),
+            filename=original_name or filename,
             file_size=file_size,
             duration=duration,
             language="en",  # Default language
@@ -74,9 +100,13 @@ async def upload_audio_note(
             "file_size": note.file_size,
         }
         
+    except HTTPException:
+        if file_path.exists() and not get_blob_store().digest_of(file_path):
+            file_path.unlink()
+        raise
     except Exception as e:
-        # Clean up file if there was an error
-        if file_path.exists():
+        # Clean up file if there was an error; a stored blob is left to collection
+        if file_path.exists() and not get_blob_store().digest_of(file_path):
             file_path.unlink()
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -135,10 +165,11 @@ async def get_audio_file(
             detail="Not enough permissions"
         )
     
-    return FileResponse(
+    # Supports seeking (Range) and revalidation (ETag / If-None-Match)
+    return MediaFileResponse(
         note.file_path,
         media_type="audio/mpeg",
-        filename=os.path.basename(note.file_path)
+        filename=note.filename or os.path.basename(note.file_path)
     )
 
 @router.get("/", response_model=schemas.AudioNoteListResponse)
@@ -225,8 +256,8 @@ def delete_audio_note(
             detail="Not enough permissions"
         )
     
-    # Delete the file if it exists
-    if os.path.exists(note.file_path):
+    # Delete the file if it exists; stored blobs are released by crud.audio_note.remove
+    if not get_blob_store().digest_of(note.file_path) and os.path.exists(note.file_path):
         try:
             os.remove(note.file_path)
         except Exception as e:
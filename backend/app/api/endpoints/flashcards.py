@@ -72,10 +72,10 @@ async def create_flashcard(
 
 @router.post(
     "/batch",
-    response_model=List[schemas.FlashcardResponse],
+    response_model=schemas.FlashcardBatchResult,
     status_code=status.HTTP_201_CREATED,
     responses={
-        201: {"description": "Flashcards created successfully"},
+        201: {"description": "Batch processed; see per-item status"},
         400: {"description": "Invalid input data or batch size exceeded"},
         401: {"description": "Not authenticated"},
         422: {"description": "Validation error"},
@@ -86,41 +86,28 @@ async def create_flashcards_batch(
     batch: schemas.FlashcardBatch,
     db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user),
-) -> List[schemas.FlashcardResponse]:
+) -> schemas.FlashcardBatchResult:
     """
     Create multiple flashcards in a single batch.
     
     - **flashcards**: List of flashcards to create (max 100)
     - **default_tags**: Tags to apply to all flashcards in the batch
     
-    Returns list of created flashcards with all fields populated.
+    Duplicate front texts (within the batch or already saved) are skipped
+    rather than failing the batch. Returns one item per submitted flashcard,
+    in order, with status "created" (and the new flashcard) or "skipped"
+    (and a reason).
     """
     try:
-        created = []
-        async with db.begin():
-            for flashcard in batch.flashcards:
-                # Apply default tags if any
-                if batch.default_tags:
-                    flashcard.tags = list(set(flashcard.tags + batch.default_tags))
-                
-                created_flashcard = await crud.flashcard.create(
-                    db=db,
-                    obj_in=flashcard,
-                    user_id=str(current_user.id)
-                )
-                created.append(created_flashcard)
-            
-            await db.commit()
-            
-        return created
-        
-    except SQLAlchemyError as e:
-        await db.rollback()
-        logger.error(f"Database error in batch create: {str(e)}")
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail="Error creating flashcards"
+        return await crud.flashcard.create_batch(
+            db=db,
+            objs_in=batch.flashcards,
+            user_id=str(current_user.id),
+            default_tags=batch.default_tags
         )
+        
+    except HTTPException:
+        raise
     except Exception as e:
         await db.rollback()
         logger.error(f"Unexpected error in batch create: {str(e)}")
@@ -129,6 +116,66 @@ async def create_flashcards_batch(
             detail="An unexpected error occurred"
         )
 
+@router.post(
+    "/reviews/",
+    response_model=schemas.FlashcardReviewSessionResult,
+    responses={
+        200: {"description": "Review session recorded"},
+        401: {"description": "Not authenticated"},
+        422: {"description": "Validation error"},
+        500: {"description": "Internal server error"}
+    }
+)
+async def record_review_session(
+    session: schemas.FlashcardReviewSession,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_current_active_user),
+) -> schemas.FlashcardReviewSessionResult:
+    """
+    Record a whole study session of reviews in one request.
+    
+    - **reviews**: List of {card_id, quality, reviewed_at} results (max 2000)
+    
+    Meant for clients syncing offline sessions. Reviews are replayed in
+    reviewed_at order with the SM-2 algorithm, so a card reviewed several
+    times is rescheduled from its last review. Unknown card IDs are listed
+    under not_found instead of failing the session.
+    """
+    return await crud.flashcard.review_session(
+        db=db,
+        user_id=str(current_user.id),
+        reviews=[review.dict() for review in session.reviews]
+    )
+
+@router.get(
+    "/forecast/",
+    response_model=schemas.FlashcardForecast,
+    responses={
+        200: {"description": "Workload forecast"},
+        401: {"description": "Not authenticated"}
+    }
+)
+async def forecast_reviews(
+    days: int = Query(30, ge=1, le=365, description="Number of days to project"),
+    retention: float = Query(0.9, ge=0, le=1, description="Assumed probability of passing a review"),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_current_active_user),
+) -> schemas.FlashcardForecast:
+    """
+    Project how many of the user's cards fall due on each upcoming day.
+    
+    - **days**: Number of days to project (1-365)
+    - **retention**: Assumed share of reviews answered correctly
+    
+    Simulates reviewing every due card on its due day with the SM-2 algorithm.
+    """
+    return await crud.flashcard.forecast(
+        db=db,
+        user_id=str(current_user.id),
+        days=days,
+        retention=retention
+    )
+
 @router.get(
     "/{flashcard_id}",
     response_model=schemas.FlashcardResponse,
@@ -225,30 +272,41 @@ async def read_flashcards(
 
 @router.get(
     "/due/",
-    response_model=List[schemas.FlashcardResponse],
+    response_model=schemas.FlashcardPage,
     responses={
         200: {"description": "List of due flashcards retrieved successfully"},
+        400: {"description": "Invalid cursor"},
         401: {"description": "Not authenticated"},
         403: {"description": "Not authorized"}
     }
 )
 async def get_due_flashcards(
     limit: int = Query(20, ge=1, le=100, description="Maximum number of due cards to return"),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page"),
     db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_active_user),
-) -> List[schemas.FlashcardResponse]:
+) -> schemas.FlashcardPage:
     """
     Get flashcards that are due for review.
     
     - **limit**: Maximum number of due cards to return (1-100)
+    - **cursor**: Resume after the previous page (keyset pagination)
     
-    Returns a list of flashcards that are due for review, ordered by due date.
+    Returns a page of due flashcards ordered by due date, the total number
+    of due cards, and the cursor for the next page.
     """
     try:
-        return await crud.flashcard.get_due_cards(
+        items, total, next_cursor = await crud.flashcard.get_due_cards(
             db=db,
             user_id=str(current_user.id),
-            limit=limit
+            limit=limit,
+            cursor=cursor
+        )
+        return {"items": items, "total": total, "next_cursor": next_cursor}
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
         )
     except Exception as e:
         logger.error(f"Error retrieving due flashcards: {str(e)}")
@@ -1,4 +1,5 @@
 <<<<<<< HEAD
+import asyncio
 import os
 import logging
 from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, status, BackgroundTasks
@@ -14,6 +15,9 @@ from ...core.security import get_current_user
 from ...models.user import User
 from ...services.file_upload import file_upload_service
 from ...services.ai import AIService
+from ...services.blob_store import get_blob_store
+from ...services.media import MediaFileResponse
+from ...core.config import settings
 
 # Configure logging
 logger = logging.getLogger(__name__)
@@ -102,6 +106,37 @@ def delete_note(
     crud.delete_note(db=db, note_id=note_id)
     return {"status": "success"}
 
+@router.get("/{note_id}/attachments/{sha256}")
+async def download_attachment(
+    note_id: int,
+    sha256: str,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Download a note attachment under the name it was uploaded as"""
+    db_note = crud.get_note(db, note_id=note_id)
+    if db_note is None:
+        raise HTTPException(status_code=404, detail="Note not found")
+    if db_note.user_id != current_user.id and not current_user.is_superuser:
+        raise HTTPException(status_code=403, detail="Not enough permissions")
+    
+    store = get_blob_store()
+    attachment = next(
+        (a for a in crud.get_note_attachments(db, note_id=note_id) if store.digest_of(a.file_path) == sha256),
+        None
+    )
+    if attachment is None:
+        raise HTTPException(status_code=404, detail="Attachment not found")
+    
+    # Fetches the content into the local cache first when blobs live in S3
+    path = await asyncio.to_thread(store.path, sha256)
+    return MediaFileResponse(
+        path,
+        media_type=attachment.file_type,
+        filename=attachment.filename,
+        content_disposition_type="attachment"
+    )
+
 @router.post("/{note_id}/attachments", response_model=schemas.Attachment)
 async def upload_attachment(
     note_id: int,
@@ -137,7 +172,7 @@ async def upload_attachment(
         attachment_data = {
             "filename": file_info["filename"],
             "file_path": file_info["file_path"],
-            "file_url": file_info["file_url"],
+            "file_url": f"{settings.API_V1_STR}/notes/{note_id}/attachments/{file_info['sha256']}",
             "file_type": file_info["file_type"],
             "file_size": file_info["file_size"],
             "note_id": note_id
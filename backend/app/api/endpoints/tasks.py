@@ -9,6 +9,7 @@ from app.core.database import get_db
 from app.core.security import get_current_active_user
 from app.models.user import User
 from app.models.user_task import UserTask, TaskStatus, TaskPriority
+from app.services.search_index import search_sync
 
 router = APIRouter()
 
@@ -264,19 +265,19 @@ async def search_tasks(
     db: Session = Depends(get_db)
 ):
     """
-    Search tasks by title or description.
+    Search tasks by title or description, best matches first.
     
     Only returns tasks owned by the current user.
     """
-    search = f"%{q}%"
+    hits, _ = search_sync(
+        db, q, doc_type="task", owner_id=str(current_user.id), limit=limit, offset=skip
+    )
+    ids = [UUID(hit.doc_id) for hit in hits]
+    if not ids:
+        return []
     
-    tasks = db.query(UserTask).filter(
-        UserTask.user_id == current_user.id,
-        (UserTask.title.ilike(search)) | (UserTask.description.ilike(search))
-    ).order_by(
-        UserTask.due_date.asc(),
-        UserTask.priority.desc(),
-        UserTask.created_at.desc()
-    ).offset(skip).limit(limit).all()
+    # Keep the rank order of the hits
+    by_id = {task.id: task for task in db.query(UserTask).filter(UserTask.id.in_(ids)).all()}
+    tasks = [by_id[task_id] for task_id in ids if task_id in by_id]
     
     return tasks
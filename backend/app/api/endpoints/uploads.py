@@ -0,0 +1,133 @@
+"""
+Resumable upload endpoints (tus 1.0 core protocol with the creation and
+termination extensions).
+
+A finished upload is referenced by its id wherever a file would otherwise
+be posted, e.g. ``upload_id`` on the audio note upload.
+"""
+import base64
+import binascii
+from typing import Dict, Optional
+
+from fastapi import APIRouter, Depends, Header, HTTPException, Request, Response, status
+from starlette.requests import ClientDisconnect
+
+from app import models
+from app.api import deps
+from app.services.resumable_upload import ResumableUploadStore, get_resumable_upload_store
+
+router = APIRouter(prefix="/api/v1/uploads", tags=["uploads"])
+
+TUS_VERSION = "1.0.0"
+TUS_HEADERS = {"Tus-Resumable": TUS_VERSION}
+
+
+def _parse_metadata(header: Optional[str]) -> Dict[str, str]:
+    """Upload-Metadata: comma-separated ``key base64value`` pairs."""
+    metadata = {}
+    for pair in filter(None, (p.strip() for p in (header or "").split(","))):
+        key, _, value = pair.partition(" ")
+        try:
+            metadata[key] = base64.b64decode(value, validate=True).decode() if value else ""
+        except (binascii.Error, UnicodeDecodeError):
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"Invalid Upload-Metadata for {key!r}")
+    return metadata
+
+
+@router.options("")
+async def upload_options():
+    """Advertise the protocol version and extensions."""
+    store = get_resumable_upload_store()
+    return Response(status_code=status.HTTP_204_NO_CONTENT, headers={
+        **TUS_HEADERS,
+        "Tus-Version": TUS_VERSION,
+        "Tus-Extension": "creation,termination",
+        "Tus-Max-Size": str(store.max_bytes),
+    })
+
+
+@router.post("", status_code=status.HTTP_201_CREATED)
+async def create_upload(
+    upload_length: int = Header(...),
+    upload_metadata: Optional[str] = Header(None),
+    current_user: models.User = Depends(deps.get_current_active_user),
+    store: ResumableUploadStore = Depends(get_resumable_upload_store),
+):
+    """Start a resumable upload of Upload-Length bytes."""
+    upload = store.create(upload_length, current_user.id, _parse_metadata(upload_metadata))
+    return Response(status_code=status.HTTP_201_CREATED, headers={
+        **TUS_HEADERS,
+        "Location": f"{router.prefix}/{upload.id}",
+        "Upload-Offset": "0",
+    })
+
+
+@router.head("/{upload_id}")
+async def get_upload_offset(
+    upload_id: str,
+    current_user: models.User = Depends(deps.get_current_active_user),
+    store: ResumableUploadStore = Depends(get_resumable_upload_store),
+):
+    """How many bytes the server has; the client resumes from there."""
+    upload = store.get(upload_id, current_user.id)
+    return Response(status_code=status.HTTP_200_OK, headers={
+        **TUS_HEADERS,
+        "Upload-Offset": str(upload.offset),
+        "Upload-Length": str(upload.length),
+        "Cache-Control": "no-store",
+    })
+
+
+@router.patch("/{upload_id}")
+async def append_upload(
+    upload_id: str,
+    request: Request,
+    upload_offset: int = Header(...),
+    content_type: str = Header(...),
+    current_user: models.User = Depends(deps.get_current_active_user),
+    store: ResumableUploadStore = Depends(get_resumable_upload_store),
+):
+    """Append the request body at Upload-Offset."""
+    if content_type.split(";")[0].strip() != "application/offset+octet-stream":
+        raise HTTPException(
+            status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+            detail="Content-Type must be application/offset+octet-stream"
+        )
+    try:
+        upload = await store.append(upload_id, upload_offset, request.stream(), current_user.id)
+    except ClientDisconnect:
+        # What reached disk is kept; the client asks for the offset and resumes
+        return Response(status_code=status.HTTP_400_BAD_REQUEST, headers=TUS_HEADERS)
+    return Response(status_code=status.HTTP_204_NO_CONTENT, headers={
+        **TUS_HEADERS,
+        "Upload-Offset": str(upload.offset),
+    })
+
+
+@router.get("/{upload_id}")
+async def get_upload(
+    upload_id: str,
+    current_user: models.User = Depends(deps.get_current_active_user),
+    store: ResumableUploadStore = Depends(get_resumable_upload_store),
+):
+    """Upload state, including the SHA-256 once it is complete."""
+    upload = store.get(upload_id, current_user.id)
+    return {
+        "id": upload.id,
+        "length": upload.length,
+        "offset": upload.offset,
+        "complete": upload.complete,
+        "sha256": upload.sha256,
+        "metadata": upload.metadata,
+    }
+
+
+@router.delete("/{upload_id}", status_code=status.HTTP_204_NO_CONTENT)
+async def delete_upload(
+    upload_id: str,
+    current_user: models.User = Depends(deps.get_current_active_user),
+    store: ResumableUploadStore = Depends(get_resumable_upload_store),
+):
+    """Abandon an upload."""
+    store.delete(upload_id, current_user.id)
+    return Response(status_code=status.HTTP_204_NO_CONTENT, headers=TUS_HEADERS)
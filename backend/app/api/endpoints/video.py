@@ -1,5 +1,5 @@
 from fastapi import APIRouter, Depends, HTTPException, BackgroundTasks, status, Query
-from fastapi.responses import FileResponse, StreamingResponse
+from fastapi.responses import StreamingResponse
 from typing import Optional, Dict, Any, List
 import os
 import uuid
@@ -17,6 +17,7 @@ from ...schemas.video import (
     VideoGenerationResponse,
     VideoStatusResponse
 )
+from ...services.media import MediaFileResponse
 from ...services.video.service import VideoGenerationService
 
 router = APIRouter(prefix="/video", tags=["video"])
@@ -108,11 +109,11 @@ async def download_video(
                 detail="Video file not found or not ready"
             )
             
-        return FileResponse(
+        return MediaFileResponse(
             video_path,
             media_type="video/mp4",
-            filename=f"video_{task_id}{video_path.suffix}",
-            headers={"Content-Disposition": f"attachment; filename=video_{task_id}{video_path.suffix}"}
+            filename=f"video_{task_id}.mp4",
+            content_disposition_type="attachment"
         )
         
     except HTTPException:
@@ -11,6 +11,7 @@ from .endpoints.flashcards import router as flashcards_router
 from .test_video import router as test_video_router
 from .endpoints.test_subscription import router as test_subscription_router
 from fastapi.responses import FileResponse, JSONResponse
+import asyncio
 import json
 import os
 from typing import Optional, List, Dict, Any
@@ -26,6 +27,8 @@ from ..models.database import get_db
 from ..services.fusion_service import FusionService
 from ..services.pdf_service import PDFService
 from ..services.visual.service import VisualGenerationService
+from ..services import search_index
+from ..services.semantic_index import get_semantic_index
 
 router = APIRouter()
 router.include_router(video_jobs_router)
@@ -227,9 +230,11 @@ async def get_diagram_image(
     expires: int = Query(..., description="Unix timestamp when URL expires"),
     signature: str = Query(..., description="Signature for the image URL")
 ):
-    """Serve a diagram image by file path (only from allowed temp dir, with signed URL)."""
+    """Serve a diagram image by file path (only from allowed temp dir or blob store, with signed URL)."""
     from pathlib import Path
     import mimetypes
+    from ..services.blob_store import get_blob_store
+    from ..services.media import MediaFileResponse
     temp_dir = visual_service._temp_dir
     try:
         # Validate signature
@@ -237,15 +242,16 @@ async def get_diagram_image(
             raise HTTPException(status_code=403, detail="Invalid or expired signature.")
         file_path = Path(path)
         file_path = file_path.resolve()
-        if not str(file_path).startswith(str(temp_dir.resolve())):
+        if not (file_path.is_relative_to(temp_dir.resolve()) or get_blob_store().digest_of(file_path)):
             raise HTTPException(status_code=403, detail="Access denied.")
         if not file_path.exists() or not file_path.is_file():
             raise HTTPException(status_code=404, detail="Image not found.")
         mime, _ = mimetypes.guess_type(str(file_path))
-        return FileResponse(
-            path=str(file_path),
+        return MediaFileResponse(
+            file_path,
             media_type=mime or "image/png",
-            filename=file_path.name
+            filename=file_path.name,
+            content_disposition_type="attachment"
         )
     except Exception as e:
         raise HTTPException(status_code=400, detail=f"Invalid image path: {str(e)}")
@@ -412,57 +418,66 @@ async def export_flashcards(session_id: str = Form(...)):
 @router.get("/search")
 async def search_content(
     query: str = Query(...),
-    session_id: Optional[str] = Query(None)
+    session_id: Optional[str] = Query(None),
+    limit: int = Query(20, ge=1, le=100),
+    offset: int = Query(0, ge=0)
 ):
-    """Search across transcripts and notes"""
+    """Search across transcripts and notes, best matches first"""
     try:
-        search_results = []
-        
-        db = await get_db()
-        if session_id:
-            # Search within specific session
-            cursor = await db.execute("""
-                SELECT * FROM sessions WHERE session_id = ? 
-                AND (lecture_content LIKE ? OR textbook_content LIKE ? OR fused_notes LIKE ?)
-            """, (session_id, f"%{query}%", f"%{query}%", f"%{query}%"))
-            sessions = await cursor.fetchall()
-            
-            for session in sessions:
-                search_results.append({
-                    "type": "session",
-                    "session_id": session[0],
-                    "module_code": session[1],
-                    "chapters": session[2],
-                    "matches": _find_matches(query, session[4] + " " + session[5] + " " + session[6])
-                })
-        else:
-            # Search across all sessions
-            cursor = await db.execute("""
-                SELECT * FROM sessions 
-                WHERE lecture_content LIKE ? OR textbook_content LIKE ? OR fused_notes LIKE ?
-            """, (f"%{query}%", f"%{query}%", f"%{query}%"))
-            sessions = await cursor.fetchall()
-            
-            for session in sessions:
-                search_results.append({
-                    "type": "session",
-                    "session_id": session[0],
-                    "module_code": session[1],
-                    "chapters": session[2],
-                    "matches": _find_matches(query, session[4] + " " + session[5] + " " + session[6])
-                })
-        
-        await db.close()
-        
+        async with get_db() as db:
+            hits, total = await search_index.search(
+                db, query, doc_type="session", doc_id=session_id, limit=limit, offset=offset
+            )
+
+        search_results = [
+            {
+                "type": hit.doc_type,
+                "session_id": hit.doc_id,
+                "title": hit.title,
+                "snippet": hit.snippet,
+                "score": hit.score
+            }
+            for hit in hits
+        ]
+
         return {
             "query": query,
             "results": search_results,
-            "total_results": len(search_results)
+            "total_results": total
         }
         
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Search failed: {str(e)}")
 
+@router.get("/search/semantic")
+async def semantic_search(
+    query: str = Query(..., min_length=1),
+    k: int = Query(10, ge=1, le=100),
+    doc_id: Optional[str] = Query(None),
+    kind: Optional[str] = Query(None, description="section or transcript"),
+    nprobe: Optional[int] = Query(None, ge=1)
+):
+    """Find the note sections and transcript passages closest in meaning to the query"""
+    try:
+        # Opening the index on first use blocks as much as searching it
+        hits = await asyncio.to_thread(lambda: get_semantic_index().search(query, k, doc_id, kind, nprobe))
+        return {
+            "query": query,
+            "results": [
+                {
+                    "doc_id": hit.doc_id,
+                    "kind": hit.kind,
+                    "title": hit.title,
+                    "text": hit.text,
+                    "start_time": hit.start_time,
+                    "score": hit.score
+                }
+                for hit in hits
+            ]
+        }
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Semantic search failed: {str(e)}")
+
 @router.post("/diagrams/save")
 async def save_diagram(
     session_id: str = Form(...),
@@ -778,18 +793,3 @@ async def generate_video_from_text(payload: dict):
         )
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Video generation failed: {str(e)}")
-
-def _find_matches(query: str, content: str) -> list:
-    """Find matches for search query in content"""
-    matches = []
-    lines = content.split('\n')
-    
-    for i, line in enumerate(lines):
-        if query.lower() in line.lower():
-            matches.append({
-                "line_number": i + 1,
-                "line": line.strip(),
-                "context": " ".join(lines[max(0, i-1):min(len(lines), i+2)])
-            })
-    
-    return matches 
\ No newline at end of file
@@ -1,7 +1,8 @@
 from fastapi import APIRouter, HTTPException, BackgroundTasks
-from fastapi.responses import JSONResponse, FileResponse
+from fastapi.responses import JSONResponse
 from typing import Optional
 import os
+from ..services.media import MediaFileResponse
 from ..services.visual.video_tasks import generate_presentation_task
 
 router = APIRouter()
@@ -54,4 +55,4 @@ def download_video_result(job_id: str):
     if not video_path or not os.path.exists(video_path):
         raise HTTPException(status_code=404, detail="Video file not found.")
     filename = os.path.basename(video_path)
-    return FileResponse(path=video_path, filename=filename, media_type="video/mp4")
+    return MediaFileResponse(video_path, filename=filename, media_type="video/mp4", content_disposition_type="attachment")
@@ -50,6 +50,9 @@ class Settings(BaseSettings):
     
     # Model settings
     MODEL_UPDATE_INTERVAL: int = 3600  # Check for model updates every hour
+    # Comma-separated kind:name[:device[:compute_type]] specs loaded at import,
+    # e.g. "whisper:base,pyannote:pyannote/speaker-diarization"
+    PRELOAD_MODELS: str = ""
     
     class Config:
         case_sensitive = True
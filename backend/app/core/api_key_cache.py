@@ -0,0 +1,218 @@
+"""
+Cache of verified API keys.
+
+Verifying a presented key means a database lookup plus a bcrypt check,
+tens of milliseconds of CPU on every authenticated request. Once a key has
+been verified, its record is cached under an HMAC-SHA256 fingerprint of
+the full presented token (the keyed hash ``_hash_api_key`` computes), so
+the secret itself is never held in memory and a hit costs one HMAC and a
+dict lookup.
+
+- Entries live for ``ttl`` seconds, never past the key's expiry, in an LRU
+  bounded to ``max_entries``.
+- Tokens that fail verification are cached as negative entries for
+  ``negative_ttl`` seconds, so repeated bad keys do not reach bcrypt either.
+- Revoking, rotating or editing a key drops every entry for its key id in
+  this process and publishes the key id on a Redis channel; other workers
+  drop theirs through ``listen_for_invalidations``.
+- Each invalidation bumps a generation for the key id. A lookup records the
+  generation before reading the database and passes it to ``put``, which
+  skips the write if an invalidation landed in between, so a lookup that
+  raced a revocation cannot cache the revoked record again.
+"""
+import asyncio
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Dict, Optional, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+INVALIDATION_CHANNEL = "api_keys:invalidate"
+
+
+@dataclass(frozen=True)
+class CachedAPIKey:
+    """Detached snapshot of a verified API key record."""
+    id: Any
+    key_id: str
+    user_id: Any
+    name: Optional[str] = None
+    rate_limit: Optional[int] = None
+    expires_at: Optional[datetime] = None
+    is_active: bool = True
+
+    @classmethod
+    def from_record(cls, record: Any) -> "CachedAPIKey":
+        return cls(
+            id=getattr(record, "id", None),
+            key_id=record.key_id,
+            user_id=record.user_id,
+            name=getattr(record, "name", None),
+            rate_limit=getattr(record, "rate_limit", None),
+            expires_at=getattr(record, "expires_at", None),
+            is_active=getattr(record, "is_active", True),
+        )
+
+
+class APIKeyCache:
+    """LRU of verified (and rejected) API keys by token fingerprint."""
+
+    def __init__(
+        self,
+        max_entries: int = 10000,
+        ttl: float = 60.0,
+        negative_ttl: float = 10.0,
+        clock=time.monotonic
+    ):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.clock = clock
+        self._lock = threading.Lock()
+        # fingerprint -> (key id, record or None when rejected, expires at)
+        self._entries: "OrderedDict[str, Tuple[str, Optional[CachedAPIKey], float]]" = OrderedDict()
+        self._by_key_id: Dict[str, Set[str]] = {}
+        # Invalidations per key id, and of the whole cache
+        self._generations: Dict[str, int] = {}
+        self._epoch = 0
+        self._stats = {"hits": 0, "negative_hits": 0, "misses": 0, "invalidations": 0}
+
+    def get(self, fingerprint: str) -> Tuple[bool, Optional[CachedAPIKey]]:
+        """(found, record); a found None is a cached rejection."""
+        with self._lock:
+            entry = self._entries.get(fingerprint)
+            if entry is None or entry[2] <= self.clock():
+                if entry is not None:
+                    self._drop(fingerprint)
+                self._stats["misses"] += 1
+                return False, None
+            self._entries.move_to_end(fingerprint)
+            self._stats["hits" if entry[1] is not None else "negative_hits"] += 1
+            return True, entry[1]
+
+    def generation(self, key_id: str) -> Tuple[int, int]:
+        """Token to take before looking ``key_id`` up and hand to ``put``."""
+        with self._lock:
+            return self._epoch, self._generations.get(key_id, 0)
+
+    def put(
+        self,
+        fingerprint: str,
+        key_id: str,
+        record: Optional[CachedAPIKey],
+        generation: Optional[Tuple[int, int]] = None
+    ) -> None:
+        """
+        Cache a verified record, or None for a token that failed verification.
+
+        With ``generation`` from before the lookup, nothing is cached if the
+        key was invalidated since.
+        """
+        now = self.clock()
+        expires = now + (self.ttl if record is not None else self.negative_ttl)
+        if record is not None and record.expires_at is not None:
+            remaining = (record.expires_at - datetime.utcnow()).total_seconds()
+            expires = min(expires, now + remaining)
+        if expires <= now:
+            return
+        with self._lock:
+            if generation is not None and generation != (self._epoch, self._generations.get(key_id, 0)):
+                return
+            self._drop(fingerprint)
+            self._entries[fingerprint] = (key_id, record, expires)
+            self._by_key_id.setdefault(key_id, set()).add(fingerprint)
+            while len(self._entries) > self.max_entries:
+                self._drop(next(iter(self._entries)))
+
+    def invalidate(self, key_id: str) -> int:
+        """Drop every entry for ``key_id``; returns how many were dropped."""
+        with self._lock:
+            fingerprints = list(self._by_key_id.get(key_id, ()))
+            for fingerprint in fingerprints:
+                self._drop(fingerprint)
+            self._generations[key_id] = self._generations.get(key_id, 0) + 1
+            self._stats["invalidations"] += 1
+            return len(fingerprints)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._by_key_id.clear()
+            self._epoch += 1
+
+    def _drop(self, fingerprint: str) -> None:
+        entry = self._entries.pop(fingerprint, None)
+        if entry is None:
+            return
+        fingerprints = self._by_key_id.get(entry[0])
+        if fingerprints is not None:
+            fingerprints.discard(fingerprint)
+            if not fingerprints:
+                del self._by_key_id[entry[0]]
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {**self._stats, "entries": len(self._entries)}
+
+
+_api_key_cache: Optional[APIKeyCache] = None
+
+
+def get_api_key_cache() -> APIKeyCache:
+    """
+    Process-wide cache bounded by API_KEY_CACHE_MAX_ENTRIES, with
+    API_KEY_CACHE_TTL and API_KEY_CACHE_NEGATIVE_TTL in seconds.
+    """
+    global _api_key_cache
+    if _api_key_cache is None:
+        _api_key_cache = APIKeyCache(
+            max_entries=int(os.getenv("API_KEY_CACHE_MAX_ENTRIES", "10000")),
+            ttl=float(os.getenv("API_KEY_CACHE_TTL", "60")),
+            negative_ttl=float(os.getenv("API_KEY_CACHE_NEGATIVE_TTL", "10")),
+        )
+    return _api_key_cache
+
+
+async def publish_invalidation(key_id: str, redis_url: Optional[str] = None) -> None:
+    """Drop ``key_id`` here and tell the other workers to drop it too."""
+    get_api_key_cache().invalidate(key_id)
+    try:
+        import redis.asyncio as aioredis
+
+        client = aioredis.from_url(redis_url or os.getenv("REDIS_URL", "redis://localhost:6379/0"))
+        try:
+            await client.publish(INVALIDATION_CHANNEL, key_id)
+        finally:
+            await client.close()
+    except Exception as e:
+        # Other workers still expire the entry within the TTL
+        logger.warning(f"Failed to publish API key invalidation for {key_id}: {e}")
+
+
+async def listen_for_invalidations(redis_url: str, retry_delay: float = 5.0) -> None:
+    """Apply invalidations published by other workers until cancelled."""
+    import redis.asyncio as aioredis
+
+    while True:
+        client = aioredis.from_url(redis_url, decode_responses=True)
+        pubsub = client.pubsub()
+        try:
+            await pubsub.subscribe(INVALIDATION_CHANNEL)
+            async for message in pubsub.listen():
+                if message.get("type") == "message":
+                    get_api_key_cache().invalidate(message["data"])
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.warning(f"API key invalidation listener interrupted: {e}")
+            # Entries cached before the outage may have missed an invalidation
+            get_api_key_cache().clear()
+        finally:
+            await pubsub.close()
+            await client.close()
+        await asyncio.sleep(retry_delay)
@@ -4,18 +4,22 @@ API Key utility functions for NoteFusion AI.
 This module provides functions for generating, validating, and managing API keys.
 """
 import hmac
+import math
 import hashlib
 import secrets
 import string
+import threading
 import time
+from collections import OrderedDict
 from datetime import datetime, timedelta
-from typing import Optional, Dict, Any, Tuple, List, Union
+from typing import Optional, Dict, Any, Tuple, List, Union, Callable
 
 from fastapi import HTTPException, status, Depends, Request
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from sqlalchemy.orm import Session
 from sqlalchemy import and_, or_
 
+from app.core.api_key_cache import CachedAPIKey, get_api_key_cache, publish_invalidation
 from app.core.config import settings
 from app.core.security import verify_password, get_password_hash
 from app.db.session import get_db
@@ -25,6 +29,14 @@ from app.schemas.api_key import APIKeyCreate, APIKeyUpdate, APIKeyInDB
 # Security scheme for API key authentication
 security = HTTPBearer()
 
+# Minimum seconds between last_used_at writes for the same key
+LAST_USED_INTERVAL = 60
+
+# Key ids whose last write time is remembered; the least recently written go first
+LAST_TOUCHED_MAX_ENTRIES = 10000
+_last_touched: "OrderedDict[str, float]" = OrderedDict()
+_last_touched_lock = threading.Lock()
+
 def generate_api_key(prefix: str = None, length: int = None) -> Tuple[str, str]:
     """
     Generate a new API key with the given prefix and length.
@@ -65,18 +77,39 @@ async def validate_api_key(
     key_id: str,
     key_secret: str,
     db: Session
-) -> Optional[APIKey]:
+) -> Optional[CachedAPIKey]:
     """
     Validate an API key ID and secret.
     
+    Verified and rejected keys are cached by the HMAC of the presented
+    token, so only the first request for a key pays for the database
+    lookup and bcrypt check.
+    
     Args:
         key_id: The API key ID
         key_secret: The API key secret
         db: Database session
         
     Returns:
-        The API key record if valid, None otherwise
+        A snapshot of the API key record if valid, None otherwise
     """
+    fingerprint = _hash_api_key(f"{key_id}.{key_secret}")
+    found, cached = get_api_key_cache().get(fingerprint)
+    if found:
+        return cached
+    return _verify_api_key(key_id, key_secret, fingerprint, db)
+
+def _verify_api_key(
+    key_id: str,
+    key_secret: str,
+    fingerprint: str,
+    db: Session
+) -> Optional[CachedAPIKey]:
+    """Check a key against the database and cache the outcome."""
+    cache = get_api_key_cache()
+    # Taken before the lookup, so a revocation racing it is not cached over
+    generation = cache.generation(key_id)
+    
     # Get the API key from the database
     api_key = db.query(APIKey).filter(
         APIKey.key_id == key_id,
@@ -87,14 +120,67 @@ async def validate_api_key(
         )
     ).first()
     
-    if not api_key:
-        return None
-    
     # Verify the key secret
-    if not verify_password(key_secret, api_key.hashed_secret):
+    record = None
+    if api_key and verify_password(key_secret, api_key.hashed_secret):
+        record = CachedAPIKey.from_record(api_key)
+    
+    cache.put(fingerprint, key_id, record, generation)
+    return record
+
+async def authenticate_api_key(
+    token: str,
+    session_factory: Callable[[], Session]
+) -> Optional[CachedAPIKey]:
+    """
+    Validate a full "key_id.secret" token, opening a database session
+    from ``session_factory`` only when the token is not cached.
+    
+    Args:
+        token: The API key as presented by the client
+        session_factory: Callable returning a new database session
+        
+    Returns:
+        A snapshot of the API key record if valid, None otherwise
+    """
+    try:
+        key_id, key_secret = token.split('.', 1)
+    except ValueError:
         return None
     
-    return api_key
+    fingerprint = _hash_api_key(token)
+    found, cached = get_api_key_cache().get(fingerprint)
+    if found:
+        return cached
+    
+    db = session_factory()
+    try:
+        return _verify_api_key(key_id, key_secret, fingerprint, db)
+    finally:
+        db.close()
+
+def last_used_due(key_id: str) -> bool:
+    """Whether ``key_id``'s last_used_at is older than LAST_USED_INTERVAL; marks it updated."""
+    now = time.monotonic()
+    with _last_touched_lock:
+        if now - _last_touched.get(key_id, float("-inf")) < LAST_USED_INTERVAL:
+            return False
+        _last_touched[key_id] = now
+        _last_touched.move_to_end(key_id)
+        # Entries past the interval no longer hold anything back
+        while _last_touched and (
+            len(_last_touched) > LAST_TOUCHED_MAX_ENTRIES
+            or now - next(iter(_last_touched.values())) >= LAST_USED_INTERVAL
+        ):
+            _last_touched.popitem(last=False)
+        return True
+
+def touch_api_key(db: Session, key_id: str) -> None:
+    """Set a key's last_used_at without loading the record."""
+    db.query(APIKey).filter(APIKey.key_id == key_id).update(
+        {APIKey.last_used_at: datetime.utcnow()}, synchronize_session=False
+    )
+    db.commit()
 
 async def check_rate_limit(
     api_key: APIKey,
@@ -114,42 +200,25 @@ async def check_rate_limit(
     Returns:
         Dict with rate limit information
     """
-    from app.core.redis import get_redis
+    from app.security.rate_limiter import get_limiter
     
     # Get the rate limit for this key (or use default)
     rate_limit = api_key.rate_limit or settings.API_KEY_RATE_LIMIT_DEFAULT
     window = settings.API_KEY_RATE_LIMIT_WINDOW
     
-    # Create a unique key for this API key and endpoint
-    redis_key = f"rate_limit:{api_key.key_id}:{endpoint}:{int(time.time() // window)}"
-    
-    # Get Redis client
-    redis = await get_redis()
-    
-    # Get current count
-    current = await redis.get(redis_key)
-    current = int(current) if current else 0
-    
-    # Check if rate limit is exceeded
-    if current + cost > rate_limit:
-        return {
-            "allowed": False,
-            "limit": rate_limit,
-            "remaining": 0,
-            "reset": window - (int(time.time()) % window),
-            "retry_after": window - (int(time.time()) % window)
-        }
-    
-    # Increment the counter
-    await redis.incrby(redis_key, cost)
-    await redis.expire(redis_key, window)
-    
-    return {
-        "allowed": True,
-        "limit": rate_limit,
-        "remaining": rate_limit - current - cost,
-        "reset": window - (int(time.time()) % window)
+    # One atomic round trip per request for this API key and endpoint
+    result = await get_limiter().hit(f"api_key:{api_key.key_id}:{endpoint}", rate_limit, window, cost)
+    
+    info = {
+        "allowed": result.allowed,
+        "limit": result.limit,
+        "remaining": result.remaining,
+        "reset": math.ceil(result.reset),
+        "headers": result.headers()
     }
+    if not result.allowed:
+        info["retry_after"] = max(1, math.ceil(result.retry_after))
+    return info
 
 async def log_api_usage(
     db: Session,
@@ -327,6 +396,51 @@ async def update_api_key(
     db.commit()
     db.refresh(db_key)
     
+    # Cached verifications may carry the old limits or an inactive key
+    await publish_invalidation(key_id, str(settings.REDIS_URL))
+    
+    return db_key
+
+async def rotate_api_key(
+    db: Session,
+    key_id: str,
+    user_id: str = None
+) -> Optional[APIKey]:
+    """
+    Replace the secret of an API key, keeping its ID and settings.
+    
+    Args:
+        db: Database session
+        key_id: The ID of the API key to rotate
+        user_id: Optional user ID to verify ownership
+        
+    Returns:
+        The API key record with the new full key in ``key``, or None if not found
+    """
+    query = db.query(APIKey).filter(APIKey.key_id == key_id)
+    
+    if user_id is not None:
+        query = query.filter(APIKey.user_id == user_id)
+    
+    db_key = query.first()
+    
+    if not db_key:
+        return None
+    
+    _, full_key = generate_api_key()
+    _, secret = full_key.split('.', 1)
+    db_key.hashed_secret = _hash_api_key(secret)
+    db_key.updated_at = datetime.utcnow()
+    
+    db.commit()
+    db.refresh(db_key)
+    
+    # The old secret must stop working on every worker
+    await publish_invalidation(key_id, str(settings.REDIS_URL))
+    
+    # Return the full key to the user (this is the only time they'll see it)
+    db_key.key = f"{key_id}.{secret}"
+    
     return db_key
 
 async def delete_api_key(
@@ -360,6 +474,8 @@ async def delete_api_key(
     db.delete(db_key)
     db.commit()
     
+    await publish_invalidation(key_id, str(settings.REDIS_URL))
+    
     return True
 
 async def get_user_api_keys(
@@ -486,17 +602,12 @@ async def get_current_api_key(
         raise HTTPException(
             status_code=status.HTTP_429_TOO_MANY_REQUESTS,
             detail="Rate limit exceeded",
-            headers={
-                "Retry-After": str(rate_limit["retry_after"]),
-                "X-RateLimit-Limit": str(rate_limit["limit"]),
-                "X-RateLimit-Remaining": str(rate_limit["remaining"]),
-                "X-RateLimit-Reset": str(rate_limit["reset"])
-            }
+            headers=rate_limit["headers"]
         )
     
-    # Update last used timestamp
-    api_key.last_used_at = datetime.utcnow()
-    db.commit()
+    # Update last used timestamp, at most once a minute per key
+    if last_used_due(api_key.key_id):
+        touch_api_key(db, api_key.key_id)
     
     # Add rate limit headers to the response
     request.state.rate_limit = rate_limit
@@ -51,6 +51,16 @@ beat_schedule = {
         'schedule': timedelta(hours=24),  # Run daily
         'options': {'queue': 'export'},
     },
+    'purge-expired-uploads': {
+        'task': 'app.tasks.cleanup.purge_expired_uploads',
+        'schedule': timedelta(hours=1),
+        'options': {'queue': 'export'},
+    },
+    'collect-blob-garbage': {
+        'task': 'app.tasks.cleanup.collect_blob_garbage',
+        'schedule': timedelta(hours=1),
+        'options': {'queue': 'export'},
+    },
 }
 
 # Task error handling
@@ -1,4 +1,5 @@
 import logging
+import threading
 import time
 from contextlib import asynccontextmanager
 from typing import Any, AsyncGenerator, Dict, Optional, Type, TypeVar
@@ -33,6 +34,7 @@ class Database:
         self.async_session_maker: Optional[async_sessionmaker] = None
         self._sync_engine = None
         self._sync_session_maker = None
+        self._sync_lock = threading.Lock()
         self._setup_complete = False
         self._pool_options = {
             'pool_size': 20,
@@ -73,21 +75,7 @@ class Database:
         )
         
         # Create sync engine for migrations and testing
-        sync_db_url = self.db_url.replace('+asyncpg', '').replace('+asyncmy', '').replace('+aiosqlite', '')
-        self._sync_engine = create_engine(
-            sync_db_url,
-            **self._pool_options,
-            echo=settings.DEBUG,
-            future=True,
-        )
-        
-        self._sync_session_maker = sessionmaker(
-            bind=self._sync_engine,
-            autocommit=False,
-            autoflush=False,
-            expire_on_commit=False,
-            class_=Session,
-        )
+        self.sync_session_maker()
         
         # Add event listeners
         self._add_event_listeners()
@@ -95,6 +83,31 @@ class Database:
         self._setup_complete = True
         logger.info("Database connection pool initialized")
     
+    def sync_session_maker(self) -> sessionmaker:
+        """
+        Sync session factory, created on first use.
+        
+        For code that runs on worker threads or in Celery tasks rather than
+        on the event loop; it does not need ``connect()`` to have run.
+        """
+        with self._sync_lock:
+            if self._sync_session_maker is None:
+                sync_db_url = self.db_url.replace('+asyncpg', '').replace('+asyncmy', '').replace('+aiosqlite', '')
+                self._sync_engine = create_engine(
+                    sync_db_url,
+                    **self._pool_options,
+                    echo=settings.DEBUG,
+                    future=True,
+                )
+                self._sync_session_maker = sessionmaker(
+                    bind=self._sync_engine,
+                    autocommit=False,
+                    autoflush=False,
+                    expire_on_commit=False,
+                    class_=Session,
+                )
+            return self._sync_session_maker
+    
     async def disconnect(self):
         """Close all database connections"""
         if self.engine:
@@ -103,6 +116,8 @@ class Database:
         
         if self._sync_engine:
             self._sync_engine.dispose()
+            self._sync_engine = None
+            self._sync_session_maker = None
             logger.info("Synchronous database connection pool closed")
         
         self._setup_complete = False
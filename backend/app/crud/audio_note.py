@@ -8,6 +8,7 @@ from sqlalchemy.orm import Session
 
 from app.models.audio_note import AudioNote
 from app.schemas.audio_note import AudioNoteCreate, AudioNoteUpdate, AudioNoteQueryParams
+from app.services.blob_store import add_reference, get_blob_store, release_path
 
 class CRUDAudioNote:
     """CRUD operations for AudioNote model."""
@@ -91,6 +92,7 @@ class CRUDAudioNote:
         db_obj = AudioNote(
             title=obj_in.title,
             file_path=obj_in.file_path,
+            filename=obj_in.filename,
             file_size=obj_in.file_size,
             duration=obj_in.duration,
             transcription=obj_in.transcription,
@@ -98,6 +100,9 @@ class CRUDAudioNote:
             tags=obj_in.tags or [],
             language=obj_in.language or "en"
         )
+        digest = get_blob_store().digest_of(obj_in.file_path)
+        if digest:
+            add_reference(db, digest, obj_in.file_size or 0)
         db.add(db_obj)
         db.commit()
         db.refresh(db_obj)
@@ -133,6 +138,7 @@ class CRUDAudioNote:
         """Delete an audio note."""
         obj = db.query(AudioNote).filter(AudioNote.id == note_id).first()
         if obj:
+            release_path(db, get_blob_store(), obj.file_path)
             db.delete(obj)
             db.commit()
             return obj
@@ -1,6 +1,9 @@
 from typing import List, Optional, Dict, Any, Tuple, TypeVar, Type, Generic, Union
 from sqlalchemy.orm import Session, joinedload, selectinload
-from sqlalchemy import and_, or_, func, select, update, delete, text
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import and_, or_, func, select, update, delete, text, insert, tuple_
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 from sqlalchemy.exc import SQLAlchemyError, IntegrityError, NoResultFound, MultipleResultsFound
 from datetime import datetime, timedelta
 import uuid
@@ -17,6 +20,8 @@ from ..schemas.flashcard import FlashcardCreate, FlashcardUpdate, FlashcardRevie
 from ..core.security import get_password_hash, verify_password
 
 from ..models.flashcard import Flashcard
+from ..services.spaced_repetition import apply_review_session, simulate_workload
+from ..services.due_queue import decode_cursor, encode_cursor, get_due_queue
 from ..models.user import User
 from ..schemas.flashcard import FlashcardCreate, FlashcardUpdate, FlashcardReview, PaginatedResponse
 from ..core.security import get_password_hash, verify_password
@@ -165,62 +170,109 @@ class CRUDFlashcard:
         
         return results, total
 
-    def get_by_user(
+    async def _due_counts(
+        self,
+        db: AsyncSession,
+        user_id: str,
+        now: datetime,
+        min_interval: int = 0
+    ) -> Tuple[int, int]:
+        """(due, total) card counts, from the Redis due queue when it is enabled."""
+        queue = get_due_queue()
+        if min_interval == 0 and queue.enabled:
+            counts = await queue.counts(user_id, now)
+            if counts is not None:
+                return counts
+            # Cold mirror: one pass over the user's (id, due_date) index entries
+            rows = (await db.execute(
+                select(Flashcard.id, Flashcard.due_date).where(Flashcard.user_id == user_id)
+            )).all()
+            await queue.rebuild(user_id, rows)
+            return sum(1 for row in rows if row.due_date <= now), len(rows)
+        
+        due, total = (await db.execute(
+            select(
+                func.count().filter(Flashcard.due_date <= now),
+                func.count()
+            ).where(Flashcard.user_id == user_id, Flashcard.interval >= min_interval)
+        )).one()
+        return due or 0, total or 0
+
+    def _due_page_query(self, user_id: str, limit: int, cursor: Optional[str]):
+        """Cards in (due_date, id) order, resuming after ``cursor``, served by ix_flashcards_user_due."""
+        query = select(Flashcard).where(Flashcard.user_id == user_id)
+        if cursor:
+            due_date, card_id = decode_cursor(cursor)
+            query = query.where(tuple_(Flashcard.due_date, Flashcard.id) > tuple_(due_date, card_id))
+        return query.order_by(Flashcard.due_date.asc(), Flashcard.id.asc()).limit(limit)
+
+    @staticmethod
+    def _next_cursor(results: List[Flashcard], limit: int) -> Optional[str]:
+        if len(results) < limit:
+            return None
+        return encode_cursor(results[-1].due_date, results[-1].id)
+
+    async def get_by_user(
         self, 
-        db: Session, 
+        db: AsyncSession, 
         user_id: str, 
         *, 
-        skip: int = 0, 
         limit: int = 100,
-        due_only: bool = False
-    ) -> Tuple[List[Flashcard], int]:
-        """Get flashcards for a specific user with pagination.
+        cursor: Optional[str] = None,
+        due_only: bool = False,
+        include_note: bool = False
+    ) -> Tuple[List[Flashcard], int, Optional[str]]:
+        """Get flashcards for a specific user, one keyset page at a time.
         
         Args:
             db: Database session
             user_id: ID of the user to get flashcards for
-            skip: Number of records to skip
             limit: Maximum number of records to return
+            cursor: ``next_cursor`` of the previous page, or None for the first page
             due_only: If True, only return cards that are due for review
+            include_note: If True, eager loads the related note
             
         Returns:
             Tuple containing:
-                - List of flashcards
-                - Total count of user's flashcards
+                - List of flashcards ordered by due date
+                - Total count of user's flashcards (due ones if due_only)
+                - Cursor for the next page, or None on the last page
+                
+        Raises:
+            ValueError: If the cursor is malformed
         """
-        query = select(Flashcard).where(Flashcard.user_id == user_id)
-        count_query = select(func.count()).where(Flashcard.user_id == user_id)
-        
+        now = datetime.utcnow()
+        query = self._due_page_query(user_id, limit, cursor)
         if due_only:
-            now = datetime.utcnow()
             query = query.where(Flashcard.due_date <= now)
-            count_query = count_query.where(Flashcard.due_date <= now)
+        if include_note:
+            query = query.options(selectinload(Flashcard.note))
         
-        total = db.scalar(count_query)
-        results = db.execute(
-            query.order_by(Flashcard.due_date.asc())
-                 .offset(skip)
-                 .limit(limit)
-                 .options(joinedload(Flashcard.note))
-        ).scalars().all()
+        results = (await db.execute(query)).scalars().all()
+        due, total = await self._due_counts(db, user_id, now)
         
-        return results, total
+        return results, due if due_only else total, self._next_cursor(results, limit)
 
-    def get_due_cards(
+    async def get_due_cards(
         self, 
-        db: Session, 
+        db: AsyncSession, 
         *, 
         user_id: str, 
         limit: int = 20,
+        cursor: Optional[str] = None,
         include_early: bool = False,
         min_interval: int = 0
-    ) -> Tuple[List[Flashcard], int]:
+    ) -> Tuple[List[Flashcard], int, Optional[str]]:
         """Get flashcards that are due for review with additional filtering options.
         
+        The page is an index range scan on (user_id, due_date) and the count
+        comes from the due queue, so the cost does not grow with deck size.
+        
         Args:
             db: Database session
             user_id: ID of the user to get due cards for
             limit: Maximum number of cards to return
+            cursor: ``next_cursor`` of the previous page, or None for the first page
             include_early: If True, include cards that are not yet due
             min_interval: Minimum interval (in days) for cards to include
             
@@ -228,41 +280,28 @@ class CRUDFlashcard:
             Tuple containing:
                 - List of due flashcards
                 - Total count of due flashcards
+                - Cursor for the next page, or None on the last page
+                
+        Raises:
+            ValueError: If the cursor is malformed
         """
         now = datetime.utcnow()
-        
-        # Base query
-        query = select(Flashcard).where(
-            Flashcard.user_id == user_id,
-            Flashcard.interval >= min_interval
-        )
+        query = self._due_page_query(user_id, limit, cursor)
+        if min_interval:
+            query = query.where(Flashcard.interval >= min_interval)
         
         # Filter by due date unless including early reviews
         if not include_early:
             query = query.where(Flashcard.due_date <= now)
         
-        # Get total count for pagination
-        count_query = select(func.count()).where(
-            Flashcard.user_id == user_id,
-            Flashcard.interval >= min_interval
-        )
-        if not include_early:
-            count_query = count_query.where(Flashcard.due_date <= now)
-            
-        total = db.scalar(count_query)
-        
-        # Get the actual results
-        results = db.execute(
-            query.order_by(Flashcard.due_date.asc())
-                 .limit(limit)
-                 .options(joinedload(Flashcard.note))
-        ).scalars().all()
+        results = (await db.execute(query)).scalars().all()
+        due, total = await self._due_counts(db, user_id, now, min_interval)
         
-        return results, total
+        return results, total if include_early else due, self._next_cursor(results, limit)
 
-    def create(
+    async def create(
         self, 
-        db: Session, 
+        db: AsyncSession, 
         *, 
         obj_in: FlashcardCreate, 
         user_id: str
@@ -270,7 +309,7 @@ class CRUDFlashcard:
         """Create a new flashcard with validation and error handling.
         
         Args:
-            db: Database session
+            db: Async database session
             obj_in: Flashcard creation data
             user_id: ID of the user creating the flashcard
             
@@ -282,13 +321,13 @@ class CRUDFlashcard:
         """
         try:
             # Check for duplicate flashcard
-            existing = db.execute(
+            existing = (await db.execute(
                 select(Flashcard)
                 .where(
                     Flashcard.user_id == user_id,
                     Flashcard.front_text == obj_in.front_text
                 )
-            ).scalar_one_or_none()
+            )).scalar_one_or_none()
             
             if existing:
                 raise HTTPException(
@@ -304,28 +343,140 @@ class CRUDFlashcard:
             )
             
             db.add(db_obj)
-            db.commit()
-            db.refresh(db_obj)
+            await db.commit()
+            await db.refresh(db_obj)
+            await get_due_queue().update(user_id, [(db_obj.id, db_obj.due_date)])
             return db_obj
             
         except IntegrityError as e:
-            db.rollback()
+            await db.rollback()
             logger.error(f"Database integrity error creating flashcard: {str(e)}")
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail="Failed to create flashcard due to a database constraint violation"
             )
         except Exception as e:
-            db.rollback()
+            await db.rollback()
             logger.error(f"Unexpected error creating flashcard: {str(e)}")
             raise HTTPException(
                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
                 detail="An unexpected error occurred while creating the flashcard"
             )
 
-    def update(
+    async def create_batch(
+        self,
+        db: AsyncSession,
+        *,
+        objs_in: List[FlashcardCreate],
+        user_id: str,
+        default_tags: Optional[List[str]] = None
+    ) -> Dict[str, Any]:
+        """Create many flashcards with one lookup, one INSERT and one commit.
+        
+        Duplicates are skipped instead of failing the batch: repeated front
+        texts within the batch, front texts the user already has, and rows
+        that lose a race against a concurrent insert (ON CONFLICT DO NOTHING
+        on ``ix_flashcards_user_front``).
+        
+        Args:
+            db: Async database session
+            objs_in: Flashcards to create, in request order
+            user_id: ID of the user creating the flashcards
+            default_tags: Tags added to every flashcard
+            
+        Returns:
+            Dict with ``created`` and ``skipped`` counts and one ``items`` entry
+            per input with its index, front_text, status, reason and flashcard
+            
+        Raises:
+            HTTPException: If the database rejects the batch
+        """
+        items = []
+        rows = {}
+        now = datetime.utcnow()
+        for index, obj_in in enumerate(objs_in):
+            front_text = obj_in.front_text.strip()
+            item = {"index": index, "front_text": obj_in.front_text, "status": "skipped",
+                    "reason": None, "flashcard": None}
+            items.append(item)
+            if front_text in rows:
+                item["reason"] = "duplicate_in_batch"
+                continue
+            data = obj_in.dict(exclude_unset=True)
+            rows[front_text] = {
+                **data,
+                "id": str(uuid.uuid4()),
+                "user_id": user_id,
+                "front_text": front_text,
+                "back_text": obj_in.back_text.strip(),
+                "ease_factor": obj_in.ease_factor,
+                "interval": obj_in.interval,
+                "review_count": 0,
+                "tags": list(dict.fromkeys(obj_in.tags + (default_tags or []))),
+                "due_date": now,  # Set initial due date to now
+                "created_at": now,
+                "updated_at": now,
+            }
+        
+        try:
+            if rows:
+                existing = set((await db.execute(
+                    select(Flashcard.front_text).where(
+                        Flashcard.user_id == user_id,
+                        Flashcard.front_text.in_(list(rows))
+                    )
+                )).scalars())
+                for front_text in existing:
+                    rows.pop(front_text)
+            
+            created = {}
+            if rows:
+                dialect = db.get_bind().dialect.name
+                if dialect == "postgresql":
+                    stmt = pg_insert(Flashcard).on_conflict_do_nothing(index_elements=["user_id", "front_text"])
+                elif dialect == "sqlite":
+                    stmt = sqlite_insert(Flashcard).on_conflict_do_nothing(index_elements=["user_id", "front_text"])
+                else:
+                    stmt = insert(Flashcard)
+                result = await db.execute(stmt.values(list(rows.values())).returning(Flashcard))
+                created = {flashcard.front_text: flashcard for flashcard in result.scalars()}
+            await db.commit()
+            await get_due_queue().update(user_id, [(f.id, f.due_date) for f in created.values()])
+            
+        except IntegrityError as e:
+            await db.rollback()
+            logger.error(f"Database integrity error creating flashcard batch: {str(e)}")
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Failed to create flashcards due to a database constraint violation"
+            )
+        except SQLAlchemyError as e:
+            await db.rollback()
+            logger.error(f"Database error creating flashcard batch: {str(e)}")
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail="An unexpected error occurred while creating the flashcards"
+            )
+        
+        for item in items:
+            if item["reason"]:
+                continue
+            flashcard = created.get(item["front_text"].strip())
+            if flashcard is None:
+                item["reason"] = "already_exists"
+            else:
+                item["status"] = "created"
+                item["flashcard"] = flashcard
+        
+        return {
+            "created": len(created),
+            "skipped": len(items) - len(created),
+            "items": items,
+        }
+
+    async def update(
         self, 
-        db: Session, 
+        db: AsyncSession, 
         *, 
         db_obj: Flashcard, 
         obj_in: FlashcardUpdate,
@@ -334,7 +485,7 @@ class CRUDFlashcard:
         """Update a flashcard with validation and error handling.
         
         Args:
-            db: Database session
+            db: Async database session
             db_obj: The flashcard to update
             obj_in: Update data
             user_id: Optional user ID for ownership verification
@@ -354,14 +505,14 @@ class CRUDFlashcard:
             
             # Check for duplicate front text if it's being updated
             if 'front_text' in update_data:
-                existing = db.execute(
+                existing = (await db.execute(
                     select(Flashcard)
                     .where(
                         Flashcard.user_id == db_obj.user_id,
                         Flashcard.front_text == update_data['front_text'],
                         Flashcard.id != db_obj.id
                     )
-                ).scalar_one_or_none()
+                )).scalar_one_or_none()
                 
                 if existing:
                     raise HTTPException(
@@ -374,34 +525,127 @@ class CRUDFlashcard:
                 setattr(db_obj, field, value)
                 
             db.add(db_obj)
-            db.commit()
-            db.refresh(db_obj)
+            await db.commit()
+            await db.refresh(db_obj)
+            await get_due_queue().update(db_obj.user_id, [(db_obj.id, db_obj.due_date)])
             return db_obj
             
         except SQLAlchemyError as e:
-            db.rollback()
+            await db.rollback()
             logger.error(f"Database error updating flashcard: {str(e)}")
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail="Failed to update flashcard due to a database error"
             )
 
-    def record_review(
-        self, db: Session, db_obj: Flashcard, review: FlashcardReview
+    async def record_review(
+        self, db: AsyncSession, db_obj: Flashcard, review: FlashcardReview
     ) -> Flashcard:
         """Record a flashcard review and update spaced repetition parameters."""
         # Update flashcard with review data
         db_obj.update_spaced_repetition(quality=review.quality)
         db.add(db_obj)
-        db.commit()
-        db.refresh(db_obj)
+        await db.commit()
+        await db.refresh(db_obj)
+        await get_due_queue().update(db_obj.user_id, [(db_obj.id, db_obj.due_date)])
         return db_obj
 
-    def remove(self, db: Session, *, id: str, user_id: Optional[str] = None) -> bool:
+    async def review_session(
+        self,
+        db: AsyncSession,
+        *,
+        user_id: str,
+        reviews: List[Dict[str, Any]]
+    ) -> Dict[str, Any]:
+        """Apply a whole session of reviews with one SELECT, one UPDATE and one commit.
+        
+        Args:
+            db: Async database session
+            user_id: ID of the reviewing user; other users' cards are not touched
+            reviews: Dicts with card_id, quality and reviewed_at (None for now)
+            
+        Returns:
+            Dict with the ``updated`` count, ``not_found`` card IDs and the new
+            schedule of every reviewed card under ``cards``
+            
+        Raises:
+            HTTPException: If the update fails
+        """
+        now = datetime.utcnow()
+        reviews = [{**review, "reviewed_at": review.get("reviewed_at") or now} for review in reviews]
+        card_ids = list(dict.fromkeys(review["card_id"] for review in reviews))
+        
+        try:
+            rows = (await db.execute(
+                select(Flashcard.id, Flashcard.ease_factor, Flashcard.interval, Flashcard.review_count)
+                .where(Flashcard.user_id == user_id, Flashcard.id.in_(card_ids))
+            )).all()
+            cards = {
+                row.id: {"ease_factor": row.ease_factor, "interval": row.interval, "review_count": row.review_count}
+                for row in rows
+            }
+            schedules = apply_review_session(cards, reviews)
+            
+            if schedules:
+                # Bulk UPDATE by primary key: one executemany statement
+                await db.execute(
+                    update(Flashcard),
+                    [{"id": card_id, **schedule, "updated_at": now} for card_id, schedule in schedules.items()]
+                )
+            await db.commit()
+            await get_due_queue().update(
+                user_id, [(card_id, schedule["due_date"]) for card_id, schedule in schedules.items()]
+            )
+            
+        except SQLAlchemyError as e:
+            await db.rollback()
+            logger.error(f"Database error recording review session: {str(e)}")
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail="Failed to record reviews due to a database error"
+            )
+        
+        return {
+            "updated": len(schedules),
+            "not_found": [card_id for card_id in card_ids if card_id not in cards],
+            "cards": [{"id": card_id, **schedule} for card_id, schedule in schedules.items()],
+        }
+
+    async def forecast(
+        self,
+        db: AsyncSession,
+        *,
+        user_id: str,
+        days: int = 30,
+        retention: float = 0.9
+    ) -> Dict[str, Any]:
+        """Project the user's daily review workload over the next ``days`` days.
+        
+        Args:
+            db: Async database session
+            user_id: ID of the user whose deck is simulated
+            days: Number of days to project
+            retention: Assumed probability of passing a review
+            
+        Returns:
+            Dict with total_cards, retention and one {date, due} entry per day
+        """
+        rows = (await db.execute(
+            select(Flashcard.ease_factor, Flashcard.interval, Flashcard.review_count, Flashcard.due_date)
+            .where(Flashcard.user_id == user_id)
+        )).all()
+        columns = list(zip(*rows)) if rows else [[], [], [], []]
+        return {
+            "total_cards": len(rows),
+            "retention": retention,
+            "days": simulate_workload(*columns, days=days, retention=retention),
+        }
+
+    async def remove(self, db: AsyncSession, *, id: str, user_id: Optional[str] = None) -> bool:
         """Delete a flashcard with ownership check.
         
         Args:
-            db: Database session
+            db: Async database session
             id: ID of the flashcard to delete
             user_id: Optional user ID for ownership verification
             
@@ -416,19 +660,21 @@ class CRUDFlashcard:
             if user_id:
                 stmt = stmt.where(Flashcard.user_id == user_id)
                 
-            result = db.execute(stmt)
-            db.commit()
+            result = await db.execute(stmt.returning(Flashcard.user_id))
+            owners = result.scalars().all()
+            await db.commit()
             
-            if result.rowcount == 0:
+            if not owners:
                 if user_id:
                     # If we got here with a user_id, it means the flashcard exists but belongs to another user
                     raise ForbiddenError("You don't have permission to delete this flashcard")
                 return False
-                
+            
+            await get_due_queue().remove(owners[0], [id])
             return True
             
         except SQLAlchemyError as e:
-            db.rollback()
+            await db.rollback()
             logger.error(f"Database error deleting flashcard: {str(e)}")
             raise HTTPException(
                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -1,6 +1,7 @@
 from sqlalchemy.orm import Session
 from typing import List, Optional
 from .. import models, schemas
+from ..services.blob_store import add_reference, get_blob_store, release_path
 from datetime import datetime
 
 def get_note(db: Session, note_id: int) -> Optional[models.Note]:
@@ -72,6 +73,9 @@ def create_attachment(
 ) -> models.Attachment:
     """Create a new attachment"""
     db_attachment = models.Attachment(**attachment.dict())
+    digest = get_blob_store().digest_of(db_attachment.file_path)
+    if digest:
+        add_reference(db, digest, db_attachment.file_size or 0)
     db.add(db_attachment)
     db.commit()
     db.refresh(db_attachment)
@@ -95,7 +99,8 @@ def delete_attachment(db: Session, attachment_id: int) -> bool:
     if not db_attachment:
         return False
     
-    # TODO: Delete file from storage
+    # The file goes once no other row refers to the same content
+    release_path(db, get_blob_store(), db_attachment.file_path)
     
     db.delete(db_attachment)
     db.commit()
@@ -3,6 +3,7 @@ from typing import Optional, Dict, Any
 from datetime import datetime
 
 from ..models.task import Task, TaskStatus, TaskType
+from ..services.blob_store import release_reference
 
 def create_task(
     db: Session,
@@ -88,6 +89,12 @@ def delete_task(db: Session, task_id: str, user_id: Optional[str] = None) -> boo
     if user_id:
         query = query.filter(Task.user_id == user_id)
     
+    # Completed video tasks hold a reference to their video's blob
+    for task in query.filter(Task.status == TaskStatus.COMPLETED):
+        digest = ((task.result_data or {}).get("result") or {}).get("sha256")
+        if digest:
+            release_reference(db, digest)
+    
     deleted = query.delete(synchronize_session=False)
     db.commit()
     return deleted > 0
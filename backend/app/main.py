@@ -40,10 +40,12 @@ from datetime import datetime, timedelta
 import httpx
 import uuid
 import json
+import shutil
+import tempfile
 from dotenv import load_dotenv
 
 # Import WebSocket manager
-from app.websocket import manager as ws_manager
+from app.websocket import manager as ws_manager, transcription_stream_endpoint
 from sqlalchemy.exc import SQLAlchemyError, IntegrityError
 from starlette.middleware.base import BaseHTTPMiddleware
 from pydantic import BaseModel
@@ -56,6 +58,8 @@ from app.core.redis import get_redis, init_redis_pool
 from app.core.api_key_auth import APIKeyAuthMiddleware
 from app.core.rate_limiter import RateLimiter
 from app.core.config import settings
+from app.core.api_key_utils import authenticate_api_key, last_used_due, touch_api_key
+from app.core.api_key_cache import listen_for_invalidations
 from .core.exceptions import (
     AppException,
     NotFoundException,
@@ -88,6 +92,8 @@ from datetime import datetime, timedelta
 import httpx
 from dotenv import load_dotenv
 from pathlib import Path
+import shutil
+import tempfile
 >>>>>>> fc8ed2a6ee76667dd0759a129f0149acc56be76e
 
 # Load environment variables
@@ -108,9 +114,15 @@ def get_api_key(request: Request):
 =======
 >>>>>>> fc8ed2a6ee76667dd0759a129f0149acc56be76e
 from .services.transcription.service import TranscriptionService
+from .services.transcription.pipeline import TranscriptionPipeline
+from .services.task_queue import setup_task_queue, shutdown_task_queue
 from .services.pdf.service import PDFService
 from .services.fusion.service import FusionService
 from .services.model_update_service import ModelUpdateService
+from .services.model_registry import model_registry
+from .services.llm_cache import get_llm_cache
+from .services.semantic_index import index_document, note_segments, transcript_segments
+from .services.video.progress import relay_video_progress
 from .models.user import User
 from .models.ai_models import DBAIModel, UserAIModelSettings, AIProvider, AIModelStatus
 from .models.database import SessionLocal, Base, get_db
@@ -187,36 +199,22 @@ class APIKeyAuthMiddleware(BaseHTTPMiddleware):
             )
             
         # Validate API key
-        db = SessionLocal()
         try:
-            # Split the key into ID and secret
-            try:
-                key_id, key_secret = api_key.split('.', 1)
-            except ValueError:
+            if '.' not in api_key:
                 raise HTTPException(
                     status_code=status.HTTP_401_UNAUTHORIZED,
                     detail="Invalid API key format"
                 )
                 
-            # Get the API key from the database
-            api_key_obj = db.query(APIKey).filter(
-                APIKey.key_id == key_id,
-                APIKey.is_active == True
-            ).first()
+            # Verified keys come from the cache; a session is opened only on a miss
+            api_key_obj = await authenticate_api_key(api_key, SessionLocal)
             
-            if not api_key_obj or not api_key_obj.verify_key(key_secret):
+            if not api_key_obj:
                 raise HTTPException(
                     status_code=status.HTTP_401_UNAUTHORIZED,
                     detail="Invalid API key"
                 )
                 
-            # Check if the key has expired
-            if api_key_obj.is_expired():
-                raise HTTPException(
-                    status_code=status.HTTP_401_UNAUTHORIZED,
-                    detail="API key has expired"
-                )
-                
             # Check rate limiting
             redis = await get_redis()
             rate_limiter = RateLimiter(redis)
@@ -234,9 +232,12 @@ class APIKeyAuthMiddleware(BaseHTTPMiddleware):
                 )
                 
             # Update last used timestamp
-            api_key_obj.last_used_at = datetime.utcnow()
-            db.add(api_key_obj)
-            db.commit()
+            if last_used_due(api_key_obj.key_id):
+                db = SessionLocal()
+                try:
+                    touch_api_key(db, api_key_obj.key_id)
+                finally:
+                    db.close()
             
             # Attach the API key to the request state
             request.state.api_key = api_key_obj
@@ -260,8 +261,6 @@ class APIKeyAuthMiddleware(BaseHTTPMiddleware):
                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
                 detail="Internal server error"
             )
-        finally:
-            db.close()
 
 # Create the FastAPI application with custom docs settings
 app = FastAPI(
@@ -511,6 +510,34 @@ async def check_for_updates(
     updated = await service.check_for_updates(force=True)
     return {"status": "success" if updated else "no_updates"}
 
+@app.get(
+    f"{settings.API_V1_STR}/admin/models/resident",
+    summary="List ML models resident in this process"
+)
+async def list_resident_models(current_user: User = Depends(get_current_user)):
+    """Show which Whisper/pyannote models this worker has loaded."""
+    if not current_user.is_superuser:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Only administrators can inspect loaded models"
+        )
+    
+    return {"pid": os.getpid(), "models": model_registry.resident()}
+
+@app.get(
+    f"{settings.API_V1_STR}/admin/llm-cache/stats",
+    summary="LLM response cache hit rates per feature"
+)
+async def llm_cache_stats(current_user: User = Depends(get_current_user)):
+    """Show hits, misses and coalesced requests of the shared LLM cache in this worker."""
+    if not current_user.is_superuser:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Only administrators can inspect the LLM cache"
+        )
+    
+    return {"pid": os.getpid(), "callers": get_llm_cache().stats()}
+
 @app.get(
     f"{settings.API_V1_STR}/ai/settings",
     response_model=UserAIModelSettingsSchema,
@@ -736,11 +763,63 @@ async def startup_event():
     asyncio.create_task(start_model_update_task())
     logger.info("Background tasks started")
 
+# Models loaded here, at import, are shared copy-on-write by the workers of a
+# pre-forking server (gunicorn --preload); everything else loads on first use
+if settings.PRELOAD_MODELS:
+    model_registry.preload(spec for spec in settings.PRELOAD_MODELS.split(",") if spec.strip())
+    model_registry.prepare_for_fork()
+
 # Initialize services
 transcription_service = TranscriptionService()
 pdf_service = PDFService()
 fusion_service = FusionService(os.getenv("OPENAI_API_KEY"))
 
+async def publish_transcription_update(user_id: Optional[str], message: dict):
+    """Push staged transcription results to the user's WebSocket connections"""
+    if user_id:
+        await ws_manager.broadcast_to_user(message, user_id)
+
+transcription_pipeline = TranscriptionPipeline(
+    transcription_service,
+    publisher=publish_transcription_update,
+)
+
+@app.on_event("startup")
+async def start_transcription_pipeline():
+    """Run transcription stages on the Redis task queue"""
+    try:
+        await setup_task_queue(settings.REDIS_URL, configure=transcription_pipeline.attach)
+    except Exception as e:
+        logger.warning(f"Task queue unavailable, staged transcription disabled: {e}")
+
+@app.on_event("shutdown")
+async def stop_transcription_pipeline():
+    await shutdown_task_queue()
+
+@app.on_event("startup")
+async def start_video_progress_relay():
+    """Forward video job progress published by the workers to WebSocket clients"""
+    app.state.video_progress_relay = asyncio.create_task(
+        relay_video_progress(settings.REDIS_URL, ws_manager.broadcast_to_user)
+    )
+
+@app.on_event("shutdown")
+async def stop_video_progress_relay():
+    relay = getattr(app.state, "video_progress_relay", None)
+    if relay:
+        relay.cancel()
+
+@app.on_event("startup")
+async def start_api_key_invalidation_listener():
+    """Drop cached API keys revoked or rotated on other workers"""
+    app.state.api_key_invalidations = asyncio.create_task(listen_for_invalidations(settings.REDIS_URL))
+
+@app.on_event("shutdown")
+async def stop_api_key_invalidation_listener():
+    listener = getattr(app.state, "api_key_invalidations", None)
+    if listener:
+        listener.cancel()
+
 <<<<<<< HEAD
 # Add API key authentication to protected endpoints
 protected_endpoints = [
@@ -788,12 +867,57 @@ async def upload_audio(
         
         result = await transcription_service.transcribe_audio(temp_path, diarize)
         os.remove(temp_path)
+        if result.get("segments"):
+            result["transcript_id"] = str(uuid.uuid4())
+            await index_document(
+                result["transcript_id"], "transcript",
+                transcript_segments(result["transcript_id"], result["segments"])
+            )
         return result
     except Exception as e:
         if os.path.exists(temp_path):
             os.remove(temp_path)
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.post("/api/transcriptions", status_code=status.HTTP_202_ACCEPTED)
+async def create_transcription_job(
+    file: UploadFile = File(...),
+    diarize: bool = False,
+    generate_diagrams: bool = True,
+    language: Optional[str] = None,
+    user = Depends(verify_firebase_token)
+):
+    """Queue a staged transcription; stage results arrive on /ws/notifications"""
+    if not transcription_pipeline.available:
+        raise HTTPException(status_code=503, detail="Transcription queue unavailable")
+
+    suffix = Path(file.filename or "").suffix
+    with tempfile.NamedTemporaryFile(suffix=suffix, delete=False) as buffer:
+        shutil.copyfileobj(file.file, buffer)
+        temp_path = buffer.name
+
+    try:
+        job_id = await transcription_pipeline.submit(
+            temp_path,
+            diarize=diarize,
+            generate_diagrams=generate_diagrams,
+            language=language,
+            user_id=user.get("sub"),
+            cleanup=True,
+        )
+    except Exception as e:
+        os.remove(temp_path)
+        raise HTTPException(status_code=500, detail=str(e))
+    return {"job_id": job_id, "status": "pending"}
+
+@app.get("/api/transcriptions/{job_id}")
+async def get_transcription_job(job_id: str, user = Depends(verify_firebase_token)):
+    """Get a staged transcription job with the results of every finished stage"""
+    job = await transcription_pipeline.get_job(job_id)
+    if not job or job["user_id"] != user.get("sub"):
+        raise HTTPException(status_code=404, detail="Transcription job not found")
+    return job
+
 @app.post("/api/upload/pdf")
 async def upload_pdf(
     request: Request,
@@ -832,6 +956,8 @@ async def generate_notes(
             table_of_contents=request.table_of_contents,
             lecture_timestamps=request.lecture_timestamps
         )
+        if result.get("fusion_id"):
+            await index_document(result["fusion_id"], "section", note_segments(result["fusion_id"], result))
         return result
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -850,6 +976,25 @@ async def websocket_audio(websocket: WebSocket):
     except Exception as e:
         await websocket.close(code=1000, reason=str(e))
 
+@app.websocket("/ws/transcribe")
+async def websocket_transcribe(websocket: WebSocket, token: str = Query(...)):
+    """Stream live lecture audio and receive partial and final transcripts"""
+    try:
+        payload = jwt.decode(token, os.getenv("SECRET_KEY"), algorithms=["HS256"])
+        user_id = payload.get("sub")
+    except JWTError:
+        user_id = None
+    if not user_id:
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+        return
+    
+    await transcription_stream_endpoint(
+        websocket,
+        client_id=str(uuid.uuid4()),
+        user_id=user_id,
+        transcribe=transcription_service.transcribe_samples,
+    )
+
 @app.post("/api/export/pdf")
 async def export_pdf(
     content: dict,
@@ -1,32 +1,23 @@
 """Content moderation middleware for AI-generated content."""
-from typing import Dict, List, Pattern, Optional, Tuple
-import re
+import codecs
+from typing import Optional, Tuple
 from fastapi import Request, HTTPException, status
-from pydantic import BaseModel
+from fastapi.responses import JSONResponse, Response, StreamingResponse
 import logging
 
+from app.services.moderation import ModerationAutomaton, get_moderation_automaton
+
 logger = logging.getLogger(__name__)
 
+# Response types whose bodies are moderated
+MODERATED_CONTENT_TYPES = ("application/json", "text/")
+
 class ContentModeration:
     """Moderate AI-generated and user-submitted content."""
     
-    def __init__(self):
-        # Define patterns for different types of content to moderate
-        self.banned_patterns: Dict[str, List[Pattern]] = {
-            'hate_speech': [
-                re.compile(r'\b(kill|hurt|harm|attack|assault|murder|rape|torture|abuse)(?:\s+\w+){0,3}\s+(you|them|us|him|her|me)\b', re.IGNORECASE),
-                re.compile(r'\b(nazi|hitler|kkk|white\s+supremac|racist|sexist|homophob|transphob|islamophob)\b', re.IGNORECASE),
-            ],
-            'violence': [
-                re.compile(r'\b(kill|murder|assassinat|behead|tortur|maim|mutilat|dismember|strangl|suffocat|stab|shoot|bomb|explod|arson|burn\s+alive|lynch|execute|massacre|genocide)\b', re.IGNORECASE),
-            ],
-            'self_harm': [
-                re.compile(r'\b(suicid|kill\s+myself|end\s+it\s+all|want\s+to\s+die|cutting\s+myself|self\s*[-]?harm|self\s*[-]?injury)\b', re.IGNORECASE),
-            ],
-            'harassment': [
-                re.compile(r'\b(rape|raping|rapist|pedophil|child\s*abuse|incest|molest|molestation|pedo)\b', re.IGNORECASE),
-            ]
-        }
+    def __init__(self, automaton: Optional[ModerationAutomaton] = None):
+        # All banned terms compiled into one automaton; see app.services.moderation
+        self.automaton = automaton or get_moderation_automaton()
     
     async def __call__(self, request: Request, call_next):
         # Skip moderation for non-POST/PUT requests or non-AI endpoints
@@ -46,19 +37,8 @@ class ContentModeration:
             response = await call_next(request)
             
             # Check response for inappropriate content if it's from an AI endpoint
-            if response.status_code < 300 and response.headers.get("content-type", "").startswith("application/json"):
-                response_body = b"".join([chunk async for chunk in response.body_iterator])
-                response_body_str = response_body.decode('utf-8', errors='ignore')
-                violation = self._check_content(response_body_str)
-                if violation:
-                    return self._create_violation_response(violation)
-                
-                # Reconstruct the response
-                response = JSONResponse(
-                    content=response_body,
-                    status_code=response.status_code,
-                    headers=dict(response.headers)
-                )
+            if response.status_code < 300 and response.headers.get("content-type", "").startswith(MODERATED_CONTENT_TYPES):
+                return await self._moderate_response(response)
             
             return response
             
@@ -71,12 +51,80 @@ class ContentModeration:
                 content={"detail": "Internal server error during content moderation"}
             )
     
+    async def _moderate_response(self, response) -> Response:
+        """Scan the response body while it streams.
+        
+        Each chunk is held back until the next one has been scanned, so a
+        word split across chunks is checked before either half is sent. A
+        violation before the first chunk goes out (always the case for a
+        single-chunk body such as a JSON reply) becomes the usual 400; after
+        that the status line is already sent and the stream is cut off
+        instead, dropping the offending chunk and the one held back before it.
+        """
+        scanner = self.automaton.scanner()
+        decode = codecs.getincrementaldecoder("utf-8")(errors="ignore").decode
+        chunks = response.body_iterator.__aiter__()
+        
+        async def next_chunk():
+            """(chunk, violation); chunk is None once the body is exhausted."""
+            try:
+                chunk = await chunks.__anext__()
+            except StopAsyncIteration:
+                return None, scanner.feed(decode(b"", final=True)) or scanner.finish()
+            return chunk, scanner.feed(chunk if isinstance(chunk, str) else decode(chunk))
+        
+        first, violation = await next_chunk()
+        following = None
+        if first is not None and not violation:
+            following, violation = await next_chunk()
+        if violation:
+            await self._close(chunks)
+            return self._create_violation_response((violation.category, violation.rule))
+        if following is None:
+            return Response(
+                content=first or b"",
+                status_code=response.status_code,
+                headers=dict(response.headers),
+                background=response.background
+            )
+        
+        async def stream():
+            held, upcoming = first, following
+            try:
+                while upcoming is not None:
+                    yield held
+                    held = upcoming
+                    upcoming, violation = await next_chunk()
+                    if violation:
+                        logger.warning(
+                            f"Content moderation violation - {violation.category}: {violation.rule} "
+                            f"(response stream cut off)"
+                        )
+                        return
+                yield held
+            finally:
+                await self._close(chunks)
+        
+        # The body may end early, so its length is no longer known up front
+        headers = {k: v for k, v in response.headers.items() if k.lower() != "content-length"}
+        return StreamingResponse(
+            stream(),
+            status_code=response.status_code,
+            headers=headers,
+            background=response.background
+        )
+    
+    @staticmethod
+    async def _close(chunks) -> None:
+        aclose = getattr(chunks, "aclose", None)
+        if aclose is not None:
+            await aclose()
+    
     def _check_content(self, text: str) -> Optional[Tuple[str, str]]:
         """Check content for policy violations."""
-        for category, patterns in self.banned_patterns.items():
-            for pattern in patterns:
-                if pattern.search(text):
-                    return (category, pattern.pattern)
+        violation = self.automaton.check(text)
+        if violation:
+            return (violation.category, violation.rule)
         return None
     
     def _create_violation_response(self, violation: Tuple[str, str]) -> JSONResponse:
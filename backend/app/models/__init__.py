@@ -8,6 +8,7 @@ from .database import Base
 from .user import User
 from .ai_models import DBAIModel, UserAIModelSettings, AIProvider, AIModelStatus
 from .task import Task, TaskStatus, TaskType
+from .blob import Blob
 <<<<<<< HEAD
 from .user_task import UserTask, TaskStatus as UserTaskStatus, TaskPriority
 =======
@@ -45,6 +46,7 @@ __all__ = [
     'Task',
     'TaskStatus',
     'TaskType',
+    'Blob',
     'Subscription',
     'Invoice',
     'SubscriptionTier',
@@ -15,6 +15,7 @@ class AudioNote(Base):
     id = Column(Integer, primary_key=True, index=True)
     title = Column(String, nullable=False)
     file_path = Column(String, nullable=False)
+    filename = Column(String, nullable=True)  # Name the file was uploaded as
     file_size = Column(Integer)  # Size in bytes
     duration = Column(Float)  # Duration in seconds
     transcription = Column(String, nullable=True)
@@ -40,6 +41,7 @@ class AudioNote(Base):
             "id": self.id,
             "title": self.title,
             "file_path": self.file_path,
+            "filename": self.filename,
             "file_size": self.file_size,
             "duration": self.duration,
             "transcription": self.transcription,
@@ -0,0 +1,45 @@
+from datetime import datetime
+from sqlalchemy import Column, String, BigInteger, Integer, DateTime, Index
+
+from .database import Base
+
+
+class Blob(Base):
+    """A content-addressed file in the blob store and how many rows use it."""
+    __tablename__ = "blobs"
+    __table_args__ = (
+        Index('idx_blobs_unreferenced_at', 'unreferenced_at'),
+        {'comment': 'Reference counts for content-addressed blobs'}
+    )
+
+    sha256: str = Column(
+        String(64),
+        primary_key=True,
+        comment='SHA-256 of the content, hex encoded'
+    )
+    size: int = Column(
+        BigInteger,
+        nullable=False,
+        default=0,
+        comment='Size in bytes'
+    )
+    ref_count: int = Column(
+        Integer,
+        nullable=False,
+        default=0,
+        comment='Rows referring to this blob'
+    )
+    created_at: datetime = Column(
+        DateTime,
+        nullable=False,
+        default=datetime.utcnow,
+        comment='When the blob was first stored'
+    )
+    unreferenced_at: datetime = Column(
+        DateTime,
+        nullable=True,
+        comment='When the reference count last reached zero; NULL while referenced'
+    )
+
+    def __repr__(self) -> str:
+        return f"<Blob(sha256='{self.sha256}', refs={self.ref_count})>"
@@ -37,6 +37,8 @@ class Flashcard(Base):
     __table_args__ = (
         Index('ix_flashcards_due_date', 'due_date'),
         Index('ix_flashcards_user_front', 'user_id', 'front_text', unique=True),
+        # Due queue: per-user range scans in (due_date, id) keyset order
+        Index('ix_flashcards_user_due', 'user_id', 'due_date', 'id'),
         CheckConstraint('LENGTH(front_text) <= 2000', name='ck_flashcards_front_text_length'),
         CheckConstraint('LENGTH(back_text) <= 10000', name='ck_flashcards_back_text_length'),
         CheckConstraint('ease_factor BETWEEN 130 AND 250', name='ck_flashcards_ease_factor_range'),
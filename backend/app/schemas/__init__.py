@@ -32,6 +32,15 @@ from .flashcard import (
     FlashcardResponse,
     FlashcardStats,
     FlashcardBatch,
+    FlashcardBatchItem,
+    FlashcardBatchResult,
+    FlashcardSessionReview,
+    FlashcardReviewSession,
+    FlashcardSchedule,
+    FlashcardReviewSessionResult,
+    FlashcardForecastDay,
+    FlashcardForecast,
+    FlashcardPage,
 )
 
 =======
@@ -83,6 +92,15 @@ __all__ = [
     'FlashcardResponse',
     'FlashcardStats',
     'FlashcardBatch',
+    'FlashcardBatchItem',
+    'FlashcardBatchResult',
+    'FlashcardSessionReview',
+    'FlashcardReviewSession',
+    'FlashcardSchedule',
+    'FlashcardReviewSessionResult',
+    'FlashcardForecastDay',
+    'FlashcardForecast',
+    'FlashcardPage',
     
 =======
 >>>>>>> fc8ed2a6ee76667dd0759a129f0149acc56be76e
@@ -9,6 +9,7 @@ class AudioNoteBase(BaseModel):
     """Base model for audio notes."""
     title: str = Field(..., description="Title of the audio note")
     file_path: str = Field(..., description="Path to the audio file")
+    filename: Optional[str] = Field(None, description="Original name of the uploaded file")
     file_size: Optional[int] = Field(None, description="Size of the audio file in bytes")
     duration: Optional[float] = Field(None, description="Duration of the audio in seconds")
     transcription: Optional[str] = Field(None, description="Transcription of the audio")
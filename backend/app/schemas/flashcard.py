@@ -1,4 +1,4 @@
-from datetime import datetime, timedelta
+from datetime import date, datetime, timedelta
 from typing import List, Optional, Dict, Any, ClassVar
 from pydantic import BaseModel, Field, validator, root_validator, conint, confloat
 import re
@@ -282,3 +282,108 @@ class FlashcardBatch(BaseSchema):
                 ]
             }
         }
+
+class FlashcardBatchItem(BaseSchema):
+    """Outcome of one flashcard in a batch create.
+    
+    Attributes:
+        index: Position of the flashcard in the request
+        front_text: Front text as submitted
+        status: "created" or "skipped"
+        reason: Why the flashcard was skipped ("duplicate_in_batch" or "already_exists")
+        flashcard: The created flashcard
+    """
+    index: int = Field(..., ge=0, description="Position of the flashcard in the request")
+    front_text: str = Field(..., description="Front text as submitted")
+    status: str = Field(..., description='"created" or "skipped"')
+    reason: Optional[str] = Field(None, description="Why the flashcard was skipped")
+    flashcard: Optional[FlashcardResponse] = Field(None, description="The created flashcard")
+
+class FlashcardBatchResult(BaseSchema):
+    """Per-item results of a batch create.
+    
+    Attributes:
+        created: Number of flashcards inserted
+        skipped: Number of duplicates left out
+        items: One entry per submitted flashcard, in request order
+    """
+    created: int = Field(..., ge=0, description="Number of flashcards inserted")
+    skipped: int = Field(..., ge=0, description="Number of duplicates left out")
+    items: List[FlashcardBatchItem] = Field(..., description="Results in request order")
+
+class FlashcardSessionReview(BaseSchema):
+    """One review result from a study session.
+    
+    Attributes:
+        card_id: ID of the reviewed flashcard
+        quality: Rating of how well the card was known (0-5)
+        reviewed_at: When the card was reviewed (defaults to now)
+    """
+    card_id: str = Field(..., description="ID of the reviewed flashcard")
+    quality: int = Field(..., ge=0, le=5, description="Rating of how well the card was known (0-5)")
+    reviewed_at: Optional[datetime] = Field(None, description="When the card was reviewed (defaults to now)")
+
+class FlashcardReviewSession(BaseSchema):
+    """Schema for syncing a whole review session at once.
+    
+    Attributes:
+        reviews: Review results, in any order; a card may appear more than once
+    """
+    MAX_SESSION_SIZE: ClassVar[int] = 2000
+    
+    reviews: List[FlashcardSessionReview] = Field(
+        ...,
+        min_items=1,
+        max_items=MAX_SESSION_SIZE,
+        description=f"Up to {MAX_SESSION_SIZE} review results"
+    )
+
+class FlashcardSchedule(BaseSchema):
+    """New spaced repetition state of a reviewed flashcard."""
+    id: str
+    ease_factor: int
+    interval: int
+    review_count: int
+    last_reviewed: datetime
+    due_date: datetime
+
+class FlashcardReviewSessionResult(BaseSchema):
+    """Result of a review session sync.
+    
+    Attributes:
+        updated: Number of flashcards rescheduled
+        not_found: Card IDs that do not exist or belong to another user
+        cards: New schedule of every rescheduled flashcard
+    """
+    updated: int = Field(..., ge=0)
+    not_found: List[str] = Field(default_factory=list)
+    cards: List[FlashcardSchedule]
+
+class FlashcardForecastDay(BaseSchema):
+    """Projected number of reviews on one day."""
+    date: date
+    due: int = Field(..., ge=0)
+
+class FlashcardForecast(BaseSchema):
+    """Projected daily review workload for a user's deck.
+    
+    Attributes:
+        total_cards: Cards in the simulated deck
+        retention: Assumed probability of passing a review
+        days: Projected due cards per day
+    """
+    total_cards: int = Field(..., ge=0)
+    retention: float = Field(..., ge=0, le=1)
+    days: List[FlashcardForecastDay]
+
+class FlashcardPage(BaseSchema):
+    """One keyset page of flashcards.
+    
+    Attributes:
+        items: Flashcards on this page, ordered by due date
+        total: Number of matching flashcards across all pages
+        next_cursor: Pass as ``cursor`` to get the next page; None on the last page
+    """
+    items: List[FlashcardResponse]
+    total: int = Field(..., ge=0)
+    next_cursor: Optional[str] = None
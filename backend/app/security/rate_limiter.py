@@ -1,82 +1,337 @@
 """
 Rate limiting functionality for API endpoints.
 
-This module provides rate limiting capabilities using Redis as the backend.
+This module is the one limiter engine behind every rate-limiting middleware
+and dependency. Limits are enforced with GCRA (the generic cell rate
+algorithm), an exact token bucket that stores a single value per key: the
+theoretical arrival time (TAT) of the next request. A Lua script reads and
+advances it atomically, so a check is one EVALSHA round trip on a pooled
+client and the budget is shared by every worker. While Redis is unreachable
+the same algorithm runs in process, so limits degrade to per-worker instead
+of switching off.
 """
+import logging
+import math
+import os
+import re
+import threading
 import time
-from typing import Optional, Dict, Any, Callable, Awaitable
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Optional, Dict, Any, Callable, Awaitable, Tuple, Union
 from fastapi import Request, HTTPException, status
 from fastapi.responses import JSONResponse
 from functools import wraps
 import redis.asyncio as redis
 from ..core.config import settings
 
+logger = logging.getLogger(__name__)
+
+# KEYS[1]: bucket; ARGV: limit, period (ms), cost.
+# Returns {allowed, remaining, reset (ms until full), retry_after (ms)}.
+GCRA_SCRIPT = """
+if redis.replicate_commands then redis.replicate_commands() end
+local limit = tonumber(ARGV[1])
+local period = tonumber(ARGV[2])
+local cost = tonumber(ARGV[3])
+local interval = period / limit
+local clock = redis.call('TIME')
+local now = clock[1] * 1000 + math.floor(clock[2] / 1000)
+local tat = tonumber(redis.call('GET', KEYS[1]))
+if not tat or tat < now then tat = now end
+local new_tat = tat + cost * interval
+local allow_at = new_tat - period
+if allow_at > now then
+    return {0, math.max(0, math.floor((period - (tat - now)) / interval)), math.ceil(tat - now), math.ceil(allow_at - now)}
+end
+redis.call('SET', KEYS[1], math.ceil(new_tat), 'PX', math.ceil(new_tat - now))
+return {1, math.floor((period - (new_tat - now)) / interval + 1e-9), math.ceil(new_tat - now), 0}
+"""
+
+PERIODS = {"second": 1, "minute": 60, "hour": 3600, "day": 86400}
+_LIMIT_RE = re.compile(r"^\s*(\d+)\s*(?:/|per)\s*(\d+)?\s*(second|minute|hour|day)s?\s*$", re.IGNORECASE)
+
+
+@dataclass(frozen=True)
+class RateLimit:
+    """``limit`` requests per ``period`` seconds; the full limit may be used as a burst."""
+    limit: int
+    period: float = 60
+
+    @classmethod
+    def parse(cls, value: Union[str, int, "RateLimit"]) -> "RateLimit":
+        """Parse "100/minute" or "100 per 3600 seconds"; an int means per minute."""
+        if isinstance(value, RateLimit):
+            return value
+        if isinstance(value, int):
+            return cls(value)
+        match = _LIMIT_RE.match(value)
+        if not match:
+            raise ValueError(f"Invalid rate limit: {value!r}")
+        count, multiplier, unit = match.groups()
+        return cls(int(count), int(multiplier or 1) * PERIODS[unit.lower()])
+
+
+@dataclass
+class RateLimitResult:
+    """Outcome of one limiter check."""
+    allowed: bool
+    limit: int
+    remaining: int
+    reset: float
+    retry_after: float = 0.0
+
+    def headers(self) -> Dict[str, str]:
+        """X-RateLimit-* plus the IETF RateLimit-* headers; Retry-After when denied."""
+        reset = str(math.ceil(self.reset))
+        headers = {
+            "X-RateLimit-Limit": str(self.limit),
+            "X-RateLimit-Remaining": str(self.remaining),
+            "X-RateLimit-Reset": reset,
+            "RateLimit-Limit": str(self.limit),
+            "RateLimit-Remaining": str(self.remaining),
+            "RateLimit-Reset": reset,
+        }
+        if not self.allowed:
+            headers["Retry-After"] = str(max(1, math.ceil(self.retry_after)))
+        return headers
+
+
+class LocalBuckets:
+    """In-process GCRA state, bounded to ``max_keys`` least recently used keys."""
+
+    def __init__(self, max_keys: int = 10000, clock: Callable[[], float] = time.monotonic):
+        self.max_keys = max_keys
+        self.clock = clock
+        self._tats: "OrderedDict[str, float]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def hit(self, key: str, policy: RateLimit, cost: int = 1) -> RateLimitResult:
+        interval = policy.period / policy.limit
+        with self._lock:
+            now = self.clock()
+            tat = max(self._tats.get(key, now), now)
+            new_tat = tat + cost * interval
+            allow_at = new_tat - policy.period
+            if allow_at > now:
+                remaining = max(0, math.floor((policy.period - (tat - now)) / interval))
+                return RateLimitResult(False, policy.limit, remaining, tat - now, allow_at - now)
+            self._tats[key] = new_tat
+            self._tats.move_to_end(key)
+            while len(self._tats) > self.max_keys:
+                self._tats.popitem(last=False)
+        remaining = math.floor((policy.period - (new_tat - now)) / interval + 1e-9)
+        return RateLimitResult(True, policy.limit, remaining, new_tat - now)
+
+
 class RateLimiter:
-    """Rate limiter using Redis as the backend."""
-    
-    def __init__(self, redis_client: redis.Redis, prefix: str = "rate_limit:"):
+    """GCRA rate limiter on Redis with an in-process fallback."""
+
+    def __init__(
+        self,
+        redis_client: Optional[redis.Redis] = None,
+        prefix: str = "rate_limit:",
+        local_max_keys: int = 10000,
+        retry_interval: float = 5.0
+    ):
         """Initialize the rate limiter.
-        
+
         Args:
-            redis_client: Redis client instance
+            redis_client: Redis client instance; None limits in process only
             prefix: Prefix for Redis keys
+            local_max_keys: Keys tracked by the fallback buckets
+            retry_interval: Seconds to stay on the fallback after a Redis error
         """
         self.redis = redis_client
         self.prefix = prefix
-    
+        self.retry_interval = retry_interval
+        self.local = LocalBuckets(local_max_keys)
+        self._script = redis_client.register_script(GCRA_SCRIPT) if redis_client is not None else None
+        self._redis_down_until = 0.0
+
+    async def hit(
+        self,
+        key: str,
+        limit: Union[RateLimit, str, int],
+        period: Optional[float] = None,
+        cost: int = 1
+    ) -> RateLimitResult:
+        """Spend ``cost`` from ``key``'s bucket.
+
+        Args:
+            key: The key to rate limit on (e.g., IP address or user ID)
+            limit: A RateLimit, a "100/minute" string, or a request count
+            period: Window in seconds when ``limit`` is a count
+            cost: Tokens this request consumes
+
+        Returns:
+            RateLimitResult with the decision and header values
+        """
+        if isinstance(limit, int) and period is not None:
+            policy = RateLimit(limit, period)
+        else:
+            policy = RateLimit.parse(limit)
+        if self._script is not None and time.monotonic() >= self._redis_down_until:
+            try:
+                allowed, remaining, reset, retry_after = await self._script(
+                    keys=[f"{self.prefix}{key}"],
+                    args=[policy.limit, int(policy.period * 1000), cost]
+                )
+                return RateLimitResult(
+                    bool(allowed), policy.limit, int(remaining), int(reset) / 1000, int(retry_after) / 1000
+                )
+            except (redis.RedisError, OSError) as e:
+                # Checks already in flight fail together; report the outage once
+                if time.monotonic() >= self._redis_down_until:
+                    logger.warning(
+                        f"Redis error in rate limiter, limiting in process for {self.retry_interval:g}s: {e}"
+                    )
+                    self._redis_down_until = time.monotonic() + self.retry_interval
+        return self.local.hit(f"{self.prefix}{key}", policy, cost)
+
     async def is_rate_limited(
-        self, 
-        key: str, 
-        limit: int, 
+        self,
+        key: str,
+        limit: int,
         window: int = 60
     ) -> bool:
         """Check if a request should be rate limited.
-        
+
         Args:
             key: The key to rate limit on (e.g., IP address or user ID)
             limit: Maximum number of requests allowed in the time window
             window: Time window in seconds
-            
+
         Returns:
             bool: True if rate limited, False otherwise
         """
-        current = int(time.time())
-        window_start = current - window
-        
-        # Use Redis pipeline for atomic operations
-        async with self.redis.pipeline() as pipe:
-            try:
-                # Add current timestamp to sorted set
-                pipe.zadd(f"{self.prefix}{key}", {current: current})
-                # Remove old timestamps
-                pipe.zremrangebyscore(f"{self.prefix}{key}", 0, window_start)
-                # Get count of requests in current window
-                pipe.zcard(f"{self.prefix}{key}")
-                # Set expiry on the key
-                pipe.expire(f"{self.prefix}{key}", window)
-                
-                # Execute all commands
-                _, _, count, _ = await pipe.execute()
-                
-                return count > limit
-                
-            except redis.RedisError as e:
-                # If Redis is down, fail open (don't rate limit)
-                print(f"Redis error in rate limiter: {e}")
-                return False
+        result = await self.hit(key, limit, window)
+        return not result.allowed
+
+
+class RateLimitPolicies:
+    """Per-route and per-tier limits.
+
+    ``routes`` maps path prefixes to a limit, or to a {tier: limit} mapping
+    with an optional "default" entry; the longest matching prefix wins.
+    Paths matching no route get the caller's tier limit, then ``default``.
+    """
+
+    def __init__(
+        self,
+        default: Union[RateLimit, str],
+        routes: Optional[Dict[str, Any]] = None,
+        tiers: Optional[Dict[str, Union[RateLimit, str]]] = None
+    ):
+        self.default = RateLimit.parse(default)
+        self.tiers = {tier: RateLimit.parse(limit) for tier, limit in (tiers or {}).items()}
+        self.routes = sorted(
+            ((prefix, self._parse(limit)) for prefix, limit in (routes or {}).items()),
+            key=lambda route: -len(route[0])
+        )
+
+    @staticmethod
+    def _parse(limit: Any) -> Any:
+        if isinstance(limit, dict):
+            return {tier: RateLimit.parse(value) for tier, value in limit.items()}
+        return RateLimit.parse(limit)
+
+    def resolve(self, path: str, tier: Optional[str] = None) -> Tuple[str, RateLimit]:
+        """The scope (matched prefix, or "*") and limit for a request."""
+        tier = tier.lower() if tier else None
+        for prefix, limit in self.routes:
+            if path.startswith(prefix):
+                if isinstance(limit, dict):
+                    return prefix, limit.get(tier) or limit.get("default") or self.tiers.get(tier, self.default)
+                return prefix, limit
+        return "*", self.tiers.get(tier, self.default)
+
+
+def client_ip(request: Request) -> str:
+    return request.client.host if request.client else "unknown"
+
+
+class RateLimitMiddleware:
+    """HTTP middleware enforcing ``policies`` per client and route scope."""
+
+    def __init__(
+        self,
+        policies: RateLimitPolicies,
+        limiter: Optional[RateLimiter] = None,
+        key_func: Callable[[Request], str] = client_ip,
+        tier_func: Optional[Callable[[Request], Optional[str]]] = None,
+        paths: Optional[Tuple[str, ...]] = None,
+        name: str = "http"
+    ):
+        self.policies = policies
+        self.name = name
+        self._limiter = limiter
+        self.key_func = key_func
+        self.tier_func = tier_func
+        self.paths = paths
+
+    @property
+    def limiter(self) -> RateLimiter:
+        return self._limiter or get_limiter()
+
+    async def __call__(self, request: Request, call_next):
+        path = request.url.path
+        if self.paths and not path.startswith(self.paths):
+            return await call_next(request)
+
+        tier = self.tier_func(request) if self.tier_func else None
+        scope, policy = self.policies.resolve(path, tier)
+        result = await self.limiter.hit(f"{self.name}:{self.key_func(request)}:{scope}", policy)
+        if not result.allowed:
+            return rate_limited_response(result)
+
+        response = await call_next(request)
+        response.headers.update(result.headers())
+        return response
+
+
+def rate_limited_response(result: RateLimitResult) -> JSONResponse:
+    """429 response carrying the limiter headers."""
+    retry_after = max(1, math.ceil(result.retry_after))
+    return JSONResponse(
+        status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+        content={
+            "detail": f"Rate limit exceeded. Try again in {retry_after} seconds",
+            "retry_after": retry_after,
+            "limit": result.limit,
+        },
+        headers=result.headers()
+    )
+
+
+_limiter: Optional[RateLimiter] = None
+
 
 def get_limiter() -> RateLimiter:
-    """Get a rate limiter instance."""
-    redis_client = redis.Redis.from_url(settings.REDIS_URL)
-    return RateLimiter(redis_client)
+    """
+    Get the process-wide rate limiter, on a pooled client for
+    RATE_LIMIT_REDIS_URL (default REDIS_URL).
+    """
+    global _limiter
+    if _limiter is None:
+        timeout = float(os.getenv("RATE_LIMIT_REDIS_TIMEOUT", "0.25"))
+        pool = redis.BlockingConnectionPool.from_url(
+            os.getenv("RATE_LIMIT_REDIS_URL") or str(settings.REDIS_URL),
+            max_connections=int(os.getenv("RATE_LIMIT_REDIS_MAX_CONNECTIONS", "50")),
+            timeout=timeout,
+            socket_timeout=timeout,
+            socket_connect_timeout=timeout
+        )
+        _limiter = RateLimiter(redis.Redis(connection_pool=pool))
+    return _limiter
 
 def rate_limit(
-    limit: int = 100, 
+    limit: int = 100,
     window: int = 60,
     key_func: Optional[Callable[[Request], str]] = None
 ):
     """Decorator to rate limit API endpoints.
-    
+
     Args:
         limit: Maximum number of requests allowed in the time window
         window: Time window in seconds
@@ -87,28 +342,17 @@ def rate_limit(
         async def wrapper(request: Request, *args, **kwargs):
             # Default key function uses client IP
             if key_func is None:
-                client_ip = request.client.host if request.client else "unknown"
-                key = f"ip:{client_ip}:{request.url.path}"
+                key = f"ip:{client_ip(request)}:{request.url.path}"
             else:
                 key = key_func(request)
-            
+
             # Check rate limit
-            limiter = get_limiter()
-            is_limited = await limiter.is_rate_limited(
-                key=key,
-                limit=limit,
-                window=window
-            )
-            
-            if is_limited:
-                return JSONResponse(
-                    status_code=status.HTTP_429_TOO_MANY_REQUESTS,
-                    content={"detail": "Too many requests. Please try again later."},
-                    headers={"Retry-After": str(window)}
-                )
-                
+            result = await get_limiter().hit(key, limit, window)
+            if not result.allowed:
+                return rate_limited_response(result)
+
             return await func(request, *args, **kwargs)
-            
+
         return wrapper
-    
+
     return decorator
@@ -8,6 +8,7 @@ Provides comprehensive audio processing functionality including:
 - Transcription services
 - Audio processing utilities
 """
+import asyncio
 import os
 import wave
 import time
@@ -24,6 +25,8 @@ import speech_recognition as sr
 from gtts import gTTS
 from pydub import AudioSegment
 
+from ..blob_store import get_blob_store
+
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -80,10 +83,11 @@ class AudioService:
                 if not filename:
                     filename = f"tts_{int(time.time())}_{hashlib.md5(text.encode()).hexdigest()[:8]}"
                 
-                # Save to file
+                # Save to file, then keep one copy per distinct output
                 filepath = self.tts_dir / f"{filename}.mp3"
                 tts.save(str(filepath))
-                return str(filepath), 'audio/mp3'
+                blob = await asyncio.to_thread(get_blob_store().put_file, filepath, move=True)
+                return str(blob.path), 'audio/mp3'
             else:
                 # Return audio data as bytes
                 audio_bytes = io.BytesIO()
@@ -0,0 +1,429 @@
+"""
+Content-addressed blob store.
+
+Uploads, TTS audio, diagrams and rendered videos are stored once per
+distinct content, under the hex SHA-256 of their bytes, in directories
+sharded by the first two byte pairs (``ab/cd/abcd...``). Storing content
+that is already present only drops the incoming copy.
+
+Every blob has a row in the ``blobs`` table. Rows that keep a blob (an
+audio note, an attachment, a finished video task) hold a reference through
+``add_reference``/``release_reference`` in their own transaction. Blobs
+nobody references, such as intermediate TTS output, sit at zero from the
+start. ``collect_garbage`` deletes blobs that have been unreferenced for
+longer than a grace period, found through an index on the table rather than
+by walking directories.
+
+Blob files are read-only; nothing may modify one in place.
+"""
+import hashlib
+import logging
+import os
+import re
+import shutil
+import uuid
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import BinaryIO, Callable, Dict, Optional, Union
+
+from sqlalchemy import case, delete, select, update
+from sqlalchemy.exc import IntegrityError
+
+from ..models.blob import Blob
+
+logger = logging.getLogger(__name__)
+
+CHUNK_SIZE = 1024 * 1024
+
+_DIGEST = re.compile(r"[0-9a-f]{64}")
+
+
+@dataclass(frozen=True)
+class StoredBlob:
+    """A blob in the store; ``path`` is a local copy of the content."""
+    sha256: str
+    size: int
+    path: Path
+
+
+def file_sha256(path: Union[str, Path]) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        while chunk := f.read(CHUNK_SIZE):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _shard(digest: str) -> Path:
+    return Path(digest[:2]) / digest[2:4] / digest
+
+
+def blob_dir() -> Path:
+    """Local root of the process-wide store (its cache, for the S3 backend)."""
+    return Path(os.path.abspath(os.getenv("BLOB_STORE_DIR", "data/blobs")))
+
+
+def blob_digest(path: Union[str, Path]) -> Optional[str]:
+    """
+    The digest if ``path`` is a blob of the process-wide store, else None.
+
+    Only looks at the path, so it never builds the store.
+    """
+    path = Path(os.path.abspath(path))
+    if _DIGEST.fullmatch(path.name) and path.parent == blob_dir() / _shard(path.name).parent:
+        return path.name
+    return None
+
+
+def sync_session():
+    """A session from the application's sync engine, for reference rows."""
+    from ..core.database import database
+
+    return database.sync_session_maker()()
+
+
+class BlobStore:
+    """Base class: hashing and reference rows; subclasses move the bytes."""
+
+    def __init__(self, session_factory: Optional[Callable] = None):
+        # None skips registering rows (a store used as another store's cache)
+        self.session_factory = session_factory
+
+    def put_file(
+        self,
+        path: Union[str, Path],
+        move: bool = False,
+        sha256: Optional[str] = None
+    ) -> StoredBlob:
+        """
+        Store the file at ``path``; with ``move`` the file itself is consumed.
+
+        Pass ``sha256`` when the caller already hashed the content while
+        writing it. The blob is registered before its bytes are stored, so
+        collection cannot remove content that is being stored again.
+        """
+        path = Path(path)
+        digest = sha256 or file_sha256(path)
+        size = path.stat().st_size
+        self._register(digest, size)
+        return StoredBlob(digest, size, self._store(path, digest, move))
+
+    def put_bytes(self, data: bytes) -> StoredBlob:
+        digest = hashlib.sha256(data).hexdigest()
+        self._register(digest, len(data))
+        if not self.exists(digest):
+            tmp = self._staging_path()
+            tmp.write_bytes(data)
+            return StoredBlob(digest, len(data), self._store(tmp, digest, move=True))
+        return StoredBlob(digest, len(data), self.path(digest))
+
+    def digest_of(self, path: Union[str, Path]) -> Optional[str]:
+        """The digest if ``path`` is a blob of this store, else None."""
+        path = Path(os.path.abspath(path))
+        if _DIGEST.fullmatch(path.name) and path.parent == self.local_path(path.name).parent:
+            return path.name
+        return None
+
+    def _register(self, digest: str, size: int) -> None:
+        """Create the blob's row, or restart the grace period of an unreferenced one."""
+        if self.session_factory is None:
+            return
+        now = datetime.utcnow()
+        try:
+            db = self.session_factory()
+            try:
+                for _ in range(2):
+                    touched = db.execute(
+                        update(Blob).where(Blob.sha256 == digest, Blob.ref_count == 0).values(unreferenced_at=now)
+                    ).rowcount
+                    if touched or db.get(Blob, digest) is not None:
+                        db.commit()
+                        return
+                    db.add(Blob(sha256=digest, size=size, ref_count=0, created_at=now, unreferenced_at=now))
+                    try:
+                        db.commit()
+                        return
+                    except IntegrityError:
+                        # Registered concurrently; touch that row instead
+                        db.rollback()
+            finally:
+                db.close()
+        except Exception as e:
+            # The content is still stored; only its collection is delayed
+            logger.warning(f"Failed to register blob {digest}: {e}")
+
+    def _staging_path(self) -> Path:
+        raise NotImplementedError
+
+    def _store(self, path: Path, digest: str, move: bool) -> Path:
+        raise NotImplementedError
+
+    def exists(self, digest: str) -> bool:
+        raise NotImplementedError
+
+    def local_path(self, digest: str) -> Path:
+        """Where the blob's content is, or would be, kept locally."""
+        raise NotImplementedError
+
+    def path(self, digest: str) -> Path:
+        """Local path of the blob's content."""
+        return self.local_path(digest)
+
+    def open(self, digest: str) -> BinaryIO:
+        return open(self.path(digest), "rb")
+
+    def url(self, digest: str, expires_in: int = 3600) -> Optional[str]:
+        """A URL serving the blob directly, where the backend has one."""
+        return None
+
+    def delete(self, digest: str, still_unused: Callable[[], bool]) -> bool:
+        """Delete the content if ``still_unused()`` holds; returns whether it did."""
+        raise NotImplementedError
+
+
+class LocalBlobStore(BlobStore):
+    """Blobs under a local directory."""
+
+    def __init__(self, root: Union[str, Path], session_factory: Optional[Callable] = None):
+        super().__init__(session_factory)
+        self.root = Path(root).resolve()
+        self.root.mkdir(parents=True, exist_ok=True)
+
+    def local_path(self, digest: str) -> Path:
+        return self.root / _shard(digest)
+
+    def exists(self, digest: str) -> bool:
+        return self.path(digest).exists()
+
+    def _staging_path(self) -> Path:
+        return self.root / f".{uuid.uuid4().hex}.tmp"
+
+    def _store(self, path: Path, digest: str, move: bool) -> Path:
+        dest = self.path(digest)
+        if dest.exists():
+            # Already stored: the incoming copy is redundant
+            if move:
+                path.unlink(missing_ok=True)
+            return dest
+        dest.parent.mkdir(parents=True, exist_ok=True)
+        tmp = dest.with_name(f".{digest}.{uuid.uuid4().hex}.tmp")
+        try:
+            if move:
+                shutil.move(str(path), tmp)
+            else:
+                shutil.copyfile(path, tmp)
+            os.chmod(tmp, 0o444)
+            # Atomic; a concurrent put of the same content just replaces equal bytes
+            os.replace(tmp, dest)
+        except BaseException:
+            tmp.unlink(missing_ok=True)
+            raise
+        return dest
+
+    def delete(self, digest: str, still_unused: Callable[[], bool]) -> bool:
+        path = self.path(digest)
+        # Set aside first, so a put that saw the file before the check still finds it after
+        tomb = path.with_name(f".{digest}.deleting")
+        try:
+            os.replace(path, tomb)
+        except FileNotFoundError:
+            return False
+        if not still_unused():
+            os.replace(tomb, path)
+            return False
+        tomb.unlink()
+        return True
+
+
+class S3BlobStore(BlobStore):
+    """
+    Blobs in an S3-compatible bucket under ``prefix``, with a local cache.
+
+    Content stored here is also kept in the cache, and cached copies are
+    fetched on demand, so ``path`` works as it does locally; the cache can be
+    trimmed by age at any time with ``evict_cache``.
+    """
+
+    def __init__(
+        self,
+        client,
+        bucket: str,
+        prefix: str = "blobs",
+        cache_dir: Union[str, Path] = "data/blob_cache",
+        session_factory: Optional[Callable] = None
+    ):
+        super().__init__(session_factory)
+        self.client = client
+        self.bucket = bucket
+        self.prefix = prefix.strip("/")
+        self.cache = LocalBlobStore(cache_dir)
+
+    def key(self, digest: str) -> str:
+        return f"{self.prefix}/{_shard(digest).as_posix()}"
+
+    def exists(self, digest: str) -> bool:
+        from botocore.exceptions import ClientError
+
+        try:
+            self.client.head_object(Bucket=self.bucket, Key=self.key(digest))
+            return True
+        except ClientError as e:
+            if e.response.get("Error", {}).get("Code") in ("404", "NoSuchKey", "NotFound"):
+                return False
+            raise
+
+    def _staging_path(self) -> Path:
+        return self.cache._staging_path()
+
+    def _store(self, path: Path, digest: str, move: bool) -> Path:
+        if not self.exists(digest):
+            self.client.upload_file(str(path), self.bucket, self.key(digest))
+        return self.cache._store(path, digest, move)
+
+    def local_path(self, digest: str) -> Path:
+        return self.cache.local_path(digest)
+
+    def path(self, digest: str) -> Path:
+        local = self.cache.path(digest)
+        if not local.exists():
+            tmp = self.cache._staging_path()
+            self.client.download_file(self.bucket, self.key(digest), str(tmp))
+            self.cache._store(tmp, digest, move=True)
+        return local
+
+    def url(self, digest: str, expires_in: int = 3600) -> Optional[str]:
+        return self.client.generate_presigned_url(
+            "get_object",
+            Params={"Bucket": self.bucket, "Key": self.key(digest)},
+            ExpiresIn=expires_in
+        )
+
+    def delete(self, digest: str, still_unused: Callable[[], bool]) -> bool:
+        if not still_unused():
+            return False
+        self.client.delete_object(Bucket=self.bucket, Key=self.key(digest))
+        self.cache.path(digest).unlink(missing_ok=True)
+        return True
+
+    def evict_cache(self, older_than: timedelta) -> int:
+        """Drop cached copies not read or written within ``older_than``."""
+        cutoff = (datetime.now() - older_than).timestamp()
+        evicted = 0
+        for shard in self.cache.root.glob("??/??"):
+            for path in shard.iterdir():
+                try:
+                    stat = path.stat()
+                    if max(stat.st_atime, stat.st_mtime) < cutoff:
+                        path.unlink()
+                        evicted += 1
+                except FileNotFoundError:
+                    continue
+        return evicted
+
+
+def add_reference(db, digest: str, size: int = 0) -> None:
+    """Count one more row referring to ``digest``; commits with the caller's transaction."""
+    updated = db.execute(
+        update(Blob).where(Blob.sha256 == digest).values(ref_count=Blob.ref_count + 1, unreferenced_at=None)
+    ).rowcount
+    if not updated:
+        db.add(Blob(sha256=digest, size=size, ref_count=1, created_at=datetime.utcnow()))
+        db.flush()
+
+
+def release_reference(db, digest: str) -> None:
+    """Count one row fewer referring to ``digest``; commits with the caller's transaction."""
+    db.execute(
+        update(Blob)
+        .where(Blob.sha256 == digest, Blob.ref_count > 0)
+        .values(
+            ref_count=Blob.ref_count - 1,
+            # SET sees the old count: stamp only the release that reaches zero
+            unreferenced_at=case((Blob.ref_count == 1, datetime.utcnow()), else_=None)
+        )
+    )
+
+
+def release_path(db, store: BlobStore, file_path: Optional[str]) -> bool:
+    """Release the blob at ``file_path``; False if the path is not a blob."""
+    digest = store.digest_of(file_path) if file_path else None
+    if digest is None:
+        return False
+    release_reference(db, digest)
+    return True
+
+
+def collect_garbage(
+    db,
+    store: BlobStore,
+    grace_period: timedelta = timedelta(hours=1),
+    batch_size: int = 500
+) -> Dict[str, int]:
+    """
+    Delete up to ``batch_size`` blobs unreferenced for ``grace_period``.
+
+    Each row is removed (only if it is still unreferenced) before its
+    content; a blob stored again in the meantime gets a new row, which
+    stops the content from being deleted.
+    """
+    cutoff = datetime.utcnow() - grace_period
+    stats = {"deleted": 0, "bytes_freed": 0, "skipped": 0}
+    candidates = db.execute(
+        select(Blob.sha256, Blob.size)
+        .where(Blob.ref_count == 0, Blob.unreferenced_at < cutoff)
+        .limit(batch_size)
+    ).all()
+
+    for digest, size in candidates:
+        removed = db.execute(
+            delete(Blob).where(Blob.sha256 == digest, Blob.ref_count == 0, Blob.unreferenced_at < cutoff)
+        ).rowcount
+        db.commit()
+        if not removed:
+            stats["skipped"] += 1
+            continue
+
+        def still_unused(digest=digest):
+            return db.execute(select(Blob.sha256).where(Blob.sha256 == digest)).first() is None
+
+        try:
+            if store.delete(digest, still_unused):
+                stats["deleted"] += 1
+                stats["bytes_freed"] += size or 0
+            else:
+                stats["skipped"] += 1
+        except Exception as e:
+            logger.error(f"Failed to delete blob {digest}: {e}")
+            # Put the row back so the next run retries
+            db.add(Blob(sha256=digest, size=size, ref_count=0, unreferenced_at=cutoff))
+            db.commit()
+    return stats
+
+
+_blob_store: Optional[BlobStore] = None
+
+
+def get_blob_store() -> BlobStore:
+    """
+    Process-wide store: BLOB_STORE_BACKEND ``local`` (under BLOB_STORE_DIR)
+    or ``s3`` (CloudStorageService's bucket under BLOB_STORE_S3_PREFIX).
+
+    Reference rows go through sync sessions of ``app.core.database``, opened
+    only when a blob is registered.
+    """
+    global _blob_store
+    if _blob_store is None:
+        if os.getenv("BLOB_STORE_BACKEND", "local") == "s3":
+            from .cloud_storage import cloud_storage
+
+            _blob_store = S3BlobStore(
+                cloud_storage.s3_client,
+                cloud_storage.bucket_name,
+                prefix=os.getenv("BLOB_STORE_S3_PREFIX", "blobs"),
+                cache_dir=blob_dir(),
+                session_factory=sync_session,
+            )
+        else:
+            _blob_store = LocalBlobStore(blob_dir(), session_factory=sync_session)
+    return _blob_store
@@ -1,76 +1,265 @@
-from typing import BinaryIO, Optional
+"""
+Async S3 storage client.
+
+boto3 calls block, so every call runs on a thread pool sized to botocore's
+connection pool: at most ``max_pool_connections`` requests are in flight,
+each with its own pooled connection, and the event loop only awaits them.
+Large uploads are split into parts uploaded concurrently (reads happen on
+the pool too), deletes are batched, and presigned URLs are reused while
+most of their lifetime remains.
+
+Point S3_ENDPOINT_URL at MinIO or a moto server to run against a local S3.
+"""
+import asyncio
+import functools
+import os
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import BinaryIO, Dict, Iterable, List, Optional, Tuple
+
 import boto3
+from botocore.config import Config
 from botocore.exceptions import ClientError
-import os
+
 from ..core.config import settings
 
+# Concurrent S3 requests (and pooled connections) per process
+MAX_POOL_CONNECTIONS = int(os.getenv("S3_MAX_POOL_CONNECTIONS", "16"))
+
+# Multipart part size in bytes; S3 requires at least 5 MiB for all but the last part
+PART_SIZE = int(os.getenv("S3_PART_SIZE", str(16 * 1024 * 1024)))
+
+# Parts of one upload in flight at once; bounds its memory to about this many parts
+MAX_CONCURRENCY = int(os.getenv("S3_MAX_CONCURRENCY", "8"))
+
+# Keys per DeleteObjects request (the S3 maximum)
+DELETE_BATCH_SIZE = 1000
+
+# A cached presigned URL is handed out until this fraction of its lifetime has passed
+URL_REUSE_FRACTION = 0.5
+
+# Presigned URLs kept in the cache
+URL_CACHE_SIZE = 10_000
+
+MIN_PART_SIZE = 5 * 1024 * 1024
+
+
+def _make_client(max_pool_connections: int):
+    endpoint_url = getattr(settings, 'S3_ENDPOINT_URL', None)
+    config = Config(
+        max_pool_connections=max_pool_connections,
+        signature_version=getattr(settings, 'S3_SIGNATURE_VERSION', 's3v4'),
+        retries={'max_attempts': 5, 'mode': 'adaptive'},
+        # MinIO and moto serve buckets by path rather than by host name
+        s3={'addressing_style': 'path'} if endpoint_url else None,
+    )
+    return boto3.client(
+        's3',
+        aws_access_key_id=getattr(settings, 'AWS_ACCESS_KEY_ID', None) or None,
+        aws_secret_access_key=getattr(settings, 'AWS_SECRET_ACCESS_KEY', None) or None,
+        region_name=getattr(settings, 'AWS_REGION', 'us-east-1'),
+        endpoint_url=endpoint_url,
+        use_ssl=getattr(settings, 'S3_USE_SSL', True),
+        config=config
+    )
+
+
 class CloudStorageService:
-    def __init__(self):
-        """Initialize the cloud storage service with AWS S3 client."""
-        self.s3_client = boto3.client(
-            's3',
-            aws_access_key_id=settings.AWS_ACCESS_KEY_ID,
-            aws_secret_access_key=settings.AWS_SECRET_ACCESS_KEY,
-            region_name=settings.AWS_REGION
-        )
-        self.bucket_name = settings.S3_BUCKET_NAME
-        self.base_url = f"https://{self.bucket_name}.s3.{settings.AWS_REGION}.amazonaws.com"
+    def __init__(
+        self,
+        client=None,
+        bucket_name: Optional[str] = None,
+        max_pool_connections: int = MAX_POOL_CONNECTIONS,
+        part_size: int = PART_SIZE,
+        max_concurrency: int = MAX_CONCURRENCY
+    ):
+        """
+        Initialize the cloud storage service with an S3 client.
+
+        Args:
+            client: boto3 S3 client; by default one is built from settings
+            bucket_name: Bucket to use (default: settings.S3_BUCKET_NAME)
+            max_pool_connections: Requests in flight at once across all calls
+            part_size: Multipart part size in bytes; smaller files go in one request
+            max_concurrency: Parts of a single upload in flight at once
+        """
+        if part_size < MIN_PART_SIZE:
+            raise ValueError(f"part_size must be at least {MIN_PART_SIZE} bytes")
+        self.s3_client = client or _make_client(max_pool_connections)
+        self.bucket_name = bucket_name or settings.S3_BUCKET_NAME
+        self.part_size = part_size
+        self.max_concurrency = max_concurrency
+        self._executor = ThreadPoolExecutor(max_workers=max_pool_connections, thread_name_prefix="s3")
+        self._urls: "OrderedDict[Tuple[str, int], Tuple[str, float]]" = OrderedDict()
+
+        endpoint_url = getattr(settings, 'S3_ENDPOINT_URL', None)
+        if endpoint_url:
+            self.base_url = f"{endpoint_url.rstrip('/')}/{self.bucket_name}"
+        else:
+            self.base_url = f"https://{self.bucket_name}.s3.{settings.AWS_REGION}.amazonaws.com"
+
+    async def _call(self, fn, *args, **kwargs):
+        """Run a blocking call on the S3 pool."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, functools.partial(fn, *args, **kwargs))
 
     async def upload_file(self, file_obj: BinaryIO, object_name: str, content_type: str = None) -> str:
         """
         Upload a file to S3 bucket.
-        
+
+        Files larger than ``part_size`` are sent as a multipart upload with
+        up to ``max_concurrency`` parts in flight.
+
         Args:
             file_obj: File-like object to upload
             object_name: S3 object name (path in the bucket)
             content_type: Optional MIME type of the file
-            
+
         Returns:
             str: Public URL of the uploaded file
         """
+        extra_args = {}
+        if content_type:
+            extra_args['ContentType'] = content_type
+
         try:
-            extra_args = {}
-            if content_type:
-                extra_args['ContentType'] = content_type
-                
-            self.s3_client.upload_fileobj(
-                file_obj,
-                self.bucket_name,
-                object_name,
-                ExtraArgs=extra_args
-            )
+            first = await self._call(file_obj.read, self.part_size)
+            if len(first) < self.part_size:
+                await self._call(
+                    self.s3_client.put_object,
+                    Bucket=self.bucket_name, Key=object_name, Body=first, **extra_args
+                )
+            else:
+                await self._upload_multipart(file_obj, object_name, first, extra_args)
             return f"{self.base_url}/{object_name}"
         except ClientError as e:
             raise Exception(f"Failed to upload file: {str(e)}")
 
+    async def _upload_multipart(
+        self,
+        file_obj: BinaryIO,
+        object_name: str,
+        first: bytes,
+        extra_args: Dict[str, str]
+    ) -> None:
+        upload_id = (await self._call(
+            self.s3_client.create_multipart_upload,
+            Bucket=self.bucket_name, Key=object_name, **extra_args
+        ))['UploadId']
+        slots = asyncio.Semaphore(self.max_concurrency)
+        pending: List[asyncio.Task] = []
+
+        async def upload_part(number: int, body: bytes) -> Dict[str, object]:
+            try:
+                response = await self._call(
+                    self.s3_client.upload_part,
+                    Bucket=self.bucket_name, Key=object_name, UploadId=upload_id,
+                    PartNumber=number, Body=body
+                )
+                return {'PartNumber': number, 'ETag': response['ETag']}
+            finally:
+                slots.release()
+
+        try:
+            number, body = 1, first
+            while body:
+                # Wait for a free slot, so at most max_concurrency parts are in memory
+                await slots.acquire()
+                if any(task.done() and task.exception() for task in pending):
+                    # A part failed; stop reading and let gather raise it
+                    slots.release()
+                    break
+                pending.append(asyncio.create_task(upload_part(number, body)))
+                number += 1
+                body = await self._call(file_obj.read, self.part_size)
+            parts = await asyncio.gather(*pending)
+            await self._call(
+                self.s3_client.complete_multipart_upload,
+                Bucket=self.bucket_name, Key=object_name, UploadId=upload_id,
+                MultipartUpload={'Parts': parts}
+            )
+        except BaseException:
+            for task in pending:
+                task.cancel()
+            await asyncio.gather(*pending, return_exceptions=True)
+            try:
+                await self._call(
+                    self.s3_client.abort_multipart_upload,
+                    Bucket=self.bucket_name, Key=object_name, UploadId=upload_id
+                )
+            except ClientError:
+                pass
+            raise
+
     async def delete_file(self, object_name: str) -> bool:
         """
         Delete a file from S3 bucket.
-        
+
         Args:
             object_name: S3 object name (path in the bucket)
-            
+
         Returns:
             bool: True if deletion was successful
         """
         try:
-            self.s3_client.delete_object(Bucket=self.bucket_name, Key=object_name)
+            await self._call(self.s3_client.delete_object, Bucket=self.bucket_name, Key=object_name)
+            self._forget_urls([object_name])
             return True
         except ClientError as e:
             raise Exception(f"Failed to delete file: {str(e)}")
 
+    async def delete_files(self, object_names: Iterable[str]) -> List[str]:
+        """
+        Delete many files, up to 1000 per request, with the batches sent concurrently.
+
+        Args:
+            object_names: S3 object names (paths in the bucket)
+
+        Returns:
+            List[str]: Object names that could not be deleted
+        """
+        names = list(dict.fromkeys(object_names))
+        batches = [names[i:i + DELETE_BATCH_SIZE] for i in range(0, len(names), DELETE_BATCH_SIZE)]
+
+        async def delete_batch(batch: List[str]) -> List[str]:
+            response = await self._call(
+                self.s3_client.delete_objects,
+                Bucket=self.bucket_name,
+                Delete={'Objects': [{'Key': name} for name in batch], 'Quiet': True}
+            )
+            return [error['Key'] for error in response.get('Errors', [])]
+
+        try:
+            failed = [name for errors in await asyncio.gather(*map(delete_batch, batches)) for name in errors]
+        except ClientError as e:
+            raise Exception(f"Failed to delete files: {str(e)}")
+        self._forget_urls(set(names) - set(failed))
+        return failed
+
     async def generate_presigned_url(self, object_name: str, expires_in: int = 3600) -> str:
         """
         Generate a presigned URL for temporary access to a private file.
-        
+
+        A URL generated earlier for the same object and expiry is returned
+        while at least half of its lifetime remains.
+
         Args:
             object_name: S3 object name (path in the bucket)
             expires_in: URL expiration time in seconds (default: 1 hour)
-            
+
         Returns:
             str: Presigned URL
         """
+        key = (object_name, expires_in)
+        now = time.monotonic()
+        cached = self._urls.get(key)
+        if cached and now < cached[1]:
+            self._urls.move_to_end(key)
+            return cached[0]
+
         try:
+            # Signing is local computation, cheap enough to run on the loop
             url = self.s3_client.generate_presigned_url(
                 'get_object',
                 Params={
@@ -79,9 +268,19 @@ class CloudStorageService:
                 },
                 ExpiresIn=expires_in
             )
-            return url
         except ClientError as e:
             raise Exception(f"Failed to generate presigned URL: {str(e)}")
 
+        self._urls[key] = (url, now + expires_in * URL_REUSE_FRACTION)
+        self._urls.move_to_end(key)
+        while len(self._urls) > URL_CACHE_SIZE:
+            self._urls.popitem(last=False)
+        return url
+
+    def _forget_urls(self, object_names: Iterable[str]) -> None:
+        names = set(object_names)
+        for key in [key for key in self._urls if key[0] in names]:
+            del self._urls[key]
+
 # Global instance for easy import
 cloud_storage = CloudStorageService()
@@ -0,0 +1,141 @@
+"""Per-user flashcard due queues.
+
+Review queues are read far more often than cards change. Two pieces keep
+"next N due cards" and "how many are due" independent of deck size:
+
+- Keyset cursors: pages are ordered by (due_date, id) and resume after the
+  last card returned, so the ``ix_flashcards_user_due`` index is entered
+  once per page instead of skipping OFFSET rows.
+- ``DueQueue``: an optional Redis sorted set per user mirroring card id ->
+  due timestamp. Due and total counts become ZCOUNT/ZCARD calls. The mirror
+  is updated after every create, update, review and delete commit, expires
+  after ``ttl`` seconds so writes made elsewhere cannot leave it stale for
+  long, and is rebuilt from the database on the next read.
+
+The queue is disabled unless FLASHCARD_DUE_QUEUE_REDIS_URL is set; callers
+then count with SQL over the same index.
+"""
+import base64
+import logging
+import os
+from datetime import datetime
+from typing import Iterable, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+def encode_cursor(due_date: datetime, card_id: str) -> str:
+    """Opaque page cursor for the card a page ended on."""
+    raw = f"{due_date.isoformat()}|{card_id}".encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, str]:
+    """Inverse of ``encode_cursor``; raises ValueError for malformed cursors."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode("utf-8")
+        due_date, card_id = raw.split("|", 1)
+        return datetime.fromisoformat(due_date), card_id
+    except (ValueError, UnicodeDecodeError) as e:
+        raise ValueError("Invalid pagination cursor") from e
+
+
+class DueQueue:
+    """Redis sorted set of due timestamps per user."""
+
+    def __init__(self, redis_url: Optional[str] = None, client=None,
+                 prefix: str = "flashcards:due", ttl: int = 3600):
+        self.prefix = prefix
+        self.ttl = ttl
+        self._redis = client
+        if self._redis is None and redis_url:
+            import redis.asyncio as aioredis
+            self._redis = aioredis.from_url(redis_url, decode_responses=True)
+
+    @property
+    def enabled(self) -> bool:
+        return self._redis is not None
+
+    def _key(self, user_id: str) -> str:
+        return f"{self.prefix}:{user_id}"
+
+    async def is_warm(self, user_id: str) -> bool:
+        """Whether the user's mirror exists; empty decks are rebuilt each time, which is cheap."""
+        if not self.enabled:
+            return False
+        try:
+            return bool(await self._redis.exists(self._key(user_id)))
+        except Exception as e:
+            logger.warning(f"Due queue unavailable: {e}")
+            return False
+
+    async def rebuild(self, user_id: str, cards: Iterable[Tuple[str, datetime]]) -> None:
+        """Replace the user's mirror with (card_id, due_date) pairs."""
+        if not self.enabled:
+            return
+        mapping = {card_id: due_date.timestamp() for card_id, due_date in cards}
+        key = self._key(user_id)
+        try:
+            async with self._redis.pipeline(transaction=True) as pipe:
+                pipe.delete(key)
+                if mapping:
+                    pipe.zadd(key, mapping)
+                    pipe.expire(key, self.ttl)
+                await pipe.execute()
+        except Exception as e:
+            logger.warning(f"Due queue rebuild failed for user {user_id}: {e}")
+
+    async def update(self, user_id: str, cards: Iterable[Tuple[str, datetime]]) -> None:
+        """Set the due date of created or reviewed cards in an existing mirror."""
+        mapping = {card_id: due_date.timestamp() for card_id, due_date in cards}
+        if not self.enabled or not mapping:
+            return
+        key = self._key(user_id)
+        try:
+            # Only touch a warm mirror; a partial one would under-count
+            if await self._redis.exists(key):
+                await self._redis.zadd(key, mapping)
+        except Exception as e:
+            logger.warning(f"Due queue update failed for user {user_id}: {e}")
+
+    async def remove(self, user_id: str, card_ids: Iterable[str]) -> None:
+        card_ids = list(card_ids)
+        if not self.enabled or not card_ids:
+            return
+        try:
+            await self._redis.zrem(self._key(user_id), *card_ids)
+        except Exception as e:
+            logger.warning(f"Due queue remove failed for user {user_id}: {e}")
+
+    async def counts(self, user_id: str, until: datetime) -> Optional[Tuple[int, int]]:
+        """(due by ``until``, total) for a warm mirror, else None."""
+        if not self.enabled:
+            return None
+        key = self._key(user_id)
+        try:
+            async with self._redis.pipeline(transaction=False) as pipe:
+                pipe.zcount(key, "-inf", until.timestamp())
+                pipe.zcard(key)
+                due, total = await pipe.execute()
+        except Exception as e:
+            logger.warning(f"Due queue unavailable: {e}")
+            return None
+        return (due, total) if total else None
+
+
+_due_queue: Optional[DueQueue] = None
+
+
+def get_due_queue() -> DueQueue:
+    """Process-wide due queue configured from FLASHCARD_DUE_QUEUE_REDIS_URL."""
+    global _due_queue
+    if _due_queue is None:
+        try:
+            _due_queue = DueQueue(
+                os.getenv("FLASHCARD_DUE_QUEUE_REDIS_URL") or None,
+                ttl=int(os.getenv("FLASHCARD_DUE_QUEUE_TTL", "3600")),
+            )
+        except Exception as e:
+            logger.warning(f"Due queue disabled: {e}")
+            _due_queue = DueQueue()
+    return _due_queue
@@ -1,9 +1,12 @@
 <<<<<<< HEAD
 from typing import Optional, List, Dict, Any, Union
+import json
 import openai
 from dataclasses import dataclass
 from enum import Enum
 
+from app.services.llm_cache import get_llm_cache
+
 class TeachingStyle(Enum):
     VISUAL = "visual"  # Heavy on diagrams and animations
     PRACTICAL = "practical"  # Focus on real-world examples
@@ -20,6 +23,13 @@ class QuizQuestion:
     difficulty: str
     topic_area: str
 
+async def _complete_json(model: str, messages: List[Dict[str, str]]) -> str:
+    """Chat completion that must be valid JSON, so unparseable replies are never cached"""
+    response = await openai.ChatCompletion.acreate(model=model, messages=messages)
+    content = response.choices[0].message.content
+    json.loads(content)
+    return content
+
 class QuizGenerator:
     def __init__(self, api_key: Optional[str] = None):
         if api_key:
@@ -40,16 +50,15 @@ For each question include:
 
 Format as JSON."""
 
+        messages = [
+            {"role": "system", "content": "You are an expert quiz creator."},
+            {"role": "user", "content": prompt}
+        ]
+
         try:
-            response = await openai.ChatCompletion.acreate(
-                model="gpt-4",
-                messages=[
-                    {"role": "system", "content": "You are an expert quiz creator."},
-                    {"role": "user", "content": prompt}
-                ]
+            quiz_data = await get_llm_cache().get_or_create(
+                "quiz", "gpt-4", messages, lambda: _complete_json("gpt-4", messages)
             )
-            
-            quiz_data = response.choices[0].message.content
             # Parse JSON and convert to QuizQuestion objects
             quiz_json = json.loads(quiz_data)
             
@@ -97,16 +106,16 @@ Include:
 
 Format as JSON."""
 
+        messages = [
+            {"role": "system", "content": "You are an expert educational content designer."},
+            {"role": "user", "content": prompt}
+        ]
+
         try:
-            response = await openai.ChatCompletion.acreate(
-                model="gpt-4",
-                messages=[
-                    {"role": "system", "content": "You are an expert educational content designer."},
-                    {"role": "user", "content": prompt}
-                ]
+            path_data = await get_llm_cache().get_or_create(
+                "learning_path", "gpt-4", messages, lambda: _complete_json("gpt-4", messages)
             )
-            
-            return json.loads(response.choices[0].message.content)
+            return json.loads(path_data)
         except Exception as e:
             print(f"Error generating learning path: {e}")
             return {}
@@ -1,14 +1,151 @@
 """
 File upload service for handling file uploads to cloud storage.
+
+Uploads are copied to disk in fixed-size chunks with their SHA-256 and size
+computed on the way, so an upload never holds more than one chunk in memory
+whatever its size.
 """
+import asyncio
+import errno
+import hashlib
 import os
+import stat
+import tempfile
 import uuid
+from dataclasses import dataclass
 from datetime import datetime
 from pathlib import Path
-from typing import Optional, Tuple
-import aiofiles
+from typing import BinaryIO, Optional, Tuple
 from fastapi import UploadFile, HTTPException, status
 
+from .blob_store import get_blob_store
+
+# Bytes copied per read; the most an upload holds in memory at once
+CHUNK_SIZE = 1024 * 1024
+
+# Largest accepted upload in bytes
+MAX_UPLOAD_BYTES = int(os.getenv("UPLOAD_MAX_BYTES", str(2 * 1024 ** 3)))
+
+# copy_file_range/sendfile errors that mean "not for this pair of files"
+_NO_KERNEL_COPY = {errno.EXDEV, errno.ENOSYS, errno.EINVAL, errno.EOPNOTSUPP, errno.EBADF}
+
+
+@dataclass(frozen=True)
+class StoredFile:
+    """A file written to disk, with the size and SHA-256 of its content."""
+    path: Path
+    size: int
+    sha256: str
+
+
+def upload_too_large(max_bytes: int) -> HTTPException:
+    return HTTPException(
+        status_code=413,
+        detail=f"File exceeds the upload limit of {max_bytes} bytes"
+    )
+
+
+def _disk_fd(src: BinaryIO) -> Optional[int]:
+    """Descriptor of ``src`` if its data is in a regular file, else None."""
+    if isinstance(src, tempfile.SpooledTemporaryFile):
+        # fileno() would force an in-memory spool out to disk
+        if not src._rolled:
+            return None
+        src = src._file
+    try:
+        fd = src.fileno()
+    except (AttributeError, OSError, ValueError):
+        return None
+    return fd if stat.S_ISREG(os.fstat(fd).st_mode) else None
+
+
+def _kernel_copy(src_fd: int, offset: int, dst_fd: int, count: int) -> None:
+    """Append ``count`` bytes of ``src_fd`` from ``offset`` to ``dst_fd``.
+
+    copy_file_range stays in the kernel (and reflinks where the filesystem
+    can); sendfile is next best; plain reads and writes are the fallback.
+    """
+    end = offset + count
+
+    def copy_file_range(n):
+        if not hasattr(os, "copy_file_range"):
+            raise OSError(errno.ENOSYS, "copy_file_range unavailable")
+        return os.copy_file_range(src_fd, dst_fd, n, offset)
+
+    def sendfile(n):
+        return os.sendfile(dst_fd, src_fd, offset, n)
+
+    def read_write(n):
+        return os.write(dst_fd, os.pread(src_fd, min(n, CHUNK_SIZE), offset))
+
+    for copy in (copy_file_range, sendfile, read_write):
+        try:
+            while offset < end:
+                copied = copy(min(end - offset, 1 << 30))
+                if not copied:
+                    raise OSError(errno.EIO, "Source file shrank during copy")
+                offset += copied
+            return
+        except OSError as e:
+            if copy is read_write or e.errno not in _NO_KERNEL_COPY:
+                raise
+
+
+def copy_to_path(
+    src: BinaryIO,
+    dest: Path,
+    max_bytes: Optional[int] = MAX_UPLOAD_BYTES,
+    chunk_size: int = CHUNK_SIZE
+) -> StoredFile:
+    """
+    Copy ``src`` from its current position to ``dest``.
+
+    When ``src`` is already on disk its size is checked before anything is
+    copied, the copy stays in the kernel and only the hash reads the data.
+    Otherwise chunks are read, hashed and written one at a time, stopping
+    with a 413 as soon as ``max_bytes`` is passed. ``dest`` is removed on
+    failure.
+    """
+    digest = hashlib.sha256()
+    size = 0
+    fd = _disk_fd(src)
+    try:
+        with open(dest, "wb") as out:
+            if fd is not None:
+                start = src.tell()
+                size = os.fstat(fd).st_size - start
+                if max_bytes is not None and size > max_bytes:
+                    raise upload_too_large(max_bytes)
+                _kernel_copy(fd, start, out.fileno(), size)
+                for offset in range(start, start + size, chunk_size):
+                    digest.update(os.pread(fd, chunk_size, offset))
+                src.seek(start + size)
+            else:
+                while chunk := src.read(chunk_size):
+                    size += len(chunk)
+                    if max_bytes is not None and size > max_bytes:
+                        raise upload_too_large(max_bytes)
+                    digest.update(chunk)
+                    out.write(chunk)
+    except BaseException:
+        dest.unlink(missing_ok=True)
+        raise
+    return StoredFile(path=Path(dest), size=size, sha256=digest.hexdigest())
+
+
+async def save_upload(
+    file: UploadFile,
+    dest: Path,
+    max_bytes: Optional[int] = MAX_UPLOAD_BYTES
+) -> StoredFile:
+    """Stream an ``UploadFile`` to ``dest`` off the event loop; see copy_to_path."""
+    # Starlette records the size while spooling, so oversized files fail before any copy
+    if max_bytes is not None and (getattr(file, "size", None) or 0) > max_bytes:
+        raise upload_too_large(max_bytes)
+    await file.seek(0)
+    return await asyncio.to_thread(copy_to_path, file.file, Path(dest), max_bytes)
+
+
 class FileUploadService:
     """Service for handling file uploads and storage."""
     
@@ -29,30 +166,37 @@ class FileUploadService:
         new_filename = f"{timestamp}_{unique_id}{ext}"
         return new_filename, ext[1:]  # Remove the dot from extension
     
-    async def save_upload_file(self, file: UploadFile) -> dict:
-        """Save uploaded file to the filesystem."""
+    async def save_upload_file(self, file: UploadFile, max_bytes: Optional[int] = MAX_UPLOAD_BYTES) -> dict:
+        """
+        Save uploaded file to the blob store.
+        
+        The file is stored under its SHA-256 rather than ``saved_filename``, so
+        there is no static URL for it; callers serve ``file_path`` themselves.
+        """
         try:
             # Generate unique filename
             filename, file_ext = self.generate_unique_filename(file.filename)
             file_path = self.upload_dir / filename
             
-            # Save file
-            async with aiofiles.open(file_path, 'wb') as buffer:
-                content = await file.read()
-                await buffer.write(content)
+            # Stream the file to disk in chunks
+            stored = await save_upload(file, file_path, max_bytes)
             
-            # Get file size
-            file_size = os.path.getsize(file_path)
+            # Keep one copy per distinct content
+            blob = await asyncio.to_thread(
+                get_blob_store().put_file, file_path, move=True, sha256=stored.sha256
+            )
             
             return {
                 "filename": file.filename,
                 "saved_filename": filename,
-                "file_path": str(file_path),
-                "file_url": f"/uploads/{filename}",
+                "file_path": str(blob.path),
                 "file_type": file.content_type or f"application/{file_ext}",
-                "file_size": file_size
+                "file_size": stored.size,
+                "sha256": stored.sha256
             }
             
+        except HTTPException:
+            raise
         except Exception as e:
             # Clean up if there was an error
             if 'file_path' in locals() and file_path.exists():
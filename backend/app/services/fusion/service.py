@@ -3,11 +3,13 @@ from typing import Optional, Dict, List
 import openai
 import json
 
+from app.services.llm_cache import get_llm_cache
+
 class FusionService:
     def __init__(self, api_key: Optional[str] = None):
         if api_key:
             openai.api_key = api_key
-        self._cache = {}
+        self._cache = get_llm_cache()
 
     async def generate_notes(
         self,
@@ -18,28 +20,29 @@ class FusionService:
         detail_level: str = "standard",  # concise, standard, in-depth
     ) -> dict:
         """Generate fused notes from lecture and textbook content"""
-        cache_key = f"{lecture_text[:100]}_{textbook_text[:100] if textbook_text else ''}"
-        if cache_key in self._cache:
-            return self._cache[cache_key]
-
         # Prepare the prompt
         prompt = self._prepare_fusion_prompt(
             lecture_text, textbook_text, module_code, chapter, detail_level
         )
+        messages = [
+            {"role": "system", "content": "You are an expert note-taking assistant."},
+            {"role": "user", "content": prompt}
+        ]
 
-        try:
+        async def create() -> str:
             response = await openai.ChatCompletion.acreate(
                 model="gpt-4",
-                messages=[
-                    {"role": "system", "content": "You are an expert note-taking assistant."},
-                    {"role": "user", "content": prompt}
-                ],
+                messages=messages,
                 temperature=0.7
             )
+            return response.choices[0].message.content
 
-            result = self._parse_gpt_response(response.choices[0].message.content)
-            self._cache[cache_key] = result
-            return result
+        try:
+            # Keyed on the full prompt, so different material never shares an entry
+            content = await self._cache.get_or_create(
+                "notes", "gpt-4", messages, create, temperature=0.7
+            )
+            return self._parse_gpt_response(content)
         except Exception as e:
             return {"error": str(e), "notes": "", "questions": [], "study_time": 0}
 
@@ -0,0 +1,205 @@
+"""Split a lecture and its textbook material into aligned sections.
+
+Map-reduce fusion sends each section to the model on its own, so the
+sections must line up: the lecture part and the textbook part that cover the
+same topic should land in the same section. Cues, strongest first:
+
+1. Timestamps: ``[00:10:23]`` markers in the transcript, optionally named
+   by a user-provided ``lecture_timestamps`` list (``00:10:23 Kinematics``).
+2. Headings: table-of-contents entries, or ``Chapter 2`` / ``Section 2.3`` /
+   ``2.3 Title`` style lines, located in both texts.
+3. Size: when there are no cues, paragraphs are packed into chunks.
+
+Textbook parts are attached to the lecture section whose title they share
+the most words with, or spread in order when no titles match. Every
+section is finally capped at ``max_chars`` of combined text.
+"""
+import re
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+TIMESTAMP_RE = re.compile(r"\[?\b(?:(\d{1,2}):)?(\d{1,2}):(\d{2})\b\]?")
+INLINE_TIMESTAMP_RE = re.compile(r"\[(?:(\d{1,2}):)?(\d{1,2}):(\d{2})\]")
+HEADING_RE = re.compile(
+    r"^\s*(?:#+\s*)?(?:(?:chapter|section|part|unit|lecture)\s+[\dIVXivx]+(?:\.\d+)*\b|\d+(?:\.\d+)+\s+\S)[^\n]*$",
+    re.IGNORECASE | re.MULTILINE,
+)
+WORD_RE = re.compile(r"[a-z0-9]+")
+STOPWORDS = {"the", "and", "of", "to", "a", "in", "for", "on", "chapter", "section", "part", "unit", "lecture", "introduction"}
+
+
+@dataclass
+class FusionSection:
+    """One unit of map-reduce work: matching lecture and textbook text."""
+    index: int
+    title: str
+    lecture: str
+    textbook: str = ""
+    start_time: Optional[str] = None
+
+    @property
+    def size(self) -> int:
+        return len(self.lecture) + len(self.textbook)
+
+
+def _seconds(hours: Optional[str], minutes: str, seconds: str) -> int:
+    return int(hours or 0) * 3600 + int(minutes) * 60 + int(seconds)
+
+
+def format_timestamp(seconds: int) -> str:
+    return f"{seconds // 3600:02d}:{seconds % 3600 // 60:02d}:{seconds % 60:02d}"
+
+
+def parse_timestamps(lecture_timestamps: Optional[str]) -> Dict[int, str]:
+    """Map seconds to titles for lines like ``00:10:23 - Kinematics``."""
+    named = {}
+    for line in (lecture_timestamps or "").splitlines():
+        match = TIMESTAMP_RE.search(line)
+        if match:
+            title = line[match.end():].strip(" -–:\t]")
+            named[_seconds(*match.groups())] = title
+    return named
+
+
+def parse_toc(table_of_contents: Optional[str]) -> List[str]:
+    """Table-of-contents entries without trailing page numbers or dot leaders."""
+    titles = []
+    for line in (table_of_contents or "").splitlines():
+        title = re.sub(r"[.\s]*\d+\s*$", "", line).strip(" .\t")
+        if len(title) > 2:
+            titles.append(title)
+    return titles
+
+
+def _words(text: str) -> set:
+    return {word for word in WORD_RE.findall(text.lower()) if word not in STOPWORDS}
+
+
+def _split_on(text: str, starts: List[Tuple[int, str]]) -> List[Tuple[str, str]]:
+    """Cut ``text`` at sorted (offset, title) starts; text before the first start is kept."""
+    parts = []
+    starts = sorted(starts)
+    if not starts or starts[0][0] > 0:
+        starts = [(0, "")] + starts
+    for (offset, title), (end, _) in zip(starts, starts[1:] + [(len(text), "")]):
+        body = text[offset:end].strip()
+        if body:
+            parts.append((title, body))
+    return parts
+
+
+def _heading_starts(text: str, toc: List[str]) -> List[Tuple[int, str]]:
+    starts = {}
+    lowered = text.lower()
+    for title in toc:
+        # A TOC entry counts only where it starts a line, with or without its numbering
+        bare = re.sub(r"^(?:\d+(?:\.\d+)*\.?|[ivx]+\.)\s+", "", title.lower())
+        for candidate in dict.fromkeys((title.lower(), bare)):
+            match = re.search(r"(?m)^\s*" + re.escape(candidate), lowered)
+            if match:
+                starts.setdefault(match.start(), title)
+                break
+    if not starts:
+        for match in HEADING_RE.finditer(text):
+            starts.setdefault(match.start(), match.group(0).strip().lstrip("#").strip())
+    return sorted(starts.items())
+
+
+def split_lecture(lecture: str, timestamps: Dict[int, str], toc: List[str]) -> List[Tuple[str, str, Optional[str]]]:
+    """Lecture parts as (title, text, start_time)."""
+    markers = list(INLINE_TIMESTAMP_RE.finditer(lecture))
+    if markers:
+        if timestamps:
+            # Cut only at the markers that open a user-named segment
+            cuts, names = [], sorted(timestamps.items())
+            for at, title in names:
+                marker = next((m for m in markers if _seconds(*m.groups()) >= at), None)
+                if marker is not None and all(marker.start() != c[0] for c in cuts):
+                    cuts.append((marker.start(), title or format_timestamp(at)))
+        else:
+            cuts = [(m.start(), format_timestamp(_seconds(*m.groups()))) for m in markers]
+        parts = []
+        for title, body in _split_on(lecture, cuts):
+            marker = INLINE_TIMESTAMP_RE.match(body)
+            start = format_timestamp(_seconds(*marker.groups())) if marker else None
+            parts.append((title, body, start))
+        return parts
+
+    return [(title, body, None) for title, body in _split_on(lecture, _heading_starts(lecture, toc))]
+
+
+def _pack(text: str, max_chars: int) -> List[str]:
+    """Pack paragraphs (or, for huge paragraphs, sentences) into chunks of at most ``max_chars``."""
+    pieces = []
+    for paragraph in re.split(r"\n\s*\n", text):
+        if len(paragraph) <= max_chars:
+            pieces.append(paragraph)
+        else:
+            pieces.extend(re.split(r"(?<=[.!?])\s+", paragraph))
+    chunks, current = [], ""
+    for piece in pieces:
+        while len(piece) > max_chars:
+            chunks.append(piece[:max_chars])
+            piece = piece[max_chars:]
+        if current and len(current) + len(piece) + 2 > max_chars:
+            chunks.append(current)
+            current = ""
+        current = f"{current}\n\n{piece}" if current else piece
+    if current.strip():
+        chunks.append(current)
+    return [chunk.strip() for chunk in chunks if chunk.strip()]
+
+
+def _align(lecture_parts, textbook_parts) -> List[List[str]]:
+    """Assign each textbook part to one lecture section."""
+    assigned: List[List[str]] = [[] for _ in lecture_parts]
+    lecture_words = [_words(title) for title, _, _ in lecture_parts]
+    for position, (title, body) in enumerate(textbook_parts):
+        words = _words(title)
+        scores = [len(words & candidate) for candidate in lecture_words]
+        best = max(range(len(scores)), key=lambda i: (scores[i], -i)) if scores else 0
+        if not scores or scores[best] == 0:
+            # No title overlap: keep document order
+            best = position * len(lecture_parts) // max(1, len(textbook_parts))
+        assigned[best].append(body)
+    return assigned
+
+
+def plan_sections(
+    lecture: str,
+    textbook: str = "",
+    table_of_contents: Optional[str] = None,
+    lecture_timestamps: Optional[str] = None,
+    max_chars: int = 12000,
+) -> List[FusionSection]:
+    """Split lecture and textbook into aligned sections of at most ``max_chars``."""
+    toc = parse_toc(table_of_contents)
+    lecture_parts = split_lecture(lecture or "", parse_timestamps(lecture_timestamps), toc)
+    if not lecture_parts:
+        lecture_parts = [("", "", None)]
+    textbook_parts = _split_on(textbook or "", _heading_starts(textbook or "", toc))
+    if len(textbook_parts) == 1 and not textbook_parts[0][0] and len(lecture_parts) > 1:
+        # No headings to match on: spread the textbook evenly, in order
+        share = -(-len(textbook_parts[0][1]) // len(lecture_parts))
+        textbook_parts = [("", chunk) for chunk in _pack(textbook_parts[0][1], share)]
+    attached = _align(lecture_parts, textbook_parts)
+
+    sections: List[FusionSection] = []
+    for (title, body, start), book in zip(lecture_parts, attached):
+        title = title or f"Part {len(sections) + 1}"
+        book_text = "\n\n".join(book)
+        if len(body) + len(book_text) <= max_chars:
+            sections.append(FusionSection(len(sections), title, body, book_text, start))
+            continue
+        # Oversized: split both sides into the same number of pieces so they stay paired
+        budget = max(1, max_chars // 2)
+        lecture_chunks = _pack(body, budget) or [""]
+        book_chunks = _pack(book_text, budget)
+        count = max(len(lecture_chunks), len(book_chunks))
+        for part in range(count):
+            lecture_chunk = lecture_chunks[part] if part < len(lecture_chunks) else ""
+            book_chunk = book_chunks[part] if part < len(book_chunks) else ""
+            part_title = title if count == 1 else f"{title} (part {part + 1})"
+            sections.append(FusionSection(len(sections), part_title, lecture_chunk, book_chunk,
+                                          start if part == 0 else None))
+    return sections
@@ -6,8 +6,11 @@ from typing import Dict, List, Optional
 import uuid
 from datetime import datetime
 
+from .fusion_sections import FusionSection, plan_sections
+from .llm_cache import get_llm_cache
+
 class FusionService:
-    def __init__(self):
+    def __init__(self, max_concurrency: Optional[int] = None, section_chars: int = 12000):
         # Initialize OpenAI client with fallback for missing API key
         api_key = os.getenv("OPENAI_API_KEY")
         if api_key and api_key != "your_openai_api_key_here":
@@ -17,6 +20,9 @@ class FusionService:
             self.client = None
             self.openai_available = False
             print("Warning: OpenAI API key not set. AI features will use fallback methods.")
+        # Map-reduce fusion: sections fused at once, and the size of each section
+        self.max_concurrency = max_concurrency or int(os.getenv("FUSION_MAX_CONCURRENCY", "4"))
+        self.section_chars = section_chars
         
     async def fuse_content(
         self,
@@ -26,11 +32,16 @@ class FusionService:
         chapters: str,
         detail_level: str = "standard",
         table_of_contents: Optional[str] = None,
-        lecture_timestamps: Optional[str] = None
+        lecture_timestamps: Optional[str] = None,
+        mode: str = "auto"
     ) -> Dict:
         """
         Fuse lecture and textbook content into structured notes using GPT-4
         
+        Inputs longer than one section (``section_chars``) are fused map-reduce
+        style: split into aligned sections, fused concurrently, then merged in
+        order. ``mode`` forces "single" or "map_reduce" instead of "auto".
+        
         Args:
             lecture_content: Transcribed lecture content
             textbook_content: Textbook excerpts or content
@@ -39,11 +50,22 @@ class FusionService:
             detail_level: "concise", "standard", or "in-depth"
             table_of_contents: Optional, user-provided TOC for improved segmentation
             lecture_timestamps: Optional, user-provided timestamps for segmentation
+            mode: "auto", "single" or "map_reduce"
         
         Returns:
             Dict containing structured notes with sections, practice questions, etc.
         """
         try:
+            if mode != "single" and self.openai_available:
+                sections = plan_sections(
+                    lecture_content, textbook_content or "",
+                    table_of_contents=table_of_contents,
+                    lecture_timestamps=lecture_timestamps,
+                    max_chars=self.section_chars,
+                )
+                if mode == "map_reduce" or len(sections) > 1:
+                    return await self._fuse_map_reduce(sections, module_code, chapters, detail_level)
+            
             # Create prompt for GPT-4
             prompt = self._create_fusion_prompt(
                 lecture_content, textbook_content, module_code, chapters, detail_level,
@@ -69,7 +91,8 @@ class FusionService:
         chapters: str,
         detail_level: str,
         table_of_contents: Optional[str] = None,
-        lecture_timestamps: Optional[str] = None
+        lecture_timestamps: Optional[str] = None,
+        section_note: Optional[str] = None
     ) -> str:
         """Create the prompt for GPT-4 fusion"""
         
@@ -85,7 +108,7 @@ You are an expert academic note-taking assistant. Your task is to fuse lecture c
 MODULE: {module_code}
 CHAPTERS: {chapters}
 DETAIL LEVEL: {detail_level} - {detail_instructions.get(detail_level, detail_instructions['standard'])}
-
+{section_note or ''}
 LECTURE CONTENT:
 {lecture_content}
 
@@ -116,23 +139,23 @@ ADVANCED INSTRUCTIONS:
 7. If you detect a table of contents or chapter list, use it to guide sectioning.
 
 OUTPUT FORMAT (JSON):
-{
+{{
     "sections": [
-        {
+        {{
             "title": "Section Title or Time Interval",
             "start_time": "00:10:23" (if available),
             "content": [
-                {
+                {{
                     "type": "heading",
                     "text": "Subsection",
                     "source": "[Lecture][Chapter 2]" or similar
-                },
-                {
+                }},
+                {{
                     "type": "bullet",
                     "text": "Content point",
                     "source": "[Lecture] or [Book]"
-                },
-                {
+                }},
+                {{
                     "type": "definition",
                     "text": "Key definition",
                     "source": "[Lecture] or [Book]"
@@ -152,7 +175,7 @@ OUTPUT FORMAT (JSON):
                     "type": "multiple_choice"
                 }}
             ]
-        }
+        }}
     ],
     "total_estimated_study_time_minutes": 120,
     "summary": "Brief overview of the entire content"
@@ -162,27 +185,96 @@ Please provide the response in valid JSON format.
 """
         return prompt
     
-    async def _call_openai(self, prompt: str) -> str:
+    async def _fuse_map_reduce(
+        self,
+        sections: List[FusionSection],
+        module_code: str,
+        chapters: str,
+        detail_level: str
+    ) -> Dict:
+        """Fuse sections concurrently (at most ``max_concurrency`` calls) and merge in order"""
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+        
+        async def fuse_section(section: FusionSection) -> Dict:
+            note = (
+                f"PART: {section.index + 1} of {len(sections)} - \"{section.title}\"\n"
+                "These are excerpts of a longer lecture. Cover only this part; "
+                "do not write an introduction or conclusion for the whole lecture.\n"
+            )
+            prompt = self._create_fusion_prompt(
+                section.lecture, section.textbook or "[None]", module_code, chapters, detail_level,
+                lecture_timestamps=section.start_time, section_note=note
+            )
+            async with semaphore:
+                response = await self._call_openai(prompt)
+            return self._parse_fusion_response(response)
+        
+        partials = await asyncio.gather(*(fuse_section(section) for section in sections))
+        return self._merge_section_notes(sections, list(partials))
+    
+    def _merge_section_notes(self, sections: List[FusionSection], partials: List[Dict]) -> Dict:
+        """Reduce step: concatenate per-part notes in lecture order into one document"""
+        merged_sections = []
+        summaries = []
+        failed_parts = []
+        for section, notes in zip(sections, partials):
+            if notes.get("parse_error"):
+                failed_parts.append(section.index)
+            part_sections = notes.get("sections") or []
+            for part_section in part_sections:
+                if section.start_time and not part_section.get("start_time"):
+                    part_section["start_time"] = section.start_time
+                if len(part_sections) == 1 and part_section.get("title") in (None, "", "Combined Notes"):
+                    part_section["title"] = section.title
+                merged_sections.append(part_section)
+            if notes.get("summary"):
+                summaries.append(notes["summary"].strip())
+        
+        total_minutes = sum(
+            section.get("estimated_study_time_minutes") or 0 for section in merged_sections
+        )
+        merged = {
+            "sections": merged_sections,
+            "total_estimated_study_time_minutes": total_minutes,
+            "summary": " ".join(summaries),
+            "generated_at": datetime.now().isoformat(),
+            "fusion_id": str(uuid.uuid4()),
+            "fusion_mode": "map_reduce",
+            "part_count": len(sections),
+        }
+        if failed_parts:
+            merged["parse_error"] = True
+            merged["failed_parts"] = failed_parts
+        return merged
+    
+    async def _call_openai(self, prompt: str, caller: str = "fusion") -> str:
         """Call OpenAI API with the fusion prompt"""
         if not self.openai_available:
             # Return fallback content when OpenAI is not available
             return self._generate_fallback_content(prompt)
         
-        try:
+        messages = [
+            {"role": "system", "content": "You are an expert academic note-taking assistant."},
+            {"role": "user", "content": prompt}
+        ]
+
+        async def create() -> str:
             response = await asyncio.get_event_loop().run_in_executor(
                 None,
                 lambda: self.client.chat.completions.create(
                     model="gpt-4",
-                    messages=[
-                        {"role": "system", "content": "You are an expert academic note-taking assistant."},
-                        {"role": "user", "content": prompt}
-                    ],
+                    messages=messages,
                     temperature=0.3,
                     max_tokens=4000
                 )
             )
-            
             return response.choices[0].message.content
+
+        try:
+            # Failed calls raise out of the cache, so fallback content is never stored
+            return await get_llm_cache().get_or_create(
+                caller, "gpt-4", messages, create, temperature=0.3, max_tokens=4000
+            )
             
         except Exception as e:
             print(f"OpenAI API call failed: {str(e)}")
@@ -297,7 +389,7 @@ Format as JSON:
 }}
 """
             
-            response = await self._call_openai(prompt)
+            response = await self._call_openai(prompt, caller="practice_questions")
             
             # Parse response
             if "```json" in response:
@@ -336,7 +428,7 @@ Generate flashcards in this format:
 Focus on key concepts, definitions, and important facts.
 """
             
-            response = await self._call_openai(prompt)
+            response = await self._call_openai(prompt, caller="flashcards")
             
             # Parse response
             if "```json" in response:
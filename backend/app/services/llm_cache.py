@@ -0,0 +1,321 @@
+"""Shared cache for LLM completions.
+
+Every AI service that calls a chat model goes through ``LLMResponseCache``.
+Entries are keyed by a SHA-256 of (model, normalized messages, temperature,
+max_tokens), so regenerating the same notes, flashcards or quiz returns the
+stored completion instead of spending tokens and seconds again.
+
+Two backends are available:
+
+- ``RedisLLMCacheBackend``: shared by every worker and host. Entries expire
+  with Redis TTLs, and a sorted set of access times trims the least recently
+  used keys beyond ``max_entries``.
+- ``SQLiteLLMCacheBackend``: a local file with the same TTL and LRU rules,
+  for single-host deployments without Redis.
+
+Concurrent requests for the same key are coalesced (single-flight): only
+the first one calls the model and the others await its result, so a burst
+of identical regenerations costs one completion. Failed calls are never
+cached. Hit rates are tracked per caller name.
+"""
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections import defaultdict
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Union
+
+logger = logging.getLogger(__name__)
+
+Messages = Union[str, List[Dict[str, Any]]]
+
+DEFAULT_TTL = 7 * 24 * 3600
+DEFAULT_MAX_ENTRIES = 50_000
+
+
+def _normalize(text: str) -> str:
+    # Whitespace-only differences (indentation of prompt templates, trailing
+    # newlines) do not change what the model is asked
+    return re.sub(r"\s+", " ", text).strip()
+
+
+def llm_cache_key(
+    model: str,
+    messages: Messages,
+    temperature: Optional[float] = None,
+    max_tokens: Optional[int] = None,
+) -> str:
+    """Stable key for a completion request."""
+    if isinstance(messages, str):
+        messages = [{"role": "user", "content": messages}]
+    normalized = [
+        {"role": message.get("role", "user"), "content": _normalize(str(message.get("content", "")))}
+        for message in messages
+    ]
+    payload = json.dumps(
+        {"model": model, "messages": normalized, "temperature": temperature, "max_tokens": max_tokens},
+        sort_keys=True,
+        separators=(",", ":"),
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class SQLiteLLMCacheBackend:
+    """LLM completions in a local SQLite file, with TTL and LRU eviction."""
+
+    def __init__(self, db_path: str = "data/llm_cache.sqlite3", ttl: int = DEFAULT_TTL,
+                 max_entries: int = DEFAULT_MAX_ENTRIES):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        Path(db_path).parent.mkdir(parents=True, exist_ok=True)
+        self._db = sqlite3.connect(db_path, check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS llm_responses ("
+            " key TEXT PRIMARY KEY,"
+            " response TEXT NOT NULL,"
+            " expires_at REAL NOT NULL,"
+            " last_access REAL NOT NULL)"
+        )
+        self._db.execute(
+            "CREATE INDEX IF NOT EXISTS ix_llm_responses_last_access ON llm_responses (last_access)"
+        )
+
+    def _get(self, key: str) -> Optional[str]:
+        now = time.time()
+        with self._lock:
+            row = self._db.execute(
+                "SELECT response, expires_at FROM llm_responses WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            if row[1] <= now:
+                self._db.execute("DELETE FROM llm_responses WHERE key = ?", (key,))
+                return None
+            self._db.execute("UPDATE llm_responses SET last_access = ? WHERE key = ?", (now, key))
+            return row[0]
+
+    def _set(self, key: str, response: str) -> int:
+        now = time.time()
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO llm_responses (key, response, expires_at, last_access)"
+                " VALUES (?, ?, ?, ?)",
+                (key, response, now + self.ttl, now),
+            )
+            expired = self._db.execute("DELETE FROM llm_responses WHERE expires_at <= ?", (now,)).rowcount
+            count = self._db.execute("SELECT COUNT(*) FROM llm_responses").fetchone()[0]
+            evicted = 0
+            if count > self.max_entries:
+                evicted = self._db.execute(
+                    "DELETE FROM llm_responses WHERE key IN ("
+                    " SELECT key FROM llm_responses ORDER BY last_access LIMIT ?)",
+                    (count - self.max_entries,),
+                ).rowcount
+            return expired + evicted
+
+    async def get(self, key: str) -> Optional[str]:
+        return await asyncio.to_thread(self._get, key)
+
+    async def set(self, key: str, response: str) -> int:
+        """Store a response; returns how many entries were evicted."""
+        return await asyncio.to_thread(self._set, key, response)
+
+    async def close(self) -> None:
+        with self._lock:
+            self._db.close()
+
+
+class RedisLLMCacheBackend:
+    """LLM completions in Redis, shared across workers, with TTL and LRU eviction."""
+
+    def __init__(self, redis_url: str, namespace: str = "llm_cache", ttl: int = DEFAULT_TTL,
+                 max_entries: int = DEFAULT_MAX_ENTRIES, client=None):
+        import redis.asyncio as aioredis
+
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.namespace = namespace
+        self._redis = client or aioredis.from_url(redis_url, decode_responses=True)
+        self._access_key = f"{namespace}:access"
+
+    def _key(self, key: str) -> str:
+        return f"{self.namespace}:{key}"
+
+    async def get(self, key: str) -> Optional[str]:
+        response = await self._redis.get(self._key(key))
+        if response is not None:
+            await self._redis.zadd(self._access_key, {key: time.time()})
+        return response
+
+    async def set(self, key: str, response: str) -> int:
+        async with self._redis.pipeline(transaction=False) as pipe:
+            pipe.set(self._key(key), response, ex=self.ttl)
+            pipe.zadd(self._access_key, {key: time.time()})
+            pipe.zcard(self._access_key)
+            _, _, count = await pipe.execute()
+        if count <= self.max_entries:
+            return 0
+        # Oldest accesses first; expired keys are trimmed from the index the same way
+        stale = await self._redis.zrange(self._access_key, 0, count - self.max_entries - 1)
+        if stale:
+            async with self._redis.pipeline(transaction=False) as pipe:
+                pipe.delete(*(self._key(k) for k in stale))
+                pipe.zrem(self._access_key, *stale)
+                await pipe.execute()
+        return len(stale)
+
+    async def close(self) -> None:
+        await self._redis.close()
+
+
+class LLMResponseCache:
+    """Single-flight completion cache with per-caller metrics."""
+
+    def __init__(self, backend=None):
+        self.backend = backend
+        self._in_flight: Dict[str, asyncio.Future] = {}
+        self._stats: Dict[str, Dict[str, float]] = defaultdict(
+            lambda: {"hits": 0, "misses": 0, "coalesced": 0, "errors": 0, "evictions": 0, "seconds_saved": 0.0}
+        )
+        self._latency: Dict[str, float] = {}
+
+    async def get_or_create(
+        self,
+        caller: str,
+        model: str,
+        messages: Messages,
+        create: Callable[[], Awaitable[str]],
+        temperature: Optional[float] = None,
+        max_tokens: Optional[int] = None,
+    ) -> str:
+        """
+        Return the cached completion for this request or call ``create``.
+
+        ``caller`` names the feature for the hit-rate metrics. Exceptions from
+        ``create`` propagate to every coalesced waiter and nothing is stored.
+        If the caller running ``create`` is cancelled, its waiters are not:
+        the first of them to wake runs the request in its place.
+        """
+        stats = self._stats[caller]
+        if self.backend is None:
+            stats["misses"] += 1
+            return await create()
+
+        key = llm_cache_key(model, messages, temperature, max_tokens)
+        coalesced = False
+        while (pending := self._in_flight.get(key)) is not None:
+            if not coalesced:
+                stats["coalesced"] += 1
+                coalesced = True
+            try:
+                return await asyncio.shield(pending)
+            except asyncio.CancelledError:
+                if not pending.cancelled():
+                    # This waiter was cancelled, not the request
+                    raise
+
+        future = asyncio.get_running_loop().create_future()
+        self._in_flight[key] = future
+        try:
+            cached = await self._backend_get(key)
+            if cached is not None:
+                stats["hits"] += 1
+                stats["seconds_saved"] += self._latency.get(caller, 0.0)
+                future.set_result(cached)
+                return cached
+
+            stats["misses"] += 1
+            started = time.perf_counter()
+            try:
+                response = await create()
+            except Exception as e:
+                stats["errors"] += 1
+                future.set_exception(e)
+                # Waiters see the error; mark it retrieved so it is not logged as unhandled
+                future.exception()
+                raise
+            elapsed = time.perf_counter() - started
+            previous = self._latency.get(caller)
+            self._latency[caller] = elapsed if previous is None else 0.8 * previous + 0.2 * elapsed
+            future.set_result(response)
+            stats["evictions"] += await self._backend_set(key, response)
+            return response
+        except asyncio.CancelledError:
+            # Clear the entry before waking the waiters, so one of them takes over
+            self._release(key, future)
+            future.cancel()
+            raise
+        finally:
+            self._release(key, future)
+
+    def _release(self, key: str, future: asyncio.Future) -> None:
+        if self._in_flight.get(key) is future:
+            del self._in_flight[key]
+
+    async def _backend_get(self, key: str) -> Optional[str]:
+        try:
+            return await self.backend.get(key)
+        except Exception as e:
+            logger.warning(f"LLM cache read failed: {e}")
+            return None
+
+    async def _backend_set(self, key: str, response: str) -> int:
+        try:
+            return await self.backend.set(key, response) or 0
+        except Exception as e:
+            logger.warning(f"LLM cache write failed: {e}")
+            return 0
+
+    def stats(self) -> Dict[str, Dict[str, float]]:
+        """Per-caller hits, misses, coalesced waits, errors and hit rate."""
+        report = {}
+        for caller, stats in self._stats.items():
+            lookups = stats["hits"] + stats["misses"] + stats["coalesced"]
+            report[caller] = {
+                **stats,
+                "hit_rate": (stats["hits"] + stats["coalesced"]) / lookups if lookups else 0.0,
+            }
+        return report
+
+    async def close(self) -> None:
+        if self.backend is not None:
+            await self.backend.close()
+
+
+_llm_cache: Optional[LLMResponseCache] = None
+
+
+def get_llm_cache() -> LLMResponseCache:
+    """
+    Process-wide cache configured from the environment.
+
+    LLM_CACHE_BACKEND is "redis" (REDIS_URL), "disk" (LLM_CACHE_PATH) or
+    "none"; LLM_CACHE_TTL and LLM_CACHE_MAX_ENTRIES bound both backends.
+    """
+    global _llm_cache
+    if _llm_cache is None:
+        kind = os.getenv("LLM_CACHE_BACKEND", "disk").lower()
+        ttl = int(os.getenv("LLM_CACHE_TTL", str(DEFAULT_TTL)))
+        max_entries = int(os.getenv("LLM_CACHE_MAX_ENTRIES", str(DEFAULT_MAX_ENTRIES)))
+        backend = None
+        try:
+            if kind == "redis":
+                backend = RedisLLMCacheBackend(
+                    os.getenv("REDIS_URL", "redis://localhost:6379/0"), ttl=ttl, max_entries=max_entries
+                )
+            elif kind == "disk":
+                backend = SQLiteLLMCacheBackend(
+                    os.getenv("LLM_CACHE_PATH", "data/llm_cache.sqlite3"), ttl=ttl, max_entries=max_entries
+                )
+        except Exception as e:
+            logger.warning(f"LLM response cache unavailable ({kind}): {e}")
+        _llm_cache = LLMResponseCache(backend)
+    return _llm_cache
@@ -0,0 +1,252 @@
+"""
+File responses for audio, video and images with byte ranges and revalidation.
+
+``MediaFileResponse`` serves a file with:
+
+- ``Range`` requests answered with ``206 Partial Content`` (a single range;
+  players seek with one range at a time, so a multi-range request gets the
+  whole file), ``416`` when the range is past the end, and ``If-Range``;
+- a strong ``ETag`` from the content's SHA-256: a blob's name, or for other
+  files a hash computed once per file version on a worker thread and cached
+  (until it is ready, a weak ``ETag`` from the size and modification time);
+- ``If-None-Match`` and ``If-Modified-Since`` answered with ``304``;
+- zero-copy sending when the server offers the ASGI ``zerocopysend`` or
+  ``pathsend`` extensions, else reads of ``CHUNK_SIZE`` off the event loop.
+"""
+import asyncio
+import hashlib
+import mimetypes
+import os
+import re
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from email.utils import formatdate, parsedate_to_datetime
+from pathlib import Path
+from typing import Dict, Optional, Tuple, Union
+from urllib.parse import quote
+
+from starlette.datastructures import Headers
+from starlette.responses import Response
+from starlette.types import Receive, Scope, Send
+
+from .blob_store import blob_digest
+
+# Bytes read per send when the server cannot send the file itself
+CHUNK_SIZE = 256 * 1024
+
+# Content hashes of non-blob files kept, by path and version
+HASH_CACHE_SIZE = 4096
+
+_RANGE = re.compile(r"bytes=(\d*)-(\d*)")
+
+_hashes: "OrderedDict[Tuple[str, int, int, int], str]" = OrderedDict()
+_pending: Dict[Tuple[str, int, int, int], Future] = {}
+_hashes_lock = threading.Lock()
+_hasher = ThreadPoolExecutor(max_workers=2, thread_name_prefix="media-hash")
+
+
+def _file_sha256(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        while chunk := f.read(1024 * 1024):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _hash_version(key: Tuple[str, int, int, int]) -> None:
+    try:
+        digest = _file_sha256(key[0])
+    finally:
+        with _hashes_lock:
+            _pending.pop(key, None)
+    with _hashes_lock:
+        _hashes[key] = digest
+        while len(_hashes) > HASH_CACHE_SIZE:
+            _hashes.popitem(last=False)
+
+
+def content_sha256(path: Union[str, Path], stat_result: os.stat_result) -> Optional[str]:
+    """
+    SHA-256 of the file if known: its name for a blob, else the cached hash
+    of this version.
+
+    Returns None while a non-blob file is still being hashed in the
+    background, so no request waits on reading the whole file.
+    """
+    digest = blob_digest(path)
+    if digest:
+        return digest
+    key = (os.fspath(path), stat_result.st_ino, stat_result.st_size, stat_result.st_mtime_ns)
+    with _hashes_lock:
+        digest = _hashes.get(key)
+        if digest is not None:
+            _hashes.move_to_end(key)
+        elif key not in _pending:
+            _pending[key] = _hasher.submit(_hash_version, key)
+    return digest
+
+
+def parse_range(header: str, size: int) -> Optional[Tuple[int, int]]:
+    """
+    The ``(start, end)`` (end exclusive) of a single-range ``Range`` header.
+
+    Returns None for headers to ignore (malformed or several ranges), and
+    raises ValueError when the range lies entirely past the end of the file.
+    """
+    match = _RANGE.fullmatch(header.strip())
+    if not match or match.group(1) == match.group(2) == "":
+        return None
+    first, last = match.groups()
+    if size == 0:
+        raise ValueError(header)
+    if first == "":
+        # Suffix range: the last N bytes
+        length = int(last)
+        if length == 0:
+            raise ValueError(header)
+        return max(size - length, 0), size
+    start = int(first)
+    end = min(int(last) + 1, size) if last else size
+    if last and int(last) < start:
+        return None
+    if start >= size:
+        raise ValueError(header)
+    return start, end
+
+
+def _opaque(tag: str) -> str:
+    return tag[2:] if tag.startswith("W/") else tag
+
+
+def _etag_matches(header: str, etag: str) -> bool:
+    """Weak comparison, as If-None-Match uses."""
+    if header.strip() == "*":
+        return True
+    tags = [tag.strip() for tag in header.split(",")]
+    return any(_opaque(tag) == _opaque(etag) for tag in tags)
+
+
+def _not_modified_since(header: str, mtime: float) -> bool:
+    try:
+        return int(mtime) <= parsedate_to_datetime(header).timestamp()
+    except (TypeError, ValueError):
+        return False
+
+
+class MediaFileResponse(Response):
+    """
+    Serve a file with range and conditional request support.
+
+    Args:
+        path: File to send
+        media_type: Content type; guessed from ``filename`` or ``path`` if omitted
+        filename: Name for Content-Disposition, when set
+        content_disposition_type: "inline" (play in place) or "attachment"
+        cache_control: Cache-Control header value
+        sendfile: Let the server send the file itself when it offers to
+    """
+
+    def __init__(
+        self,
+        path: Union[str, Path],
+        media_type: Optional[str] = None,
+        filename: Optional[str] = None,
+        content_disposition_type: str = "inline",
+        cache_control: str = "private, no-cache",
+        headers: Optional[Dict[str, str]] = None,
+        sendfile: bool = True
+    ):
+        self.path = os.fspath(path)
+        self.status_code = 200
+        self.media_type = media_type or mimetypes.guess_type(filename or self.path)[0] or "application/octet-stream"
+        self.background = None
+        self.sendfile = sendfile
+        self.init_headers(headers)
+        self.headers.setdefault("accept-ranges", "bytes")
+        self.headers.setdefault("cache-control", cache_control)
+        if filename:
+            quoted = quote(filename)
+            if quoted != filename:
+                disposition = f"{content_disposition_type}; filename*=utf-8''{quoted}"
+            else:
+                disposition = f'{content_disposition_type}; filename="{filename}"'
+            self.headers.setdefault("content-disposition", disposition)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        stat_result = await asyncio.to_thread(os.stat, self.path)
+        digest = content_sha256(self.path, stat_result)
+        weak_etag = f'W/"{stat_result.st_size:x}-{stat_result.st_mtime_ns:x}"'
+        etag = f'"{digest}"' if digest else weak_etag
+        last_modified = formatdate(stat_result.st_mtime, usegmt=True)
+        self.headers["etag"] = etag
+        self.headers["last-modified"] = last_modified
+
+        request = Headers(scope=scope)
+        size = stat_result.st_size
+        start, end = 0, size
+
+        if_none_match = request.get("if-none-match")
+        if_modified_since = request.get("if-modified-since")
+        # The weak tag still names this version once the hash is known
+        if (if_none_match is not None and any(_etag_matches(if_none_match, tag) for tag in (etag, weak_etag))) or (
+            if_none_match is None and if_modified_since and _not_modified_since(if_modified_since, stat_result.st_mtime)
+        ):
+            return await self._send_headers(send, 304, drop=("content-type", "content-length", "content-disposition"))
+
+        range_header = request.get("range")
+        if_range = request.get("if-range")
+        # If-Range needs a strong match, which a weak ETag never gives
+        if_range_tags = (last_modified,) if etag.startswith("W/") else (etag, last_modified)
+        if range_header and (if_range is None or if_range.strip() in if_range_tags):
+            try:
+                span = parse_range(range_header, size)
+            except ValueError:
+                self.headers["content-range"] = f"bytes */{size}"
+                self.headers["content-length"] = "0"
+                return await self._send_headers(send, 416, drop=("content-type", "content-disposition"))
+            if span:
+                start, end = span
+                self.status_code = 206
+                self.headers["content-range"] = f"bytes {start}-{end - 1}/{size}"
+
+        self.headers["content-length"] = str(end - start)
+        await send({"type": "http.response.start", "status": self.status_code, "headers": self.raw_headers})
+        if scope["method"].upper() == "HEAD":
+            await send({"type": "http.response.body", "body": b"", "more_body": False})
+            return
+        await self._send_body(scope, send, start, end, size)
+
+    async def _send_headers(self, send: Send, status_code: int, drop=()) -> None:
+        """A body-less response with the headers so far, minus ``drop``."""
+        for name in drop:
+            if name in self.headers:
+                del self.headers[name]
+        await send({"type": "http.response.start", "status": status_code, "headers": self.raw_headers})
+        await send({"type": "http.response.body", "body": b"", "more_body": False})
+
+    async def _send_body(self, scope: Scope, send: Send, start: int, end: int, size: int) -> None:
+        extensions = scope.get("extensions") or {}
+        with open(self.path, "rb") as f:
+            if self.sendfile and "http.response.zerocopysend" in extensions:
+                await send({
+                    "type": "http.response.zerocopysend",
+                    "file": f.fileno(),
+                    "offset": start,
+                    "count": end - start,
+                    "more_body": False,
+                })
+                return
+            if self.sendfile and "http.response.pathsend" in extensions and (start, end) == (0, size):
+                await send({"type": "http.response.pathsend", "path": self.path})
+                return
+
+            fd = f.fileno()
+            offset = start
+            while True:
+                chunk = await asyncio.to_thread(os.pread, fd, min(CHUNK_SIZE, end - offset), offset)
+                offset += len(chunk)
+                more = bool(chunk) and offset < end
+                await send({"type": "http.response.body", "body": chunk, "more_body": more})
+                if not more:
+                    return
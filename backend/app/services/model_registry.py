@@ -0,0 +1,240 @@
+"""Process-wide registry for large ML models (Whisper, pyannote, embeddings).
+
+Services ask the registry for a model instead of loading their own copy.
+Models are loaded lazily on first ``acquire`` and shared by every caller
+asking for the same ``(kind, name, device, compute_type)``; a reference
+count decides when an idle model can be dropped again. Models loaded with
+``preload`` are pinned for the life of the process.
+
+When the server (or a transcription pool) forks worker processes after
+preloading, the children inherit the parent's registry and reuse the CPU
+weights copy-on-write instead of loading them again. ``prepare_for_fork``
+moves everything tracked by the garbage collector into the permanent
+generation so collections in the children do not touch, and therefore
+copy, those pages.
+"""
+import gc
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Iterable, Iterator, List, NamedTuple, Optional
+
+logger = logging.getLogger(__name__)
+
+ModelLoader = Callable[[str, str, str], Any]
+
+
+class ModelKey(NamedTuple):
+    kind: str
+    name: str
+    device: str = "cpu"
+    compute_type: str = "float32"
+
+    @classmethod
+    def parse(cls, spec: str) -> "ModelKey":
+        """Parse ``kind:name[:device[:compute_type]]``, e.g. ``whisper:base:cpu``."""
+        parts = [part.strip() for part in spec.split(":")]
+        if len(parts) < 2 or not all(parts):
+            raise ValueError(f"Invalid model spec {spec!r}, expected kind:name[:device[:compute_type]]")
+        return cls(*parts[:4])
+
+
+@dataclass
+class _Entry:
+    key: ModelKey
+    lock: threading.Lock = field(default_factory=threading.Lock)
+    model: Any = None
+    refcount: int = 0
+    pinned: bool = False
+    loaded_at: Optional[float] = None
+    load_seconds: Optional[float] = None
+
+
+def load_whisper(name: str, device: str, compute_type: str) -> Any:
+    import whisper
+
+    model = whisper.load_model(name, device=device)
+    if compute_type == "float16" and device != "cpu":
+        model = model.half()
+    return model
+
+
+def load_pyannote(name: str, device: str, compute_type: str) -> Any:
+    import os
+
+    from pyannote.audio import Pipeline
+
+    pipeline = Pipeline.from_pretrained(name, use_auth_token=os.getenv("HUGGINGFACE_TOKEN"))
+    if pipeline is None:
+        raise RuntimeError(f"Could not load diarization pipeline {name!r}")
+    if device != "cpu":
+        import torch
+
+        pipeline.to(torch.device(device))
+    return pipeline
+
+
+def load_sentence_transformer(name: str, device: str, compute_type: str) -> Any:
+    from sentence_transformers import SentenceTransformer
+
+    return SentenceTransformer(name, device=device)
+
+
+def _approx_bytes(model: Any) -> Optional[int]:
+    """Parameter memory of a torch module (or pyannote pipeline), if it exposes one."""
+    modules = [model]
+    if not hasattr(model, "parameters") and hasattr(model, "_models"):
+        modules = list(getattr(model, "_models").values())
+    total = 0
+    try:
+        for module in modules:
+            for tensor in module.parameters():
+                total += tensor.numel() * tensor.element_size()
+    except Exception:
+        return None
+    return total
+
+
+class ModelRegistry:
+    """Lazily loaded, reference-counted models shared across the process."""
+
+    def __init__(self):
+        self._loaders: Dict[str, ModelLoader] = {}
+        self._entries: Dict[ModelKey, _Entry] = {}
+        self._inference_locks: Dict[ModelKey, threading.Lock] = {}
+        self._lock = threading.Lock()
+
+    def register_loader(self, kind: str, loader: ModelLoader) -> None:
+        """Register ``loader(name, device, compute_type)`` for a model kind."""
+        self._loaders[kind] = loader
+
+    def _entry(self, key: ModelKey) -> _Entry:
+        if key.kind not in self._loaders:
+            raise KeyError(f"No loader registered for model kind {key.kind!r}")
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                entry = self._entries[key] = _Entry(key)
+            return entry
+
+    def _load(self, entry: _Entry) -> Any:
+        # Per-model lock: concurrent first users wait for one load instead of
+        # each loading a copy, while other models can load in parallel.
+        with entry.lock:
+            if entry.model is None:
+                key = entry.key
+                logger.info("Loading %s model %s on %s (%s)", key.kind, key.name, key.device, key.compute_type)
+                started = time.perf_counter()
+                entry.model = self._loaders[key.kind](key.name, key.device, key.compute_type)
+                entry.load_seconds = time.perf_counter() - started
+                entry.loaded_at = time.time()
+            return entry.model
+
+    def acquire(self, kind: str, name: str, device: str = "cpu", compute_type: str = "float32") -> Any:
+        """Return the shared model, loading it on first use, and take a reference."""
+        entry = self._entry(ModelKey(kind, name, device, compute_type))
+        with self._lock:
+            entry.refcount += 1
+        try:
+            return self._load(entry)
+        except Exception:
+            with self._lock:
+                entry.refcount -= 1
+                if entry.refcount == 0 and entry.model is None and not entry.pinned:
+                    self._entries.pop(entry.key, None)
+            raise
+
+    def release(self, kind: str, name: str, device: str = "cpu", compute_type: str = "float32") -> None:
+        """Drop a reference; unpinned models are unloaded when the last one goes."""
+        key = ModelKey(kind, name, device, compute_type)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry.refcount == 0:
+                return
+            entry.refcount -= 1
+            if entry.refcount > 0 or entry.pinned:
+                return
+            del self._entries[key]
+        logger.info("Unloading %s model %s on %s (%s)", key.kind, key.name, key.device, key.compute_type)
+        entry.model = None
+        if key.device.startswith("cuda"):
+            try:
+                import torch
+
+                torch.cuda.empty_cache()
+            except ImportError:
+                pass
+
+    def inference_lock(self, kind: str, name: str, device: str = "cpu", compute_type: str = "float32") -> threading.Lock:
+        """
+        Lock to hold while running a shared model.
+
+        Whisper installs per-call hooks on the model while decoding, so two
+        decodes on one instance must not overlap even from different services.
+        """
+        key = ModelKey(kind, name, device, compute_type)
+        with self._lock:
+            return self._inference_locks.setdefault(key, threading.Lock())
+
+    @contextmanager
+    def lease(self, kind: str, name: str, device: str = "cpu", compute_type: str = "float32") -> Iterator[Any]:
+        """``with registry.lease(...) as model:`` holds a reference for the block."""
+        model = self.acquire(kind, name, device, compute_type)
+        try:
+            yield model
+        finally:
+            self.release(kind, name, device, compute_type)
+
+    def preload(self, specs: Iterable[str]) -> List[ModelKey]:
+        """
+        Load and pin models given as ``kind:name[:device[:compute_type]]``.
+
+        Failures are logged and skipped so a missing optional model does not
+        stop the server from starting.
+        """
+        loaded = []
+        for spec in specs:
+            try:
+                key = ModelKey.parse(spec)
+                entry = self._entry(key)
+                self._load(entry)
+            except Exception as e:
+                logger.warning(f"Could not preload model {spec!r}: {e}")
+                continue
+            entry.pinned = True
+            loaded.append(key)
+        return loaded
+
+    def resident(self) -> List[Dict[str, Any]]:
+        """Describe every loaded model, for the admin endpoint."""
+        with self._lock:
+            entries = [entry for entry in self._entries.values() if entry.model is not None]
+        return [
+            {
+                **entry.key._asdict(),
+                "refcount": entry.refcount,
+                "pinned": entry.pinned,
+                "loaded_at": entry.loaded_at,
+                "load_seconds": entry.load_seconds,
+                "approx_bytes": _approx_bytes(entry.model),
+            }
+            for entry in entries
+        ]
+
+    def prepare_for_fork(self) -> None:
+        """Freeze the GC generations so forked children share model pages copy-on-write."""
+        gc.collect()
+        gc.freeze()
+
+
+model_registry = ModelRegistry()
+model_registry.register_loader("whisper", load_whisper)
+model_registry.register_loader("pyannote", load_pyannote)
+model_registry.register_loader("sentence_transformer", load_sentence_transformer)
+
+
+def get_model_registry() -> ModelRegistry:
+    """Get the process-wide model registry."""
+    return model_registry
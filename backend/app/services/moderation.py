@@ -0,0 +1,281 @@
+"""Single-pass content moderation.
+
+Moderation rules are word and phrase lists per category. Instead of running
+one regular expression per rule over the whole text, the text is split into
+tokens once (words, hyphens and other punctuation; whitespace only
+separates) and every rule is matched by one Aho-Corasick automaton over that
+token stream, so the cost is linear in the input whatever the number of
+rules.
+
+Rule syntax:
+
+- ``"bomb"`` matches the whole word, case-insensitively.
+- ``"tortur*"`` matches any word starting with the stem.
+- ``"white supremac*"`` matches words separated by whitespace only;
+  ``"self-harm"`` requires the hyphen.
+- ``Near(first, second, max_gap)`` matches a word from ``first`` followed by
+  a word from ``second`` with at most ``max_gap`` words in between.
+
+``ModerationScanner`` runs the automaton incrementally, so a streamed
+response is checked chunk by chunk; a word split across two chunks is
+carried over to the next one.
+"""
+import re
+from collections import deque
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple, Union
+
+_TOKEN_RE = re.compile(r"\w+|-|[^\w\s-]+")
+_WORD_RE = re.compile(r"\w+")
+
+# Longest partial word carried between chunks; longer runs are scanned as they are
+MAX_CARRY = 256
+
+# Token classes that are not rule symbols; the spaces keep them apart from any token
+_OTHER = " other"  # a word no rule mentions
+_BREAK = " break"  # punctuation other than a hyphen
+
+
+@dataclass(frozen=True)
+class Near:
+    """A word from ``first`` followed within ``max_gap`` words by one from ``second``.
+
+    Only whitespace may separate the words; both sets are matched exactly.
+    """
+    first: Tuple[str, ...]
+    second: Tuple[str, ...]
+    max_gap: int = 3
+
+    def __str__(self) -> str:
+        return f"({'|'.join(self.first)}) ~{self.max_gap} ({'|'.join(self.second)})"
+
+
+@dataclass(frozen=True)
+class Violation:
+    """A rule that matched."""
+    category: str
+    rule: str
+
+
+Rule = Union[str, Near]
+
+DEFAULT_RULES: Dict[str, List[Rule]] = {
+    'hate_speech': [
+        Near(("kill", "hurt", "harm", "attack", "assault", "murder", "rape", "torture", "abuse"),
+             ("you", "them", "us", "him", "her", "me")),
+        "nazi", "hitler", "kkk", "white supremac*", "racist", "sexist",
+        "homophob*", "transphob*", "islamophob*",
+    ],
+    'violence': [
+        "kill", "murder", "assassinat*", "behead", "tortur*", "maim", "mutilat*", "dismember",
+        "strangl*", "suffocat*", "stab", "shoot", "bomb", "explod*", "arson", "burn alive",
+        "lynch", "execute", "massacre", "genocide",
+    ],
+    'self_harm': [
+        "suicid*", "kill myself", "end it all", "want to die", "cutting myself",
+        "self harm", "self-harm", "selfharm", "self injury", "self-injury", "selfinjury",
+    ],
+    'harassment': [
+        "rape", "raping", "rapist", "pedophil*", "child abuse", "childabuse", "incest",
+        "molest*", "pedo",
+    ],
+}
+
+
+def _parse_rule(rule: str) -> Tuple[str, ...]:
+    """Rule text to symbols: words, "stem*" and "-"."""
+    symbols: List[str] = []
+    for token in _TOKEN_RE.findall(rule.lower()):
+        if token == "*" and symbols and symbols[-1] != "-":
+            symbols[-1] += "*"
+        elif token == "-" or _WORD_RE.match(token):
+            symbols.append(token)
+        else:
+            raise ValueError(f"Unsupported moderation rule: {rule!r}")
+    if not symbols:
+        raise ValueError(f"Empty moderation rule: {rule!r}")
+    return tuple(symbols)
+
+
+class ModerationAutomaton:
+    """Compiled rules; categories earlier in ``rules`` take precedence."""
+
+    def __init__(self, rules: Optional[Dict[str, List[Rule]]] = None):
+        rules = DEFAULT_RULES if rules is None else rules
+        self.categories = list(rules)
+        phrases: List[Tuple[Tuple[str, ...], int, str]] = []
+        nears: List[Tuple[frozenset, frozenset, int, int, str]] = []
+        for priority, (category, entries) in enumerate(rules.items()):
+            for entry in entries:
+                if isinstance(entry, Near):
+                    first, second = (frozenset(w.lower() for w in words) for words in (entry.first, entry.second))
+                    if any(not _WORD_RE.fullmatch(w) for w in first | second):
+                        raise ValueError(f"Near rules take single words: {entry}")
+                    nears.append((first, second, entry.max_gap, priority, str(entry)))
+                else:
+                    phrases.append((_parse_rule(entry), priority, entry))
+
+        symbols = {s for phrase, _, _ in phrases for s in phrase}
+        self._words = {s for s in symbols if not s.endswith("*")}
+        stems = sorted(s[:-1] for s in symbols if s.endswith("*"))
+        for stem in stems:
+            clashes = [w for w in self._words | set(stems) if w != stem and w.startswith(stem)]
+            if clashes:
+                raise ValueError(f"Moderation stem {stem!r}* also matches {clashes}")
+        self._stems = {stem: stem + "*" for stem in stems}
+        self._stem_lengths = sorted({len(stem) for stem in stems}, reverse=True)
+        self._stem_heads = {stem[:3] for stem in stems}
+        self._symbol_cache: Dict[str, str] = {}
+
+        self._nears = nears
+        self._near_words = {w for first, second, *_ in nears for w in first | second}
+        self._build(phrases)
+
+    def _build(self, phrases: List[Tuple[Tuple[str, ...], int, str]]) -> None:
+        """Aho-Corasick goto, failure and output tables over rule symbols."""
+        self._goto: List[Dict[str, int]] = [{}]
+        self._out: List[List[Tuple[int, str]]] = [[]]
+        for phrase, priority, rule in phrases:
+            state = 0
+            for symbol in phrase:
+                if symbol not in self._goto[state]:
+                    self._goto.append({})
+                    self._out.append([])
+                    self._goto[state][symbol] = len(self._goto) - 1
+                state = self._goto[state][symbol]
+            self._out[state].append((priority, rule))
+
+        self._fail = [0] * len(self._goto)
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for symbol, child in self._goto[state].items():
+                queue.append(child)
+                fallback = self._fail[state]
+                while fallback and symbol not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                self._fail[child] = self._goto[fallback].get(symbol, 0)
+                self._out[child] = self._out[child] + self._out[self._fail[child]]
+
+    def symbol(self, token: str) -> str:
+        """The rule symbol for a lowercased token, or _OTHER/_BREAK."""
+        if token in self._words or token == "-":
+            symbol = token
+        elif not _WORD_RE.match(token):
+            symbol = _BREAK
+        else:
+            symbol = _OTHER
+            if token[:3] in self._stem_heads:
+                for length in self._stem_lengths:
+                    stem = self._stems.get(token[:length])
+                    if stem:
+                        symbol = stem
+                        break
+        if len(self._symbol_cache) >= 100_000:
+            self._symbol_cache.clear()
+        self._symbol_cache[token] = symbol
+        return symbol
+
+    def scanner(self) -> "ModerationScanner":
+        return ModerationScanner(self)
+
+    def check(self, text: str) -> Optional[Violation]:
+        """The highest-precedence violation in ``text``, if any."""
+        scanner = self.scanner()
+        found = scanner.feed(text)
+        tail = scanner.finish()
+        if found and tail:
+            return min(found, tail, key=lambda v: self.categories.index(v.category))
+        return found or tail
+
+
+class ModerationScanner:
+    """Incremental scanner for one text stream."""
+
+    def __init__(self, automaton: ModerationAutomaton):
+        self.automaton = automaton
+        self._state = 0
+        self._tail = ""
+        self._words = 0
+        self._last_break = 0
+        # Per Near rule: word count at its last ``first`` word
+        self._near_first: List[int] = [-1] * len(automaton._nears)
+
+    def feed(self, text: str) -> Optional[Violation]:
+        """Scan the next chunk; returns the highest-precedence violation it completes."""
+        text = self._tail + text.lower()
+        pieces = text.split()
+        self._tail = ""
+        if pieces and not text[-1].isspace() and len(pieces[-1]) < MAX_CARRY:
+            # The chunk may end mid-word; finish that run with the next chunk
+            self._tail = pieces.pop()
+        return self._scan(pieces)
+
+    def finish(self) -> Optional[Violation]:
+        """Scan whatever was carried over at the end of the stream."""
+        pieces, self._tail = ([self._tail] if self._tail else []), ""
+        return self._scan(pieces)
+
+    def _scan(self, pieces: List[str]) -> Optional[Violation]:
+        """Run the automaton over whitespace-separated pieces of lowercased text."""
+        automaton = self.automaton
+        goto, fail, out = automaton._goto, automaton._fail, automaton._out
+        cached, symbol_of = automaton._symbol_cache.get, automaton.symbol
+        near_words = automaton._near_words
+        tokenize = _TOKEN_RE.findall
+        state = self._state
+        best: Optional[Tuple[int, str]] = None
+
+        for piece in pieces:
+            # Most pieces are plain words; only the rest need the tokenizer
+            for token in (piece,) if piece.isalnum() else tokenize(piece):
+                symbol = cached(token) or symbol_of(token)
+                if symbol is _BREAK or symbol == "-":
+                    # Phrases may span a hyphen, Near rules only whitespace
+                    self._last_break = self._words
+                    if symbol is _BREAK:
+                        state = 0
+                        continue
+                else:
+                    self._words += 1
+                    if token in near_words:
+                        match = self._near(token)
+                        if match and (best is None or match[0] < best[0]):
+                            best = match
+                    if symbol is _OTHER:
+                        state = 0
+                        continue
+
+                while state and symbol not in goto[state]:
+                    state = fail[state]
+                state = goto[state].get(symbol, 0)
+                for match in out[state]:
+                    if best is None or match[0] < best[0]:
+                        best = match
+
+        self._state = state
+        if best is None:
+            return None
+        return Violation(automaton.categories[best[0]], best[1])
+
+    def _near(self, token: str) -> Optional[Tuple[int, str]]:
+        best = None
+        for i, (first, second, max_gap, priority, rule) in enumerate(self.automaton._nears):
+            start = self._near_first[i]
+            if token in second and start > self._last_break and self._words - start <= max_gap + 1:
+                if best is None or priority < best[0]:
+                    best = (priority, rule)
+            if token in first:
+                self._near_first[i] = self._words
+        return best
+
+
+_automaton: Optional[ModerationAutomaton] = None
+
+
+def get_moderation_automaton() -> ModerationAutomaton:
+    """Process-wide automaton for the default rules."""
+    global _automaton
+    if _automaton is None:
+        _automaton = ModerationAutomaton()
+    return _automaton
@@ -0,0 +1,255 @@
+"""
+Resumable chunked uploads (tus 1.0 core protocol).
+
+A client creates an upload with its total length, then sends the bytes in
+as many PATCH requests as it needs, each starting at the offset the server
+reports. An interrupted request keeps whatever reached disk, so the client
+resumes from there instead of starting over.
+
+Each upload is a data file plus a small JSON sidecar under ``root``. The
+data file's size is the upload offset, so nothing else has to be written
+per chunk. The SHA-256 is updated as chunks arrive; a worker that did not
+see the earlier chunks rehashes the data already on disk once before
+appending.
+"""
+import asyncio
+import fcntl
+import hashlib
+import json
+import logging
+import os
+import re
+import time
+import uuid
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import AsyncIterator, Dict, Optional, Tuple
+
+from fastapi import HTTPException, status
+
+from app.services.file_upload import CHUNK_SIZE, MAX_UPLOAD_BYTES, StoredFile, upload_too_large
+
+logger = logging.getLogger(__name__)
+
+# Ids double as file names, so nothing else may reach the filesystem
+_UPLOAD_ID = re.compile(r"[0-9a-f]{32}")
+
+
+@dataclass
+class ResumableUpload:
+    """State of one resumable upload."""
+    id: str
+    length: int
+    user_id: str
+    metadata: Dict[str, str] = field(default_factory=dict)
+    created_at: float = 0.0
+    offset: int = 0
+    sha256: Optional[str] = None
+
+    @property
+    def complete(self) -> bool:
+        return self.offset == self.length
+
+
+class ResumableUploadStore:
+    """Upload files and their sidecars under ``root``."""
+
+    def __init__(
+        self,
+        root: Path,
+        max_bytes: int = MAX_UPLOAD_BYTES,
+        expires_after: float = 24 * 3600,
+        chunk_size: int = CHUNK_SIZE
+    ):
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self.expires_after = expires_after
+        self.chunk_size = chunk_size
+        # upload id -> (offset hashed so far, running SHA-256)
+        self._hashers: Dict[str, Tuple[int, "hashlib._Hash"]] = {}
+
+    def _data_path(self, upload_id: str) -> Path:
+        return self.root / f"{upload_id}.bin"
+
+    def _info_path(self, upload_id: str) -> Path:
+        return self.root / f"{upload_id}.json"
+
+    def _write_info(self, upload: ResumableUpload) -> None:
+        info = asdict(upload)
+        del info["offset"]
+        tmp = self._info_path(upload.id).with_suffix(".tmp")
+        tmp.write_text(json.dumps(info))
+        os.replace(tmp, self._info_path(upload.id))
+
+    def create(self, length: int, user_id: str, metadata: Optional[Dict[str, str]] = None) -> ResumableUpload:
+        """Start an upload of ``length`` bytes."""
+        if length < 0:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid Upload-Length")
+        if length > self.max_bytes:
+            raise upload_too_large(self.max_bytes)
+        upload = ResumableUpload(
+            id=uuid.uuid4().hex,
+            length=length,
+            user_id=str(user_id),
+            metadata=metadata or {},
+            created_at=time.time(),
+            sha256=hashlib.sha256().hexdigest() if length == 0 else None
+        )
+        self._data_path(upload.id).touch()
+        self._write_info(upload)
+        return upload
+
+    def get(self, upload_id: str, user_id: Optional[str] = None) -> ResumableUpload:
+        """The upload's current state; 404 if it is unknown or belongs to someone else."""
+        if not _UPLOAD_ID.fullmatch(upload_id):
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Upload not found")
+        try:
+            info = json.loads(self._info_path(upload_id).read_text())
+            offset = self._data_path(upload_id).stat().st_size
+        except (OSError, ValueError):
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Upload not found")
+        upload = ResumableUpload(**info, offset=offset)
+        if user_id is not None and upload.user_id != str(user_id):
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Upload not found")
+        return upload
+
+    async def append(
+        self,
+        upload_id: str,
+        offset: int,
+        chunks: AsyncIterator[bytes],
+        user_id: Optional[str] = None
+    ) -> ResumableUpload:
+        """
+        Append a request body at ``offset``, which must be the current offset.
+
+        Bytes that reach disk before the body is cut off are kept. A body
+        running past the declared length is rejected with 413 once it gets
+        there; a concurrent append to the same upload gets 409.
+        """
+        upload = self.get(upload_id, user_id)
+        if offset != upload.offset:
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail=f"Upload-Offset {offset} does not match the current offset {upload.offset}"
+            )
+
+        out = open(self._data_path(upload_id), "ab")
+        try:
+            try:
+                # flock also excludes other workers appending to the same file
+                fcntl.flock(out.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="Upload is busy")
+            # The offset may have moved while the lock was being taken
+            if out.tell() != offset:
+                raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="Upload offset changed")
+
+            digest = await self._hasher(upload_id, offset)
+            try:
+                async for chunk in chunks:
+                    if not chunk:
+                        continue
+                    if offset + len(chunk) > upload.length:
+                        raise upload_too_large(upload.length)
+                    await asyncio.to_thread(self._write, out, digest, chunk)
+                    offset += len(chunk)
+            finally:
+                self._hashers[upload_id] = (offset, digest)
+        finally:
+            out.close()
+
+        upload.offset = offset
+        if upload.complete:
+            upload.sha256 = digest.hexdigest()
+            self._hashers.pop(upload_id, None)
+            self._write_info(upload)
+        return upload
+
+    @staticmethod
+    def _write(out, digest, chunk: bytes) -> None:
+        out.write(chunk)
+        out.flush()
+        # Only once the bytes are on disk, so the cached digest never runs ahead of the file
+        digest.update(chunk)
+
+    async def _hasher(self, upload_id: str, offset: int):
+        """A SHA-256 covering the first ``offset`` bytes of the upload."""
+        cached = self._hashers.pop(upload_id, None)
+        if cached is not None and cached[0] == offset:
+            return cached[1]
+        return await asyncio.to_thread(self._rehash, upload_id, offset)
+
+    def _rehash(self, upload_id: str, offset: int):
+        digest = hashlib.sha256()
+        with open(self._data_path(upload_id), "rb") as f:
+            remaining = offset
+            while remaining:
+                chunk = f.read(min(self.chunk_size, remaining))
+                if not chunk:
+                    break
+                digest.update(chunk)
+                remaining -= len(chunk)
+        return digest
+
+    def claim(self, upload_id: str, dest: Path, user_id: Optional[str] = None) -> StoredFile:
+        """Move a completed upload to ``dest`` and forget it."""
+        upload = self.get(upload_id, user_id)
+        if upload.complete and upload.sha256 is None:
+            # The last append finished writing but not its sidecar
+            upload.sha256 = self._rehash(upload_id, upload.length).hexdigest()
+        if not upload.complete:
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail=f"Upload is incomplete ({upload.offset} of {upload.length} bytes)"
+            )
+        Path(dest).parent.mkdir(parents=True, exist_ok=True)
+        os.replace(self._data_path(upload_id), dest)
+        self._info_path(upload_id).unlink(missing_ok=True)
+        return StoredFile(path=Path(dest), size=upload.length, sha256=upload.sha256)
+
+    def delete(self, upload_id: str, user_id: Optional[str] = None) -> None:
+        """Abandon an upload."""
+        self.get(upload_id, user_id)
+        self._remove(upload_id)
+
+    def _remove(self, upload_id: str) -> None:
+        self._hashers.pop(upload_id, None)
+        self._data_path(upload_id).unlink(missing_ok=True)
+        self._info_path(upload_id).unlink(missing_ok=True)
+
+    def purge_expired(self, now: Optional[float] = None) -> int:
+        """Remove uploads untouched for ``expires_after`` seconds; returns how many."""
+        cutoff = (now or time.time()) - self.expires_after
+        purged = 0
+        for info_path in self.root.glob("*.json"):
+            upload_id = info_path.stem
+            data_path = self._data_path(upload_id)
+            try:
+                last_touched = max(info_path.stat().st_mtime, data_path.stat().st_mtime)
+            except FileNotFoundError:
+                last_touched = 0
+            if last_touched < cutoff:
+                self._remove(upload_id)
+                purged += 1
+        if purged:
+            logger.info(f"Purged {purged} expired resumable uploads")
+        return purged
+
+
+_store: Optional[ResumableUploadStore] = None
+
+
+def get_resumable_upload_store() -> ResumableUploadStore:
+    """
+    Process-wide store under RESUMABLE_UPLOAD_DIR, expiring uploads idle for
+    RESUMABLE_UPLOAD_EXPIRY seconds.
+    """
+    global _store
+    if _store is None:
+        _store = ResumableUploadStore(
+            Path(os.getenv("RESUMABLE_UPLOAD_DIR", "uploads/resumable")),
+            expires_after=float(os.getenv("RESUMABLE_UPLOAD_EXPIRY", str(24 * 3600))),
+        )
+    return _store
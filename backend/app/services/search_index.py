@@ -0,0 +1,326 @@
+"""Full-text search over sessions and tasks.
+
+Searchable rows are mirrored into one index, kept current by database
+triggers on the source tables so every insert, update and delete path is
+covered, including raw SQL writes:
+
+- SQLite: an FTS5 table ``search_fts`` (title, body; porter stemming) whose
+  rowids map to ``search_docs`` (doc_type, doc_id, owner_id). Results are
+  ranked with BM25 (title weighted 10x body) and ``snippet()`` highlights
+  the matched terms.
+- PostgreSQL: a ``search_documents`` table with a generated, weighted
+  ``tsvector`` and a GIN index. Results are ranked with ``ts_rank_cd``
+  (Postgres has no built-in BM25) and highlighted with ``ts_headline``.
+
+``install_search_index`` creates the index, triggers and a backfill of
+existing rows; it is idempotent, run by the Alembic migration and lazily on
+first search. Matches are wrapped in ``<mark>`` tags.
+"""
+import logging
+import re
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import inspect, text
+from sqlalchemy.engine import Connection
+
+logger = logging.getLogger(__name__)
+
+HIGHLIGHT_START = "<mark>"
+HIGHLIGHT_END = "</mark>"
+
+
+@dataclass(frozen=True)
+class SearchSource:
+    """A table whose rows are indexed; expressions are SQL over the row alias ``{row}``."""
+    table: str
+    key: str
+    title: str
+    body: str
+    owner: Optional[str] = None
+
+
+SOURCES: Dict[str, SearchSource] = {
+    "session": SearchSource(
+        table="sessions",
+        key="session_id",
+        title="coalesce({row}.module_code, '') || ' ' || coalesce({row}.chapters, '')",
+        body=(
+            "coalesce({row}.lecture_content, '') || ' ' || coalesce({row}.textbook_content, '')"
+            " || ' ' || coalesce({row}.fused_notes, '')"
+        ),
+    ),
+    "task": SearchSource(
+        table="user_tasks",
+        key="id",
+        owner="user_id",
+        title="coalesce({row}.title, '')",
+        body="coalesce({row}.description, '')",
+    ),
+}
+
+
+@dataclass
+class SearchHit:
+    doc_type: str
+    doc_id: str
+    title: str
+    snippet: str
+    score: float
+
+
+def _values(source: SearchSource, row: str) -> Tuple[str, str, str, str]:
+    owner = f"CAST({row}.{source.owner} AS TEXT)" if source.owner else "NULL"
+    return (
+        f"CAST({row}.{source.key} AS TEXT)",
+        owner,
+        source.title.format(row=row),
+        source.body.format(row=row),
+    )
+
+
+def _sqlite_ddl(doc_type: str, source: SearchSource) -> List[str]:
+    def upsert(row: str) -> str:
+        doc_id, owner, title, body = _values(source, row)
+        lookup = f"(SELECT rowid FROM search_docs WHERE doc_type = '{doc_type}' AND doc_id = {doc_id})"
+        return (
+            f"INSERT OR IGNORE INTO search_docs (doc_type, doc_id, owner_id) VALUES ('{doc_type}', {doc_id}, {owner});"
+            f" UPDATE search_docs SET owner_id = {owner} WHERE rowid = {lookup};"
+            f" DELETE FROM search_fts WHERE rowid = {lookup};"
+            f" INSERT INTO search_fts (rowid, title, body) VALUES ({lookup}, {title}, {body});"
+        )
+
+    def remove(row: str) -> str:
+        doc_id = _values(source, row)[0]
+        lookup = f"(SELECT rowid FROM search_docs WHERE doc_type = '{doc_type}' AND doc_id = {doc_id})"
+        return (
+            f"DELETE FROM search_fts WHERE rowid = {lookup};"
+            f" DELETE FROM search_docs WHERE doc_type = '{doc_type}' AND doc_id = {doc_id};"
+        )
+
+    doc_id, owner, title, body = _values(source, "src")
+    return [
+        f"CREATE TRIGGER IF NOT EXISTS {source.table}_search_ai AFTER INSERT ON {source.table} BEGIN {upsert('new')} END",
+        f"CREATE TRIGGER IF NOT EXISTS {source.table}_search_au AFTER UPDATE ON {source.table} BEGIN"
+        f" {remove('old')} {upsert('new')} END",
+        f"CREATE TRIGGER IF NOT EXISTS {source.table}_search_ad AFTER DELETE ON {source.table} BEGIN {remove('old')} END",
+        # Backfill rows written before the triggers existed
+        f"INSERT OR IGNORE INTO search_docs (doc_type, doc_id, owner_id)"
+        f" SELECT '{doc_type}', {doc_id}, {owner} FROM {source.table} AS src",
+        f"INSERT INTO search_fts (rowid, title, body)"
+        f" SELECT d.rowid, {title}, {body} FROM {source.table} AS src"
+        f" JOIN search_docs AS d ON d.doc_type = '{doc_type}' AND d.doc_id = {doc_id}"
+        f" WHERE d.rowid NOT IN (SELECT rowid FROM search_fts)",
+    ]
+
+
+def _postgres_ddl(doc_type: str, source: SearchSource) -> List[str]:
+    function = f"search_index_{source.table}"
+    doc_id, owner, title, body = _values(source, "NEW")
+    old_id = _values(source, "OLD")[0]
+    src_id, src_owner, src_title, src_body = _values(source, "src")
+    return [
+        f"""CREATE OR REPLACE FUNCTION {function}() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP = 'DELETE' OR (TG_OP = 'UPDATE' AND {old_id} <> {doc_id}) THEN
+        DELETE FROM search_documents WHERE doc_type = '{doc_type}' AND doc_id = {old_id};
+        IF TG_OP = 'DELETE' THEN
+            RETURN OLD;
+        END IF;
+    END IF;
+    INSERT INTO search_documents (doc_type, doc_id, owner_id, title, body)
+    VALUES ('{doc_type}', {doc_id}, {owner}, {title}, {body})
+    ON CONFLICT (doc_type, doc_id) DO UPDATE
+    SET owner_id = EXCLUDED.owner_id, title = EXCLUDED.title, body = EXCLUDED.body;
+    RETURN NEW;
+END
+$$ LANGUAGE plpgsql""",
+        f"DROP TRIGGER IF EXISTS {source.table}_search ON {source.table}",
+        f"CREATE TRIGGER {source.table}_search AFTER INSERT OR UPDATE OR DELETE ON {source.table}"
+        f" FOR EACH ROW EXECUTE FUNCTION {function}()",
+        f"INSERT INTO search_documents (doc_type, doc_id, owner_id, title, body)"
+        f" SELECT '{doc_type}', {src_id}, {src_owner}, {src_title}, {src_body} FROM {source.table} AS src"
+        f" ON CONFLICT (doc_type, doc_id) DO NOTHING",
+    ]
+
+
+SQLITE_TABLES = [
+    "CREATE TABLE IF NOT EXISTS search_docs ("
+    " rowid INTEGER PRIMARY KEY,"
+    " doc_type TEXT NOT NULL,"
+    " doc_id TEXT NOT NULL,"
+    " owner_id TEXT,"
+    " UNIQUE (doc_type, doc_id))",
+    "CREATE VIRTUAL TABLE IF NOT EXISTS search_fts USING fts5(title, body, tokenize = 'porter unicode61')",
+]
+
+POSTGRES_TABLES = [
+    """CREATE TABLE IF NOT EXISTS search_documents (
+    doc_type VARCHAR(20) NOT NULL,
+    doc_id VARCHAR(64) NOT NULL,
+    owner_id VARCHAR(64),
+    title TEXT NOT NULL DEFAULT '',
+    body TEXT NOT NULL DEFAULT '',
+    tsv TSVECTOR GENERATED ALWAYS AS (
+        setweight(to_tsvector('english', title), 'A') || setweight(to_tsvector('english', body), 'B')
+    ) STORED,
+    PRIMARY KEY (doc_type, doc_id)
+)""",
+    "CREATE INDEX IF NOT EXISTS ix_search_documents_tsv ON search_documents USING GIN (tsv)",
+    "CREATE INDEX IF NOT EXISTS ix_search_documents_owner ON search_documents (owner_id, doc_type)",
+]
+
+
+def install_search_index(connection: Connection) -> None:
+    """Create the index, triggers for every existing source table, and backfill."""
+    dialect = connection.dialect.name
+    if dialect == "sqlite":
+        tables, ddl = SQLITE_TABLES, _sqlite_ddl
+    elif dialect == "postgresql":
+        tables, ddl = POSTGRES_TABLES, _postgres_ddl
+    else:
+        raise NotImplementedError(f"Full-text search is not supported on {dialect}")
+
+    existing = set(inspect(connection).get_table_names())
+    for statement in tables:
+        connection.exec_driver_sql(statement)
+    for doc_type, source in SOURCES.items():
+        if source.table not in existing:
+            continue
+        for statement in ddl(doc_type, source):
+            connection.exec_driver_sql(statement)
+
+
+
+def drop_search_index(connection: Connection) -> None:
+    """Remove the triggers and index tables created by ``install_search_index``."""
+    dialect = connection.dialect.name
+    for source in SOURCES.values():
+        if dialect == "sqlite":
+            for suffix in ("ai", "au", "ad"):
+                connection.exec_driver_sql(f"DROP TRIGGER IF EXISTS {source.table}_search_{suffix}")
+        else:
+            connection.exec_driver_sql(f"DROP TRIGGER IF EXISTS {source.table}_search ON {source.table}")
+            connection.exec_driver_sql(f"DROP FUNCTION IF EXISTS search_index_{source.table}()")
+    tables = ("search_fts", "search_docs") if dialect == "sqlite" else ("search_documents",)
+    for table in tables:
+        connection.exec_driver_sql(f"DROP TABLE IF EXISTS {table}")
+
+def fts5_query(query: str) -> str:
+    """
+    Turn free text into an FTS5 MATCH expression.
+
+    Every word must match (implicit AND) and the last one matches as a prefix,
+    so "newt sec" finds "Newton's second law". FTS5 operators are not
+    interpreted, so user input can never be a syntax error.
+    """
+    terms = re.findall(r"\w+", query)
+    if not terms:
+        return ""
+    quoted = [f'"{term}"' for term in terms]
+    quoted[-1] += "*"
+    return " ".join(quoted)
+
+
+def _filters(prefix: str, doc_type: Optional[str], owner_id: Optional[str], doc_id: Optional[str]) -> str:
+    clauses = []
+    if doc_type:
+        clauses.append(f"{prefix}.doc_type = :doc_type")
+    if owner_id:
+        clauses.append(f"{prefix}.owner_id = :owner_id")
+    if doc_id:
+        clauses.append(f"{prefix}.doc_id = :doc_id")
+    return "".join(f" AND {clause}" for clause in clauses)
+
+
+def build_search(
+    dialect: str,
+    query: str,
+    doc_type: Optional[str] = None,
+    owner_id: Optional[str] = None,
+    doc_id: Optional[str] = None,
+    limit: int = 20,
+    offset: int = 0,
+):
+    """(page statement, count statement, params) for ``query``, or None when it has no terms."""
+    params = {"doc_type": doc_type, "owner_id": owner_id, "doc_id": doc_id, "limit": limit, "offset": offset}
+    if dialect == "sqlite":
+        params["match"] = fts5_query(query)
+        if not params["match"]:
+            return None
+        where = f"search_fts MATCH :match{_filters('search_docs', doc_type, owner_id, doc_id)}"
+        page = text(
+            "SELECT search_docs.doc_type, search_docs.doc_id, search_fts.title,"
+            f" snippet(search_fts, 1, '{HIGHLIGHT_START}', '{HIGHLIGHT_END}', '…', 16) AS snippet,"
+            " -bm25(search_fts, 10.0, 1.0) AS score"
+            " FROM search_fts JOIN search_docs ON search_docs.rowid = search_fts.rowid"
+            f" WHERE {where}"
+            " ORDER BY bm25(search_fts, 10.0, 1.0) LIMIT :limit OFFSET :offset"
+        )
+        count = text(
+            "SELECT count(*) FROM search_fts JOIN search_docs ON search_docs.rowid = search_fts.rowid"
+            f" WHERE {where}"
+        )
+    elif dialect == "postgresql":
+        if not re.search(r"\w", query):
+            return None
+        params["query"] = query
+        where = f"d.tsv @@ websearch_to_tsquery('english', :query){_filters('d', doc_type, owner_id, doc_id)}"
+        # Rank and page first, so ts_headline only runs on the returned rows
+        page = text(
+            "SELECT p.doc_type, p.doc_id, p.title,"
+            " ts_headline('english', p.body, websearch_to_tsquery('english', :query),"
+            f" 'StartSel={HIGHLIGHT_START}, StopSel={HIGHLIGHT_END}, MaxFragments=2, MaxWords=24, MinWords=8')"
+            " AS snippet, p.score"
+            " FROM (SELECT d.doc_type, d.doc_id, d.title, d.body,"
+            " ts_rank_cd(d.tsv, websearch_to_tsquery('english', :query)) AS score"
+            f" FROM search_documents AS d WHERE {where}"
+            " ORDER BY score DESC LIMIT :limit OFFSET :offset) AS p"
+            " ORDER BY p.score DESC"
+        )
+        count = text(f"SELECT count(*) FROM search_documents AS d WHERE {where}")
+    else:
+        raise NotImplementedError(f"Full-text search is not supported on {dialect}")
+    return page, count, {key: value for key, value in params.items() if value is not None}
+
+
+_installed = set()
+
+
+def _ensure_installed(connection: Connection) -> None:
+    engine = connection.engine
+    if engine.url not in _installed:
+        # Own transaction, so the request's rollback cannot undo the DDL
+        with engine.begin() as ddl_connection:
+            install_search_index(ddl_connection)
+        _installed.add(engine.url)
+
+
+def _hits(rows) -> List[SearchHit]:
+    return [
+        SearchHit(row.doc_type, row.doc_id, row.title or "", row.snippet or "", float(row.score or 0))
+        for row in rows
+    ]
+
+
+def search_sync(db, query: str, **filters) -> Tuple[List[SearchHit], int]:
+    """Ranked, highlighted hits and the total match count, for a synchronous Session."""
+    connection = db.connection()
+    _ensure_installed(connection)
+    statements = build_search(connection.dialect.name, query, **filters)
+    if statements is None:
+        return [], 0
+    page, count, params = statements
+    hits = _hits(db.execute(page, params))
+    return hits, db.execute(count, params).scalar() or 0
+
+
+async def search(db, query: str, **filters) -> Tuple[List[SearchHit], int]:
+    """Ranked, highlighted hits and the total match count, for an AsyncSession."""
+    await db.run_sync(lambda session: _ensure_installed(session.connection()))
+    statements = build_search(db.get_bind().dialect.name, query, **filters)
+    if statements is None:
+        return [], 0
+    page, count, params = statements
+    hits = _hits(await db.execute(page, params))
+    return hits, (await db.execute(count, params)).scalar() or 0
@@ -0,0 +1,479 @@
+"""Semantic search over fused notes and lecture transcripts.
+
+Text segments (sections of fused notes, windows of transcript segments) are
+embedded and stored in an on-disk index:
+
+- Vectors are L2-normalised float32 rows in a memory-mapped file, appended
+  and never moved, so the index is bounded by disk rather than RAM.
+- Once ``train_size`` segments exist, spherical k-means picks ``nlist``
+  centroids and every row joins the inverted list of its nearest one (IVF).
+  A query scores the centroids, then only the rows of the ``nprobe`` closest
+  lists. Smaller indexes, and searches within one document, are exact.
+- Deletes are tombstones in the row -> list assignment file, skipped at
+  query time; ``train`` rebuilds the lists.
+- Segment metadata (document, kind, title, text, start time) is kept in
+  SQLite next to the vectors.
+
+Embeddings come from a local sentence-transformers model when
+SEMANTIC_EMBEDDING_MODEL is set and the package is installed, otherwise from
+a deterministic hashing vectorizer that needs no model at all. An index is
+tied to the embedder it was built with.
+"""
+import array
+import asyncio
+import hashlib
+import json
+import logging
+import math
+import os
+import re
+import sqlite3
+import threading
+from collections import Counter
+from dataclasses import dataclass
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .model_registry import get_model_registry
+
+logger = logging.getLogger(__name__)
+
+_TOKEN = re.compile(r"\w+")
+
+
+def _normalize(vectors: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return (vectors / norms).astype(np.float32, copy=False)
+
+
+@lru_cache(maxsize=1 << 16)
+def _feature(feature: str, dim: int) -> Tuple[int, float]:
+    digest = int.from_bytes(hashlib.blake2b(feature.encode("utf-8"), digest_size=8).digest(), "little")
+    return digest % dim, (1.0 if digest >> 63 else -1.0)
+
+
+def _tokens(text: str) -> List[str]:
+    # Fold plurals so "vectors" and "vector" share a feature
+    return [
+        token[:-1] if len(token) > 3 and token.endswith("s") and not token.endswith("ss") else token
+        for token in _TOKEN.findall(text.lower())
+    ]
+
+
+class HashingEmbedder:
+    """Signed feature hashing of words and word pairs.
+
+    Only captures lexical overlap, but needs no model and produces identical
+    vectors in every process.
+    """
+
+    def __init__(self, dim: int = 384):
+        self.dim = dim
+        self.name = f"hashing-{dim}"
+
+    def embed(self, texts: Sequence[str]) -> np.ndarray:
+        vectors = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for i, text in enumerate(texts):
+            tokens = _tokens(text)
+            counts = Counter(tokens)
+            counts.update(f"{a} {b}" for a, b in zip(tokens, tokens[1:]))
+            for feature, count in counts.items():
+                index, sign = _feature(feature, self.dim)
+                vectors[i, index] += sign * (1.0 + math.log(count))
+        return _normalize(vectors)
+
+
+class SentenceTransformerEmbedder:
+    """A local sentence-transformers model, shared through the model registry."""
+
+    def __init__(self, model_name: str, device: str = "cpu"):
+        self.name = model_name
+        self._model = get_model_registry().acquire("sentence_transformer", model_name, device)
+        self.dim = self._model.get_sentence_embedding_dimension()
+
+    def embed(self, texts: Sequence[str]) -> np.ndarray:
+        vectors = self._model.encode(
+            list(texts), batch_size=64, normalize_embeddings=True, convert_to_numpy=True
+        )
+        return np.asarray(vectors, dtype=np.float32).reshape(len(texts), self.dim)
+
+
+def get_embedder():
+    """SEMANTIC_EMBEDDING_MODEL if it can be loaded, else the hashing vectorizer."""
+    model_name = os.getenv("SEMANTIC_EMBEDDING_MODEL")
+    if model_name:
+        try:
+            return SentenceTransformerEmbedder(model_name, os.getenv("SEMANTIC_EMBEDDING_DEVICE", "cpu"))
+        except Exception as e:
+            logger.warning(f"Embedding model {model_name} unavailable, using hashing vectorizer: {e}")
+    return HashingEmbedder(int(os.getenv("SEMANTIC_EMBEDDING_DIM", "384")))
+
+
+@dataclass
+class Segment:
+    doc_id: str
+    kind: str
+    text: str
+    title: str = ""
+    start_time: Optional[str] = None
+
+
+@dataclass
+class SemanticHit:
+    doc_id: str
+    kind: str
+    title: str
+    text: str
+    start_time: Optional[str]
+    score: float
+
+
+def _flatten(content: Any) -> str:
+    """Section content may be a string, a list of bullets, or nested dicts."""
+    if content is None:
+        return ""
+    if isinstance(content, str):
+        return content
+    if isinstance(content, dict):
+        return "\n".join(_flatten(value) for value in content.values())
+    if isinstance(content, (list, tuple)):
+        return "\n".join(_flatten(item) for item in content)
+    return str(content)
+
+
+def _timestamp(seconds: float) -> str:
+    seconds = int(seconds)
+    return f"{seconds // 3600:02d}:{seconds % 3600 // 60:02d}:{seconds % 60:02d}"
+
+
+def note_segments(doc_id: str, notes: Dict) -> List[Segment]:
+    """One segment per section of ``FusionService.fuse_content`` output."""
+    segments = []
+    for section in notes.get("sections") or []:
+        text = _flatten(section.get("content")).strip()
+        if text:
+            segments.append(Segment(
+                doc_id, "section", text,
+                title=section.get("title") or "",
+                start_time=section.get("start_time") or None,
+            ))
+    return segments
+
+
+def transcript_segments(doc_id: str, segments: Iterable[Dict], window_chars: int = 400) -> List[Segment]:
+    """Consecutive transcript segments merged into windows of about ``window_chars``."""
+    windows, texts, start = [], [], None
+    for segment in segments:
+        text = (segment.get("text") or "").strip()
+        if not text:
+            continue
+        if start is None:
+            start = segment.get("start") or 0.0
+        texts.append(text)
+        if sum(len(t) for t in texts) >= window_chars:
+            windows.append(Segment(doc_id, "transcript", " ".join(texts), start_time=_timestamp(start)))
+            texts, start = [], None
+    if texts:
+        windows.append(Segment(doc_id, "transcript", " ".join(texts), start_time=_timestamp(start)))
+    return windows
+
+
+class SemanticIndex:
+    """Memory-mapped IVF index of segment embeddings with incremental add and delete."""
+
+    def __init__(self, path: str, embedder=None, train_size: int = 20000, nprobe: int = 16):
+        self.path = Path(path)
+        self.path.mkdir(parents=True, exist_ok=True)
+        self.embedder = embedder or get_embedder()
+        self.dim = self.embedder.dim
+        self.train_size = train_size
+        self.nprobe = nprobe
+        self._lock = threading.RLock()
+
+        self._state = self._load_state()
+        if (self._state["embedder"], self._state["dim"]) != (self.embedder.name, self.dim):
+            raise ValueError(
+                f"Index at {self.path} was built with {self._state['embedder']} ({self._state['dim']} dims), "
+                f"not {self.embedder.name}; rebuild it or use a different path"
+            )
+
+        self._db = sqlite3.connect(str(self.path / "segments.sqlite3"), check_same_thread=False)
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS segments ("
+            " row INTEGER PRIMARY KEY, doc_id TEXT NOT NULL, kind TEXT NOT NULL,"
+            " title TEXT, text TEXT, start_time TEXT)"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS ix_segments_doc ON segments (doc_id, kind)")
+        # Rows past the saved count belong to an add that did not finish
+        self._db.execute("DELETE FROM segments WHERE row >= ?", (self._state["count"],))
+        self._db.commit()
+
+        self._capacity = 0
+        self._open(max(self._state["count"], 1024))
+        centroids_path = self.path / "centroids.npy"
+        self._centroids = np.load(centroids_path) if centroids_path.exists() else None
+        self._lists = self._build_lists()
+
+    # Storage
+
+    def _load_state(self) -> Dict[str, Any]:
+        state_path = self.path / "state.json"
+        if state_path.exists():
+            return json.loads(state_path.read_text())
+        return {"embedder": self.embedder.name, "dim": self.dim, "count": 0, "deleted": 0}
+
+    def _save_state(self) -> None:
+        self._vectors.flush()
+        self._slots.flush()
+        tmp_path = self.path / "state.json.tmp"
+        tmp_path.write_text(json.dumps(self._state))
+        os.replace(tmp_path, self.path / "state.json")
+
+    def _mmap(self, name: str, dtype, shape: Tuple[int, ...]) -> np.memmap:
+        file_path = self.path / name
+        size = int(np.prod(shape)) * np.dtype(dtype).itemsize
+        with open(file_path, "ab") as f:
+            if f.tell() < size:
+                f.truncate(size)
+        return np.memmap(file_path, dtype=dtype, mode="r+", shape=shape)
+
+    def _open(self, capacity: int) -> None:
+        """Map (or grow) the vector and slot files to hold ``capacity`` rows."""
+        if capacity <= self._capacity:
+            return
+        if self._capacity:
+            self._vectors.flush()
+            self._slots.flush()
+        self._vectors = self._mmap("vectors.f32", np.float32, (capacity, self.dim))
+        # Inverted list + 1 for each row; 0 marks a deleted row
+        self._slots = self._mmap("slots.i32", np.int32, (capacity,))
+        self._capacity = capacity
+
+    def _build_lists(self) -> Optional[List[array.array]]:
+        if self._centroids is None:
+            return None
+        count = self._state["count"]
+        rows = np.nonzero(self._slots[:count])[0]
+        labels = self._slots[rows] - 1
+        order = np.argsort(labels, kind="stable")
+        bounds = np.cumsum(np.bincount(labels, minlength=len(self._centroids)))
+        return [array.array("q", part.tolist()) for part in np.split(rows[order], bounds[:-1])]
+
+    # Writes
+
+    @property
+    def size(self) -> int:
+        """Number of live segments."""
+        return self._state["count"] - self._state["deleted"]
+
+    @staticmethod
+    def _nearest(vectors: np.ndarray, centroids: np.ndarray, chunk: int = 8192) -> np.ndarray:
+        labels = np.empty(len(vectors), dtype=np.int32)
+        for start in range(0, len(vectors), chunk):
+            labels[start:start + chunk] = np.argmax(vectors[start:start + chunk] @ centroids.T, axis=1)
+        return labels
+
+    def _embed(self, segments: Sequence[Segment]) -> np.ndarray:
+        return self.embedder.embed([f"{s.title}\n{s.text}" if s.title else s.text for s in segments])
+
+    def add(self, segments: Sequence[Segment]) -> List[int]:
+        """Embed and append segments; returns their row numbers."""
+        if not segments:
+            return []
+        return self._append(segments, self._embed(segments))
+
+    def _append(self, segments: Sequence[Segment], vectors: np.ndarray) -> List[int]:
+        with self._lock:
+            start = self._state["count"]
+            end = start + len(segments)
+            if end > self._capacity:
+                self._open(max(end, self._capacity * 2))
+            self._vectors[start:end] = vectors
+            if self._centroids is None:
+                self._slots[start:end] = 1
+            else:
+                labels = self._nearest(vectors, self._centroids)
+                self._slots[start:end] = labels + 1
+                for row, label in zip(range(start, end), labels.tolist()):
+                    self._lists[label].append(row)
+            self._db.executemany(
+                "INSERT INTO segments (row, doc_id, kind, title, text, start_time) VALUES (?, ?, ?, ?, ?, ?)",
+                [(start + i, s.doc_id, s.kind, s.title, s.text, s.start_time) for i, s in enumerate(segments)],
+            )
+            self._db.commit()
+            self._state["count"] = end
+            self._save_state()
+            if self._centroids is None and self.size >= self.train_size:
+                self.train()
+        return list(range(start, end))
+
+    def delete(self, doc_id: str, kind: Optional[str] = None) -> int:
+        """Tombstone every segment of a document (optionally of one kind)."""
+        with self._lock:
+            rows = self._rows(doc_id, kind)
+            if not len(rows):
+                return 0
+            self._slots[rows] = 0
+            query, params = "DELETE FROM segments WHERE doc_id = ?", [doc_id]
+            if kind:
+                query, params = query + " AND kind = ?", params + [kind]
+            self._db.execute(query, params)
+            self._db.commit()
+            self._state["deleted"] += len(rows)
+            self._save_state()
+            # Keep tombstones from dominating the scanned lists
+            if self._lists is not None and self._state["deleted"] > self.size:
+                self._lists = self._build_lists()
+            return len(rows)
+
+    def replace(self, doc_id: str, kind: str, segments: Sequence[Segment]) -> List[int]:
+        """Re-index one kind of segments of a document."""
+        # Embedding is the slow part; searches carry on meanwhile
+        vectors = self._embed(segments) if segments else None
+        with self._lock:
+            self.delete(doc_id, kind)
+            return self._append(segments, vectors) if segments else []
+
+    def train(self, nlist: Optional[int] = None, iterations: int = 10, seed: int = 0) -> None:
+        """Cluster live rows with spherical k-means and rebuild the inverted lists."""
+        with self._lock:
+            count = self._state["count"]
+            rows = np.nonzero(self._slots[:count])[0]
+            if not len(rows):
+                return
+            nlist = min(nlist or int(np.clip(math.sqrt(len(rows)), 16, 4096)), len(rows))
+            rng = np.random.default_rng(seed)
+            sample = np.sort(rng.choice(rows, size=min(len(rows), nlist * 64), replace=False))
+            points = np.asarray(self._vectors[sample])
+            centroids = points[rng.choice(len(points), size=nlist, replace=False)].copy()
+            for _ in range(iterations):
+                labels = self._nearest(points, centroids)
+                counts = np.bincount(labels, minlength=nlist)
+                order = np.argsort(labels, kind="stable")
+                starts = np.concatenate(([0], np.cumsum(counts)[:-1]))
+                filled = counts > 0
+                sums = np.zeros_like(centroids)
+                sums[filled] = np.add.reduceat(points[order], starts[filled])
+                # Re-seed empty clusters from random points
+                sums[~filled] = points[rng.choice(len(points), size=int((~filled).sum()))]
+                centroids = _normalize(sums)
+            self._centroids = centroids
+            for start in range(0, len(rows), 65536):
+                chunk = rows[start:start + 65536]
+                self._slots[chunk] = self._nearest(np.asarray(self._vectors[chunk]), centroids) + 1
+            np.save(self.path / "centroids.npy", centroids)
+            self._save_state()
+            self._lists = self._build_lists()
+
+    # Reads
+
+    def _rows(self, doc_id: str, kind: Optional[str] = None) -> np.ndarray:
+        query, params = "SELECT row FROM segments WHERE doc_id = ?", [doc_id]
+        if kind:
+            query, params = query + " AND kind = ?", params + [kind]
+        return np.fromiter((row for (row,) in self._db.execute(query, params)), dtype=np.int64)
+
+    def search(
+        self,
+        query: str,
+        k: int = 10,
+        doc_id: Optional[str] = None,
+        kind: Optional[str] = None,
+        nprobe: Optional[int] = None,
+    ) -> List[SemanticHit]:
+        """Top-``k`` segments by cosine similarity to ``query``."""
+        vector = self.embedder.embed([query])[0]
+        # Snapshot under the lock, score without it: rows below ``count`` never move
+        with self._lock:
+            count = self._state["count"]
+            vectors, slots = self._vectors, self._slots
+            if doc_id:
+                candidates = self._rows(doc_id, kind)
+            elif self._lists is None:
+                candidates = None
+            else:
+                nprobe = min(nprobe or self.nprobe, len(self._centroids))
+                probes = np.argpartition(-(self._centroids @ vector), nprobe - 1)[:nprobe]
+                candidates = np.concatenate(
+                    [np.frombuffer(self._lists[p], dtype=np.int64) for p in probes]
+                )
+
+        fetch = k
+        if kind and not doc_id:
+            # Kinds are filtered after ranking: over-fetch
+            fetch = k * 8
+        if candidates is None:
+            scores = np.asarray(vectors[:count]) @ vector
+            scores[slots[:count] == 0] = -np.inf
+            candidates = np.arange(count)
+        else:
+            candidates = np.sort(candidates)
+            candidates = candidates[slots[candidates] != 0]
+            scores = np.asarray(vectors[candidates]) @ vector
+        if not len(candidates):
+            return []
+        fetch = min(fetch, len(candidates))
+        top = np.argpartition(-scores, fetch - 1)[:fetch]
+        top = top[np.argsort(-scores[top])]
+        top = top[np.isfinite(scores[top])]
+        rows = candidates[top].tolist()
+        placeholders = ",".join("?" * len(rows))
+        with self._lock:
+            # Rows deleted since the snapshot have no metadata and drop out below
+            meta = {
+                row: rest for row, *rest in self._db.execute(
+                    f"SELECT row, doc_id, kind, title, text, start_time FROM segments WHERE row IN ({placeholders})",
+                    rows,
+                )
+            }
+        hits = []
+        for row, score in zip(rows, scores[top].tolist()):
+            if row not in meta or (kind and meta[row][1] != kind):
+                continue
+            hits.append(SemanticHit(*meta[row], score=score))
+            if len(hits) == k:
+                break
+        return hits
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "embedder": self.embedder.name,
+            "dim": self.dim,
+            "segments": self.size,
+            "deleted": self._state["deleted"],
+            "nlist": None if self._centroids is None else len(self._centroids),
+            "nprobe": self.nprobe,
+        }
+
+
+_semantic_index: Optional[SemanticIndex] = None
+_semantic_index_lock = threading.Lock()
+
+
+def get_semantic_index() -> SemanticIndex:
+    """
+    Process-wide index at SEMANTIC_INDEX_PATH, with SEMANTIC_INDEX_TRAIN_SIZE
+    and SEMANTIC_INDEX_NPROBE tuning the IVF structure.
+    """
+    global _semantic_index
+    # First use loads the embedding model and maps the index files; do it once
+    with _semantic_index_lock:
+        if _semantic_index is None:
+            _semantic_index = SemanticIndex(
+                os.getenv("SEMANTIC_INDEX_PATH", "data/semantic_index"),
+                train_size=int(os.getenv("SEMANTIC_INDEX_TRAIN_SIZE", "20000")),
+                nprobe=int(os.getenv("SEMANTIC_INDEX_NPROBE", "16")),
+            )
+        return _semantic_index
+
+
+async def index_document(doc_id: str, kind: str, segments: Sequence[Segment]) -> None:
+    """Re-index one kind of a document's segments off the event loop; failures are only logged."""
+    try:
+        await asyncio.to_thread(get_semantic_index().replace, doc_id, kind, segments)
+    except Exception as e:
+        logger.warning(f"Semantic indexing failed for {kind} {doc_id}: {e}")
@@ -0,0 +1,158 @@
+"""Vectorized SM-2 scheduling.
+
+``Flashcard.update_spaced_repetition`` applies SM-2 to one card. The
+functions here apply the same rules to whole arrays of cards with numpy, for:
+
+- review sessions: a client syncs hundreds of (card, quality, reviewed_at)
+  results at once, possibly several reviews of the same card;
+- workload forecasts: simulate a deck's reviews day by day to project how
+  many cards fall due each day.
+
+Ease factors are integers scaled by 100 (250 = 2.5), as in the model.
+"""
+from datetime import date, datetime, timedelta, timezone
+from typing import Dict, List, NamedTuple, Optional, Sequence
+
+import numpy as np
+
+MIN_EASE = 130
+MAX_EASE = 250
+PASSING_QUALITY = 3
+
+
+class Schedule(NamedTuple):
+    """SM-2 state for an array of cards."""
+    ease_factor: np.ndarray
+    interval: np.ndarray
+    review_count: np.ndarray
+
+
+def sm2_step(ease_factor, interval, review_count, quality) -> Schedule:
+    """
+    Apply one review to each card.
+
+    Arrays are broadcast together. Matches ``Flashcard.update_spaced_repetition``:
+    passing reviews grow the interval (1, 6, then interval * ease) and adjust the
+    ease; failing reviews reset the interval to 1 and keep the ease.
+    """
+    ease_factor = np.asarray(ease_factor, dtype=np.int64)
+    interval = np.asarray(interval, dtype=np.int64)
+    review_count = np.asarray(review_count, dtype=np.int64)
+    quality = np.asarray(quality, dtype=np.int64)
+    if np.any((quality < 0) | (quality > 5)):
+        raise ValueError("Quality must be between 0 and 5")
+
+    ef = ease_factor / 100
+    passed = quality >= PASSING_QUALITY
+    grown = np.rint(interval * ef).astype(np.int64)
+    new_interval = np.where(review_count == 0, 1, np.where(review_count == 1, 6, grown))
+    miss = 5 - quality
+    new_ef = np.clip(ef + (0.1 - miss * (0.08 + miss * 0.02)), MIN_EASE / 100, MAX_EASE / 100)
+
+    return Schedule(
+        ease_factor=np.where(passed, (new_ef * 100).astype(np.int64), ease_factor),
+        interval=np.where(passed, new_interval, 1),
+        review_count=review_count + 1,
+    )
+
+
+def _naive_utc(value: datetime) -> datetime:
+    """Naive UTC, as the due_date and last_reviewed columns store it."""
+    if value.tzinfo is None:
+        return value
+    return value.astimezone(timezone.utc).replace(tzinfo=None)
+
+
+def apply_review_session(
+    cards: Dict[str, Dict],
+    reviews: Sequence[Dict],
+) -> Dict[str, Dict]:
+    """
+    Replay a session of reviews against the cards' current SM-2 state.
+
+    ``cards`` maps card id to a dict with ease_factor, interval and
+    review_count. ``reviews`` are dicts with card_id, quality and reviewed_at;
+    reviews of unknown cards are ignored. A card reviewed several times is
+    stepped once per review, in reviewed_at order, with each round of reviews
+    computed for all cards at once. Aware reviewed_at values are converted to
+    naive UTC first, so clients may send either.
+
+    Returns card id to the new ease_factor, interval, review_count,
+    last_reviewed and due_date.
+    """
+    ordered = sorted(
+        ({**r, "reviewed_at": _naive_utc(r["reviewed_at"])} for r in reviews if r["card_id"] in cards),
+        key=lambda r: r["reviewed_at"],
+    )
+    # Group the k-th review of every card into round k
+    rounds: List[List[Dict]] = []
+    seen: Dict[str, int] = {}
+    for review in ordered:
+        k = seen.get(review["card_id"], 0)
+        seen[review["card_id"]] = k + 1
+        if k == len(rounds):
+            rounds.append([])
+        rounds[k].append(review)
+
+    state = {
+        card_id: (card["ease_factor"], card["interval"], card["review_count"])
+        for card_id, card in cards.items()
+    }
+    results: Dict[str, Dict] = {}
+    for batch in rounds:
+        ids = [review["card_id"] for review in batch]
+        current = np.array([state[card_id] for card_id in ids], dtype=np.int64).reshape(-1, 3)
+        step = sm2_step(current[:, 0], current[:, 1], current[:, 2], [review["quality"] for review in batch])
+        for i, review in enumerate(batch):
+            card_id = review["card_id"]
+            values = (int(step.ease_factor[i]), int(step.interval[i]), int(step.review_count[i]))
+            state[card_id] = values
+            results[card_id] = {
+                "ease_factor": values[0],
+                "interval": values[1],
+                "review_count": values[2],
+                "last_reviewed": review["reviewed_at"],
+                "due_date": review["reviewed_at"] + timedelta(days=values[1]),
+            }
+    return results
+
+
+def simulate_workload(
+    ease_factor: Sequence[int],
+    interval: Sequence[int],
+    review_count: Sequence[int],
+    due_dates: Sequence[datetime],
+    days: int = 30,
+    retention: float = 0.9,
+    start: Optional[date] = None,
+    seed: Optional[int] = 0,
+) -> List[Dict]:
+    """
+    Project how many cards fall due on each of the next ``days`` days.
+
+    Every due card is reviewed on the day it falls due (overdue cards on the
+    first day). A review passes with probability ``retention`` (quality 4)
+    and otherwise fails (quality 1), then the card is rescheduled with SM-2.
+
+    Returns one ``{"date", "due"}`` dict per day.
+    """
+    if not 0 <= retention <= 1:
+        raise ValueError("Retention must be between 0 and 1")
+    start = start or datetime.utcnow().date()
+    ease = np.asarray(ease_factor, dtype=np.int64)
+    ivl = np.asarray(interval, dtype=np.int64)
+    count = np.asarray(review_count, dtype=np.int64)
+    # Day offset from start at which each card is next due
+    due = np.array([max(0, (d.date() - start).days) for d in due_dates], dtype=np.int64)
+    rng = np.random.default_rng(seed)
+
+    forecast = []
+    for day in range(days):
+        todays = np.flatnonzero(due == day)
+        if todays.size:
+            quality = np.where(rng.random(todays.size) < retention, 4, 1)
+            step = sm2_step(ease[todays], ivl[todays], count[todays], quality)
+            ease[todays], ivl[todays], count[todays] = step
+            due[todays] = day + step.interval
+        forecast.append({"date": start + timedelta(days=day), "due": int(todays.size)})
+    return forecast
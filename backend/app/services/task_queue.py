@@ -327,11 +327,21 @@ class TaskQueue:
 # Global task queue instance
 task_queue: Optional[TaskQueue] = None
 
-async def setup_task_queue(redis_url: str, **kwargs) -> TaskQueue:
-    """Set up the global task queue"""
+async def setup_task_queue(
+    redis_url: str,
+    configure: Optional[Callable[[TaskQueue], None]] = None,
+    **kwargs
+) -> TaskQueue:
+    """Set up the global task queue
+    
+    ``configure`` is called with the new queue before the worker starts, so
+    handlers can be registered without racing the worker loop.
+    """
     global task_queue
     if task_queue is None:
         task_queue = TaskQueue(redis_url, **kwargs)
+        if configure:
+            configure(task_queue)
         await task_queue.initialize()
         await task_queue.start()
     return task_queue
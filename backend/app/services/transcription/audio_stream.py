@@ -0,0 +1,242 @@
+"""Streaming PCM decoding for long lecture recordings.
+
+Audio is decoded by an ``ffmpeg`` child process straight to 16 kHz mono
+signed 16-bit PCM on a pipe and handed out as float32 numpy windows, which is
+the format ``whisper.transcribe`` accepts directly. Only one window (plus the
+configured overlap) is ever resident, regardless of the recording length.
+"""
+import json
+import logging
+import os
+import subprocess
+from dataclasses import dataclass
+from typing import Any, BinaryIO, Dict, Generator, List, Optional
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Whisper models are trained on 16 kHz mono audio (whisper.audio.SAMPLE_RATE).
+SAMPLE_RATE = 16000
+BYTES_PER_SAMPLE = 2
+
+
+@dataclass
+class AudioChunk:
+    """A window of decoded audio."""
+
+    samples: np.ndarray
+    offset: float
+    overlap: float
+    progress: Optional[float] = None
+    sample_rate: int = SAMPLE_RATE
+
+    @property
+    def duration(self) -> float:
+        return len(self.samples) / self.sample_rate
+
+    @property
+    def end(self) -> float:
+        return self.offset + self.duration
+
+
+def _read_exact(stream: BinaryIO, size: int) -> bytes:
+    """Read up to ``size`` bytes, only returning short at end of stream."""
+    buffer = bytearray(size)
+    view = memoryview(buffer)
+    filled = 0
+    while filled < size:
+        read = stream.readinto(view[filled:])
+        if not read:
+            break
+        filled += read
+    return bytes(view[:filled])
+
+
+def pcm_to_float32(raw: bytes) -> np.ndarray:
+    """Convert little-endian s16 PCM to float32 in [-1, 1), as whisper.load_audio does."""
+    usable = len(raw) - (len(raw) % BYTES_PER_SAMPLE)
+    return np.frombuffer(raw[:usable], dtype="<i2").astype(np.float32) / 32768.0
+
+
+def iter_pcm_chunks(
+    stream: BinaryIO,
+    chunk_duration: float = 1800,
+    overlap: float = 0.0,
+    sample_rate: int = SAMPLE_RATE,
+    total_duration: Optional[float] = None,
+) -> Generator[AudioChunk, None, None]:
+    """
+    Cut a raw PCM stream into fixed-length windows.
+
+    Consecutive windows share ``overlap`` seconds so that words cut at a
+    boundary are heard in full by one of them; see ``merge_chunk_segments``
+    for removing the resulting duplicates.
+    """
+    chunk_samples = int(chunk_duration * sample_rate)
+    overlap_samples = int(overlap * sample_rate)
+    if chunk_samples <= 0:
+        raise ValueError("chunk_duration must be positive")
+    if not 0 <= overlap_samples < chunk_samples:
+        raise ValueError("overlap must be non-negative and shorter than chunk_duration")
+
+    carry = np.empty(0, dtype=np.float32)
+    start_sample = 0
+
+    while True:
+        raw = _read_exact(stream, (chunk_samples - len(carry)) * BYTES_PER_SAMPLE)
+        if not raw:
+            # Whatever is left in ``carry`` was already part of the previous window.
+            break
+
+        fresh = pcm_to_float32(raw)
+        samples = np.concatenate((carry, fresh)) if len(carry) else fresh
+        offset = start_sample / sample_rate
+        progress = None
+        if total_duration:
+            progress = min(1.0, (start_sample + len(samples)) / sample_rate / total_duration)
+
+        yield AudioChunk(
+            samples=samples,
+            offset=offset,
+            overlap=len(carry) / sample_rate,
+            progress=progress,
+            sample_rate=sample_rate,
+        )
+
+        if len(samples) < chunk_samples:
+            break
+
+        carry = samples[len(samples) - overlap_samples:].copy() if overlap_samples else carry[:0]
+        start_sample += len(samples) - len(carry)
+
+
+def probe_duration(audio_path: str, ffprobe_path: str = "ffprobe") -> Optional[float]:
+    """Return the media duration in seconds, or ``None`` if it cannot be determined."""
+    try:
+        result = subprocess.run(
+            [
+                ffprobe_path, "-v", "error",
+                "-show_entries", "format=duration",
+                "-of", "json",
+                audio_path,
+            ],
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            check=True,
+        )
+        return float(json.loads(result.stdout)["format"]["duration"])
+    except (OSError, subprocess.SubprocessError, KeyError, ValueError, TypeError):
+        return None
+
+
+def stream_audio_chunks(
+    audio_path: str,
+    chunk_duration: float = 1800,
+    overlap: float = 0.0,
+    sample_rate: int = SAMPLE_RATE,
+    ffmpeg_path: str = "ffmpeg",
+    ffprobe_path: Optional[str] = None,
+) -> Generator[AudioChunk, None, None]:
+    """
+    Decode ``audio_path`` through an ffmpeg pipe and yield ``AudioChunk`` windows.
+
+    ``ffprobe_path`` defaults to the ffprobe next to ``ffmpeg_path``.
+    """
+    cmd = [
+        ffmpeg_path, "-nostdin",
+        "-loglevel", "error",
+        "-threads", "0",
+        "-i", audio_path,
+        "-f", "s16le",
+        "-ac", "1",
+        "-acodec", "pcm_s16le",
+        "-ar", str(sample_rate),
+        "-",
+    ]
+    try:
+        process = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    except FileNotFoundError as e:
+        raise RuntimeError("FFmpeg not found. Please install FFmpeg and add it to PATH.") from e
+
+    if ffprobe_path is None:
+        directory, name = os.path.split(ffmpeg_path)
+        ffprobe_path = os.path.join(directory, name.replace("ffmpeg", "ffprobe"))
+    total_duration = probe_duration(audio_path, ffprobe_path=ffprobe_path)
+    produced = False
+    try:
+        for chunk in iter_pcm_chunks(
+            process.stdout,
+            chunk_duration=chunk_duration,
+            overlap=overlap,
+            sample_rate=sample_rate,
+            total_duration=total_duration,
+        ):
+            produced = True
+            yield chunk
+    finally:
+        process.stdout.close()
+        if process.poll() is None:
+            process.kill()
+        stderr = process.stderr.read().decode("utf-8", errors="replace")
+        process.stderr.close()
+        returncode = process.wait()
+
+    if returncode != 0 and not produced:
+        raise RuntimeError(f"FFmpeg failed to decode {audio_path}: {stderr.strip()}")
+    if returncode != 0:
+        logger.warning("FFmpeg exited with %s while decoding %s: %s", returncode, audio_path, stderr.strip())
+
+
+def merge_chunk_segments(
+    merged: List[Dict[str, Any]],
+    segments: List[Dict[str, Any]],
+    offset: float,
+    tolerance: float = 0.05,
+) -> List[Dict[str, Any]]:
+    """
+    Shift a window's segments onto the recording timeline and append them to ``merged``.
+
+    Segments starting before the end of the last merged segment were already
+    transcribed by the previous (overlapping) window and are dropped. Returns
+    the segments that were kept.
+    """
+    covered_until = merged[-1]["end"] if merged else float("-inf")
+    kept = []
+    for segment in segments:
+        shifted = dict(segment)
+        shifted["start"] = segment["start"] + offset
+        shifted["end"] = segment["end"] + offset
+        if shifted["start"] < covered_until - tolerance:
+            continue
+        kept.append(shifted)
+        covered_until = max(covered_until, shifted["end"])
+    merged.extend(kept)
+    return kept
+
+
+class TranscriptMerger:
+    """Accumulate per-chunk Whisper results, in chunk order, into one transcript."""
+
+    def __init__(self):
+        self.segments: List[Dict[str, Any]] = []
+        self.text: List[str] = []
+        self.language: Optional[str] = None
+        self.duration = 0.0
+
+    def add(self, chunk: AudioChunk, result: Dict[str, Any]) -> None:
+        kept = merge_chunk_segments(self.segments, result.get("segments", []), chunk.offset)
+        if chunk.overlap:
+            self.text.append("".join(segment["text"] for segment in kept).strip())
+        else:
+            self.text.append(result.get("text", ""))
+        self.language = self.language or result.get("language")
+        self.duration = chunk.end
+
+    def result(self) -> Dict[str, Any]:
+        return {
+            "text": " ".join(self.text),
+            "segments": self.segments,
+            "language": self.language,
+            "duration": self.duration,
+        }
@@ -0,0 +1,184 @@
+"""Content-addressed cache for transcription results.
+
+Entries are keyed by a SHA-256 of the audio bytes plus the options that
+change Whisper's output (model size, language, diarization...), so the same
+lecture uploaded again under another filename is still a hit. A bounded
+in-memory LRU tier sits in front of a SQLite file that survives restarts.
+"""
+import hashlib
+import json
+import logging
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+HASH_BLOCK_SIZE = 1024 * 1024
+
+
+def hash_audio_file(audio_path: str, block_size: int = HASH_BLOCK_SIZE) -> str:
+    """SHA-256 of the file contents, read in fixed-size blocks."""
+    digest = hashlib.sha256()
+    with open(audio_path, "rb") as f:
+        for block in iter(lambda: f.read(block_size), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _json_default(value: Any) -> Any:
+    # Whisper results can carry numpy scalars/arrays
+    if hasattr(value, "tolist"):
+        return value.tolist()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+class TranscriptionCache:
+    """Two-tier (memory LRU + SQLite) transcription result cache."""
+
+    def __init__(
+        self,
+        db_path: str = "data/transcription_cache.sqlite3",
+        memory_budget_bytes: int = 64 * 1024 * 1024,
+        disk_budget_bytes: Optional[int] = 2 * 1024 * 1024 * 1024,
+    ):
+        self.memory_budget_bytes = memory_budget_bytes
+        self.disk_budget_bytes = disk_budget_bytes
+        self._memory: "OrderedDict[str, Tuple[bytes, int]]" = OrderedDict()
+        self._memory_bytes = 0
+        self._lock = threading.Lock()
+        self._stats = {
+            "memory_hits": 0,
+            "disk_hits": 0,
+            "misses": 0,
+            "stores": 0,
+            "memory_evictions": 0,
+            "disk_evictions": 0,
+        }
+
+        self._db: Optional[sqlite3.Connection] = None
+        try:
+            Path(db_path).parent.mkdir(parents=True, exist_ok=True)
+            self._db = sqlite3.connect(db_path, check_same_thread=False, isolation_level=None)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS transcripts ("
+                " key TEXT PRIMARY KEY,"
+                " payload BLOB NOT NULL,"
+                " size INTEGER NOT NULL,"
+                " last_access REAL NOT NULL)"
+            )
+            self._db.execute(
+                "CREATE INDEX IF NOT EXISTS ix_transcripts_last_access ON transcripts (last_access)"
+            )
+        except sqlite3.Error as e:
+            logger.warning(f"Transcription disk cache unavailable ({db_path}): {e}")
+            self._db = None
+
+    @staticmethod
+    def make_key(content_hash: str, model_size: str, language: Optional[str] = None,
+                 diarize: bool = False, **options: Any) -> str:
+        """Build the cache key for a content hash and the options that affect the result."""
+        parts = {
+            "content": content_hash,
+            "model": model_size,
+            "language": language,
+            "diarize": bool(diarize),
+            **options,
+        }
+        return hashlib.sha256(json.dumps(parts, sort_keys=True).encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                self._memory.move_to_end(key)
+                self._stats["memory_hits"] += 1
+                return json.loads(entry[0])
+
+            payload = None
+            if self._db is not None:
+                try:
+                    row = self._db.execute(
+                        "SELECT payload FROM transcripts WHERE key = ?", (key,)
+                    ).fetchone()
+                    if row is not None:
+                        payload = bytes(row[0])
+                        self._db.execute(
+                            "UPDATE transcripts SET last_access = ? WHERE key = ?", (time.time(), key)
+                        )
+                except sqlite3.Error as e:
+                    logger.error(f"Transcription cache read error: {e}")
+
+            if payload is None:
+                self._stats["misses"] += 1
+                return None
+
+            self._stats["disk_hits"] += 1
+            self._remember(key, payload)
+            return json.loads(payload)
+
+    def set(self, key: str, value: Dict[str, Any]) -> None:
+        payload = json.dumps(value, default=_json_default).encode("utf-8")
+        with self._lock:
+            self._stats["stores"] += 1
+            self._remember(key, payload)
+            if self._db is None:
+                return
+            try:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO transcripts (key, payload, size, last_access) VALUES (?, ?, ?, ?)",
+                    (key, payload, len(payload), time.time()),
+                )
+                self._evict_disk()
+            except sqlite3.Error as e:
+                logger.error(f"Transcription cache write error: {e}")
+
+    def _remember(self, key: str, payload: bytes) -> None:
+        size = len(payload)
+        if size > self.memory_budget_bytes:
+            return
+        previous = self._memory.pop(key, None)
+        if previous is not None:
+            self._memory_bytes -= previous[1]
+        self._memory[key] = (payload, size)
+        self._memory_bytes += size
+        while self._memory_bytes > self.memory_budget_bytes:
+            _, (_, evicted_size) = self._memory.popitem(last=False)
+            self._memory_bytes -= evicted_size
+            self._stats["memory_evictions"] += 1
+
+    def _evict_disk(self) -> None:
+        if not self.disk_budget_bytes:
+            return
+        total = self._db.execute("SELECT COALESCE(SUM(size), 0) FROM transcripts").fetchone()[0]
+        while total > self.disk_budget_bytes:
+            row = self._db.execute(
+                "SELECT key, size FROM transcripts ORDER BY last_access LIMIT 1"
+            ).fetchone()
+            if row is None:
+                break
+            self._db.execute("DELETE FROM transcripts WHERE key = ?", (row[0],))
+            total -= row[1]
+            self._stats["disk_evictions"] += 1
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss counters and current memory usage."""
+        with self._lock:
+            lookups = self._stats["memory_hits"] + self._stats["disk_hits"] + self._stats["misses"]
+            hits = lookups - self._stats["misses"]
+            return {
+                **self._stats,
+                "hit_rate": hits / lookups if lookups else 0.0,
+                "memory_entries": len(self._memory),
+                "memory_bytes": self._memory_bytes,
+            }
+
+    def close(self) -> None:
+        with self._lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
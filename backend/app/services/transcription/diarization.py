@@ -1,18 +1,31 @@
 <<<<<<< HEAD
 from typing import List, Dict, Any
-import torch
+from ..model_registry import model_registry
 
 class DiarizationService:
-    def __init__(self):
-        self._pipeline = None
-        try:
-            from pyannote.audio import Pipeline
-            self._pipeline = Pipeline.from_pretrained(
-                "pyannote/speaker-diarization",
-                use_auth_token="your_huggingface_token"  # Replace with actual token
-            )
-        except Exception as e:
-            print(f"Warning: Diarization pipeline not available: {e}")
+    def __init__(self, model_name: str = "pyannote/speaker-diarization", device: str = "cpu"):
+        self._model_name = model_name
+        self._device = device
+        self._loaded_pipeline = None
+        self._unavailable = False
+
+    @property
+    def _pipeline(self):
+        """Shared pyannote pipeline from the model registry, loaded on first use"""
+        if self._loaded_pipeline is None and not self._unavailable:
+            try:
+                # Reads the Hugging Face token from HUGGINGFACE_TOKEN
+                self._loaded_pipeline = model_registry.acquire("pyannote", self._model_name, device=self._device)
+            except Exception as e:
+                self._unavailable = True
+                print(f"Warning: Diarization pipeline not available: {e}")
+        return self._loaded_pipeline
+
+    def close(self) -> None:
+        """Drop this service's reference to the shared pipeline"""
+        if self._loaded_pipeline is not None:
+            self._loaded_pipeline = None
+            model_registry.release("pyannote", self._model_name, device=self._device)
 
     def diarize(self, audio_path: str) -> List[Dict[str, Any]]:
         """
@@ -0,0 +1,136 @@
+"""Process-pool transcription of long recordings.
+
+Each worker process takes a Whisper model from the model registry once (in
+the pool initializer) and keeps it resident for every chunk it is handed.
+With the ``fork`` start method, workers inherit a model the server already
+preloaded and share its weights copy-on-write instead of loading a copy. Chunks are
+submitted as float32 numpy arrays with a bounded number in flight, so memory
+stays proportional to the worker count rather than the recording length,
+and results are merged back in submission order.
+"""
+import logging
+import multiprocessing
+import os
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import Any, Callable, Deque, Dict, Iterable, Optional, Tuple
+
+from ..model_registry import model_registry
+from .audio_stream import AudioChunk, TranscriptMerger
+
+logger = logging.getLogger(__name__)
+
+# Populated in each worker process by ``_init_worker``.
+_worker_model = None
+
+
+def load_whisper_model(model_size: str, device: str):
+    """Default model loader used inside worker processes."""
+    return model_registry.acquire("whisper", model_size, device=device)
+
+
+def _init_worker(
+    model_loader: Callable[[str, str], Any],
+    model_size: str,
+    device: str,
+    threads_per_worker: int,
+) -> None:
+    global _worker_model
+    try:
+        import torch
+
+        # Without this every worker spins up one intra-op thread per core
+        # and the pool oversubscribes the machine.
+        torch.set_num_threads(threads_per_worker)
+    except ImportError:
+        pass
+    _worker_model = model_loader(model_size, device)
+
+
+def _transcribe_in_worker(samples, options: Dict[str, Any]) -> Dict[str, Any]:
+    result = _worker_model.transcribe(samples, **options)
+    return {
+        "text": result.get("text", ""),
+        "segments": result.get("segments", []),
+        "language": result.get("language"),
+    }
+
+
+class ParallelTranscriber:
+    """Transcribe audio chunks across a pool of worker processes."""
+
+    def __init__(
+        self,
+        model_size: str = "base",
+        device: str = "cpu",
+        workers: Optional[int] = None,
+        threads_per_worker: Optional[int] = None,
+        model_loader: Callable[[str, str], Any] = load_whisper_model,
+        start_method: Optional[str] = None,
+    ):
+        cpu_count = os.cpu_count() or 1
+        self.model_size = model_size
+        self.device = device
+        self.workers = max(1, workers or cpu_count)
+        self.threads_per_worker = threads_per_worker or max(1, cpu_count // self.workers)
+        self._model_loader = model_loader
+        # "spawn" unless the server preloads models and opts into "fork"
+        self.start_method = start_method or os.getenv("TRANSCRIPTION_WORKER_START_METHOD", "spawn")
+        self._pool: Optional[ProcessPoolExecutor] = None
+
+    def _get_pool(self) -> ProcessPoolExecutor:
+        if self._pool is None:
+            # Spawned workers start fresh and never inherit a half-initialised
+            # torch/OpenMP runtime; forked workers reuse preloaded weights, so
+            # only fork when the model is loaded before torch spins up threads.
+            if self.start_method == "fork":
+                model_registry.prepare_for_fork()
+            self._pool = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context(self.start_method),
+                initializer=_init_worker,
+                initargs=(self._model_loader, self.model_size, self.device, self.threads_per_worker),
+            )
+        return self._pool
+
+    def transcribe_chunks(
+        self,
+        chunks: Iterable[AudioChunk],
+        on_progress: Optional[Callable[[float], None]] = None,
+        **options,
+    ) -> Dict[str, Any]:
+        """
+        Transcribe ``chunks`` in parallel and merge them in order.
+
+        At most ``2 * workers`` chunks are decoded and queued at any time.
+        Extra keyword arguments are passed through to ``model.transcribe``.
+        """
+        options.setdefault("fp16", self.device != "cpu")
+        pool = self._get_pool()
+        max_in_flight = self.workers * 2
+
+        merger = TranscriptMerger()
+        pending: Deque[Tuple[AudioChunk, Future]] = deque()
+
+        def _drain(limit: int) -> None:
+            while len(pending) > limit:
+                chunk, future = pending.popleft()
+                merger.add(chunk, future.result())
+                if on_progress and chunk.progress is not None:
+                    on_progress(chunk.progress)
+
+        try:
+            for chunk in chunks:
+                pending.append((chunk, pool.submit(_transcribe_in_worker, chunk.samples, options)))
+                _drain(max_in_flight)
+            _drain(0)
+        finally:
+            for _, future in pending:
+                future.cancel()
+
+        return merger.result()
+
+    def shutdown(self) -> None:
+        if self._pool is not None:
+            self._pool.shutdown(wait=True, cancel_futures=True)
+            self._pool = None
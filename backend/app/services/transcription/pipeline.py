@@ -0,0 +1,210 @@
+"""Staged transcription pipeline on top of the Redis ``TaskQueue``.
+
+A job runs as three separately scheduled tasks:
+
+* ``transcription`` - Whisper (+ diarization); the transcript is published
+  as soon as it is ready.
+* ``enrichment`` - diagrams, Mermaid diagrams and main topics.
+* ``media`` - presentation and educational videos.
+
+Each stage stores its result in a Redis hash for the job and pushes it to
+the optional publisher (e.g. the WebSocket ``ConnectionManager``), then
+enqueues the next stage.
+"""
+import json
+import logging
+import os
+import uuid
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from ..task_queue import Task, TaskQueue
+
+logger = logging.getLogger(__name__)
+
+STAGE_TRANSCRIPTION = "transcription"
+STAGE_ENRICHMENT = "enrichment"
+STAGE_MEDIA = "media"
+STAGES = (STAGE_TRANSCRIPTION, STAGE_ENRICHMENT, STAGE_MEDIA)
+
+# Called with (user_id, message) whenever a stage finishes or fails
+Publisher = Callable[[Optional[str], Dict[str, Any]], Awaitable[None]]
+
+
+class TranscriptionPipeline:
+    """Schedule TranscriptionService stages on a TaskQueue and publish partial results."""
+
+    def __init__(self, service, publisher: Optional[Publisher] = None):
+        self.service = service
+        self.publisher = publisher
+        self.queue: Optional[TaskQueue] = None
+
+    @staticmethod
+    def task_name(stage: str) -> str:
+        return f"transcription_pipeline.{stage}"
+
+    def attach(self, queue: TaskQueue) -> None:
+        """Register the stage handlers on ``queue``."""
+        self.queue = queue
+        queue.register_handler(self.task_name(STAGE_TRANSCRIPTION), self._run_transcription)
+        queue.register_handler(self.task_name(STAGE_ENRICHMENT), self._run_enrichment)
+        queue.register_handler(self.task_name(STAGE_MEDIA), self._run_media)
+
+    @property
+    def available(self) -> bool:
+        return self.queue is not None and self.queue.redis is not None
+
+    def _job_key(self, job_id: str) -> str:
+        return f"{self.queue.namespace}:transcription_jobs:{job_id}"
+
+    async def submit(
+        self,
+        audio_path: str,
+        diarize: bool = False,
+        generate_diagrams: bool = True,
+        language: Optional[str] = None,
+        user_id: Optional[str] = None,
+        cleanup: bool = False,
+    ) -> str:
+        """
+        Start a job for ``audio_path`` and return its id.
+
+        With ``cleanup`` the audio file is removed once the transcription
+        stage no longer needs it.
+        """
+        if not self.available:
+            raise RuntimeError("Task queue not initialized")
+
+        job_id = str(uuid.uuid4())
+        key = self._job_key(job_id)
+        await self.queue.redis.hset(key, mapping={
+            "status": "pending",
+            "stage": STAGE_TRANSCRIPTION,
+            "user_id": user_id or "",
+        })
+        await self.queue.redis.expire(key, self.queue.result_ttl)
+
+        await self.queue.enqueue(Task(
+            name=self.task_name(STAGE_TRANSCRIPTION),
+            params={
+                "job_id": job_id,
+                "audio_path": audio_path,
+                "diarize": diarize,
+                "generate_diagrams": generate_diagrams,
+                "language": language,
+                "user_id": user_id,
+                "cleanup": cleanup,
+            },
+        ))
+        return job_id
+
+    async def get_job(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Return the job status and the results of every stage finished so far."""
+        if not self.available:
+            return None
+
+        data = await self.queue.redis.hgetall(self._job_key(job_id))
+        if not data:
+            return None
+
+        return {
+            "job_id": job_id,
+            "status": data.get("status"),
+            "stage": data.get("stage"),
+            "user_id": data.get("user_id") or None,
+            "error": data.get("error"),
+            "results": {
+                stage: json.loads(data[f"result:{stage}"])
+                for stage in STAGES
+                if f"result:{stage}" in data
+            },
+        }
+
+    async def _load_result(self, job_id: str, stage: str) -> Dict[str, Any]:
+        payload = await self.queue.redis.hget(self._job_key(job_id), f"result:{stage}")
+        if payload is None:
+            raise RuntimeError(f"Missing {stage} result for transcription job {job_id}")
+        return json.loads(payload)
+
+    async def _notify(self, user_id: Optional[str], message: Dict[str, Any]) -> None:
+        if not self.publisher:
+            return
+        try:
+            await self.publisher(user_id, message)
+        except Exception as e:
+            logger.error(f"Failed to publish transcription job update: {e}")
+
+    async def _publish(self, job_id: str, stage: str, result: Dict[str, Any],
+                       user_id: Optional[str], next_stage: Optional[str],
+                       generate_diagrams: bool = True) -> None:
+        key = self._job_key(job_id)
+        await self.queue.redis.hset(key, mapping={
+            f"result:{stage}": json.dumps(result),
+            "status": "processing" if next_stage else "completed",
+            "stage": next_stage or stage,
+        })
+        await self.queue.redis.expire(key, self.queue.result_ttl)
+        await self._notify(user_id, {
+            "type": "transcription.stage_completed",
+            "payload": {"job_id": job_id, "stage": stage, "result": result},
+        })
+        if next_stage:
+            await self.queue.enqueue(Task(
+                name=self.task_name(next_stage),
+                params={"job_id": job_id, "user_id": user_id, "generate_diagrams": generate_diagrams},
+            ))
+
+    async def _fail(self, job_id: str, stage: str, error: str, user_id: Optional[str]) -> None:
+        await self.queue.redis.hset(self._job_key(job_id), mapping={
+            "status": "failed",
+            "stage": stage,
+            "error": error,
+        })
+        await self._notify(user_id, {
+            "type": "transcription.stage_failed",
+            "payload": {"job_id": job_id, "stage": stage, "error": error},
+        })
+
+    async def _run_transcription(self, job_id: str, audio_path: str, diarize: bool = False,
+                                 generate_diagrams: bool = True, language: Optional[str] = None,
+                                 user_id: Optional[str] = None, cleanup: bool = False,
+                                 _progress_callback=None) -> Dict[str, Any]:
+        try:
+            result = await self.service.transcribe_stage(audio_path, diarize=diarize, language=language)
+        finally:
+            if cleanup and os.path.exists(audio_path):
+                os.remove(audio_path)
+
+        if "error" in result:
+            await self._fail(job_id, STAGE_TRANSCRIPTION, result["error"], user_id)
+            raise RuntimeError(result["error"])
+
+        await self._publish(job_id, STAGE_TRANSCRIPTION, result, user_id,
+                            next_stage=STAGE_ENRICHMENT, generate_diagrams=generate_diagrams)
+        return {"job_id": job_id, "stage": STAGE_TRANSCRIPTION}
+
+    async def _run_enrichment(self, job_id: str, generate_diagrams: bool = True,
+                              user_id: Optional[str] = None, _progress_callback=None) -> Dict[str, Any]:
+        try:
+            transcript = await self._load_result(job_id, STAGE_TRANSCRIPTION)
+            result = await self.service.enrichment_stage(transcript, generate_diagrams=generate_diagrams)
+        except Exception as e:
+            await self._fail(job_id, STAGE_ENRICHMENT, str(e), user_id)
+            raise
+
+        await self._publish(job_id, STAGE_ENRICHMENT, result, user_id,
+                            next_stage=STAGE_MEDIA, generate_diagrams=generate_diagrams)
+        return {"job_id": job_id, "stage": STAGE_ENRICHMENT}
+
+    async def _run_media(self, job_id: str, generate_diagrams: bool = True,
+                         user_id: Optional[str] = None, _progress_callback=None) -> Dict[str, Any]:
+        try:
+            enriched = await self._load_result(job_id, STAGE_TRANSCRIPTION)
+            enriched.update(await self._load_result(job_id, STAGE_ENRICHMENT))
+            result = await self.service.media_stage(enriched, generate_diagrams=generate_diagrams)
+        except Exception as e:
+            await self._fail(job_id, STAGE_MEDIA, str(e), user_id)
+            raise
+
+        await self._publish(job_id, STAGE_MEDIA, result, user_id,
+                            next_stage=None, generate_diagrams=generate_diagrams)
+        return {"job_id": job_id, "stage": STAGE_MEDIA}
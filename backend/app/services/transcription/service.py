@@ -1,15 +1,18 @@
 <<<<<<< HEAD
 from typing import Optional, List, Dict, Any, Generator, Tuple
-import whisper
+import asyncio
 import tempfile
 import os
 import openai
+from .audio_stream import AudioChunk, TranscriptMerger, stream_audio_chunks
+from .cache import TranscriptionCache, hash_audio_file
 from .diarization import DiarizationService
+from .parallel import ParallelTranscriber
+from ..model_registry import model_registry
+from .speakers import assign_speakers
 from ..visual.service import VisualGenerationService
 from ..educational.service import EducationalVideoService
 import numpy as np
-from pydub import AudioSegment
-import math
 import re
 from datetime import timedelta
 from dotenv import load_dotenv
@@ -19,45 +22,65 @@ import torch
 load_dotenv()
 
 class TranscriptionService:
-    def __init__(self, model_size: str = "base", device: str = "cpu", openai_api_key: Optional[str] = None):
-        self._model = None
-        self._diarizer = DiarizationService()
+    def __init__(self, model_size: str = "base", device: str = "cpu", openai_api_key: Optional[str] = None,
+                 chunk_duration: int = 1800, chunk_overlap: float = 0.0, ffmpeg_path: str = "ffmpeg",
+                 workers: Optional[int] = None, parallel_chunk_duration: int = 300,
+                 parallel_chunk_overlap: float = 2.0, cache: Optional[TranscriptionCache] = None):
+        self._whisper_model = None
+        self._model_unavailable = False
+        self._model_size = model_size
+        self._chunk_duration = chunk_duration
+        self._chunk_overlap = chunk_overlap
+        self._ffmpeg_path = ffmpeg_path
+        # Worker processes for parallel chunk transcription; 1 keeps the sequential path
+        self._workers = workers if workers is not None else int(os.getenv("TRANSCRIPTION_WORKERS", "1"))
+        # Shorter chunks give the worker pool enough pieces to keep every core busy
+        self._parallel_chunk_duration = parallel_chunk_duration
+        # With that many more seams, overlap them so the merge can drop the words cut at each one
+        self._parallel_chunk_overlap = parallel_chunk_overlap
+        self._parallel_transcriber: Optional[ParallelTranscriber] = None
+        self._diarizer = DiarizationService(device=device)
         api_key = openai_api_key or os.getenv('OPENAI_API_KEY')
         self._visual_generator = VisualGenerationService(api_key=api_key)
         self._educational_generator = EducationalVideoService(api_key=api_key)
-        self._cache = {}
+        self._cache = cache or TranscriptionCache(
+            db_path=os.getenv("TRANSCRIPTION_CACHE_PATH", "data/transcription_cache.sqlite3"),
+            memory_budget_bytes=int(os.getenv("TRANSCRIPTION_CACHE_MEMORY_MB", "64")) * 1024 * 1024,
+        )
         self._device = device
+        self._compute_type = "float32" if device == "cpu" else "float16"
         
         # Configure OpenAI API
         if openai_api_key:
             openai.api_key = openai_api_key
-        
-        try:
-            self._model = whisper.load_model(model_size, device=device)
-        except Exception as e:
-            print(f"Warning: Whisper model not available: {e}")
-            print("Make sure you have installed whisper: pip install openai-whisper")
 
-    def _split_audio(self, audio_path: str, chunk_duration: int = 1800) -> Generator[Tuple[AudioSegment, float], None, None]:
+    @property
+    def _model(self):
+        """Shared Whisper model from the model registry, loaded on first use"""
+        if self._whisper_model is None and not self._model_unavailable:
+            try:
+                self._whisper_model = model_registry.acquire(
+                    "whisper", self._model_size, device=self._device, compute_type=self._compute_type
+                )
+            except Exception as e:
+                self._model_unavailable = True
+                print(f"Warning: Whisper model not available: {e}")
+                print("Make sure you have installed whisper: pip install openai-whisper")
+        return self._whisper_model
+
+    def _split_audio(self, audio_path: str, chunk_duration: Optional[int] = None,
+                     overlap: Optional[float] = None) -> Generator[AudioChunk, None, None]:
         """
-        Split long audio/video file into chunks
+        Stream long audio/video file as 16 kHz mono float32 chunks
         chunk_duration: duration of each chunk in seconds (default 30 minutes)
+        overlap: seconds shared between consecutive chunks
         """
-        try:
-            audio = AudioSegment.from_file(audio_path)
-            total_duration = len(audio) / 1000  # Convert to seconds
-            chunks = math.ceil(total_duration / chunk_duration)
-            
-            for i in range(chunks):
-                start_time = i * chunk_duration * 1000  # Convert to milliseconds
-                end_time = min((i + 1) * chunk_duration * 1000, len(audio))
-                chunk = audio[start_time:end_time]
-                progress = (i + 1) / chunks
-                yield chunk, progress
-                
-        except Exception as e:
-            print(f"Error splitting audio: {e}")
-            yield AudioSegment.from_file(audio_path), 1.0
+        return stream_audio_chunks(
+            audio_path,
+            chunk_duration=chunk_duration or self._chunk_duration,
+            overlap=self._chunk_overlap if overlap is None else overlap,
+            ffmpeg_path=self._ffmpeg_path,
+        )
 
     async def _extract_main_topics(self, text: str) -> List[Dict[str, str]]:
         """Extract main topics from the transcribed text using GPT-4"""
@@ -121,55 +144,49 @@ class TranscriptionService:
         return descriptions
 
     async def transcribe_audio(self, audio_path: str, diarize: bool = False, 
-                             generate_diagrams: bool = True) -> dict:
-        """Transcribe audio file with optional speaker diarization and diagram generation"""
-        if audio_path in self._cache:
-            return self._cache[audio_path]
+                             generate_diagrams: bool = True, language: Optional[str] = None) -> dict:
+        """
+        Transcribe audio file with optional speaker diarization and diagram generation
+        Runs every stage inline; TranscriptionPipeline schedules them separately so the
+        transcript is available as soon as Whisper is done
+        """
+        result = await self.transcribe_stage(audio_path, diarize=diarize, language=language)
+        if "error" in result:
+            return result
 
-        if not self._model:
-            return {"error": "Whisper model not available", "fallback": True, "text": ""}
+        try:
+            result.update(await self.enrichment_stage(result, generate_diagrams=generate_diagrams))
+            result.update(await self.media_stage(result, generate_diagrams=generate_diagrams))
+            return result
+        except Exception as e:
+            return {"error": str(e), "fallback": True, "text": ""}
+
+    async def transcribe_stage(self, audio_path: str, diarize: bool = False,
+                               language: Optional[str] = None) -> dict:
+        """Stage 1: Whisper transcription plus optional speaker diarization"""
+        # Hashing, decoding and diarization all block; keep them off the event loop
+        return await asyncio.to_thread(self._transcribe_stage, audio_path, diarize, language)
 
+    def _transcribe_stage(self, audio_path: str, diarize: bool, language: Optional[str]) -> dict:
         try:
-            all_segments = []
-            full_text = []
-            current_offset = 0.0
-            
-            # Process audio in chunks
-            for chunk, progress in self._split_audio(audio_path):
-                # Save chunk to temporary file
-                with tempfile.NamedTemporaryFile(suffix='.wav', delete=False) as temp_file:
-                    chunk_path = temp_file.name
-                    chunk.export(chunk_path, format='wav')
-                
-                try:
-                    # Transcribe chunk
-                    chunk_result = self._model.transcribe(chunk_path)
-                    
-                    # Adjust timestamps for segments
-                    if "segments" in chunk_result:
-                        for segment in chunk_result["segments"]:
-                            segment["start"] += current_offset
-                            segment["end"] += current_offset
-                            all_segments.append(segment)
-                    
-                    full_text.append(chunk_result["text"])
-                    
-                    # Update progress
-                    print(f"Transcription progress: {progress*100:.1f}%")
-                    
-                finally:
-                    # Clean up temporary file
-                    if os.path.exists(chunk_path):
-                        os.unlink(chunk_path)
-                
-                current_offset += len(chunk) / 1000  # Update offset in seconds
-            
-            # Combine results
-            result = {
-                "text": " ".join(full_text),
-                "segments": all_segments,
-                "duration": current_offset
-            }
+            # Key on the audio content so re-uploads under another name still hit
+            cache_key = self._cache.make_key(
+                hash_audio_file(audio_path),
+                self._model_size,
+                language=language,
+                diarize=diarize,
+            )
+            cached = self._cache.get(cache_key)
+            if cached is not None:
+                return cached
+
+            # Cache hits never load Whisper; parallel workers load their own
+            if self._workers > 1:
+                result = self._transcribe_parallel(audio_path, language=language)
+            elif not self._model:
+                return {"error": "Whisper model not available", "fallback": True, "text": ""}
+            else:
+                result = self._transcribe_sequential(audio_path, language=language)
             
             if diarize:
                 # Perform speaker diarization on the full audio
@@ -183,105 +200,157 @@ class TranscriptionService:
                     result["speakers"] = ["Speaker 1"]
             
             # Add human-readable duration
-            result["duration_formatted"] = str(timedelta(seconds=int(current_offset)))
+            result["duration_formatted"] = str(timedelta(seconds=int(result["duration"])))
             
-            # Generate diagrams if requested
-            if generate_diagrams:
-                diagram_descriptions = await self._extract_diagram_descriptions(result["text"])
-                diagrams = []
-                
-                for desc in diagram_descriptions:
-                    diagram = await self._visual_generator.generate_diagram(
-                        desc["description"],
-                        style=desc["type"]
-                    )
-                    if "error" not in diagram:
-                        diagrams.append(diagram)
-                
-                result["diagrams"] = diagrams
-                
-                # Generate Mermaid diagrams for technical sections
-                for segment in result.get("segments", []):
-                    if any(term in segment["text"].lower() 
-                          for term in ["flowchart", "sequence", "architecture", "process"]):
-                        mermaid = await self._visual_generator.generate_mermaid_diagram(
-                            segment["text"],
-                            type="flowchart" if "flowchart" in segment["text"].lower() else "sequence"
-                        )
-                        if "error" not in mermaid:
-                            if "mermaid_diagrams" not in result:
-                                result["mermaid_diagrams"] = []
-                            result["mermaid_diagrams"].append(mermaid)
+            self._cache.set(cache_key, result)
+            return result
+        except Exception as e:
+            return {"error": str(e), "fallback": True, "text": ""}
+
+    async def enrichment_stage(self, transcript: Dict[str, Any], generate_diagrams: bool = True) -> dict:
+        """Stage 2: diagrams and main topics derived from the transcript"""
+        result: Dict[str, Any] = {}
+        
+        # Generate diagrams if requested
+        if generate_diagrams:
+            diagram_descriptions = await self._extract_diagram_descriptions(transcript["text"])
+            diagrams = []
             
-            # Generate presentation if there's enough content
-            if len(result.get("segments", [])) > 5:
-                presentation = await self._visual_generator.generate_presentation(
-                    result,
-                    include_diagrams=generate_diagrams
+            for desc in diagram_descriptions:
+                diagram = await self._visual_generator.generate_diagram(
+                    desc["description"],
+                    style=desc["type"]
                 )
-                if "error" not in presentation:
-                    result["presentation"] = presentation
+                if "error" not in diagram:
+                    diagrams.append(diagram)
             
-            # Extract main topics and generate educational videos
-            topics = await self._extract_main_topics(result["text"])
-            educational_videos = []
+            result["diagrams"] = diagrams
             
-            for topic in topics:
-                video = await self._educational_generator.generate_educational_video(
-                    topic["title"],
-                    {
-                        "text": topic["content"],
-                        "diagrams": result.get("diagrams", []),
-                        "mermaid_diagrams": result.get("mermaid_diagrams", [])
-                    },
-                    style="engaging",
-                    duration=300  # 5 minutes per topic
-                )
-                if "error" not in video:
-                    educational_videos.append({
-                        "topic": topic["title"],
-                        "video": video
-                    })
-            
-            if educational_videos:
-                result["educational_videos"] = educational_videos
+            # Generate Mermaid diagrams for technical sections
+            for segment in transcript.get("segments", []):
+                if any(term in segment["text"].lower() 
+                      for term in ["flowchart", "sequence", "architecture", "process"]):
+                    mermaid = await self._visual_generator.generate_mermaid_diagram(
+                        segment["text"],
+                        type="flowchart" if "flowchart" in segment["text"].lower() else "sequence"
+                    )
+                    if "error" not in mermaid:
+                        if "mermaid_diagrams" not in result:
+                            result["mermaid_diagrams"] = []
+                        result["mermaid_diagrams"].append(mermaid)
+        
+        # Extract main topics for the educational videos
+        result["topics"] = await self._extract_main_topics(transcript["text"])
+        return result
+
+    async def media_stage(self, enriched: Dict[str, Any], generate_diagrams: bool = True) -> dict:
+        """Stage 3: presentation and educational videos from the enriched transcript"""
+        result: Dict[str, Any] = {}
+        
+        # Generate presentation if there's enough content
+        if len(enriched.get("segments", [])) > 5:
+            presentation = await self._visual_generator.generate_presentation(
+                enriched,
+                include_diagrams=generate_diagrams
+            )
+            if "error" not in presentation:
+                result["presentation"] = presentation
+        
+        # Generate educational videos for the main topics
+        educational_videos = []
+        
+        for topic in enriched.get("topics", []):
+            video = await self._educational_generator.generate_educational_video(
+                topic["title"],
+                {
+                    "text": topic["content"],
+                    "diagrams": enriched.get("diagrams", []),
+                    "mermaid_diagrams": enriched.get("mermaid_diagrams", [])
+                },
+                style="engaging",
+                duration=300  # 5 minutes per topic
+            )
+            if "error" not in video:
+                educational_videos.append({
+                    "topic": topic["title"],
+                    "video": video
+                })
+        
+        if educational_videos:
+            result["educational_videos"] = educational_videos
+        return result
+
+    def _transcribe_sequential(self, audio_path: str, language: Optional[str] = None) -> Dict[str, Any]:
+        """Transcribe chunks one after another on the in-process model"""
+        merger = TranscriptMerger()
+        
+        # Process audio in chunks decoded straight from the ffmpeg pipe
+        for chunk in self._split_audio(audio_path):
+            with model_registry.inference_lock("whisper", self._model_size, self._device, self._compute_type):
+                chunk_result = self._model.transcribe(chunk.samples, language=language, fp16=self._device != "cpu")
+            merger.add(chunk, chunk_result)
             
-            self._cache[audio_path] = result
-            return result
-        except Exception as e:
-            return {"error": str(e), "fallback": True, "text": ""}
+            if chunk.progress is not None:
+                print(f"Transcription progress: {chunk.progress*100:.1f}%")
+        
+        return merger.result()
+
+    def _transcribe_parallel(self, audio_path: str, language: Optional[str] = None) -> Dict[str, Any]:
+        """Fan chunks out to worker processes, each holding a resident Whisper model"""
+        if self._parallel_transcriber is None:
+            self._parallel_transcriber = ParallelTranscriber(
+                model_size=self._model_size,
+                device=self._device,
+                workers=self._workers,
+            )
+        
+        chunks = self._split_audio(
+            audio_path,
+            chunk_duration=min(self._chunk_duration, self._parallel_chunk_duration),
+            overlap=self._parallel_chunk_overlap,
+        )
+        return self._parallel_transcriber.transcribe_chunks(
+            chunks,
+            on_progress=lambda progress: print(f"Transcription progress: {progress*100:.1f}%"),
+            language=language,
+        )
+
+    def close(self) -> None:
+        """Release worker processes, shared models and the result cache"""
+        if self._parallel_transcriber is not None:
+            self._parallel_transcriber.shutdown()
+            self._parallel_transcriber = None
+        if self._whisper_model is not None:
+            self._whisper_model = None
+            model_registry.release("whisper", self._model_size, device=self._device, compute_type=self._compute_type)
+        self._diarizer.close()
+        self._cache.close()
+
+    def cache_stats(self) -> Dict[str, Any]:
+        """Hit/miss metrics for the transcription result cache"""
+        return self._cache.stats()
 
     def _merge_diarization(self, whisper_segments: List[Dict[str, Any]], diarization_segments: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
         """
         Merge Whisper transcription segments with speaker diarization segments
+        Each segment gets the speaker of the diarization turn it overlaps the most
         """
-        merged_segments = []
-        
-        for whisper_seg in whisper_segments:
-            # Find overlapping diarization segments
-            start_time = whisper_seg["start"]
-            end_time = whisper_seg["end"]
-            
-            # Find the diarization segment that overlaps the most with this transcription segment
-            max_overlap = 0
-            assigned_speaker = "Speaker 1"
-            
-            for diar_seg in diarization_segments:
-                overlap_start = max(start_time, diar_seg["start"])
-                overlap_end = min(end_time, diar_seg["end"])
-                
-                if overlap_end > overlap_start:
-                    overlap_duration = overlap_end - overlap_start
-                    if overlap_duration > max_overlap:
-                        max_overlap = overlap_duration
-                        assigned_speaker = diar_seg["speaker"]
-            
-            # Add the speaker information to the segment
-            segment = whisper_seg.copy()
-            segment["speaker"] = assigned_speaker
-            merged_segments.append(segment)
-        
-        return merged_segments
+        return assign_speakers(whisper_segments, diarization_segments)
+
+    def transcribe_samples(self, samples: np.ndarray, initial_prompt: Optional[str] = None,
+                           language: Optional[str] = None) -> Dict[str, Any]:
+        """Decode 16 kHz float32 samples in memory; used by live streaming sessions"""
+        if not self._model:
+            raise RuntimeError("Whisper model not available")
+        with model_registry.inference_lock("whisper", self._model_size, self._device, self._compute_type):
+            result = self._model.transcribe(
+                samples,
+                language=language,
+                initial_prompt=initial_prompt,
+                condition_on_previous_text=False,
+                fp16=self._device != "cpu",
+            )
+        return {"text": result.get("text", ""), "segments": result.get("segments", [])}
 
     async def transcribe_chunk(self, audio_chunk: bytes, diarize: bool = False) -> dict:
         """Transcribe live audio chunk with optional diarization"""
@@ -294,7 +363,8 @@ class TranscriptionService:
                 temp_file.write(audio_chunk)
                 temp_file_path = temp_file.name
 
-            result = self._model.transcribe(temp_file_path)
+            with model_registry.inference_lock("whisper", self._model_size, self._device, self._compute_type):
+                result = self._model.transcribe(temp_file_path)
 
             if diarize and len(result.get("text", "").strip()) > 0:
                 # Only attempt diarization if there's actual speech
@@ -0,0 +1,115 @@
+"""Speaker assignment for transcript segments.
+
+Each Whisper segment gets the speaker of the diarization turn it overlaps
+the most. A turn and a segment overlap exactly when the turn starts inside
+the segment or the segment starts strictly inside the turn, and each of
+those is a contiguous run of start-sorted turns (or segments) found by two
+binary searches. Only overlapping (segment, turn) pairs are ever generated,
+so one long turn costs one pair per segment it covers rather than widening
+every later search, and the pairs are scored in bulk.
+"""
+from typing import Any, Dict, List
+
+import numpy as np
+
+DEFAULT_SPEAKER = "Speaker 1"
+
+# Upper bound on candidate pairs scored at once, to cap memory when long
+# turns overlap many segments.
+MAX_PAIRS_PER_BATCH = 1_000_000
+
+
+def assign_speakers(
+    whisper_segments: List[Dict[str, Any]],
+    diarization_segments: List[Dict[str, Any]],
+    default_speaker: str = DEFAULT_SPEAKER,
+) -> List[Dict[str, Any]]:
+    """
+    Return copies of ``whisper_segments`` with a ``speaker`` key added.
+
+    Ties are resolved in favour of the turn listed first in
+    ``diarization_segments``; segments without any positive overlap get
+    ``default_speaker``.
+    """
+    merged = [dict(segment, speaker=default_speaker) for segment in whisper_segments]
+    if not merged or not diarization_segments:
+        return merged
+
+    diar_start = np.array([seg["start"] for seg in diarization_segments], dtype=np.float64)
+    diar_end = np.array([seg["end"] for seg in diarization_segments], dtype=np.float64)
+    # Empty turns overlap nothing; keep the others sorted by start, ties in listed order
+    order = np.flatnonzero(diar_end > diar_start)
+    order = order[np.argsort(diar_start[order], kind="stable")]
+    diar_start = diar_start[order]
+    diar_end = diar_end[order]
+
+    seg_start = np.array([seg["start"] for seg in whisper_segments], dtype=np.float64)
+    seg_end = np.array([seg["end"] for seg in whisper_segments], dtype=np.float64)
+    seg_order = np.flatnonzero(seg_end > seg_start)
+    seg_order = seg_order[np.argsort(seg_start[seg_order], kind="stable")]
+    sorted_seg_start = seg_start[seg_order]
+
+    best_overlap = np.zeros(len(merged), dtype=np.float64)
+    best = np.full(len(merged), -1, dtype=np.int64)
+
+    # Turns starting in [s, e) of each segment
+    lo = np.searchsorted(diar_start, seg_start[seg_order], side="left")
+    hi = np.searchsorted(diar_start, seg_end[seg_order], side="left")
+    for owner, other in _pairs_in_batches(lo, hi - lo):
+        _score_pairs(seg_order[owner], other, seg_start, seg_end,
+                     diar_start, diar_end, order, best_overlap, best)
+
+    # Segments starting strictly inside each turn
+    lo = np.searchsorted(sorted_seg_start, diar_start, side="right")
+    hi = np.searchsorted(sorted_seg_start, diar_end, side="left")
+    for owner, other in _pairs_in_batches(lo, np.maximum(hi - lo, 0)):
+        _score_pairs(seg_order[other], owner, seg_start, seg_end,
+                     diar_start, diar_end, order, best_overlap, best)
+
+    speakers = [seg["speaker"] for seg in diarization_segments]
+    for index in np.flatnonzero(best >= 0):
+        merged[index]["speaker"] = speakers[best[index]]
+    return merged
+
+
+def _pairs_in_batches(lo, counts):
+    """
+    Yield ``(owner, other)`` index arrays pairing each owner ``i`` with
+    ``lo[i]``, ..., ``lo[i] + counts[i] - 1``, at most MAX_PAIRS_PER_BATCH
+    pairs at a time (always at least one owner).
+    """
+    batch_start = 0
+    while batch_start < len(counts):
+        cumulative = np.cumsum(counts[batch_start:])
+        batch_end = batch_start + max(1, int(np.searchsorted(cumulative, MAX_PAIRS_PER_BATCH, side="right")))
+        batch_counts = counts[batch_start:batch_end]
+        total = int(batch_counts.sum())
+        if total:
+            owner = np.repeat(np.arange(batch_start, batch_end), batch_counts)
+            offsets = np.arange(total) - np.repeat(np.cumsum(batch_counts) - batch_counts, batch_counts)
+            yield owner, lo[owner] + offsets
+        batch_start = batch_end
+
+
+def _score_pairs(pair_seg, pair_turn, seg_start, seg_end, diar_start, diar_end,
+                 order, best_overlap, best) -> None:
+    """Keep, per segment, the largest overlap so far and its earliest original turn."""
+    overlap = (np.minimum(seg_end[pair_seg], diar_end[pair_turn])
+               - np.maximum(seg_start[pair_seg], diar_start[pair_turn]))
+    original_index = order[pair_turn]
+
+    # Sort by segment, then largest overlap, then earliest original turn;
+    # the first pair of each segment is its winner in this batch.
+    ranking = np.lexsort((original_index, -overlap, pair_seg))
+    pair_seg = pair_seg[ranking]
+    first = np.ones(len(pair_seg), dtype=bool)
+    first[1:] = pair_seg[1:] != pair_seg[:-1]
+    segs = pair_seg[first]
+    overlap = overlap[ranking][first]
+    original_index = original_index[ranking][first]
+
+    better = (overlap > best_overlap[segs]) | (
+        (overlap == best_overlap[segs]) & (original_index < best[segs])
+    )
+    best_overlap[segs[better]] = overlap[better]
+    best[segs[better]] = original_index[better]
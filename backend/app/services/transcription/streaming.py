@@ -0,0 +1,255 @@
+"""Streaming speech recognition for live lectures.
+
+A ``StreamingSession`` accepts raw 16 kHz mono s16le PCM frames as they
+arrive over a WebSocket, segments them into utterances with a lightweight
+energy voice-activity detector, and emits:
+
+- ``transcription.partial`` hypotheses for the utterance in progress, at most
+  every ``partial_interval`` seconds of audio, and
+- one ``transcription.final`` hypothesis per utterance once the speaker
+  pauses (or the utterance reaches ``max_utterance`` seconds).
+
+Timestamps come from the count of samples received, not from wall-clock
+time, so they are stable across partials and line up with a recording of
+the same stream. A partial and the final that replaces it share an
+``utterance_id``. The text of the previous finals is passed on as the
+decoding prompt, so context carries across utterances.
+
+Memory per session is bounded by ``max_pending_bytes`` of not-yet-processed
+PCM plus one utterance buffer of at most ``max_utterance`` seconds. When
+decoding falls behind, ``push`` waits for room instead of buffering more,
+which stops the WebSocket reader and pushes back on the client through TCP
+flow control; the backlog is then processed in one step and stale partials
+are skipped.
+"""
+import asyncio
+import logging
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+import numpy as np
+
+from .audio_stream import BYTES_PER_SAMPLE, SAMPLE_RATE, pcm_to_float32
+
+logger = logging.getLogger(__name__)
+
+# transcribe(samples, initial_prompt) -> {"text": ..., "segments": [...]}
+Transcriber = Callable[[np.ndarray, Optional[str]], Dict[str, Any]]
+Emitter = Callable[[Dict[str, Any]], Awaitable[None]]
+
+FRAME_SECONDS = 0.03
+PROMPT_CHARS = 200
+
+
+class EnergyVAD:
+    """
+    Frame-level voice activity from RMS energy against an adaptive noise floor.
+
+    A frame is speech when its energy is ``threshold_ratio`` times above the
+    tracked noise floor and above ``min_energy``. The floor follows quiet
+    frames quickly and loud frames slowly, so it settles on room noise.
+    """
+
+    def __init__(self, threshold_ratio: float = 3.0, min_energy: float = 0.01,
+                 initial_floor: float = 0.005, adapt_rate: float = 0.05):
+        self.threshold_ratio = threshold_ratio
+        self.min_energy = min_energy
+        self.noise_floor = initial_floor
+        self.adapt_rate = adapt_rate
+
+    def is_speech(self, frame: np.ndarray) -> bool:
+        energy = float(np.sqrt(np.mean(frame * frame))) if len(frame) else 0.0
+        speech = energy > max(self.min_energy, self.noise_floor * self.threshold_ratio)
+        rate = self.adapt_rate * (0.01 if speech else 1.0)
+        self.noise_floor += rate * (energy - self.noise_floor)
+        return speech
+
+
+class StreamingSession:
+    """One live transcription stream; feed it with ``push`` and drive it with ``run``."""
+
+    def __init__(
+        self,
+        transcribe: Transcriber,
+        emit: Emitter,
+        session_id: str = "",
+        sample_rate: int = SAMPLE_RATE,
+        partial_interval: float = 0.5,
+        endpoint_silence: float = 0.6,
+        max_utterance: float = 30.0,
+        preroll: float = 0.2,
+        max_pending_bytes: int = 512 * 1024,
+        vad: Optional[EnergyVAD] = None,
+    ):
+        self.session_id = session_id
+        self.sample_rate = sample_rate
+        self._transcribe = transcribe
+        self._emit = emit
+        self._vad = vad or EnergyVAD()
+        self._frame = int(FRAME_SECONDS * sample_rate)
+        self._partial_interval = int(partial_interval * sample_rate)
+        self._endpoint_silence = int(endpoint_silence * sample_rate)
+        self._preroll = int(preroll * sample_rate)
+        self._max_utterance = int(max_utterance * sample_rate)
+        self.max_pending_bytes = max_pending_bytes
+
+        self._pending = bytearray()
+        self._pending_changed = asyncio.Condition()
+        self._closed = False
+        self._throttled = False
+
+        self._clock = 0  # samples processed since the session started
+        self._remainder = np.zeros(0, dtype=np.float32)  # samples short of a full VAD frame
+        self._preroll_audio = np.zeros(0, dtype=np.float32)
+        self._utterance = np.zeros(max(self._max_utterance, self._preroll + self._frame), dtype=np.float32)
+        self._utterance_length = 0
+        self._utterance_start: Optional[int] = None
+        self._utterance_id = 0
+        self._silence = 0
+        self._last_partial = 0
+        self._prompt = ""
+
+    async def push(self, frame: bytes) -> None:
+        """Queue a PCM frame, waiting while ``max_pending_bytes`` are already queued."""
+        if len(frame) > self.max_pending_bytes:
+            raise ValueError(f"Frame of {len(frame)} bytes exceeds the {self.max_pending_bytes} byte session buffer")
+        fits = lambda: len(self._pending) + len(frame) <= self.max_pending_bytes
+        async with self._pending_changed:
+            # Tell the client once per stall that it is sending faster than we decode
+            notify = not fits() and not self._throttled
+            self._throttled = self._throttled or notify
+            pending = len(self._pending)
+        if notify:
+            await self._emit(self._message("transcription.backpressure", {
+                "pending_bytes": pending,
+                "max_pending_bytes": self.max_pending_bytes,
+            }))
+        async with self._pending_changed:
+            await self._pending_changed.wait_for(lambda: self._closed or fits())
+            if self._closed:
+                raise RuntimeError("Streaming session is closed")
+            self._pending.extend(frame)
+            self._pending_changed.notify_all()
+
+    async def close(self) -> None:
+        """Stop accepting audio; ``run`` finalizes what is buffered and returns."""
+        async with self._pending_changed:
+            self._closed = True
+            self._pending_changed.notify_all()
+
+    async def run(self) -> None:
+        """Process queued audio until the session is closed or decoding fails."""
+        try:
+            await self._run()
+        except Exception as e:
+            logger.error(f"Streaming transcription failed for {self.session_id}: {e}")
+            await self.close()
+            await self._emit(self._message("transcription.error", {"error": str(e)}))
+
+    async def _run(self) -> None:
+        while True:
+            async with self._pending_changed:
+                await self._pending_changed.wait_for(
+                    lambda: len(self._pending) >= BYTES_PER_SAMPLE or self._closed
+                )
+                # Take whole samples only; an odd trailing byte waits for its pair
+                usable = len(self._pending) - len(self._pending) % BYTES_PER_SAMPLE
+                data = bytes(self._pending[:usable])
+                del self._pending[:usable]
+                closed = self._closed
+                self._throttled = False
+                self._pending_changed.notify_all()
+
+            if data:
+                await self._process(pcm_to_float32(data))
+            if closed:
+                await self._flush()
+                return
+
+    async def _process(self, samples: np.ndarray) -> None:
+        samples = np.concatenate([self._remainder, samples])
+        frames = len(samples) // self._frame
+        self._remainder = samples[frames * self._frame:]
+
+        for index in range(frames):
+            frame = samples[index * self._frame:(index + 1) * self._frame]
+            speech = self._vad.is_speech(frame)
+            if self._utterance_start is None:
+                if speech:
+                    self._begin_utterance(frame)
+                else:
+                    preroll = np.concatenate([self._preroll_audio, frame])
+                    self._preroll_audio = preroll[max(0, len(preroll) - self._preroll):]
+            else:
+                self._append(frame)
+                self._silence = 0 if speech else self._silence + len(frame)
+                if self._silence >= self._endpoint_silence:
+                    await self._finalize(trim=self._silence)
+                elif self._utterance_length + self._frame > len(self._utterance):
+                    await self._finalize()
+            self._clock += len(frame)
+
+        if (self._utterance_start is not None and self._silence == 0
+                and self._clock - self._last_partial >= self._partial_interval):
+            await self._partial()
+
+    def _begin_utterance(self, frame: np.ndarray) -> None:
+        self._utterance_id += 1
+        self._utterance_length = 0
+        self._utterance_start = self._clock - len(self._preroll_audio)
+        self._append(self._preroll_audio)
+        self._append(frame)
+        self._preroll_audio = np.zeros(0, dtype=np.float32)
+        self._silence = 0
+        self._last_partial = self._clock
+
+    def _append(self, samples: np.ndarray) -> None:
+        end = self._utterance_length + len(samples)
+        self._utterance[self._utterance_length:end] = samples
+        self._utterance_length = end
+
+    async def _decode(self, length: int) -> Dict[str, Any]:
+        # Copy: the shared utterance buffer keeps changing while the decode runs
+        samples = self._utterance[:length].copy()
+        return await asyncio.to_thread(self._transcribe, samples, self._prompt or None)
+
+    async def _partial(self) -> None:
+        self._last_partial = self._clock
+        result = await self._decode(self._utterance_length)
+        await self._emit(self._message("transcription.partial", self._hypothesis(result, self._utterance_length)))
+
+    async def _finalize(self, trim: int = 0) -> None:
+        length = max(0, self._utterance_length - trim)
+        result = await self._decode(length) if length else {"text": "", "segments": []}
+        hypothesis = self._hypothesis(result, length)
+        if hypothesis["text"]:
+            self._prompt = (self._prompt + " " + hypothesis["text"])[-PROMPT_CHARS:]
+        await self._emit(self._message("transcription.final", hypothesis))
+        self._utterance_start = None
+        self._utterance_length = 0
+        self._silence = 0
+
+    async def _flush(self) -> None:
+        if self._utterance_start is not None:
+            if len(self._remainder):
+                self._append(self._remainder[:len(self._utterance) - self._utterance_length])
+            await self._finalize(trim=self._silence)
+
+    def _hypothesis(self, result: Dict[str, Any], length: int) -> Dict[str, Any]:
+        offset = self._utterance_start / self.sample_rate
+        segments = []
+        for segment in result.get("segments", []):
+            segments.append({
+                **segment,
+                "start": offset + segment["start"],
+                "end": offset + min(segment["end"], length / self.sample_rate),
+            })
+        return {
+            "utterance_id": self._utterance_id,
+            "text": result.get("text", "").strip(),
+            "start": offset,
+            "end": offset + length / self.sample_rate,
+            "segments": segments,
+        }
+
+    def _message(self, message_type: str, payload: Dict[str, Any]) -> Dict[str, Any]:
+        return {"type": message_type, "payload": {"session_id": self.session_id, **payload}}
@@ -1,5 +1,20 @@
 <<<<<<< HEAD
-"""FFmpeg video generation service for NoteFusion AI."""
+"""FFmpeg video generation service for NoteFusion AI.
+
+Slides are rendered in one of two modes:
+
+- ``parallel``: every slide is encoded by its own ffmpeg process on the
+  thread pool, at most one process per core, each with a share of the
+  encoder threads. The clips are then joined with the concat demuxer.
+  Encoded slides are kept in a content-addressed ``SlideSegmentCache``, so
+  regenerating after an edit only re-encodes the slides that changed.
+- ``filtergraph``: one ffmpeg invocation draws every slide from a color
+  source and drawtext inside a single ``-filter_complex`` graph, joins them
+  with ``xfade`` transitions (or ``concat`` without them) and encodes once.
+
+Both encode with an x264 preset from ``ENCODER_PRESETS``. Faster presets
+trade file size for encode time, which costs little on mostly static slides.
+"""
 import os
 import subprocess
 import tempfile
@@ -7,22 +22,56 @@ import shutil
 import logging
 import uuid
 from pathlib import Path
-from typing import List, Dict, Any, Optional, Union, Callable
-from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict, Any, Optional, Union, Callable, Tuple
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from .segment_cache import SlideSegmentCache, get_slide_cache
 
 logger = logging.getLogger(__name__)
 
+ENCODER_PRESETS = ("ultrafast", "superfast", "veryfast", "faster", "fast", "medium")
+RENDER_MODES = ("parallel", "filtergraph")
+
+
+def _filter_path(path: Path) -> str:
+    """Quote a file path as a filter option value (Windows drive colons included)."""
+    return "'" + str(path).replace("\\", "/").replace(":", "\\:") + "'"
+
+
 class FFmpegVideoService:
     """Service for generating videos using FFmpeg with advanced features."""
     
-    def __init__(self, output_dir: str = "generated_videos"):
+    def __init__(
+        self,
+        output_dir: str = "generated_videos",
+        max_workers: Optional[int] = None,
+        preset: Optional[str] = None,
+        mode: Optional[str] = None,
+        slide_cache: Optional[SlideSegmentCache] = None
+    ):
         self.ffmpeg_path = self._find_ffmpeg()
         if not self.ffmpeg_path:
             raise RuntimeError("FFmpeg not found. Please install FFmpeg and add it to PATH.")
         
         self.output_dir = Path(output_dir).resolve()
         self.output_dir.mkdir(parents=True, exist_ok=True)
-        self.thread_pool = ThreadPoolExecutor(max_workers=min(4, (os.cpu_count() or 2) * 2))
+        # One slide encode per core: x264 already threads inside an encode, so
+        # more processes than cores only adds contention
+        self.max_workers = max_workers or os.cpu_count() or 2
+        self.thread_pool = ThreadPoolExecutor(max_workers=self.max_workers)
+        self.preset = self._check_option(
+            preset or os.getenv("VIDEO_ENCODER_PRESET", "veryfast"), ENCODER_PRESETS, "preset"
+        )
+        self.mode = self._check_option(
+            mode or os.getenv("VIDEO_RENDER_MODE", "parallel"), RENDER_MODES, "render mode"
+        )
+        self.slide_cache = slide_cache if slide_cache is not None else get_slide_cache()
+    
+    @staticmethod
+    def _check_option(value: str, allowed: Tuple[str, ...], name: str) -> str:
+        if value not in allowed:
+            raise ValueError(f"Unknown {name} {value!r}; expected one of {', '.join(allowed)}")
+        return value
     
     def _find_ffmpeg(self) -> str:
         """Find FFmpeg executable in common locations."""
@@ -35,28 +84,76 @@ class FFmpegVideoService:
                     stderr=subprocess.PIPE,
                     text=True
                 )
-                if result.returncode == 0 and "ffmpeg version" in result.stderr:
+                if result.returncode == 0 and "ffmpeg version" in result.stdout + result.stderr:
                     return name
             except (FileNotFoundError, subprocess.SubprocessError):
                 continue
         return ""
     
-    def _run_ffmpeg(self, cmd: List[str], error_msg: str = "FFmpeg command failed") -> None:
-        """Run an FFmpeg command and handle errors."""
-        try:
-            return subprocess.run(
-                cmd,
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE,
-                text=True,
-                check=True
-            )
-        except subprocess.CalledProcessError as e:
-            error_details = f"{error_msg}: {e}"
-            if e.stderr:
-                error_details += f"\nError output:\n{e.stderr}"
-            logger.error(error_details)
-            raise RuntimeError(error_details) from e
+    def _run_ffmpeg(
+        self,
+        cmd: List[str],
+        error_msg: str = "FFmpeg command failed",
+        total_seconds: Optional[float] = None,
+        progress_callback: Optional[Callable[[float], None]] = None
+    ) -> None:
+        """Run an FFmpeg command and handle errors.
+        
+        With ``progress_callback`` and ``total_seconds``, encoding progress
+        (0-100) is reported from ffmpeg's ``-progress`` output.
+        """
+        if not (progress_callback and total_seconds):
+            try:
+                return subprocess.run(
+                    cmd,
+                    stdout=subprocess.PIPE,
+                    stderr=subprocess.PIPE,
+                    text=True,
+                    check=True
+                )
+            except subprocess.CalledProcessError as e:
+                error_details = f"{error_msg}: {e}"
+                if e.stderr:
+                    error_details += f"\nError output:\n{e.stderr}"
+                logger.error(error_details)
+                raise RuntimeError(error_details) from e
+        
+        cmd = cmd[:-1] + ['-progress', 'pipe:1', '-nostats', cmd[-1]]
+        # stderr goes to a file so a chatty encode cannot block on a full pipe
+        with tempfile.TemporaryFile(mode='w+') as stderr:
+            process = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=stderr, text=True)
+            for line in process.stdout:
+                key, _, value = line.strip().partition('=')
+                if key == 'out_time_us' and value.isdigit():
+                    progress_callback(min(100.0, int(value) / 1e6 / total_seconds * 100))
+            if process.wait() != 0:
+                stderr.seek(0)
+                error_details = f"{error_msg}: exit status {process.returncode}\nError output:\n{stderr.read()}"
+                logger.error(error_details)
+                raise RuntimeError(error_details)
+    
+    def _encoder_args(self, preset: str, threads: int = 0) -> List[str]:
+        args = ['-c:v', 'libx264', '-preset', preset, '-pix_fmt', 'yuv420p']
+        if threads:
+            args += ['-threads', str(threads)]
+        return args
+    
+    def _drawtext(self, slide: Dict[str, Any], text_file: Path) -> str:
+        style = slide.get('style', {})
+        return (
+            f'drawtext=textfile={_filter_path(text_file)}:'
+            f'fontcolor={style.get("font_color", "#FFFFFF")}:'
+            f'fontsize={style.get("font_size", 40)}:'
+            'x=(w-text_w)/2:y=(h-text_h)/2:'
+            'fontfile=arial.ttf:box=1:boxcolor=black@0.5:boxborderw=10'
+        )
+    
+    def _color_source(self, slide: Dict[str, Any], width: int, height: int, fps: int) -> str:
+        style = slide.get('style', {})
+        return (
+            f'color=c={style.get("background_color", "#000000")}:'
+            f's={width}x{height}:d={slide.get("duration", 5)}:r={fps}'
+        )
     
     def _generate_slide_video(
         self,
@@ -64,7 +161,9 @@ class FFmpegVideoService:
         output_path: Path,
         width: int,
         height: int,
-        fps: int
+        fps: int,
+        preset: Optional[str] = None,
+        threads: int = 0
     ) -> None:
         """Generate a video for a single slide."""
         temp_text_file = output_path.with_suffix('.txt')
@@ -72,21 +171,12 @@ class FFmpegVideoService:
             with open(temp_text_file, 'w', encoding='utf-8') as f:
                 f.write(slide.get('content', ''))
             
-            style = slide.get('style', {})
             cmd = [
                 self.ffmpeg_path, '-y',
                 '-f', 'lavfi',
-                '-i', f'color=c={style.get("background_color", "#000000")}:'
-                      f's={width}x{height}:d={slide.get("duration", 5)}:r={fps}',
-                '-vf', (
-                    f'drawtext=textfile={temp_text_file}:'
-                    f'fontcolor={style.get("font_color", "#FFFFFF")}:'
-                    f'fontsize={style.get("font_size", 40)}:'
-                    'x=(w-text_w)/2:y=(h-text_h)/2:'
-                    'fontfile=arial.ttf:box=1:boxcolor=black@0.5:boxborderw=10'
-                ),
-                '-c:v', 'libx264',
-                '-pix_fmt', 'yuv420p',
+                '-i', self._color_source(slide, width, height, fps),
+                '-vf', self._drawtext(slide, temp_text_file),
+                *self._encoder_args(preset or self.preset, threads),
                 str(output_path)
             ]
             self._run_ffmpeg(cmd, f"Failed to generate slide: {output_path}")
@@ -94,6 +184,206 @@ class FFmpegVideoService:
             if temp_text_file.exists():
                 temp_text_file.unlink()
     
+    def _slide_key(self, slide: Dict[str, Any], width: int, height: int, fps: int, preset: str) -> str:
+        # The text file path differs per render; the text itself is keyed instead
+        filters = [
+            self._color_source(slide, width, height, fps),
+            self._drawtext(slide, Path("slide.txt")),
+        ]
+        return self.slide_cache.make_key(slide.get('content', ''), filters, self._encoder_args(preset))
+    
+    def _generate_cached_slide_video(
+        self,
+        slide: Dict[str, Any],
+        output_path: Path,
+        width: int,
+        height: int,
+        fps: int,
+        preset: str,
+        threads: int,
+        key: Optional[str]
+    ) -> None:
+        self._generate_slide_video(slide, output_path, width, height, fps, preset, threads)
+        if key:
+            self.slide_cache.put(key, output_path)
+    
+    def encode_slides(
+        self,
+        slides: List[Dict[str, Any]],
+        paths: List[Path],
+        width: int = 1280,
+        height: int = 720,
+        fps: int = 30,
+        preset: Optional[str] = None,
+        on_encoded: Optional[Callable[[int, Path], None]] = None
+    ) -> None:
+        """Encode slides to ``paths`` concurrently on the pool, reusing cached segments.
+        
+        ``on_encoded(index, path)`` is called from the calling thread as each
+        slide becomes available, cached ones first.
+        """
+        preset = self._check_option(preset or self.preset, ENCODER_PRESETS, "preset")
+        threads = max(1, (os.cpu_count() or 1) // self.max_workers)
+        futures = {}
+        cached = []
+        for index, (slide, path) in enumerate(zip(slides, paths)):
+            key = self._slide_key(slide, width, height, fps, preset) if self.slide_cache else None
+            if key and self.slide_cache.get(key, path):
+                cached.append(index)
+                continue
+            future = self.thread_pool.submit(
+                self._generate_cached_slide_video, slide, path, width, height, fps, preset, threads, key
+            )
+            futures[future] = index
+        if cached:
+            logger.info(f"Reused {len(cached)} of {len(slides)} encoded slides from the cache")
+        reported = set()
+        try:
+            for index in cached:
+                if on_encoded:
+                    on_encoded(index, paths[index])
+            for future in as_completed(futures):
+                future.result()
+                reported.add(future)
+                if on_encoded:
+                    on_encoded(futures[future], paths[futures[future]])
+        except Exception:
+            for future in futures:
+                future.cancel()
+            # Slides already being encoded still finish; report them so callers can keep them
+            for future in futures:
+                if future in reported or future.cancelled() or future.exception() is not None:
+                    continue
+                if on_encoded:
+                    on_encoded(futures[future], paths[futures[future]])
+            raise
+    
+    def concat_segments(
+        self,
+        segments: List[Path],
+        output_path: Path,
+        audio_path: Optional[str] = None
+    ) -> None:
+        """Join encoded segments without re-encoding, optionally adding an audio track."""
+        fd, concat_file = tempfile.mkstemp(prefix="concat_", suffix=".txt")
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                for video in segments:
+                    f.write(f"file '{Path(video).absolute()}'\n")
+            
+            cmd = [
+                self.ffmpeg_path, '-y',
+                '-f', 'concat',
+                '-safe', '0',
+                '-i', concat_file
+            ]
+            if audio_path:
+                cmd += ['-i', str(audio_path), '-map', '0:v', '-map', '1:a', '-c:v', 'copy', '-c:a', 'aac', '-shortest']
+            else:
+                cmd += ['-c', 'copy']
+            cmd.append(str(output_path))
+            self._run_ffmpeg(cmd, "Failed to combine slides")
+        finally:
+            os.unlink(concat_file)
+    
+    def _render_parallel(
+        self,
+        slides: List[Dict[str, Any]],
+        temp_dir: Path,
+        output_path: Path,
+        width: int,
+        height: int,
+        fps: int,
+        preset: str,
+        progress_callback: Optional[Callable[[float], None]] = None,
+        audio_path: Optional[str] = None
+    ) -> None:
+        """Encode changed slides concurrently, then join all of them without re-encoding."""
+        slide_videos = [temp_dir / f"slide_{i:03d}.mp4" for i in range(len(slides))]
+        encoded = []
+        
+        def on_encoded(index: int, path: Path) -> None:
+            encoded.append(index)
+            if progress_callback:
+                progress_callback(len(encoded) * 100 / len(slides))
+        
+        self.encode_slides(slides, slide_videos, width, height, fps, preset, on_encoded)
+        self.concat_segments(slide_videos, output_path, audio_path)
+    
+    def build_filtergraph(
+        self,
+        slides: List[Dict[str, Any]],
+        text_files: List[Path],
+        width: int,
+        height: int,
+        fps: int,
+        transition: Optional[str] = None,
+        transition_duration: float = 0.5
+    ) -> Tuple[str, str, float]:
+        """Build the single-pass graph for a deck.
+        
+        Returns:
+            (filtergraph, output label, total duration in seconds)
+        """
+        durations = [float(slide.get("duration", 5)) for slide in slides]
+        chains = [
+            f"{self._color_source(slide, width, height, fps)},{self._drawtext(slide, text_file)}[s{i}]"
+            for i, (slide, text_file) in enumerate(zip(slides, text_files))
+        ]
+        if len(slides) == 1:
+            return ";".join(chains), "s0", durations[0]
+        
+        if not transition:
+            chains.append("".join(f"[s{i}]" for i in range(len(slides))) + f"concat=n={len(slides)}:v=1:a=0[out]")
+            return ";".join(chains), "out", sum(durations)
+        
+        # A transition overlaps neighbouring slides, so it must fit in the shortest one
+        overlap = min(transition_duration, min(durations) / 2)
+        label, offset = "s0", 0.0
+        for i in range(1, len(slides)):
+            offset += durations[i - 1] - overlap
+            chains.append(
+                f"[{label}][s{i}]xfade=transition={transition}:duration={overlap:g}:offset={offset:.3f}[x{i}]"
+            )
+            label = f"x{i}"
+        return ";".join(chains), label, sum(durations) - overlap * (len(slides) - 1)
+    
+    def _render_filtergraph(
+        self,
+        slides: List[Dict[str, Any]],
+        temp_dir: Path,
+        output_path: Path,
+        width: int,
+        height: int,
+        fps: int,
+        preset: str,
+        transition: Optional[str] = None,
+        transition_duration: float = 0.5,
+        progress_callback: Optional[Callable[[float], None]] = None
+    ) -> None:
+        """Draw, join and encode the whole deck in one ffmpeg invocation."""
+        text_files = []
+        for i, slide in enumerate(slides):
+            text_file = temp_dir / f"slide_{i:03d}.txt"
+            text_file.write_text(slide.get('content', ''), encoding='utf-8')
+            text_files.append(text_file)
+        
+        graph, label, total_seconds = self.build_filtergraph(
+            slides, text_files, width, height, fps, transition, transition_duration
+        )
+        # Large decks exceed command-line limits, so the graph is read from a file
+        graph_file = temp_dir / "filtergraph.txt"
+        graph_file.write_text(graph, encoding='utf-8')
+        
+        cmd = [
+            self.ffmpeg_path, '-y',
+            '-filter_complex_script', str(graph_file),
+            '-map', f'[{label}]',
+            *self._encoder_args(preset),
+            str(output_path)
+        ]
+        self._run_ffmpeg(cmd, "Failed to render slides", total_seconds, progress_callback)
+    
     def generate_video(
         self,
         slides: List[Dict[str, Any]],
@@ -101,9 +391,29 @@ class FFmpegVideoService:
         width: int = 1280,
         height: int = 720,
         fps: int = 30,
+        mode: Optional[str] = None,
+        preset: Optional[str] = None,
+        transition: Optional[str] = None,
+        transition_duration: float = 0.5,
+        progress_callback: Optional[Callable[[float], None]] = None,
         **kwargs
     ) -> Optional[Path]:
-        """Generate a video with multiple slides."""
+        """Generate a video with multiple slides.
+        
+        Args:
+            slides: Slides with ``content``, ``duration`` and optional ``style``
+            mode: "parallel" or "filtergraph" (defaults to the service's mode)
+            preset: x264 preset from ENCODER_PRESETS (defaults to the service's preset)
+            transition: xfade transition between slides, e.g. "fade"; filtergraph mode only
+            transition_duration: Length of each transition in seconds
+            progress_callback: Called with progress from 0 to 100
+        """
+        mode = self._check_option(mode or self.mode, RENDER_MODES, "render mode")
+        preset = self._check_option(preset or self.preset, ENCODER_PRESETS, "preset")
+        if transition and mode != "filtergraph":
+            raise ValueError("Transitions require the filtergraph render mode")
+        if not slides:
+            raise ValueError("At least one slide is required")
         try:
             output_filename = output_filename or f"video_{uuid.uuid4().hex}.mp4"
 =======
@@ -170,29 +480,16 @@ class FFmpegVideoService:
             temp_dir = Path(tempfile.mkdtemp(prefix="ffmpeg_temp_"))
             
             try:
-                # Generate individual slide videos
-                slide_videos = []
-                for i, slide in enumerate(slides):
-                    slide_path = temp_dir / f"slide_{i:03d}.mp4"
-                    self._generate_slide_video(slide, slide_path, width, height, fps)
-                    slide_videos.append(slide_path)
-                
-                # Combine slides
-                concat_file = temp_dir / "concat_list.txt"
-                with open(concat_file, 'w', encoding='utf-8') as f:
-                    for video in slide_videos:
-                        f.write(f"file '{video.absolute()}'\n")
-                
-                cmd = [
-                    self.ffmpeg_path, '-y',
-                    '-f', 'concat',
-                    '-safe', '0',
-                    '-i', str(concat_file),
-                    '-c', 'copy',
-                    str(output_path)
-                ]
-                
-                self._run_ffmpeg(cmd, "Failed to combine slides")
+                if mode == "filtergraph":
+                    self._render_filtergraph(
+                        slides, temp_dir, output_path, width, height, fps, preset,
+                        transition, transition_duration, progress_callback
+                    )
+                else:
+                    self._render_parallel(
+                        slides, temp_dir, output_path, width, height, fps, preset, progress_callback,
+                        kwargs.get('narration_audio')
+                    )
                 return output_path
                 
             finally:
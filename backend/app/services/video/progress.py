@@ -0,0 +1,109 @@
+"""Throttled progress reporting for video generation jobs.
+
+Videos are rendered by Celery workers in another process, so progress is
+published on a Redis channel and relayed by the API process to the user's
+WebSocket connections. The encoder reports many ticks per second;
+``ThrottledProgress`` forwards at most one per interval, plus every stage
+change and the final 100%, and never touches the database.
+"""
+import asyncio
+import json
+import logging
+import time
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+PROGRESS_CHANNEL = "video:progress"
+
+
+class ThrottledProgress:
+    """Progress callback that drops ticks arriving faster than ``interval`` seconds."""
+
+    def __init__(
+        self,
+        publish: Callable[[Dict[str, Any]], None],
+        task_id: str,
+        user_id: Optional[str] = None,
+        interval: float = 0.5,
+        clock: Callable[[], float] = time.monotonic
+    ):
+        self.publish = publish
+        self.task_id = task_id
+        self.user_id = user_id
+        self.interval = interval
+        self.clock = clock
+        self._stage: Optional[str] = None
+        self._progress: Optional[float] = None
+        self._last = float("-inf")
+
+    def __call__(self, progress: float, stage: str, message: Optional[str] = None) -> bool:
+        """Report ``progress`` (0-100) within ``stage``; True if it was published."""
+        progress = round(min(100.0, max(0.0, progress)), 1)
+        now = self.clock()
+        if stage == self._stage:
+            if progress == self._progress:
+                return False
+            if progress < 100 and now - self._last < self.interval:
+                return False
+        self._stage, self._progress, self._last = stage, progress, now
+        try:
+            self.publish({
+                "type": "video_progress",
+                "task_id": self.task_id,
+                "user_id": self.user_id,
+                "stage": stage,
+                "progress": progress,
+                "status": message or stage,
+            })
+        except Exception as e:
+            logger.warning(f"Failed to publish progress for {self.task_id}: {e}")
+        return True
+
+
+def redis_publisher(redis_url: str) -> Callable[[Dict[str, Any]], None]:
+    """Blocking publisher for worker processes."""
+    import redis
+
+    client = redis.Redis.from_url(redis_url)
+
+    def publish(message: Dict[str, Any]) -> None:
+        client.publish(PROGRESS_CHANNEL, json.dumps(message, default=str))
+
+    return publish
+
+
+async def relay_video_progress(
+    redis_url: str,
+    deliver: Callable[[Dict[str, Any], str], Awaitable[None]],
+    retry_delay: float = 5.0
+) -> None:
+    """
+    Forward published progress to ``deliver(message, user_id)`` until cancelled,
+    reconnecting when Redis goes away.
+    """
+    import redis.asyncio as aioredis
+
+    while True:
+        client = aioredis.from_url(redis_url, decode_responses=True)
+        pubsub = client.pubsub()
+        try:
+            await pubsub.subscribe(PROGRESS_CHANNEL)
+            async for raw in pubsub.listen():
+                if raw.get("type") != "message":
+                    continue
+                try:
+                    message = json.loads(raw["data"])
+                except (TypeError, ValueError):
+                    continue
+                user_id = message.pop("user_id", None)
+                if user_id:
+                    await deliver(message, user_id)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.warning(f"Video progress relay interrupted: {e}")
+        finally:
+            await pubsub.close()
+            await client.close()
+        await asyncio.sleep(retry_delay)
@@ -0,0 +1,145 @@
+"""Content-addressed cache of encoded slide segments.
+
+An encoded slide is fully determined by the ffmpeg inputs that produce it:
+its text, the color source and drawtext filter (style, size, duration, fps)
+and the encoder arguments. The cache key is a SHA-256 of exactly those, so
+regenerating a video after a small edit only re-encodes the slides that
+changed; the rest are linked into the render and joined by stream copy.
+
+Segments are stored as MP4 files in one directory and evicted least
+recently used once the directory exceeds its byte budget. File mtimes are
+the access clock, so recency survives restarts.
+"""
+import hashlib
+import json
+import logging
+import os
+import shutil
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Bump when the slide command changes in a way the key does not capture
+SEGMENT_FORMAT = 1
+
+
+class SlideSegmentCache:
+    """Size-bounded LRU directory of encoded slide segments."""
+
+    def __init__(self, cache_dir: str = "data/slide_cache", max_bytes: int = 2 * 1024 * 1024 * 1024):
+        self.cache_dir = Path(cache_dir)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "stores": 0, "evictions": 0}
+        # key -> (size, last access); seeded from the files already on disk
+        self._entries: Dict[str, Tuple[int, float]] = {}
+        for entry in os.scandir(self.cache_dir):
+            if entry.name.endswith(".mp4"):
+                stat = entry.stat()
+                self._entries[entry.name[:-4]] = (stat.st_size, stat.st_mtime)
+        self._bytes = sum(size for size, _ in self._entries.values())
+
+    @staticmethod
+    def make_key(content: str, filters: List[str], encoder_args: List[str]) -> str:
+        """Key for a slide's text, its ffmpeg filter chain and the encoder arguments."""
+        parts = {"format": SEGMENT_FORMAT, "content": content, "filters": filters, "encoder": encoder_args}
+        return hashlib.sha256(json.dumps(parts, sort_keys=True).encode("utf-8")).hexdigest()
+
+    def _path(self, key: str) -> Path:
+        return self.cache_dir / f"{key}.mp4"
+
+    @staticmethod
+    def _link(src: Path, dest: Path) -> None:
+        # A hard link is instant and outlives eviction of the cached file
+        try:
+            os.link(src, dest)
+        except OSError:
+            shutil.copyfile(src, dest)
+
+    def get(self, key: str, dest: Path) -> bool:
+        """Place the cached segment at ``dest``; False on a miss."""
+        with self._lock:
+            path = self._path(key)
+            if key not in self._entries or not path.exists():
+                self._drop(key)
+                self._stats["misses"] += 1
+                return False
+            if dest.exists():
+                dest.unlink()
+            self._link(path, dest)
+            now = time.time()
+            os.utime(path, (now, now))
+            self._entries[key] = (self._entries[key][0], now)
+            self._stats["hits"] += 1
+            return True
+
+    def put(self, key: str, segment: Path) -> None:
+        """Store an encoded segment, evicting the least recently used beyond the budget."""
+        size = segment.stat().st_size
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            tmp_path = self.cache_dir / f"{key}.{threading.get_ident()}.tmp"
+            try:
+                self._link(segment, tmp_path)
+                os.replace(tmp_path, self._path(key))
+            except OSError as e:
+                logger.warning(f"Slide cache write failed: {e}")
+                if tmp_path.exists():
+                    tmp_path.unlink()
+                return
+            self._drop(key)
+            self._entries[key] = (size, time.time())
+            self._bytes += size
+            self._stats["stores"] += 1
+            self._evict()
+
+    def _drop(self, key: str) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._bytes -= entry[0]
+
+    def _evict(self) -> None:
+        if self._bytes <= self.max_bytes:
+            return
+        for key, _ in sorted(self._entries.items(), key=lambda item: item[1][1]):
+            if self._bytes <= self.max_bytes:
+                break
+            self._drop(key)
+            try:
+                self._path(key).unlink()
+            except FileNotFoundError:
+                pass
+            self._stats["evictions"] += 1
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self._stats["hits"] + self._stats["misses"]
+            return {
+                **self._stats,
+                "hit_rate": self._stats["hits"] / lookups if lookups else 0.0,
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+            }
+
+
+_slide_cache: Optional[SlideSegmentCache] = None
+
+
+def get_slide_cache() -> Optional[SlideSegmentCache]:
+    """
+    Process-wide cache in VIDEO_SLIDE_CACHE_DIR bounded by
+    VIDEO_SLIDE_CACHE_MAX_BYTES; a budget of 0 disables it.
+    """
+    global _slide_cache
+    max_bytes = int(os.getenv("VIDEO_SLIDE_CACHE_MAX_BYTES", str(2 * 1024 * 1024 * 1024)))
+    if _slide_cache is None and max_bytes > 0:
+        try:
+            _slide_cache = SlideSegmentCache(os.getenv("VIDEO_SLIDE_CACHE_DIR", "data/slide_cache"), max_bytes)
+        except OSError as e:
+            logger.warning(f"Slide segment cache unavailable: {e}")
+    return _slide_cache
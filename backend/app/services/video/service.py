@@ -1,7 +1,11 @@
 <<<<<<< HEAD
 """Video generation service for NoteFusion AI."""
 import os
+import json
+import time
 import uuid
+import shutil
+import hashlib
 import logging
 from pathlib import Path
 from typing import Dict, Any, Optional, List, Callable
@@ -23,9 +27,37 @@ from ...crud.task import create_task, update_task_status, get_task
 from ...core.config import settings
 
 <<<<<<< HEAD
+from ..blob_store import BlobStore, get_blob_store
 from .ffmpeg_service import FFmpegVideoService
 from .tts import tts_client
 
+# Overall progress (%) at which each job stage starts; stages run in this order
+STAGE_PROGRESS = {"slides": 0, "narration": 5, "encode": 25, "mux": 95}
+
+# Minimum seconds between checkpoint writes while slides are encoding
+CHECKPOINT_INTERVAL = 5.0
+
+
+def _sha256(path: Path) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _artifact(path: Path) -> Dict[str, str]:
+    """Checkpoint record for a finished stage output."""
+    return {"path": str(path), "sha256": _sha256(path)}
+
+
+def _intact(record: Optional[Dict[str, Any]]) -> bool:
+    """Whether a checkpointed artifact is still on disk and unchanged."""
+    if not record or not record.get("path"):
+        return False
+    path = Path(record["path"])
+    return path.is_file() and _sha256(path) == record.get("sha256")
+
 =======
 # Import the FFmpeg video service
 from .ffmpeg_service import FFmpegVideoService
@@ -37,12 +69,20 @@ logger = logging.getLogger(__name__)
 class VideoGenerationService:
     """Service for generating videos from text content."""
     
-    def __init__(self, db: Session):
+    def __init__(self, db: Session, blob_store: Optional[BlobStore] = None):
         self.db = db
 <<<<<<< HEAD
         self.output_dir = Path(getattr(settings, 'VIDEO_OUTPUT_DIR', 'data/videos'))
         self.output_dir.mkdir(parents=True, exist_ok=True)
         self.ffmpeg_service = FFmpegVideoService(output_dir=str(self.output_dir))
+        self._blob_store = blob_store
+    
+    @property
+    def blob_store(self) -> BlobStore:
+        """Where finished videos are kept; the process-wide store unless one was given."""
+        if self._blob_store is None:
+            self._blob_store = get_blob_store()
+        return self._blob_store
     
     async def generate_video(
         self, 
@@ -75,12 +115,9 @@ class VideoGenerationService:
         try:
             self.db.commit()
             
-            # Start background task
-            self._process_video_generation.delay(
-                task_id=task_id,
-                request_data=task_data,
-                user_id=user_id
-            )
+            # Start background task; imported here as the task module imports this one
+            from ...tasks.video_tasks import process_video_generation
+            process_video_generation.delay(task_id=task_id, request_data=task_data)
             
             return {
                 "task_id": task_id,
@@ -148,75 +185,159 @@ class VideoGenerationService:
         self,
         task_id: str,
         request_data: Dict[str, Any],
-        user_id: str
-    ) -> None:
-        """Process video generation in a background task."""
-        try:
-            # Update task status
-            self._update_task_status(
-                task_id=task_id,
-                status=TaskStatus.PROCESSING,
-                progress=10,
-                status_message="Preparing slides"
-            )
-            
-            # Generate slides from script
-            slides = self._generate_slides(
-                script=request_data["script"],
-                style=request_data["style"],
-                duration_per_slide=request_data.get("duration_per_slide", 5)
-            )
-            
-            # Generate narration if needed
-            narration_audio = None
-            if request_data.get("include_narration", True):
-                self._update_task_status(
-                    task_id=task_id,
-                    progress=30,
-                    status_message="Generating narration"
+        user_id: str,
+        progress_callback: Optional[Callable[[float, str], Any]] = None
+    ) -> Dict[str, Any]:
+        """Run the generation stages, resuming from the task's checkpoint.
+        
+        Each finished stage (slides, narration, every encoded slide, mux)
+        records its artifacts and their SHA-256 in ``result_data["checkpoint"]``;
+        a retry skips whatever is still intact on disk. Progress goes to
+        ``progress_callback(percent, stage)`` only, and errors propagate so the
+        caller can retry.
+        """
+        task = get_task(self.db, task_id)
+        checkpoint = dict(((task.result_data or {}) if task else {}).get("checkpoint") or {})
+        work_dir = self.output_dir / "work" / task_id
+        work_dir.mkdir(parents=True, exist_ok=True)
+        report = progress_callback or (lambda progress, stage: None)
+        if checkpoint:
+            logger.info(f"Resuming video task {task_id} after: {', '.join(checkpoint)}")
+        
+        output_path = self.output_dir / f"{task_id}.mp4"
+        if not _intact(checkpoint.get("mux")):
+            slides = self._prepare_slides(task_id, request_data, work_dir, checkpoint, report)
+            narration_audio = self._prepare_narration(task_id, request_data, slides, work_dir, checkpoint, report)
+            segments = self._encode_segments(task_id, slides, work_dir, checkpoint, report)
+            
+            report(STAGE_PROGRESS["mux"], "mux")
+            self.ffmpeg_service.concat_segments(segments, output_path, narration_audio)
+            digest = _sha256(output_path)
+            blob = self.blob_store.put_file(output_path, move=True, sha256=digest)
+            checkpoint["mux"] = {"path": str(blob.path), "sha256": digest}
+            self._save_checkpoint(task_id, checkpoint, "Video assembled")
+        
+        report(100, "mux")
+        shutil.rmtree(work_dir, ignore_errors=True)
+        return {
+            "video_path": checkpoint["mux"]["path"],
+            "video_url": f"/api/videos/{task_id}/download",
+            "sha256": checkpoint["mux"]["sha256"]
+        }
+    
+    def _prepare_slides(
+        self,
+        task_id: str,
+        request_data: Dict[str, Any],
+        work_dir: Path,
+        checkpoint: Dict[str, Any],
+        report: Callable[[float, str], Any]
+    ) -> List[Dict[str, Any]]:
+        """Slides stage: the slide list, saved as JSON in the work directory."""
+        record = checkpoint.get("slides")
+        if _intact(record):
+            return json.loads(Path(record["path"]).read_text(encoding="utf-8"))
+        
+        report(STAGE_PROGRESS["slides"], "slides")
+        slides = self._generate_slides(
+            script=request_data["script"],
+            style=request_data["style"],
+            duration_per_slide=request_data.get("duration_per_slide", 5)
+        )
+        slides_path = work_dir / "slides.json"
+        slides_path.write_text(json.dumps(slides), encoding="utf-8")
+        checkpoint["slides"] = _artifact(slides_path)
+        self._save_checkpoint(task_id, checkpoint, "Slides prepared")
+        return slides
+    
+    def _prepare_narration(
+        self,
+        task_id: str,
+        request_data: Dict[str, Any],
+        slides: List[Dict[str, Any]],
+        work_dir: Path,
+        checkpoint: Dict[str, Any],
+        report: Callable[[float, str], Any]
+    ) -> Optional[str]:
+        """Narration stage: the audio track moved into the work directory, if any."""
+        record = checkpoint.get("narration")
+        if record and (record.get("path") is None or _intact(record)):
+            return record.get("path")
+        
+        report(STAGE_PROGRESS["narration"], "narration")
+        narration_audio = None
+        if request_data.get("include_narration", True):
+            narration_text = " ".join(slide.get("content", "") for slide in slides)
+            if narration_text.strip():
+                narration_audio = self._generate_narration(
+                    text=narration_text,
+                    voice=request_data.get("voice", VideoVoice.NEUTRAL)
                 )
-                
-                narration_text = " ".join(slide.get("content", "") for slide in slides)
-                if narration_text.strip():
-                    narration_audio = self._generate_narration(
-                        text=narration_text,
-                        voice=request_data.get("voice", VideoVoice.NEUTRAL)
-                    )
-            
-            # Generate video
-            self._update_task_status(
-                task_id=task_id,
-                progress=60,
-                status_message="Generating video"
-            )
-            
-            output_filename = f"{task_id}.mp4"
-            video_path = self.ffmpeg_service.generate_video(
-                slides=slides,
-                output_filename=output_filename,
-                narration_audio=narration_audio,
-                progress_callback=lambda p: self._update_progress(task_id, 60 + int(p * 0.4))
-            )
-            
-            # Update task with result
-            self._update_task_status(
-                task_id=task_id,
-                status=TaskStatus.COMPLETED,
-                progress=100,
-                status_message="Video generation completed",
-                result={
-                    "video_path": str(video_path.relative_to(self.output_dir)),
-                    "video_url": f"/api/videos/{task_id}/download"
-                }
-            )
-            
-        except Exception as e:
-            logger.error(f"Video generation failed: {str(e)}", exc_info=True)
-            self._update_task_status(
-                task_id=task_id,
-                status=TaskStatus.FAILED,
-                error_message=str(e)
+        
+        if narration_audio:
+            audio_path = work_dir / f"narration{Path(narration_audio).suffix}"
+            shutil.move(narration_audio, audio_path)
+            narration_audio = str(audio_path)
+            checkpoint["narration"] = _artifact(audio_path)
+        else:
+            checkpoint["narration"] = {"path": None, "sha256": None}
+        self._save_checkpoint(task_id, checkpoint, "Narration ready")
+        return narration_audio
+    
+    def _encode_segments(
+        self,
+        task_id: str,
+        slides: List[Dict[str, Any]],
+        work_dir: Path,
+        checkpoint: Dict[str, Any],
+        report: Callable[[float, str], Any]
+    ) -> List[Path]:
+        """Encode stage: one segment per slide, checkpointed as each finishes."""
+        segment_dir = work_dir / "segments"
+        segment_dir.mkdir(exist_ok=True)
+        paths = [segment_dir / f"slide_{i:03d}.mp4" for i in range(len(slides))]
+        done = {
+            index: record for index, record in (checkpoint.get("encode") or {}).items()
+            if int(index) < len(paths) and record.get("path") == str(paths[int(index)]) and _intact(record)
+        }
+        pending = [i for i in range(len(slides)) if str(i) not in done]
+        if not pending:
+            return paths
+        
+        start = STAGE_PROGRESS["encode"]
+        span = STAGE_PROGRESS["mux"] - start
+        last_saved = time.monotonic()
+        
+        def on_encoded(position: int, path: Path) -> None:
+            nonlocal last_saved
+            done[str(pending[position])] = _artifact(path)
+            report(start + span * len(done) / len(slides), "encode")
+            if time.monotonic() - last_saved >= CHECKPOINT_INTERVAL:
+                checkpoint["encode"] = dict(done)
+                self._save_checkpoint(task_id, checkpoint, f"Encoded {len(done)} of {len(slides)} slides")
+                last_saved = time.monotonic()
+        
+        report(start + span * len(done) / len(slides), "encode")
+        try:
+            self.ffmpeg_service.encode_slides(
+                [slides[i] for i in pending],
+                [paths[i] for i in pending],
+                on_encoded=on_encoded
             )
+        finally:
+            # Keep whatever finished, so a retry only encodes the rest
+            checkpoint["encode"] = dict(done)
+            self._save_checkpoint(task_id, checkpoint, f"Encoded {len(done)} of {len(slides)} slides")
+        return paths
+    
+    def _save_checkpoint(self, task_id: str, checkpoint: Dict[str, Any], status_message: str) -> None:
+        """Persist the checkpoint; called at stage boundaries, not per progress tick."""
+        self._update_task_status(
+            task_id=task_id,
+            status=TaskStatus.PROCESSING,
+            status_message=status_message,
+            checkpoint=checkpoint
+        )
     
     def _generate_slides(
         self,
@@ -298,19 +419,20 @@ class VideoGenerationService:
         progress: int = None,
         status_message: str = None,
         error_message: str = None,
-        result: Dict[str, Any] = None
+        result: Dict[str, Any] = None,
+        checkpoint: Dict[str, Any] = None
     ) -> None:
         """Update task status in the database."""
         try:
-            update_data = {}
-            if status is not None:
-                update_data["status"] = status
+            task = get_task(self.db, task_id)
+            update_data = {"status": status if status is not None else task.status}
             
             result_data = {}
-            task = get_task(self.db, task_id)
             if task.result_data:
                 result_data.update(task.result_data)
             
+            if checkpoint is not None:
+                result_data["checkpoint"] = checkpoint
             if progress is not None:
                 result_data["progress"] = progress
             if status_message:
@@ -323,26 +445,16 @@ class VideoGenerationService:
             if result_data:
                 update_data["result_data"] = result_data
             
-            if update_data:
-                update_task_status(
-                    db=self.db,
-                    task_id=task_id,
-                    **update_data
-                )
-                self.db.commit()
+            update_task_status(
+                db=self.db,
+                task_id=task_id,
+                **update_data
+            )
                 
         except Exception as e:
             logger.error(f"Failed to update task status: {str(e)}", exc_info=True)
             self.db.rollback()
     
-    def _update_progress(self, task_id: str, progress: int) -> None:
-        """Update task progress."""
-        self._update_task_status(
-            task_id=task_id,
-            progress=progress,
-            status_message=f"Processing ({progress}%)"
-        )
-    
     def get_video_status(self, task_id: str, user_id: str) -> Dict[str, Any]:
         """Get the status of a video generation task."""
         task = get_task(self.db, task_id)
@@ -360,6 +472,17 @@ class VideoGenerationService:
             result.update(task.result_data)
         
         return result
+    
+    def get_video_file(self, task_id: str, user_id: str) -> Optional[Path]:
+        """Path of a completed task's video, or None if it is not ready."""
+        task = get_task(self.db, task_id)
+        if not task or task.user_id != user_id or task.status != TaskStatus.COMPLETED:
+            return None
+        
+        video_path = ((task.result_data or {}).get("result") or {}).get("video_path")
+        if not video_path or not os.path.exists(video_path):
+            return None
+        return Path(video_path)
 =======
             logger.error(f"Error creating video generation task: {str(e)}")
             raise
@@ -9,6 +9,7 @@ import numpy as np
 from PIL import Image, ImageDraw, ImageFont
 from ...utils.presentation import PresentationTemplate, BrandingManager, ExportManager
 from ...utils.processing import BatchProcessor, GPUManager
+from ..blob_store import get_blob_store
 import tempfile
 from moviepy.editor import TextClip, ImageClip, CompositeVideoClip, concatenate_videoclips
 from pydub import AudioSegment, effects
@@ -61,15 +62,12 @@ class VisualGenerationService:
                 response_format="b64_json"
             )
 
-            # Save the image
+            # Save the image; identical images share one stored copy
             image_data = base64.b64decode(response.data[0].b64_json)
-            image_path = self._temp_dir / f"diagram_{hash(description)}.png"
-            
-            with open(image_path, "wb") as f:
-                f.write(image_data)
+            blob = await asyncio.to_thread(get_blob_store().put_bytes, image_data)
 
             return {
-                "path": str(image_path),
+                "path": str(blob.path),
                 "description": description,
                 "style": style
             }
@@ -0,0 +1,328 @@
+"""Micro-batching scheduler in front of a shared Whisper model.
+
+Concurrent requests each used to run ``model.transcribe`` on their own
+thread, so N uploads meant N decoder passes fighting over the same cores.
+``WhisperBatcher`` instead cuts every request into 30-second windows, turns
+each window into a log-mel spectrogram on the caller's thread, and queues
+it. One scheduler thread takes the oldest window, waits at most
+``max_wait_ms`` for more windows (from any request) up to
+``max_batch_size``, and decodes them together with a single batched
+``whisper.decode`` call. Results go back through futures.
+
+The two knobs trade latency for throughput: a larger batch amortises the
+encoder and decoder passes over more windows, while a longer wait fills
+batches under light load at the cost of added latency for the first
+request.
+
+Windows are decoded with timestamps, so each result still carries
+Whisper's segment boundaries, ``no_speech_prob`` and ``avg_logprob``, and a
+window that decodes badly is retried at higher temperatures like
+``model.transcribe`` does. Unlike ``model.transcribe`` the windows are
+fixed 30 s cuts rather than following the last timestamp, so a word that
+straddles a boundary can be split between two segments. Callers that need
+seam-exact output should use ``model.transcribe`` directly.
+"""
+import asyncio
+import dataclasses
+import logging
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+import numpy as np
+
+from .model_registry import model_registry
+
+logger = logging.getLogger(__name__)
+
+SAMPLE_RATE = 16000
+WINDOW_SECONDS = 30
+WINDOW_SAMPLES = SAMPLE_RATE * WINDOW_SECONDS
+
+# Seconds per Whisper timestamp token
+TIME_PRECISION = 0.02
+
+# model.transcribe's defaults for retrying a window at higher temperatures
+TEMPERATURE_FALLBACK = (0.2, 0.4, 0.6, 0.8, 1.0)
+COMPRESSION_RATIO_THRESHOLD = 2.4
+LOGPROB_THRESHOLD = -1.0
+NO_SPEECH_THRESHOLD = 0.6
+
+# decode_batch(mels, language) -> one {"text", "language"} dict per mel, with
+# optional "segments" (window-relative), "no_speech_prob" and "avg_logprob"
+BatchDecoder = Callable[[Sequence[Any], Optional[str]], List[Dict[str, Any]]]
+Featurizer = Callable[[np.ndarray], Any]
+
+
+def split_segments(
+    tokens: Sequence[int],
+    timestamp_begin: int,
+    decode: Callable[[List[int]], str],
+    duration: float = WINDOW_SECONDS,
+) -> List[Dict[str, Any]]:
+    """
+    Cut one window's decoded tokens into segments at its timestamp tokens.
+
+    Text tokens run between a pair of timestamps, ``<|start|> text <|end|>``;
+    text after the last timestamp ends at ``duration``.
+    """
+    segments = []
+    start = 0.0
+    text: List[int] = []
+    for token in tokens:
+        if token < timestamp_begin:
+            text.append(token)
+            continue
+        seconds = (token - timestamp_begin) * TIME_PRECISION
+        if text:
+            segments.append({"start": start, "end": seconds, "text": decode(text)})
+            text = []
+        start = seconds
+    if text:
+        segments.append({"start": start, "end": duration, "text": decode(text)})
+    return segments
+
+
+def _needs_fallback(result) -> bool:
+    """Whether model.transcribe would retry this result at a higher temperature."""
+    if result.no_speech_prob > NO_SPEECH_THRESHOLD:
+        return False
+    return result.compression_ratio > COMPRESSION_RATIO_THRESHOLD or result.avg_logprob < LOGPROB_THRESHOLD
+
+
+@dataclass
+class _Window:
+    mel: Any
+    language: Optional[str]
+    future: Future = field(default_factory=Future)
+    enqueued_at: float = field(default_factory=time.perf_counter)
+
+
+class WhisperBatcher:
+    """Batch Whisper decoding across concurrent requests."""
+
+    def __init__(
+        self,
+        model_name: str = "base",
+        device: str = "cpu",
+        max_batch_size: Optional[int] = None,
+        max_wait_ms: Optional[float] = None,
+        decode_batch: Optional[BatchDecoder] = None,
+        featurize: Optional[Featurizer] = None,
+    ):
+        self.model_name = model_name
+        self.device = device
+        self.max_batch_size = max_batch_size or int(os.getenv("WHISPER_BATCH_SIZE", "8"))
+        self.max_wait_ms = max_wait_ms if max_wait_ms is not None else float(os.getenv("WHISPER_BATCH_WAIT_MS", "25"))
+        self._decode_batch = decode_batch or self._whisper_decode
+        self._featurize = featurize or self._whisper_featurize
+        self._model = None
+        self._model_lock = threading.Lock()
+        self._queue: "queue.Queue[Optional[_Window]]" = queue.Queue()
+        self._thread: Optional[threading.Thread] = None
+        self._start_lock = threading.Lock()
+        self._stats = {"batches": 0, "windows": 0, "queue_wait_seconds": 0.0, "decode_seconds": 0.0}
+
+    # Default Whisper implementation
+
+    @property
+    def model(self):
+        with self._model_lock:
+            if self._model is None:
+                self._model = model_registry.acquire("whisper", self.model_name, device=self.device)
+            return self._model
+
+    def _whisper_featurize(self, samples: np.ndarray):
+        import whisper
+
+        audio = whisper.pad_or_trim(samples.astype(np.float32))
+        n_mels = getattr(self.model.dims, "n_mels", 80)
+        if n_mels != 80:
+            return whisper.log_mel_spectrogram(audio, n_mels)
+        return whisper.log_mel_spectrogram(audio)
+
+    def _whisper_decode(self, mels: Sequence[Any], language: Optional[str]) -> List[Dict[str, Any]]:
+        import torch
+        import whisper
+        from whisper.tokenizer import get_tokenizer
+
+        model = self.model
+        options = whisper.DecodingOptions(language=language, temperature=0.0, fp16=self.device != "cpu")
+        batch = torch.stack(list(mels)).to(model.device)
+        with model_registry.inference_lock("whisper", self.model_name, self.device):
+            results = whisper.decode(model, batch, options)
+
+        # Re-decode the windows that failed, together, at each higher temperature in turn
+        for temperature in TEMPERATURE_FALLBACK:
+            retry = [i for i, result in enumerate(results) if _needs_fallback(result)]
+            if not retry:
+                break
+            retry_options = dataclasses.replace(options, temperature=temperature)
+            with model_registry.inference_lock("whisper", self.model_name, self.device):
+                retried = whisper.decode(model, batch[retry], retry_options)
+            for i, result in zip(retry, retried):
+                results[i] = result
+
+        # Newer Whisper releases size the vocabulary by language count (large-v3 has 100)
+        extra = {"num_languages": model.num_languages} if hasattr(model, "num_languages") else {}
+        tokenizer = get_tokenizer(model.is_multilingual, **extra)
+        return [
+            {
+                "text": result.text,
+                "language": result.language,
+                "no_speech_prob": result.no_speech_prob,
+                "avg_logprob": result.avg_logprob,
+                "segments": split_segments(result.tokens, tokenizer.timestamp_begin, tokenizer.decode),
+            }
+            for result in results
+        ]
+
+    # Client API
+
+    def submit(self, samples: np.ndarray, language: Optional[str] = None) -> Future:
+        """Queue one window of at most 30 s of 16 kHz float32 audio."""
+        if len(samples) > WINDOW_SAMPLES:
+            raise ValueError(f"Window longer than {WINDOW_SECONDS} s")
+        self._ensure_started()
+        window = _Window(self._featurize(samples), language)
+        self._queue.put(window)
+        return window.future
+
+    def _submit_all(self, samples: np.ndarray, language: Optional[str]) -> List[Future]:
+        if len(samples) == 0:
+            return []
+        return [
+            self.submit(samples[start:start + WINDOW_SAMPLES], language)
+            for start in range(0, len(samples), WINDOW_SAMPLES)
+        ]
+
+    def transcribe(self, samples: np.ndarray, language: Optional[str] = None) -> Dict[str, Any]:
+        """Transcribe audio of any length, batching its windows with other requests."""
+        futures = self._submit_all(samples, language)
+        return self._combine(samples, [future.result() for future in futures], language)
+
+    async def transcribe_async(self, samples: np.ndarray, language: Optional[str] = None) -> Dict[str, Any]:
+        """``transcribe`` for async callers; waits without blocking the event loop."""
+        futures = self._submit_all(samples, language)
+        results = await asyncio.gather(*(asyncio.wrap_future(future) for future in futures))
+        return self._combine(samples, list(results), language)
+
+    @staticmethod
+    def _combine(samples: np.ndarray, results: List[Dict[str, Any]], language: Optional[str]) -> Dict[str, Any]:
+        duration = len(samples) / SAMPLE_RATE
+        segments = []
+        for index, result in enumerate(results):
+            offset = index * WINDOW_SECONDS
+            no_speech_prob = result.get("no_speech_prob", 0.0)
+            if no_speech_prob > NO_SPEECH_THRESHOLD and result.get("avg_logprob", 0.0) < LOGPROB_THRESHOLD:
+                continue
+            # Decoders without timestamps give one segment for the whole window
+            window_segments = result.get("segments") or [
+                {"start": 0, "end": WINDOW_SECONDS, "text": result["text"]}
+            ]
+            for segment in window_segments:
+                text = segment["text"].strip()
+                if text:
+                    segments.append({
+                        "start": min(offset + segment["start"], duration),
+                        "end": min(offset + segment["end"], duration),
+                        "text": text,
+                        "no_speech_prob": no_speech_prob,
+                    })
+        return {
+            "text": " ".join(segment["text"] for segment in segments),
+            "language": results[0].get("language", language) if results else language,
+            "segments": segments,
+        }
+
+    def stats(self) -> Dict[str, Any]:
+        """Batch-size and queueing metrics for tuning the knobs."""
+        stats = dict(self._stats)
+        batches = stats["batches"] or 1
+        windows = stats["windows"] or 1
+        stats["mean_batch_size"] = stats["windows"] / batches
+        stats["mean_queue_wait_ms"] = stats["queue_wait_seconds"] / windows * 1000
+        return stats
+
+    def shutdown(self) -> None:
+        """Stop the scheduler after the windows already queued."""
+        if self._thread is not None:
+            self._queue.put(None)
+            self._thread.join()
+            self._thread = None
+        if self._model is not None:
+            self._model = None
+            model_registry.release("whisper", self.model_name, device=self.device)
+
+    # Scheduler
+
+    def _ensure_started(self) -> None:
+        with self._start_lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="whisper-batcher", daemon=True)
+                self._thread.start()
+
+    def _collect(self, first: _Window) -> List[Optional[_Window]]:
+        batch: List[Optional[_Window]] = [first]
+        deadline = first.enqueued_at + self.max_wait_ms / 1000
+        while len(batch) < self.max_batch_size:
+            timeout = deadline - time.perf_counter()
+            try:
+                window = self._queue.get(timeout=timeout) if timeout > 0 else self._queue.get_nowait()
+            except queue.Empty:
+                break
+            batch.append(window)
+            if window is None:
+                break
+        return batch
+
+    def _run(self) -> None:
+        while True:
+            first = self._queue.get()
+            if first is None:
+                return
+            batch = self._collect(first)
+            stop = batch[-1] is None
+            windows = [window for window in batch if window is not None]
+
+            # One decode call per language; auto-detect (None) is its own group
+            groups: Dict[Optional[str], List[_Window]] = {}
+            for window in windows:
+                groups.setdefault(window.language, []).append(window)
+            for language, group in groups.items():
+                self._decode_group(language, group)
+            if stop:
+                return
+
+    def _decode_group(self, language: Optional[str], group: List[_Window]) -> None:
+        started = time.perf_counter()
+        try:
+            results = self._decode_batch([window.mel for window in group], language)
+        except Exception as e:
+            logger.error(f"Batched Whisper decode failed: {e}")
+            for window in group:
+                window.future.set_exception(e)
+            return
+        self._stats["batches"] += 1
+        self._stats["windows"] += len(group)
+        self._stats["queue_wait_seconds"] += sum(started - window.enqueued_at for window in group)
+        self._stats["decode_seconds"] += time.perf_counter() - started
+        for window, result in zip(group, results):
+            window.future.set_result(result)
+
+
+_batchers: Dict[tuple, WhisperBatcher] = {}
+_batchers_lock = threading.Lock()
+
+
+def get_whisper_batcher(model_name: str = "base", device: str = "cpu") -> WhisperBatcher:
+    """Get the process-wide batcher for a model, so every endpoint shares its batches."""
+    with _batchers_lock:
+        key = (model_name, device)
+        if key not in _batchers:
+            _batchers[key] = WhisperBatcher(model_name, device=device)
+        return _batchers[key]
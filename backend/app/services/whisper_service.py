@@ -3,28 +3,51 @@ import os
 import tempfile
 from typing import Dict, List, Optional, Union, BinaryIO
 import numpy as np
-import whisper
 from pydub import AudioSegment
 
+from .model_registry import model_registry
+from .whisper_batcher import WhisperBatcher, get_whisper_batcher
+
 class WhisperService:
-    def __init__(self, model_name: str = "base"):
+    def __init__(self, model_name: str = "base", device: str = "cpu"):
         """
         Initialize the Whisper transcription service.
         
+        The model itself is loaded on first use from the shared model registry.
+        
         Args:
             model_name: Name of the Whisper model to use (tiny, base, small, medium, large)
+            device: Device to run the model on
         """
         self.model_name = model_name
-        self.model = None
-        self._load_model()
+        self.device = device
+        self._model = None
+    
+    @property
+    def batcher(self) -> WhisperBatcher:
+        """Micro-batching scheduler shared by every service using this model."""
+        return get_whisper_batcher(self.model_name, device=self.device)
+    
+    @property
+    def model(self):
+        """The shared Whisper model, loaded on first access."""
+        if self._model is None:
+            self._load_model()
+        return self._model
     
     def _load_model(self):
-        """Load the Whisper model."""
+        """Take a reference to the Whisper model from the model registry."""
         try:
-            self.model = whisper.load_model(self.model_name)
+            self._model = model_registry.acquire("whisper", self.model_name, device=self.device)
         except Exception as e:
             raise RuntimeError(f"Failed to load Whisper model: {str(e)}")
     
+    def close(self):
+        """Release this service's reference to the shared model."""
+        if self._model is not None:
+            self._model = None
+            model_registry.release("whisper", self.model_name, device=self.device)
+    
     def transcribe_audio_file(
         self,
         audio_path: str,
@@ -48,13 +71,14 @@ class WhisperService:
             raise FileNotFoundError(f"Audio file not found: {audio_path}")
             
         try:
-            result = self.model.transcribe(
-                audio_path,
-                language=language,
-                initial_prompt=initial_prompt,
-                temperature=temperature,
-                fp16=False  # Disable FP16 for better compatibility
-            )
+            with model_registry.inference_lock("whisper", self.model_name, self.device):
+                result = self.model.transcribe(
+                    audio_path,
+                    language=language,
+                    initial_prompt=initial_prompt,
+                    temperature=temperature,
+                    fp16=False  # Disable FP16 for better compatibility
+                )
             return {
                 "text": result["text"].strip(),
                 "language": result.get("language", language),
@@ -80,6 +104,13 @@ class WhisperService:
         """
         Transcribe a chunk of audio data.
         
+        Plain requests (at most a language) are decoded by the micro-batching
+        scheduler together with other concurrent chunks; requests with a
+        prompt or temperature fall back to a full ``model.transcribe``.
+        Batched segments keep Whisper's timestamps, but the audio is cut
+        into fixed 30 s windows, so a word on a window boundary may be split;
+        use ``transcribe_audio_file`` when that matters.
+        
         Args:
             audio_data: Audio data as bytes, file-like object, or numpy array
             sample_rate: Sample rate of the audio data
@@ -88,6 +119,12 @@ class WhisperService:
         Returns:
             Dictionary containing the transcription result
         """
+        if set(kwargs) <= {"language"}:
+            return self.batcher.transcribe(
+                self._load_samples(audio_data, sample_rate),
+                language=kwargs.get("language"),
+            )
+        
         with tempfile.NamedTemporaryFile(suffix=".wav", delete=False) as temp_file:
             try:
                 if isinstance(audio_data, bytes):
@@ -108,6 +145,32 @@ class WhisperService:
                 except:
                     pass
     
+    def _load_samples(self, audio_data: Union[bytes, BinaryIO, np.ndarray], sample_rate: int) -> np.ndarray:
+        """Decode audio data to 16 kHz mono float32 samples."""
+        import whisper
+        
+        if isinstance(audio_data, np.ndarray) and sample_rate == 16000:
+            return audio_data.astype(np.float32)
+        with tempfile.NamedTemporaryFile(suffix=".wav", delete=False) as temp_file:
+            try:
+                if isinstance(audio_data, bytes):
+                    temp_file.write(audio_data)
+                elif hasattr(audio_data, 'read'):
+                    temp_file.write(audio_data.read())
+                elif isinstance(audio_data, np.ndarray):
+                    import soundfile as sf
+                    sf.write(temp_file.name, audio_data, sample_rate)
+                else:
+                    raise ValueError("Unsupported audio data format")
+                
+                temp_file.flush()
+                return whisper.load_audio(temp_file.name)
+            finally:
+                try:
+                    os.unlink(temp_file.name)
+                except:
+                    pass
+    
     def transcribe_chunked_audio(
         self,
         audio_chunks: List[Union[bytes, BinaryIO, np.ndarray]],
@@ -169,7 +232,19 @@ class WhisperService:
                 except:
                     pass
 
-# Singleton instance
+class WhisperTranscriber:
+    """Plain-text transcription on top of the shared Whisper model."""
+    
+    def __init__(self, model_name: str = "base", device: str = "cpu"):
+        self._service = WhisperService(model_name, device=device)
+    
+    def transcribe(self, audio_path: str) -> str:
+        import whisper
+        
+        result = self._service.batcher.transcribe(whisper.load_audio(audio_path))
+        return result["text"]
+
+# Singleton instance; cheap to create, the model loads on first transcription
 whisper_service = WhisperService()
 
 def get_whisper_service() -> WhisperService:
@@ -27,7 +27,8 @@ def cleanup_temp_files(self, older_than_hours: int = 24) -> dict:
     try:
         temp_dirs = [
             Path(settings.TEMP_DIR) if hasattr(settings, 'TEMP_DIR') else Path("data/temp"),
-            Path("data/videos"),
+            # Finished videos are blobs, collected by collect_blob_garbage
+            Path("data/videos") / "work",
             Path("data/exports"),
         ]
         
@@ -146,3 +147,49 @@ def cleanup_old_task_results(older_than_days: int = 7) -> dict:
     except Exception as e:
         logger.error(f"Error cleaning up task results: {str(e)}", exc_info=True)
         raise Reject(str(e), requeue=False)
+
+@shared_task
+def purge_expired_uploads() -> dict:
+    """
+    Remove resumable uploads that have not been touched within
+    RESUMABLE_UPLOAD_EXPIRY seconds.
+    
+    Returns:
+        Dict with cleanup statistics
+    """
+    from app.services.resumable_upload import get_resumable_upload_store
+    
+    purged = get_resumable_upload_store().purge_expired()
+    return {'purged_uploads': purged, 'completed_at': datetime.now().isoformat()}
+
+@shared_task
+def collect_blob_garbage(grace_period_hours: float = 1, batch_size: int = 500) -> dict:
+    """
+    Delete stored blobs that no row has referenced for the grace period.
+    
+    Candidates come from the blob reference counts, so the cost follows the
+    number of dead blobs rather than the size of the store.
+    
+    Returns:
+        Dict with cleanup statistics
+    """
+    from app.services.blob_store import collect_garbage, get_blob_store
+    
+    store = get_blob_store()
+    totals = {'deleted': 0, 'bytes_freed': 0, 'skipped': 0}
+    db = store.session_factory()
+    try:
+        while True:
+            stats = collect_garbage(db, store, timedelta(hours=grace_period_hours), batch_size)
+            for key in totals:
+                totals[key] += stats[key]
+            if stats['deleted'] + stats['skipped'] < batch_size:
+                break
+    finally:
+        db.close()
+    
+    logger.info(
+        f"Blob collection completed: {totals['deleted']} blobs deleted, "
+        f"{totals['bytes_freed'] / (1024*1024):.2f} MB freed"
+    )
+    return {**totals, 'completed_at': datetime.now().isoformat()}
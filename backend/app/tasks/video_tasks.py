@@ -10,8 +10,10 @@ from ...core.config import settings
 from ...db.session import SessionLocal
 from ...models.task import Task, TaskStatus, TaskType
 from ...crud.task import get_task, update_task_status
+from ...services.blob_store import add_reference
 from ...services.video.service import VideoGenerationService
 from ...services.video.ffmpeg_service import FFmpegVideoService
+from ...services.video.progress import ThrottledProgress, redis_publisher
 
 logger = logging.getLogger(__name__)
 
@@ -20,6 +22,11 @@ def process_video_generation(self, task_id: str, request_data: Dict[str, Any]) -
     """
     Background task to process video generation.
     
+    Finished stages are checkpointed on the task row, so a retry resumes
+    where the failed attempt stopped. Progress is published to the user's
+    WebSocket connections through Redis instead of being written to the
+    database on every tick.
+    
     Args:
         task_id: The ID of the task to process
         request_data: Video generation request data
@@ -35,47 +42,47 @@ def process_video_generation(self, task_id: str, request_data: Dict[str, Any]) -
             logger.error(f"Task {task_id} not found")
             raise Reject(f"Task {task_id} not found", requeue=False)
             
-        # Update task status to processing
+        # Update task status to processing, keeping any checkpoint from a previous attempt
         update_task_status(
             db=db,
             task_id=task_id,
             status=TaskStatus.PROCESSING,
-            result_data={"progress": 0, "status": "Initializing video generation"}
+            result_data={
+                **(task.result_data or {}),
+                "status": "Resuming video generation" if self.request.retries else "Initializing video generation"
+            }
         )
         
         # Initialize services
         video_service = VideoGenerationService(db)
+        publish = redis_publisher(settings.REDIS_URL)
         
-        # Create a progress callback function
-        def progress_callback(progress: float, status: str):
-            # Update task progress in the database
-            update_task_status(
-                db=db,
-                task_id=task_id,
-                status=TaskStatus.PROCESSING,
-                result_data={"progress": progress, "status": status}
-            )
+        def publish_progress(message: Dict[str, Any]):
+            publish(message)
             # Also update the Celery task state
             self.update_state(
                 state='PROGRESS',
-                meta={'progress': progress, 'status': status}
+                meta={'progress': message['progress'], 'status': message['status']}
             )
         
         # Process the video generation
         result = video_service._process_video_generation(
             task_id=task_id,
-            request=request_data,
+            request_data=request_data,
             user_id=task.user_id,
-            progress_callback=progress_callback
+            progress_callback=ThrottledProgress(publish_progress, task_id, task.user_id)
         )
         
+        # The finished task keeps the video's blob; committed with the status
+        add_reference(db, result["sha256"])
+        
         # Update task status to completed
         update_task_status(
             db=db,
             task_id=task_id,
             status=TaskStatus.COMPLETED,
             result_data={
-                **result,
+                "result": result,
                 "progress": 100,
                 "status": "Video generation completed"
             }
@@ -87,27 +94,25 @@ def process_video_generation(self, task_id: str, request_data: Dict[str, Any]) -
             "result": result
         }
         
+    except Reject:
+        raise
     except Exception as exc:
         logger.error(f"Video generation failed for task {task_id}: {str(exc)}", exc_info=True)
         
-        # Update task status to failed
-        if 'task_id' in locals() and 'db' in locals():
-            update_task_status(
-                db=db,
-                task_id=task_id,
-                status=TaskStatus.FAILED,
-                error_message=str(exc)
-            )
-        
-        # Retry the task if we haven't exceeded max retries
+        # Retry the task if we haven't exceeded max retries; the checkpoint stays in place
         if self.request.retries < self.max_retries:
             raise self.retry(exc=exc, countdown=self.default_retry_delay * (2 ** self.request.retries))
-        else:
-            raise Reject(exc, requeue=False)
+        
+        update_task_status(
+            db=db,
+            task_id=task_id,
+            status=TaskStatus.FAILED,
+            error_message=str(exc)
+        )
+        raise Reject(exc, requeue=False)
             
     finally:
-        if 'db' in locals():
-            db.close()
+        db.close()
 
 @shared_task
 def cleanup_video_files(file_paths: List[str]) -> None:
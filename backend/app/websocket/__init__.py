@@ -1,10 +1,13 @@
 """WebSocket server implementation."""
+import asyncio
 import json
 import logging
-from typing import Dict, List, Optional, Set
+from typing import Any, Dict, List, Optional, Set
 from fastapi import WebSocket, WebSocketDisconnect
 from pydantic import BaseModel
 
+from ..services.transcription.streaming import StreamingSession, Transcriber
+
 logger = logging.getLogger(__name__)
 
 class ConnectionManager:
@@ -101,3 +104,67 @@ async def websocket_endpoint(websocket: WebSocket, client_id: str, user_id: str)
         logger.info(f"WebSocket disconnected: {client_id}")
     finally:
         manager.disconnect(client_id, user_id)
+
+async def transcription_stream_endpoint(
+    websocket: WebSocket,
+    client_id: str,
+    user_id: str,
+    transcribe: Transcriber,
+    **session_options: Any,
+):
+    """
+    Live transcription over a WebSocket.
+
+    Binary messages carry 16 kHz mono s16le PCM. Text messages are JSON
+    control messages: ``{"type": "stop"}`` finalizes the last utterance and
+    ends the session, ``{"type": "ping"}`` is answered with a pong. The
+    server sends ``transcription.partial``, ``transcription.final`` and
+    ``transcription.backpressure`` messages, then ``transcription.stopped``.
+    """
+    await manager.connect(websocket, client_id, user_id)
+
+    async def emit(message: dict):
+        await manager.send_personal_message(message, client_id)
+
+    session = StreamingSession(transcribe, emit, session_id=client_id, **session_options)
+    worker = asyncio.create_task(session.run())
+    await emit(WebSocketMessage(
+        type="transcription.ready",
+        payload={"session_id": client_id, "sample_rate": session.sample_rate, "encoding": "s16le"},
+    ).dict())
+    try:
+        while True:
+            message = await websocket.receive()
+            if message["type"] == "websocket.disconnect":
+                break
+            if message.get("bytes") is not None:
+                # Waits while the session buffer is full, so a fast client is
+                # throttled by TCP flow control instead of growing memory
+                await session.push(message["bytes"])
+                continue
+
+            try:
+                control = json.loads(message.get("text") or "")
+            except json.JSONDecodeError:
+                control = None
+            if not isinstance(control, dict):
+                # Control messages are JSON objects; anything else is rejected alike
+                await emit({"type": "error", "payload": {"error": "Invalid JSON format"}})
+                continue
+            if control.get("type") == "ping":
+                await emit({"type": "pong"})
+            elif control.get("type") == "stop":
+                await session.close()
+                await worker
+                await emit({"type": "transcription.stopped", "payload": {"session_id": client_id}})
+                break
+
+    except WebSocketDisconnect:
+        logger.info(f"WebSocket disconnected: {client_id}")
+    except (ValueError, RuntimeError) as e:
+        # Oversized frame, or the session already stopped after a decode failure
+        await emit({"type": "error", "payload": {"error": str(e)}})
+    finally:
+        if not worker.done():
+            worker.cancel()
+        manager.disconnect(client_id, user_id)
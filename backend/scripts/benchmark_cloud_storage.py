@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""Measure event-loop blocking while uploading a large file to S3.
+
+Uploads a file of random bytes once through a blocking boto3
+``upload_fileobj`` call on the loop, as CloudStorageService used to, and
+once through the async client. A ticker coroutine wakes every millisecond;
+the time the loop was blocked is the sum of its oversleeps.
+
+Run it against a local S3 stand-in, for example MinIO:
+    docker run -p 9000:9000 minio/minio server /data
+    S3_ENDPOINT_URL=http://localhost:9000 AWS_ACCESS_KEY_ID=minioadmin \\
+        AWS_SECRET_ACCESS_KEY=minioadmin \\
+        python scripts/benchmark_cloud_storage.py --size-mb 1024 --bucket bench
+"""
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+# Add the project root to the path
+project_root = str(Path(__file__).parents[1])
+if project_root not in sys.path:
+    sys.path.append(project_root)
+
+from app.services.cloud_storage import CloudStorageService
+
+TICK = 0.001
+
+
+async def measure(upload) -> tuple:
+    """Run ``upload()`` and return (seconds taken, seconds the loop was blocked, longest stall)."""
+    blocked, longest, running = 0.0, 0.0, True
+
+    async def ticker():
+        nonlocal blocked, longest
+        while running:
+            start = time.perf_counter()
+            await asyncio.sleep(TICK)
+            stall = time.perf_counter() - start - TICK
+            if stall > TICK:
+                blocked += stall
+                longest = max(longest, stall)
+
+    task = asyncio.create_task(ticker())
+    await asyncio.sleep(0)
+    start = time.perf_counter()
+    await upload()
+    elapsed = time.perf_counter() - start
+    running = False
+    await task
+    return elapsed, blocked, longest
+
+
+async def run(args):
+    storage = CloudStorageService(
+        bucket_name=args.bucket,
+        part_size=args.part_size_mb * 1024 * 1024,
+        max_concurrency=args.concurrency
+    )
+    client = storage.s3_client
+    try:
+        client.create_bucket(Bucket=args.bucket)
+    except Exception:
+        pass
+
+    with tempfile.TemporaryFile() as f:
+        remaining = args.size_mb * 1024 * 1024
+        while remaining:
+            chunk = os.urandom(min(remaining, 16 * 1024 * 1024))
+            f.write(chunk)
+            remaining -= len(chunk)
+
+        async def blocking():
+            f.seek(0)
+            client.upload_fileobj(f, args.bucket, "bench/blocking.bin")
+
+        async def pooled():
+            f.seek(0)
+            await storage.upload_file(f, "bench/async.bin")
+
+        print(f"{args.size_mb} MB, {args.part_size_mb} MB parts, {args.concurrency} in flight")
+        for name, upload in [("blocking boto3", blocking), ("async client", pooled)]:
+            elapsed, blocked, longest = await measure(upload)
+            print(
+                f"{name:>15}: {elapsed:6.2f}s total, loop blocked {blocked:6.3f}s "
+                f"(longest stall {longest * 1000:7.1f} ms), {args.size_mb / elapsed:6.1f} MB/s"
+            )
+
+    await storage.delete_files(["bench/blocking.bin", "bench/async.bin"])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--size-mb", type=int, default=1024, help="upload size")
+    parser.add_argument("--bucket", default="notefusion-bench", help="bucket to upload to (created if missing)")
+    parser.add_argument("--part-size-mb", type=int, default=16, help="multipart part size")
+    parser.add_argument("--concurrency", type=int, default=8, help="parts in flight at once")
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
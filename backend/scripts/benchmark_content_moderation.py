@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""Measure content moderation throughput on lecture transcripts.
+
+Compares the previous per-pattern regular expressions with the compiled
+automaton, scanning whole bodies and streamed chunks. Transcripts are
+generated from lecture-style sentences and are clean, so every scanner has
+to read the whole text (a match would let the regexes stop early).
+
+Usage:
+    python scripts/benchmark_content_moderation.py --size-kb 512 --repeat 5
+"""
+import argparse
+import random
+import re
+import sys
+import time
+from pathlib import Path
+
+# Add the project root to the path
+project_root = str(Path(__file__).parents[1])
+if project_root not in sys.path:
+    sys.path.append(project_root)
+
+from app.services.moderation import get_moderation_automaton
+
+# The regular expressions the middleware ran before the automaton
+LEGACY_PATTERNS = [
+    re.compile(r'\b(kill|hurt|harm|attack|assault|murder|rape|torture|abuse)(?:\s+\w+){0,3}\s+(you|them|us|him|her|me)\b', re.IGNORECASE),
+    re.compile(r'\b(nazi|hitler|kkk|white\s+supremac|racist|sexist|homophob|transphob|islamophob)\b', re.IGNORECASE),
+    re.compile(r'\b(kill|murder|assassinat|behead|tortur|maim|mutilat|dismember|strangl|suffocat|stab|shoot|bomb|explod|arson|burn\s+alive|lynch|execute|massacre|genocide)\b', re.IGNORECASE),
+    re.compile(r'\b(suicid|kill\s+myself|end\s+it\s+all|want\s+to\s+die|cutting\s+myself|self\s*[-]?harm|self\s*[-]?injury)\b', re.IGNORECASE),
+    re.compile(r'\b(rape|raping|rapist|pedophil|child\s*abuse|incest|molest|molestation|pedo)\b', re.IGNORECASE),
+]
+
+SENTENCES = [
+    "So today we're going to look at how enzymes lower the activation energy of a reaction.",
+    "If you remember from last week, the Krebs cycle produces NADH and FADH2.",
+    "Let's write that on the board: ΔG = ΔH − TΔS, and note the sign convention.",
+    "Okay, any questions so far? No? Great, let's move on to the next slide.",
+    "This is really the key idea of the whole course, so make sure you understand it.",
+    "The eigenvalues of a symmetric matrix are always real, which we'll prove in a moment.",
+    "In 1789 the Estates-General met at Versailles for the first time since 1614.",
+    "Um, so, the derivative of sin(x) is cos(x) — you can check that with the limit definition.",
+    "For the homework, read chapter seven and try problems three through twelve.",
+    "Think of the cache as a small, fast memory sitting between the CPU and main memory.",
+    "Students often confuse correlation with causation; here's a classic example.",
+    "The mitochondria, as everyone loves to say, is the powerhouse of the cell.",
+    "We'll compare self-attention with recurrent networks on longer sequences.",
+    "Supply and demand curves intersect at the equilibrium price and quantity.",
+]
+
+
+def transcript(size: int, seed: int = 0) -> str:
+    rng = random.Random(seed)
+    parts, length = [], 0
+    while length < size:
+        paragraph = " ".join(rng.choice(SENTENCES) for _ in range(rng.randint(3, 8))) + "\n\n"
+        parts.append(paragraph)
+        length += len(paragraph.encode())
+    return "".join(parts)
+
+
+def legacy_check(text: str):
+    for pattern in LEGACY_PATTERNS:
+        if pattern.search(text):
+            return pattern.pattern
+    return None
+
+
+def streamed_check(text: str, chunk_size: int):
+    scanner = get_moderation_automaton().scanner()
+    for i in range(0, len(text), chunk_size):
+        if scanner.feed(text[i:i + chunk_size]):
+            return True
+    return scanner.finish()
+
+
+def throughput(fn, text: str, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn(text)
+        best = min(best, time.perf_counter() - start)
+    return len(text.encode()) / best / 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--size-kb", type=int, default=512, help="transcript size")
+    parser.add_argument("--repeat", type=int, default=5, help="runs per scanner; the best is reported")
+    args = parser.parse_args()
+
+    text = transcript(args.size_kb * 1024)
+    automaton = get_moderation_automaton()
+    assert legacy_check(text) is None and automaton.check(text) is None
+
+    runs = [
+        ("regex patterns", legacy_check),
+        ("automaton", automaton.check),
+        ("stream 4 KiB", lambda t: streamed_check(t, 4096)),
+        ("stream 64 B", lambda t: streamed_check(t, 64)),
+    ]
+    print(f"{len(text.encode()) / 1e6:.2f} MB transcript, best of {args.repeat}")
+    for name, fn in runs:
+        print(f"{name:>15}: {throughput(fn, text, args.repeat):7.1f} MB/s")
+
+
+if __name__ == "__main__":
+    main()
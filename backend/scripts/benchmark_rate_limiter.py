@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""Measure rate limiter overhead per request under an open-loop load.
+
+Requests arrive on a fixed schedule (default 5k rps) spread over many
+client keys; each arrival runs one limiter check and its latency is
+recorded. Without --redis-url only the in-process buckets are measured.
+
+Usage:
+    python scripts/benchmark_rate_limiter.py --rps 5000 --seconds 10 --redis-url redis://localhost:6379/15
+"""
+import argparse
+import asyncio
+import random
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import redis.asyncio as redis
+
+# Add the project root to the path
+project_root = str(Path(__file__).parents[1])
+if project_root not in sys.path:
+    sys.path.append(project_root)
+
+from app.security.rate_limiter import RateLimiter
+
+
+async def run(limiter: RateLimiter, rps: int, seconds: float, keys: int, limit: str, concurrency: int):
+    total = int(rps * seconds)
+    latencies = np.zeros(total)
+    allowed = 0
+    lag = 0.0
+    pending = set()
+    rng = random.Random(0)
+
+    async def check(i: int):
+        nonlocal allowed
+        started = time.perf_counter()
+        result = await limiter.hit(f"bench:{rng.randrange(keys)}", limit)
+        latencies[i] = time.perf_counter() - started
+        allowed += result.allowed
+
+    start = time.perf_counter()
+    for i in range(total):
+        # Open loop: arrival i is due at start + i / rps regardless of earlier checks
+        delay = start + i / rps - time.perf_counter()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        else:
+            lag = max(lag, -delay)
+        pending.add(asyncio.ensure_future(check(i)))
+        if len(pending) >= concurrency:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+    await asyncio.gather(*pending)
+    elapsed = time.perf_counter() - start
+
+    us = latencies * 1e6
+    return {
+        "achieved_rps": total / elapsed,
+        "p50": np.percentile(us, 50),
+        "p95": np.percentile(us, 95),
+        "p99": np.percentile(us, 99),
+        "allowed": allowed / total,
+        "max_lag_ms": lag * 1000,
+    }
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rps", type=int, default=5000)
+    parser.add_argument("--seconds", type=float, default=5.0)
+    parser.add_argument("--keys", type=int, default=1000, help="distinct client keys")
+    parser.add_argument("--limit", default="100/minute")
+    parser.add_argument("--concurrency", type=int, default=256, help="max in-flight checks")
+    parser.add_argument("--redis-url", help="Redis to benchmark; omitted runs the in-process buckets only")
+    args = parser.parse_args()
+
+    runs = [("local", RateLimiter())]
+    if args.redis_url:
+        pool = redis.BlockingConnectionPool.from_url(args.redis_url, max_connections=50, timeout=0.25)
+        runs.insert(0, ("redis", RateLimiter(redis.Redis(connection_pool=pool))))
+    # Redis unreachable: the first error trips the fallback, later checks stay local
+    unreachable = redis.Redis.from_url("redis://127.0.0.1:1/0", socket_connect_timeout=0.25)
+    runs.append(("fallback", RateLimiter(unreachable, retry_interval=args.seconds * 2)))
+
+    print(f"{args.rps} rps for {args.seconds:g} s over {args.keys} keys at {args.limit}")
+    for name, limiter in runs:
+        stats = await run(limiter, args.rps, args.seconds, args.keys, args.limit, args.concurrency)
+        print(f"{name:>8}: {stats['achieved_rps']:7.0f} rps  p50 {stats['p50']:7.1f} us  "
+              f"p95 {stats['p95']:7.1f} us  p99 {stats['p99']:8.1f} us  "
+              f"allowed {stats['allowed']:.1%}  max lag {stats['max_lag_ms']:.1f} ms")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
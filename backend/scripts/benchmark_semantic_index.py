@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""Benchmark top-k latency and recall of the IVF semantic index against exact search.
+
+Vectors are synthetic (clustered, unit-length) so the run measures the index,
+not the embedding model.
+
+Usage:
+    python scripts/benchmark_semantic_index.py --segments 1000000 --dim 384
+"""
+import argparse
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+# Add the project root to the path
+project_root = str(Path(__file__).parents[1])
+if project_root not in sys.path:
+    sys.path.append(project_root)
+
+from app.services.semantic_index import SemanticIndex, Segment
+
+
+class SyntheticEmbedder:
+    """Maps the text "<n>" to row n of a clustered random corpus; other texts to queries."""
+
+    def __init__(self, dim: int, clusters: int, seed: int):
+        self.dim = dim
+        self.name = f"synthetic-{dim}"
+        self.rng = np.random.default_rng(seed)
+        self.centers = self.rng.standard_normal((clusters, dim)).astype(np.float32)
+        self.queries = {}
+
+    def vectors(self, ids: np.ndarray) -> np.ndarray:
+        rng = np.random.default_rng(ids[0])
+        points = self.centers[ids % len(self.centers)] + 0.35 * rng.standard_normal((len(ids), self.dim))
+        return (points / np.linalg.norm(points, axis=1, keepdims=True)).astype(np.float32)
+
+    def embed(self, texts):
+        if texts[0].isdigit():
+            return self.vectors(np.array([int(t) for t in texts]))
+        return np.stack([self.queries[t] for t in texts])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--segments", type=int, default=1_000_000)
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--clusters", type=int, default=2000)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--nprobe", type=int, nargs="+", default=[8, 16, 32])
+    parser.add_argument("--batch", type=int, default=50_000)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    embedder = SyntheticEmbedder(args.dim, args.clusters, args.seed)
+    with tempfile.TemporaryDirectory() as path:
+        index = SemanticIndex(path, embedder=embedder, train_size=args.segments)
+        start = time.perf_counter()
+        for offset in range(0, args.segments, args.batch):
+            n = min(args.batch, args.segments - offset)
+            index.add([Segment(f"doc-{(offset + i) // 20}", "section", str(offset + i)) for i in range(n)])
+        print(f"add + train: {time.perf_counter() - start:.1f} s for {args.segments} segments, {index.stats()}")
+
+        # Queries are perturbed corpus vectors; ground truth is exact search
+        rng = np.random.default_rng(args.seed + 1)
+        sources = rng.choice(args.segments, size=args.queries, replace=False)
+        noise = 0.05 * rng.standard_normal((args.queries, args.dim)).astype(np.float32)
+        queries = embedder.vectors(np.sort(sources)) + noise
+        queries /= np.linalg.norm(queries, axis=1, keepdims=True)
+        vectors = np.memmap(Path(path) / "vectors.f32", dtype=np.float32, mode="r").reshape(-1, args.dim)
+        truth = []
+        for i, query in enumerate(queries):
+            embedder.queries[f"q{i}"] = query
+            scores = vectors[:args.segments] @ query
+            truth.append(set(np.argpartition(-scores, args.k)[:args.k].tolist()))
+
+        for nprobe in args.nprobe:
+            timings, recall = [], 0.0
+            for i in range(args.queries):
+                started = time.perf_counter()
+                hits = index.search(f"q{i}", k=args.k, nprobe=nprobe)
+                timings.append(time.perf_counter() - started)
+                rows = {int(h.text) for h in hits}
+                recall += len(rows & truth[i]) / args.k
+            timings = np.array(timings) * 1000
+            print(f"nprobe {nprobe:3d}: p50 {np.percentile(timings, 50):6.2f} ms  "
+                  f"p95 {np.percentile(timings, 95):6.2f} ms  recall@{args.k} {recall / args.queries:.3f}")
+
+        started = time.perf_counter()
+        for query in queries[:20]:
+            scores = vectors[:args.segments] @ query
+            np.argpartition(-scores, args.k)[:args.k]
+        print(f"exact scan: {(time.perf_counter() - started) / 20 * 1000:.1f} ms per query")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""Micro-benchmark interval-indexed speaker assignment against the nested-loop merge.
+
+Usage:
+    python scripts/benchmark_speaker_assignment.py --segments 10000 --turns 10000
+    python scripts/benchmark_speaker_assignment.py --scenario long-turn --skip-baseline
+"""
+import argparse
+import random
+import sys
+import time
+from pathlib import Path
+
+# Add the project root to the path
+project_root = str(Path(__file__).parents[1])
+if project_root not in sys.path:
+    sys.path.append(project_root)
+
+from app.services.transcription.speakers import assign_speakers
+
+
+def nested_loop_merge(whisper_segments, diarization_segments):
+    """The previous O(N*M) TranscriptionService._merge_diarization."""
+    merged_segments = []
+    for whisper_seg in whisper_segments:
+        max_overlap = 0
+        assigned_speaker = "Speaker 1"
+        for diar_seg in diarization_segments:
+            overlap_start = max(whisper_seg["start"], diar_seg["start"])
+            overlap_end = min(whisper_seg["end"], diar_seg["end"])
+            if overlap_end > overlap_start:
+                overlap_duration = overlap_end - overlap_start
+                if overlap_duration > max_overlap:
+                    max_overlap = overlap_duration
+                    assigned_speaker = diar_seg["speaker"]
+        segment = whisper_seg.copy()
+        segment["speaker"] = assigned_speaker
+        merged_segments.append(segment)
+    return merged_segments
+
+
+def make_lecture(segments: int, turns: int, seed: int):
+    """Back-to-back Whisper segments and frequent, slightly overlapping speaker turns."""
+    rng = random.Random(seed)
+    whisper, t = [], 0.0
+    for i in range(segments):
+        length = rng.uniform(1.0, 6.0)
+        whisper.append({"start": t, "end": t + length, "text": f"segment {i}"})
+        t += length
+    total = t
+    diarization, t = [], 0.0
+    for i in range(turns):
+        length = total / turns * rng.uniform(0.5, 1.5)
+        diarization.append({"start": max(0.0, t - 0.2), "end": t + length, "speaker": f"SPEAKER_{rng.randint(0, 5)}"})
+        t += length
+    return whisper, diarization
+
+
+def make_long_turn(segments: int, turns: int, seed: int):
+    """A lecture whose first turn spans the whole recording, e.g. a lecturer track."""
+    whisper, diarization = make_lecture(segments, turns, seed)
+    diarization.insert(0, {"start": 0.0, "end": whisper[-1]["end"], "speaker": "SPEAKER_LECTURER"})
+    return whisper, diarization
+
+
+SCENARIOS = {"lecture": make_lecture, "long-turn": make_long_turn}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--segments", type=int, default=10_000)
+    parser.add_argument("--turns", type=int, default=10_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--scenario", choices=sorted(SCENARIOS), default="lecture",
+                        help="long-turn adds one lecture-length turn ahead of the others")
+    parser.add_argument("--skip-baseline", action="store_true",
+                        help="skip the nested-loop version (about a minute at 10k x 10k)")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    whisper, diarization = SCENARIOS[args.scenario](args.segments, args.turns, args.seed)
+
+    timings = []
+    for _ in range(args.repeat):
+        start = time.perf_counter()
+        fast = assign_speakers(whisper, diarization)
+        timings.append(time.perf_counter() - start)
+    print(f"interval index: best {min(timings) * 1000:9.1f} ms over {args.repeat} runs "
+          f"({args.segments} segments x {len(diarization)} turns, {args.scenario})")
+
+    if not args.skip_baseline:
+        start = time.perf_counter()
+        slow = nested_loop_merge(whisper, diarization)
+        elapsed = time.perf_counter() - start
+        print(f"nested loop:         {elapsed * 1000:9.1f} ms  speed-up x{elapsed / min(timings):.0f}")
+        print("outputs identical:", fast == slow)
+
+
+if __name__ == "__main__":
+    main()
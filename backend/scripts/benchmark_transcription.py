@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+"""Compare sequential and process-pool transcription wall time on one recording.
+
+Usage:
+    python scripts/benchmark_transcription.py lecture.mp3 --workers 1 2 4 --model base
+"""
+import argparse
+import sys
+import time
+from pathlib import Path
+
+# Add the project root to the path
+project_root = str(Path(__file__).parents[1])
+if project_root not in sys.path:
+    sys.path.append(project_root)
+
+from app.services.transcription.audio_stream import TranscriptMerger, stream_audio_chunks
+from app.services.transcription.parallel import ParallelTranscriber, load_whisper_model
+
+
+def run_sequential(audio_path: str, model_size: str, chunk_duration: int, overlap: float) -> dict:
+    model = load_whisper_model(model_size, "cpu")
+    merger = TranscriptMerger()
+    for chunk in stream_audio_chunks(audio_path, chunk_duration=chunk_duration, overlap=overlap):
+        merger.add(chunk, model.transcribe(chunk.samples, fp16=False))
+    return merger.result()
+
+
+def run_parallel(audio_path: str, model_size: str, workers: int, chunk_duration: int, overlap: float) -> dict:
+    transcriber = ParallelTranscriber(model_size=model_size, device="cpu", workers=workers)
+    try:
+        # Warm the pool so model loading is not counted against the parallel run
+        transcriber._get_pool().submit(time.sleep, 0).result()
+        start = time.perf_counter()
+        result = transcriber.transcribe_chunks(
+            stream_audio_chunks(audio_path, chunk_duration=chunk_duration, overlap=overlap)
+        )
+        result["elapsed"] = time.perf_counter() - start
+        return result
+    finally:
+        transcriber.shutdown()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("audio_path")
+    parser.add_argument("--model", default="base")
+    parser.add_argument("--workers", type=int, nargs="+", default=[2, 4])
+    parser.add_argument("--chunk-duration", type=int, default=300)
+    parser.add_argument("--overlap", type=float, default=0.0)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    baseline = run_sequential(args.audio_path, args.model, args.chunk_duration, args.overlap)
+    baseline_elapsed = time.perf_counter() - start
+    print(f"sequential: {baseline_elapsed:8.1f}s  ({len(baseline['segments'])} segments, "
+          f"{baseline['duration']:.0f}s of audio)")
+
+    for workers in args.workers:
+        result = run_parallel(args.audio_path, args.model, workers, args.chunk_duration, args.overlap)
+        print(f"workers={workers:<3} {result['elapsed']:8.1f}s  speed-up x{baseline_elapsed / result['elapsed']:.2f}  "
+              f"({len(result['segments'])} segments)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""Compare wall time of serial, parallel and single-filtergraph slide rendering.
+
+Usage:
+    python scripts/benchmark_video_rendering.py --slides 50 --presets ultrafast veryfast medium
+"""
+import argparse
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+# Add the project root to the path
+project_root = str(Path(__file__).parents[1])
+if project_root not in sys.path:
+    sys.path.append(project_root)
+
+from app.services.video.ffmpeg_service import ENCODER_PRESETS, FFmpegVideoService
+
+
+def make_deck(slides: int, duration: float):
+    colors = ["#1E3A5F", "#2E4057", "#3B1F2B", "#0B3C49"]
+    return [
+        {
+            "content": f"Slide {i + 1}\nKey point number {i + 1} of the lecture",
+            "duration": duration,
+            "style": {"background_color": colors[i % len(colors)], "font_size": 42},
+        }
+        for i in range(slides)
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--slides", type=int, default=50)
+    parser.add_argument("--duration", type=float, default=3.0, help="seconds per slide")
+    parser.add_argument("--width", type=int, default=1280)
+    parser.add_argument("--height", type=int, default=720)
+    parser.add_argument("--fps", type=int, default=30)
+    parser.add_argument("--presets", nargs="+", default=["ultrafast", "veryfast", "medium"],
+                        choices=ENCODER_PRESETS)
+    parser.add_argument("--transition", default="fade", help="xfade transition for the filtergraph run")
+    parser.add_argument("--skip-serial", action="store_true", help="skip the one-process-at-a-time baseline")
+    args = parser.parse_args()
+
+    deck = make_deck(args.slides, args.duration)
+    with tempfile.TemporaryDirectory() as output_dir:
+        runs = [("parallel", FFmpegVideoService(output_dir), {}),
+                ("filtergraph", FFmpegVideoService(output_dir), {}),
+                ("filtergraph+" + args.transition, FFmpegVideoService(output_dir),
+                 {"transition": args.transition})]
+        if not args.skip_serial:
+            runs.insert(0, ("serial", FFmpegVideoService(output_dir, max_workers=1), {}))
+        print(f"{args.slides} slides x {args.duration:g} s at {args.width}x{args.height}@{args.fps}, "
+              f"{runs[-1][1].max_workers} workers")
+
+        for preset in args.presets:
+            baseline = None
+            for name, service, options in runs:
+                mode = "parallel" if name in ("serial", "parallel") else "filtergraph"
+                start = time.perf_counter()
+                path = service.generate_video(
+                    deck, f"{name}_{preset}.mp4", args.width, args.height, args.fps,
+                    mode=mode, preset=preset, **options
+                )
+                elapsed = time.perf_counter() - start
+                baseline = baseline or elapsed
+                print(f"{preset:>9} {name:<18} {elapsed:7.2f} s  x{baseline / elapsed:4.1f}  "
+                      f"{path.stat().st_size / 1024:8.0f} KiB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""Load-test the micro-batching Whisper scheduler under concurrent clients.
+
+Each client thread sends a stream of short chunks, as the live-chunk
+endpoint sees them, and the script reports throughput, latency percentiles
+and the batch sizes actually formed for every (max batch size, max wait)
+combination.
+
+By default the decoder is simulated with a fixed per-pass cost plus a
+per-window cost, which is enough to explore the knobs on any machine. Pass
+--model to run the real Whisper model instead.
+
+Usage:
+    python scripts/benchmark_whisper_batching.py --clients 16 --batch-sizes 1,4,8,16 --wait-ms 0,25,100
+    python scripts/benchmark_whisper_batching.py --model base --clients 8 --requests 4
+"""
+import argparse
+import statistics
+import sys
+import threading
+import time
+from pathlib import Path
+
+import numpy as np
+
+# Add the project root to the path
+project_root = str(Path(__file__).parents[1])
+if project_root not in sys.path:
+    sys.path.append(project_root)
+
+from app.services.whisper_batcher import SAMPLE_RATE, WhisperBatcher
+
+
+def simulated_decoder(pass_ms: float, window_ms: float):
+    """Decoder whose cost is dominated by a fixed per-pass overhead, like a CPU forward pass."""
+    def decode(mels, language):
+        time.sleep((pass_ms + window_ms * len(mels)) / 1000)
+        return [{"text": "simulated", "language": language or "en"} for _ in mels]
+    return decode
+
+
+def run(batcher: WhisperBatcher, clients: int, requests: int, seconds: float):
+    latencies = []
+    lock = threading.Lock()
+    rng = np.random.default_rng(0)
+    audio = (rng.normal(0, 0.1, int(seconds * SAMPLE_RATE))).astype(np.float32)
+
+    def client():
+        for _ in range(requests):
+            start = time.perf_counter()
+            batcher.transcribe(audio, language="en")
+            with lock:
+                latencies.append(time.perf_counter() - start)
+
+    threads = [threading.Thread(target=client) for _ in range(clients)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+    return elapsed, sorted(latencies)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--clients", type=int, default=16, help="concurrent client threads")
+    parser.add_argument("--requests", type=int, default=8, help="requests per client")
+    parser.add_argument("--seconds", type=float, default=5.0, help="audio length per request")
+    parser.add_argument("--batch-sizes", default="1,4,8,16")
+    parser.add_argument("--wait-ms", default="0,25,100")
+    parser.add_argument("--model", help="Whisper model to load instead of the simulated decoder")
+    parser.add_argument("--device", default="cpu")
+    parser.add_argument("--pass-ms", type=float, default=120.0, help="simulated fixed cost per decode pass")
+    parser.add_argument("--window-ms", type=float, default=25.0, help="simulated cost per window in a pass")
+    args = parser.parse_args()
+
+    print(f"{args.clients} clients x {args.requests} requests of {args.seconds:.1f} s audio"
+          f" ({'whisper ' + args.model if args.model else 'simulated decoder'})")
+    print(f"{'batch':>5} {'wait ms':>7} {'req/s':>7} {'p50 ms':>8} {'p95 ms':>8} {'mean batch':>10}")
+
+    for batch_size in [int(v) for v in args.batch_sizes.split(",")]:
+        for wait_ms in [float(v) for v in args.wait_ms.split(",")]:
+            if args.model:
+                batcher = WhisperBatcher(args.model, device=args.device,
+                                         max_batch_size=batch_size, max_wait_ms=wait_ms)
+            else:
+                batcher = WhisperBatcher(max_batch_size=batch_size, max_wait_ms=wait_ms,
+                                         decode_batch=simulated_decoder(args.pass_ms, args.window_ms),
+                                         featurize=lambda samples: samples)
+            elapsed, latencies = run(batcher, args.clients, args.requests, args.seconds)
+            stats = batcher.stats()
+            batcher.shutdown()
+
+            p95 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))]
+            print(f"{batch_size:>5} {wait_ms:>7.0f} {len(latencies) / elapsed:>7.1f} "
+                  f"{statistics.median(latencies) * 1000:>8.0f} {p95 * 1000:>8.0f} "
+                  f"{stats['mean_batch_size']:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,7 @@
 import pytest
 from fastapi import status, FastAPI
 from fastapi.testclient import TestClient
+from sqlalchemy import event
 from sqlalchemy.ext.asyncio import AsyncSession
 from datetime import datetime, timedelta
 import uuid
@@ -104,6 +105,55 @@ class TestCreateFlashcard:
         response = client.post("/api/v1/flashcards/", json=flashcard_data)
         assert response.status_code == status.HTTP_401_UNAUTHORIZED
 
+class TestCreateFlashcardBatch:
+    async def test_batch_skips_duplicates_per_item(self, client, test_flashcard, user_auth_headers):
+        batch = {
+            "flashcards": [
+                {"front_text": "What is 2+2?", "back_text": "4"},
+                {"front_text": test_flashcard.front_text, "back_text": "Paris"},
+                {"front_text": "What is 2+2?", "back_text": "Four"},
+                {"front_text": "What is H2O?", "back_text": "Water", "tags": ["chemistry"]},
+            ],
+            "default_tags": ["quiz"]
+        }
+        response = client.post(
+            "/api/v1/flashcards/batch",
+            json=batch,
+            headers=user_auth_headers
+        )
+        assert response.status_code == status.HTTP_201_CREATED
+        data = response.json()
+        assert data["created"] == 2
+        assert data["skipped"] == 2
+        assert [item["status"] for item in data["items"]] == ["created", "skipped", "skipped", "created"]
+        assert [item["reason"] for item in data["items"]] == [
+            None, "already_exists", "duplicate_in_batch", None
+        ]
+        assert data["items"][3]["flashcard"]["tags"] == ["chemistry", "quiz"]
+
+    async def test_batch_uses_one_insert_statement(self, client, user_auth_headers, db: AsyncSession):
+        statements = []
+        engine = db.get_bind()
+
+        def record(conn, cursor, statement, parameters, context, executemany):
+            statements.append(statement)
+
+        event.listen(engine, "before_cursor_execute", record)
+        try:
+            batch = {"flashcards": [
+                {"front_text": f"Question {i}", "back_text": f"Answer {i}"} for i in range(100)
+            ]}
+            response = client.post(
+                "/api/v1/flashcards/batch",
+                json=batch,
+                headers=user_auth_headers
+            )
+        finally:
+            event.remove(engine, "before_cursor_execute", record)
+        assert response.status_code == status.HTTP_201_CREATED
+        assert response.json()["created"] == 100
+        assert sum(s.lstrip().upper().startswith("INSERT") for s in statements) == 1
+
 class TestGetFlashcard:
     async def test_get_flashcard_success(self, client, test_flashcard, user_auth_headers):
         response = client.get(
@@ -0,0 +1,115 @@
+"""
+Unit tests for the verified API key cache.
+"""
+import hashlib
+import hmac
+import sys
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import pytest
+
+# Add the project root to the Python path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.core.api_key_cache import APIKeyCache, CachedAPIKey
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def _key(key_id="nf_a", **fields):
+    return CachedAPIKey(id=1, key_id=key_id, user_id="user-1", **fields)
+
+
+class TestAPIKeyCache:
+    """Test cases for APIKeyCache."""
+
+    def test_hit_until_ttl(self):
+        clock = FakeClock()
+        cache = APIKeyCache(ttl=60, clock=clock)
+        cache.put("fp", "nf_a", _key())
+
+        assert cache.get("fp") == (True, _key())
+        clock.now += 61
+        assert cache.get("fp") == (False, None)
+        assert cache.stats()["entries"] == 0
+
+    def test_negative_entries_expire_sooner(self):
+        clock = FakeClock()
+        cache = APIKeyCache(ttl=60, negative_ttl=5, clock=clock)
+        cache.put("bad", "nf_a", None)
+
+        assert cache.get("bad") == (True, None)
+        clock.now += 6
+        assert cache.get("bad") == (False, None)
+
+    def test_entry_never_outlives_key_expiry(self):
+        cache = APIKeyCache(ttl=3600)
+        cache.put("soon", "nf_a", _key(expires_at=datetime.utcnow() + timedelta(seconds=30)))
+        cache.put("gone", "nf_b", _key("nf_b", expires_at=datetime.utcnow() - timedelta(seconds=1)))
+
+        assert cache._entries["soon"][2] - time.monotonic() == pytest.approx(30, abs=1)
+        assert cache.get("gone") == (False, None)
+
+    def test_invalidate_drops_every_token_of_a_key(self):
+        cache = APIKeyCache()
+        cache.put("old-secret", "nf_a", _key())
+        cache.put("typo", "nf_a", None)
+        cache.put("other", "nf_b", _key("nf_b"))
+
+        assert cache.invalidate("nf_a") == 2
+        assert cache.get("old-secret") == (False, None)
+        assert cache.get("typo") == (False, None)
+        assert cache.get("other")[0]
+
+    def test_lookup_racing_an_invalidation_is_not_cached(self):
+        cache = APIKeyCache()
+        generation = cache.generation("nf_a")
+        # Revoked while the lookup was reading the old record
+        cache.invalidate("nf_a")
+        cache.put("fp", "nf_a", _key(), generation)
+
+        assert cache.get("fp") == (False, None)
+        cache.put("fp", "nf_a", None, cache.generation("nf_a"))
+        assert cache.get("fp") == (True, None)
+
+    def test_clear_discards_lookups_in_flight(self):
+        cache = APIKeyCache()
+        generation = cache.generation("nf_a")
+        cache.clear()
+        cache.put("fp", "nf_a", _key(), generation)
+
+        assert cache.get("fp") == (False, None)
+
+    def test_lru_bound(self):
+        cache = APIKeyCache(max_entries=2)
+        cache.put("a", "nf_a", _key())
+        cache.put("b", "nf_b", _key("nf_b"))
+        cache.get("a")
+        cache.put("c", "nf_c", _key("nf_c"))
+
+        assert cache.get("a")[0] and cache.get("c")[0]
+        assert cache.get("b") == (False, None)
+        assert "nf_b" not in cache._by_key_id
+
+    def test_hit_costs_microseconds(self):
+        cache = APIKeyCache()
+        token = "nf_abc.secret-part"
+        secret = b"api-key-secret"
+        cache.put(hmac.new(secret, token.encode(), hashlib.sha256).hexdigest(), "nf_abc", _key("nf_abc"))
+
+        n = 10000
+        start = time.perf_counter()
+        for _ in range(n):
+            found, record = cache.get(hmac.new(secret, token.encode(), hashlib.sha256).hexdigest())
+        per_call = (time.perf_counter() - start) / n
+
+        assert found and record.key_id == "nf_abc"
+        assert per_call < 100e-6
@@ -0,0 +1,136 @@
+"""
+Unit tests for the streaming PCM chunker used by the transcription service.
+"""
+import io
+import sys
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+# Add the project root to the Python path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.services.transcription import audio_stream
+from app.services.transcription.audio_stream import (
+    TranscriptMerger,
+    iter_pcm_chunks,
+    merge_chunk_segments,
+    pcm_to_float32,
+    stream_audio_chunks,
+)
+
+SAMPLE_RATE = 100  # Small rate keeps the fixtures readable
+
+
+def _pcm(seconds: float) -> io.BytesIO:
+    samples = np.arange(int(seconds * SAMPLE_RATE), dtype=np.int16)
+    return io.BytesIO(samples.astype("<i2").tobytes())
+
+
+class TestIterPcmChunks:
+    """Test cases for iter_pcm_chunks."""
+
+    def test_splits_without_overlap(self):
+        chunks = list(iter_pcm_chunks(_pcm(25), chunk_duration=10, sample_rate=SAMPLE_RATE))
+
+        assert [c.offset for c in chunks] == [0.0, 10.0, 20.0]
+        assert [len(c.samples) for c in chunks] == [1000, 1000, 500]
+        assert all(c.overlap == 0 for c in chunks)
+        assert chunks[-1].end == pytest.approx(25.0)
+
+    def test_overlapping_windows_share_samples(self):
+        chunks = list(iter_pcm_chunks(_pcm(25), chunk_duration=10, overlap=2, sample_rate=SAMPLE_RATE))
+
+        assert [c.offset for c in chunks] == [0.0, 8.0, 16.0]
+        assert chunks[1].overlap == pytest.approx(2.0)
+        np.testing.assert_array_equal(chunks[0].samples[-200:], chunks[1].samples[:200])
+        assert chunks[-1].end == pytest.approx(25.0)
+
+    def test_exact_multiple_does_not_emit_overlap_only_tail(self):
+        chunks = list(iter_pcm_chunks(_pcm(20), chunk_duration=10, overlap=2, sample_rate=SAMPLE_RATE))
+
+        assert chunks[-1].end == pytest.approx(20.0)
+        assert len(chunks[-1].samples) > 200
+
+    def test_reports_progress_when_duration_known(self):
+        chunks = list(iter_pcm_chunks(
+            _pcm(20), chunk_duration=10, sample_rate=SAMPLE_RATE, total_duration=20
+        ))
+
+        assert [c.progress for c in chunks] == [0.5, 1.0]
+
+    def test_rejects_overlap_longer_than_chunk(self):
+        with pytest.raises(ValueError):
+            list(iter_pcm_chunks(_pcm(5), chunk_duration=1, overlap=1, sample_rate=SAMPLE_RATE))
+
+    def test_pcm_to_float32_matches_whisper_scaling(self):
+        raw = np.array([0, 16384, -32768], dtype="<i2").tobytes() + b"\x01"
+
+        np.testing.assert_allclose(pcm_to_float32(raw), [0.0, 0.5, -1.0])
+
+
+class TestMergeChunkSegments:
+    """Test cases for merge_chunk_segments."""
+
+    def test_shifts_and_drops_overlap_duplicates(self):
+        merged = []
+        merge_chunk_segments(merged, [
+            {"start": 0.0, "end": 4.0, "text": " a"},
+            {"start": 4.0, "end": 9.5, "text": " b"},
+        ], offset=0.0)
+        kept = merge_chunk_segments(merged, [
+            {"start": 0.0, "end": 1.5, "text": " b"},
+            {"start": 1.5, "end": 6.0, "text": " c"},
+        ], offset=8.0)
+
+        assert [s["text"] for s in kept] == [" c"]
+        assert [(s["start"], s["end"]) for s in merged] == [(0.0, 4.0), (4.0, 9.5), (9.5, 14.0)]
+
+    def test_transcript_merger_joins_chunks_in_order(self):
+        merger = TranscriptMerger()
+        chunks = list(iter_pcm_chunks(_pcm(20), chunk_duration=10, sample_rate=SAMPLE_RATE))
+        merger.add(chunks[0], {"text": " first", "segments": [{"start": 0.0, "end": 10.0, "text": " first"}],
+                               "language": "en"})
+        merger.add(chunks[1], {"text": " second", "segments": [{"start": 0.0, "end": 10.0, "text": " second"}]})
+
+        result = merger.result()
+        assert result["text"] == " first  second"
+        assert [s["start"] for s in result["segments"]] == [0.0, 10.0]
+        assert result["language"] == "en"
+        assert result["duration"] == pytest.approx(20.0)
+
+
+class FakeFFmpeg:
+    """Stand-in for the ffmpeg decoder process."""
+
+    def __init__(self, cmd, stdout=None, stderr=None):
+        self.stdout = _pcm(1)
+        self.stderr = io.BytesIO()
+
+    def poll(self):
+        return 0
+
+    def wait(self):
+        return 0
+
+
+class TestStreamAudioChunks:
+    """Test cases for stream_audio_chunks."""
+
+    @pytest.mark.parametrize("ffmpeg,ffprobe,expected", [
+        ("ffmpeg", None, "ffprobe"),
+        ("/opt/ffmpeg-6/bin/ffmpeg", None, "/opt/ffmpeg-6/bin/ffprobe"),
+        ("/opt/ffmpeg-6/bin/ffmpeg", "/usr/bin/ffprobe", "/usr/bin/ffprobe"),
+    ])
+    def test_probes_with_matching_ffprobe(self, monkeypatch, ffmpeg, ffprobe, expected):
+        probed = []
+        monkeypatch.setattr(audio_stream.subprocess, "Popen", FakeFFmpeg)
+        monkeypatch.setattr(audio_stream, "probe_duration",
+                            lambda path, ffprobe_path: probed.append(ffprobe_path) or 1.0)
+
+        chunks = list(stream_audio_chunks("talk.mp3", sample_rate=SAMPLE_RATE,
+                                          ffmpeg_path=ffmpeg, ffprobe_path=ffprobe))
+
+        assert probed == [expected]
+        assert len(chunks) == 1
@@ -0,0 +1,135 @@
+"""
+Unit tests for the content-addressed blob store.
+"""
+import hashlib
+import sys
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+# Add the project root to the Python path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.models.blob import Blob
+from app.services import blob_store as blob_store_module
+from app.services.blob_store import (
+    LocalBlobStore, add_reference, blob_digest, collect_garbage, get_blob_store, release_path,
+    release_reference, sync_session
+)
+
+
+@pytest.fixture
+def session_factory():
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    Blob.__table__.create(engine)
+    return sessionmaker(bind=engine)
+
+
+@pytest.fixture
+def store(tmp_path, session_factory):
+    return LocalBlobStore(tmp_path / "blobs", session_factory=session_factory)
+
+
+def _age(db, digest, hours=2):
+    db.get(Blob, digest).unreferenced_at = datetime.utcnow() - timedelta(hours=hours)
+    db.commit()
+
+
+class TestLocalBlobStore:
+    """Test cases for storing content by hash."""
+
+    def test_identical_content_is_stored_once(self, tmp_path, store):
+        for name in ("a.wav", "b.wav"):
+            (tmp_path / name).write_bytes(b"same audio")
+        digest = hashlib.sha256(b"same audio").hexdigest()
+
+        first = store.put_file(tmp_path / "a.wav", move=True)
+        second = store.put_file(tmp_path / "b.wav", move=True)
+
+        assert first == second
+        assert first.sha256 == digest
+        assert first.path == tmp_path / "blobs" / digest[:2] / digest[2:4] / digest
+        assert first.path.read_bytes() == b"same audio"
+        assert not (tmp_path / "a.wav").exists() and not (tmp_path / "b.wav").exists()
+        assert store.digest_of(first.path) == digest
+        assert store.digest_of(tmp_path / digest) is None
+
+    def test_copy_keeps_source(self, tmp_path, store):
+        (tmp_path / "src").write_bytes(b"data")
+        store.put_file(tmp_path / "src")
+        assert (tmp_path / "src").exists()
+        assert store.put_bytes(b"data").path.read_bytes() == b"data"
+
+
+class TestReferenceCounting:
+    """Test cases for reference counts and garbage collection."""
+
+    def test_collects_only_unreferenced_blobs_past_grace(self, store, session_factory):
+        kept = store.put_bytes(b"kept")
+        released = store.put_bytes(b"released")
+        fresh = store.put_bytes(b"fresh")
+        db = session_factory()
+
+        add_reference(db, kept.sha256)
+        add_reference(db, released.sha256)
+        add_reference(db, released.sha256)
+        db.commit()
+        release_reference(db, released.sha256)
+        assert db.get(Blob, released.sha256).unreferenced_at is None
+        assert release_path(db, store, str(released.path))
+        db.commit()
+        for blob in (kept, released):
+            _age(db, blob.sha256)
+
+        stats = collect_garbage(db, store, grace_period=timedelta(hours=1))
+
+        assert stats["deleted"] == 1
+        assert stats["bytes_freed"] == len(b"released")
+        assert not released.path.exists()
+        assert db.get(Blob, released.sha256) is None
+        assert kept.path.exists() and fresh.path.exists()
+
+    def test_storing_again_restarts_grace_period(self, store, session_factory):
+        blob = store.put_bytes(b"tts output")
+        db = session_factory()
+        _age(db, blob.sha256)
+
+        store.put_bytes(b"tts output")
+        db.expire_all()
+
+        assert collect_garbage(db, store)["deleted"] == 0
+        assert blob.path.exists()
+
+    def test_delete_restores_content_stored_during_collection(self, store, session_factory):
+        blob = store.put_bytes(b"racing")
+        db = session_factory()
+
+        # A put that registered a new row after the collector removed the old one
+        assert not store.delete(blob.sha256, still_unused=lambda: False)
+        assert blob.path.read_bytes() == b"racing"
+        assert store.delete(blob.sha256, still_unused=lambda: True)
+        assert not blob.path.exists()
+        db.close()
+
+
+class TestProcessStore:
+    """Test cases for the process-wide store."""
+
+    def test_get_blob_store_builds_a_working_store(self, tmp_path, monkeypatch):
+        monkeypatch.setenv("BLOB_STORE_BACKEND", "local")
+        monkeypatch.setenv("BLOB_STORE_DIR", str(tmp_path / "blobs"))
+        monkeypatch.setattr(blob_store_module, "_blob_store", None)
+
+        store = get_blob_store()
+        ref = store.put_bytes(b"lecture")
+
+        assert get_blob_store() is store
+        assert isinstance(store, LocalBlobStore)
+        assert store.session_factory is sync_session
+        assert ref.path.read_bytes() == b"lecture"
+        assert blob_digest(ref.path) == ref.sha256
+        assert blob_digest(tmp_path / ref.sha256) is None
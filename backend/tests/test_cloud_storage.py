@@ -0,0 +1,95 @@
+"""
+Tests for the async S3 client, run against moto's in-memory S3.
+"""
+import io
+import os
+import sys
+from pathlib import Path
+
+import pytest
+
+boto3 = pytest.importorskip("boto3")
+moto = pytest.importorskip("moto")
+
+# Add the project root to the Python path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.services import cloud_storage as cloud_storage_module
+from app.services.cloud_storage import CloudStorageService
+
+BUCKET = "notefusion-test"
+PART_SIZE = 5 * 1024 * 1024
+
+
+@pytest.fixture
+def s3():
+    with moto.mock_aws():
+        client = boto3.client("s3", region_name="us-east-1")
+        client.create_bucket(Bucket=BUCKET)
+        yield client
+
+
+@pytest.fixture
+def storage(s3):
+    return CloudStorageService(client=s3, bucket_name=BUCKET, part_size=PART_SIZE, max_concurrency=3)
+
+
+class TestCloudStorageService:
+    """Test cases for uploads, deletes and presigned URLs."""
+
+    @pytest.mark.asyncio
+    async def test_small_file_is_a_single_put(self, s3, storage):
+        url = await storage.upload_file(io.BytesIO(b"notes"), "a.txt", "text/plain")
+
+        assert url.endswith("/a.txt")
+        head = s3.head_object(Bucket=BUCKET, Key="a.txt")
+        assert head["ContentType"] == "text/plain"
+        assert "-" not in head["ETag"]
+
+    @pytest.mark.asyncio
+    async def test_large_file_is_uploaded_in_parts(self, s3, storage):
+        data = os.urandom(3 * PART_SIZE + 123)
+
+        await storage.upload_file(io.BytesIO(data), "lecture.mp4", "video/mp4")
+
+        obj = s3.get_object(Bucket=BUCKET, Key="lecture.mp4")
+        assert obj["Body"].read() == data
+        assert obj["ETag"].strip('"').endswith("-4")
+
+    @pytest.mark.asyncio
+    async def test_failed_part_aborts_the_upload(self, s3, storage):
+        class Broken(io.BytesIO):
+            reads = 0
+
+            def read(self, size=-1):
+                Broken.reads += 1
+                if Broken.reads == 3:
+                    raise OSError("disk went away")
+                return super().read(size)
+
+        with pytest.raises(OSError):
+            await storage.upload_file(Broken(os.urandom(4 * PART_SIZE)), "broken.bin")
+
+        assert not s3.list_multipart_uploads(Bucket=BUCKET).get("Uploads")
+        assert "Contents" not in s3.list_objects_v2(Bucket=BUCKET)
+
+    @pytest.mark.asyncio
+    async def test_delete_files_in_batches(self, s3, storage, monkeypatch):
+        monkeypatch.setattr(cloud_storage_module, "DELETE_BATCH_SIZE", 2)
+        names = [f"blob/{i}" for i in range(5)]
+        for name in names:
+            s3.put_object(Bucket=BUCKET, Key=name, Body=b"x")
+
+        assert await storage.delete_files(names + ["blob/missing"]) == []
+        assert "Contents" not in s3.list_objects_v2(Bucket=BUCKET)
+
+    @pytest.mark.asyncio
+    async def test_presigned_urls_are_cached_until_deleted(self, s3, storage):
+        s3.put_object(Bucket=BUCKET, Key="a.txt", Body=b"x")
+
+        first = await storage.generate_presigned_url("a.txt")
+        assert await storage.generate_presigned_url("a.txt") == first
+        assert await storage.generate_presigned_url("a.txt", expires_in=60) != first
+
+        await storage.delete_file("a.txt")
+        assert not storage._urls
@@ -0,0 +1,127 @@
+"""
+Unit tests for single-pass content moderation.
+"""
+import sys
+from pathlib import Path
+
+import pytest
+from fastapi import FastAPI
+from fastapi.responses import StreamingResponse
+from fastapi.testclient import TestClient
+
+# Add the project root to the Python path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.middleware.content_moderation import ContentModeration
+from app.services.moderation import ModerationAutomaton, Near, get_moderation_automaton
+
+
+class TestModerationAutomaton:
+    """Test cases for the compiled rules."""
+
+    @pytest.mark.parametrize("text,category", [
+        ("This lecture covers photosynthesis.", None),
+        ("I want to kill someone", "violence"),
+        ("I will hurt all of you", "hate_speech"),
+        ("TORTURE is never acceptable", "violence"),
+        ("posts about self-harm and selfharm", "self_harm"),
+        ("child abuse", "harassment"),
+        ("white supremacists", "hate_speech"),
+        ("the bombastic speaker skilled at embombing", None),
+    ])
+    def test_default_rules(self, text, category):
+        violation = get_moderation_automaton().check(text)
+        assert (violation.category if violation else None) == category
+
+    def test_word_boundaries_and_separators(self):
+        automaton = ModerationAutomaton({
+            "phrases": ["want to die", "self-harm", "white supremac*"],
+            "near": [Near(("hurt",), ("you",), max_gap=1)],
+        })
+
+        assert automaton.check("I   Want to\nDIE").rule == "want to die"
+        assert automaton.check("self harm") is None
+        assert automaton.check("white, supremacists") is None
+        assert automaton.check("hurt all you").category == "near"
+        assert automaton.check("hurt all of you") is None
+        assert automaton.check("hurt. you") is None
+
+    def test_earlier_categories_win(self):
+        automaton = ModerationAutomaton({"first": ["rape"], "second": ["kill"]})
+
+        assert automaton.check("kill ... rape").category == "first"
+
+    def test_ambiguous_stems_rejected(self):
+        with pytest.raises(ValueError):
+            ModerationAutomaton({"a": ["tortur*", "torture"]})
+
+
+class TestModerationScanner:
+    """Test cases for streamed scanning."""
+
+    @pytest.mark.parametrize("chunks", [
+        ["I will hu", "rt yo", "u now"],
+        ["self", "-", "ha", "rm"],
+        ["want to", " d", "ie"],
+    ])
+    def test_matches_across_chunk_boundaries(self, chunks):
+        scanner = get_moderation_automaton().scanner()
+        results = [scanner.feed(chunk) for chunk in chunks] + [scanner.finish()]
+
+        assert sum(1 for r in results if r) == 1
+
+    def test_split_words_do_not_match(self):
+        scanner = get_moderation_automaton().scanner()
+
+        assert scanner.feed("the bom") is None
+        assert scanner.feed("bastic speaker") is None
+        assert scanner.finish() is None
+
+
+class TestContentModerationMiddleware:
+    """Test cases for the HTTP middleware."""
+
+    @pytest.fixture
+    def client(self):
+        app = FastAPI()
+        app.middleware("http")(ContentModeration())
+
+        # Replies are sent reversed so only the response, not the request, holds the words
+        @app.post("/api/v1/ai/echo")
+        async def echo(payload: dict):
+            return {"content": payload["reply"][::-1]}
+
+        @app.post("/api/v1/ai/stream")
+        async def stream(payload: dict):
+            async def tokens():
+                for word in payload["reply"][::-1].split(" "):
+                    yield word + " "
+            return StreamingResponse(tokens(), media_type="text/plain")
+
+        return TestClient(app)
+
+    def test_request_body(self, client):
+        blocked = client.post("/api/v1/ai/echo", json={"text": "I want to kill someone", "reply": "ko"})
+
+        assert blocked.status_code == 400
+        assert blocked.json()["category"] == "violence"
+
+    def test_response_body(self, client):
+        assert client.post("/api/v1/ai/echo", json={"reply": "sisotim"}).json() == {"content": "mitosis"}
+
+        blocked = client.post("/api/v1/ai/echo", json={"reply": "bmob a"})
+        assert blocked.status_code == 400
+        assert blocked.json()["error"] == "content_violation"
+
+    def test_streamed_response_is_cut_off(self, client):
+        clean = client.post("/api/v1/ai/stream", json={"reply": "sisotim yb edivid sllec"})
+        assert clean.status_code == 200
+        assert clean.text == "cells divide by mitosis "
+
+        cut = client.post("/api/v1/ai/stream", json={"reply": "kcol bmob eht nehw"})
+        assert cut.status_code == 200
+        # The chunk held back when the violation turns up is dropped with it
+        assert cut.text == "when "
+
+        # A violation before the first chunk is sent is still a 400
+        assert client.post("/api/v1/ai/stream", json={"reply": "ti od bmob"}).status_code == 400
@@ -0,0 +1,111 @@
+"""
+Unit tests for flashcard due queues and keyset cursors.
+"""
+import sys
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import pytest
+
+# Add the project root to the Python path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.services.due_queue import DueQueue, decode_cursor, encode_cursor
+
+
+class FakeSortedSets:
+    """The handful of Redis sorted-set commands DueQueue uses."""
+
+    def __init__(self):
+        self.sets = {}
+
+    async def exists(self, key):
+        return int(key in self.sets)
+
+    async def zadd(self, key, mapping):
+        self.sets.setdefault(key, {}).update(mapping)
+
+    async def zrem(self, key, *members):
+        for member in members:
+            self.sets.get(key, {}).pop(member, None)
+
+    async def zcount(self, key, low, high):
+        return sum(1 for score in self.sets.get(key, {}).values() if score <= high)
+
+    async def zcard(self, key):
+        return len(self.sets.get(key, {}))
+
+    async def delete(self, key):
+        self.sets.pop(key, None)
+
+    async def expire(self, key, seconds):
+        return True
+
+    def pipeline(self, transaction=True):
+        return FakePipeline(self)
+
+
+class FakePipeline:
+    def __init__(self, redis):
+        self.redis = redis
+        self.calls = []
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    def __getattr__(self, name):
+        return lambda *args: self.calls.append((name, args))
+
+    async def execute(self):
+        return [await getattr(self.redis, name)(*args) for name, args in self.calls]
+
+
+class TestCursor:
+    """Test cases for keyset cursors."""
+
+    def test_round_trip(self):
+        due = datetime(2024, 5, 1, 12, 30, 15, 123456)
+
+        assert decode_cursor(encode_cursor(due, "card-1")) == (due, "card-1")
+
+    def test_malformed_cursor(self):
+        with pytest.raises(ValueError):
+            decode_cursor("not a cursor")
+
+
+class TestDueQueue:
+    """Test cases for DueQueue."""
+
+    @pytest.mark.asyncio
+    async def test_counts_follow_updates(self):
+        now = datetime(2024, 1, 10)
+        queue = DueQueue(client=FakeSortedSets())
+
+        assert await queue.counts("u1", now) is None
+        await queue.rebuild("u1", [("a", now - timedelta(days=1)), ("b", now + timedelta(days=3))])
+        assert await queue.counts("u1", now) == (1, 2)
+
+        # Reviewing "a" pushes it out; a new card is due immediately
+        await queue.update("u1", [("a", now + timedelta(days=6)), ("c", now)])
+        assert await queue.counts("u1", now) == (1, 3)
+
+        await queue.remove("u1", ["c"])
+        assert await queue.counts("u1", now) == (0, 2)
+
+    @pytest.mark.asyncio
+    async def test_updates_do_not_create_partial_mirrors(self):
+        queue = DueQueue(client=FakeSortedSets())
+
+        await queue.update("u2", [("a", datetime(2024, 1, 1))])
+
+        assert not await queue.is_warm("u2")
+
+    @pytest.mark.asyncio
+    async def test_disabled_without_redis(self):
+        queue = DueQueue()
+
+        assert not queue.enabled
+        assert await queue.counts("u1", datetime.utcnow()) is None
@@ -0,0 +1,156 @@
+"""
+Unit tests for FFmpegVideoService slide rendering modes.
+"""
+import sys
+import threading
+import time
+from pathlib import Path
+
+import pytest
+
+# Add the project root to the Python path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.services.video.ffmpeg_service import FFmpegVideoService
+from app.services.video.segment_cache import SlideSegmentCache
+
+
+@pytest.fixture
+def service(tmp_path, monkeypatch):
+    monkeypatch.setattr(FFmpegVideoService, "_find_ffmpeg", lambda self: "ffmpeg")
+    return FFmpegVideoService(
+        output_dir=str(tmp_path / "out"),
+        max_workers=3,
+        slide_cache=SlideSegmentCache(str(tmp_path / "cache")),
+    )
+
+
+def _fake_encoder(encoded):
+    """Stand-in for _run_ffmpeg that writes each slide's text as its "video"."""
+    def run(cmd, error_msg="", total_seconds=None, progress_callback=None):
+        output = Path(cmd[-1])
+        if "concat" in cmd:
+            parts = [line.split("'")[1] for line in Path(cmd[cmd.index("-i") + 1]).read_text().splitlines()]
+            output.write_text("|".join(Path(part).read_text() for part in parts))
+            return
+        text = Path(cmd[cmd.index("-vf") + 1].split("'")[1]).read_text()
+        encoded.append(text)
+        output.write_text(text)
+    return run
+
+
+def _slides(durations):
+    return [{"content": f"Slide {i}", "duration": d} for i, d in enumerate(durations)]
+
+
+class TestFiltergraph:
+    """Test cases for the single-pass filtergraph."""
+
+    def test_xfade_offsets(self, service, tmp_path):
+        slides = _slides([4, 2, 3])
+        graph, label, total = service.build_filtergraph(
+            slides, [tmp_path / f"{i}.txt" for i in range(3)], 640, 360, 25, transition="fade"
+        )
+
+        assert label == "x2" and total == pytest.approx(8.0)
+        assert "color=c=#000000:s=640x360:d=4:r=25,drawtext=" in graph
+        assert "[s0][s1]xfade=transition=fade:duration=0.5:offset=3.500[x1]" in graph
+        assert "[x1][s2]xfade=transition=fade:duration=0.5:offset=5.000[x2]" in graph
+
+    def test_concat_without_transition(self, service, tmp_path):
+        graph, label, total = service.build_filtergraph(
+            _slides([1, 1]), [tmp_path / "a.txt", tmp_path / "b.txt"], 640, 360, 25
+        )
+
+        assert graph.endswith("[s0][s1]concat=n=2:v=1:a=0[out]")
+        assert label == "out" and total == 2
+
+    def test_transition_is_shortened_to_fit(self, service, tmp_path):
+        _, _, total = service.build_filtergraph(
+            _slides([1, 1]), [tmp_path / "a.txt", tmp_path / "b.txt"], 640, 360, 25,
+            transition="fade", transition_duration=2
+        )
+
+        assert total == pytest.approx(1.5)
+
+    def test_invalid_options(self, service):
+        with pytest.raises(ValueError):
+            service.generate_video(_slides([1]), preset="placebo")
+        with pytest.raises(ValueError):
+            service.generate_video(_slides([1]), mode="parallel", transition="fade")
+
+
+class TestParallelRendering:
+    """Test cases for the parallel per-slide renderer."""
+
+    def test_slides_encode_concurrently_and_join_in_order(self, service, monkeypatch):
+        running, peak, lock = [0], [0], threading.Lock()
+        concat_lists = []
+
+        def fake_run(cmd, error_msg="", total_seconds=None, progress_callback=None):
+            output = Path(cmd[-1])
+            if "concat" in cmd:
+                concat_lists.append(Path(cmd[cmd.index("-i") + 1]).read_text())
+                output.write_bytes(b"video")
+                return
+            with lock:
+                running[0] += 1
+                peak[0] = max(peak[0], running[0])
+            time.sleep(0.02)
+            output.write_bytes(b"slide")
+            with lock:
+                running[0] -= 1
+
+        monkeypatch.setattr(service, "_run_ffmpeg", fake_run)
+        progress = []
+
+        path = service.generate_video(_slides([1] * 8), "deck.mp4", progress_callback=progress.append)
+
+        assert path.read_bytes() == b"video"
+        assert peak[0] == 3
+        assert [line.split("slide_")[1][:3] for line in concat_lists[0].splitlines()] == [
+            f"{i:03d}" for i in range(8)
+        ]
+        assert progress[-1] == 100
+
+    def test_failed_slide_fails_the_video(self, service, monkeypatch):
+        def fake_run(cmd, error_msg="", total_seconds=None, progress_callback=None):
+            if "Slide 2" in Path(cmd[cmd.index("-vf") + 1].split("'")[1]).read_text():
+                raise RuntimeError("encode failed")
+            Path(cmd[-1]).write_bytes(b"slide")
+
+        monkeypatch.setattr(service, "_run_ffmpeg", fake_run)
+
+        with pytest.raises(RuntimeError):
+            service.generate_video(_slides([1] * 4), "broken.mp4")
+        assert not (service.output_dir / "broken.mp4").exists()
+
+
+class TestSlideCache:
+    """Test cases for reusing encoded slides across renders."""
+
+    def test_one_slide_edit_re_encodes_one_slide(self, service, monkeypatch):
+        encoded = []
+        monkeypatch.setattr(service, "_run_ffmpeg", _fake_encoder(encoded))
+        slides = _slides([2] * 60)
+
+        service.generate_video(slides, "v1.mp4")
+        slides[17] = {**slides[17], "content": "Slide 17 (fixed typo)"}
+        encoded.clear()
+        path = service.generate_video(slides, "v2.mp4")
+
+        assert encoded == ["Slide 17 (fixed typo)"]
+        assert path.read_text().split("|")[16:18] == ["Slide 16", "Slide 17 (fixed typo)"]
+
+    def test_key_covers_style_size_and_preset(self, service, monkeypatch):
+        encoded = []
+        monkeypatch.setattr(service, "_run_ffmpeg", _fake_encoder(encoded))
+        slide = _slides([2])
+
+        service.generate_video(slide, "a.mp4")
+        service.generate_video(slide, "b.mp4")
+        service.generate_video([{**slide[0], "style": {"font_size": 60}}], "c.mp4")
+        service.generate_video(slide, "d.mp4", width=640, height=360)
+        service.generate_video(slide, "e.mp4", preset="medium")
+
+        assert len(encoded) == 4
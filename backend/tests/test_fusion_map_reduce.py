@@ -0,0 +1,122 @@
+"""
+Unit tests for map-reduce lecture/textbook fusion.
+"""
+import asyncio
+import json
+import re
+import sys
+from pathlib import Path
+
+import pytest
+
+# Add the project root to the Python path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.services.fusion_sections import parse_timestamps, parse_toc, plan_sections
+from app.services.fusion_service import FusionService
+
+
+LECTURE = """[00:00:05] Welcome. Today we cover motion and then forces.
+[00:04:10] Velocity is the rate of change of position.
+[00:20:00] Newton's second law says force equals mass times acceleration.
+[00:31:40] Friction opposes motion."""
+
+TEXTBOOK = """Chapter 2 Kinematics
+Displacement, velocity and acceleration are vectors.
+
+Chapter 3 Dynamics and Forces
+A net force produces an acceleration."""
+
+
+class TestPlanSections:
+    """Test cases for plan_sections."""
+
+    def test_user_timestamps_name_and_cut_the_lecture(self):
+        sections = plan_sections(
+            LECTURE, TEXTBOOK,
+            lecture_timestamps="00:00:00 Kinematics\n00:20:00 - Forces",
+        )
+
+        assert [s.title for s in sections] == ["Kinematics", "Forces"]
+        assert [s.start_time for s in sections] == ["00:00:05", "00:20:00"]
+        assert "Velocity" in sections[0].lecture and "Friction" in sections[1].lecture
+        # Textbook chapters follow the lecture section sharing their title words
+        assert "Displacement" in sections[0].textbook
+        assert "net force" in sections[1].textbook
+
+    def test_inline_markers_split_without_user_timestamps(self):
+        sections = plan_sections(LECTURE)
+
+        assert [s.start_time for s in sections] == ["00:00:05", "00:04:10", "00:20:00", "00:31:40"]
+
+    def test_toc_headings_split_untimed_text(self):
+        lecture = "Intro words.\nKinematics\nmotion talk\nDynamics\nforce talk"
+        sections = plan_sections(lecture, table_of_contents="1. Kinematics .... 3\nDynamics 17")
+
+        assert [s.title for s in sections] == ["Part 1", "1. Kinematics", "Dynamics"]
+
+    def test_sections_are_capped_and_cover_all_text(self):
+        paragraphs = [f"Paragraph {i} " + "word " * 60 for i in range(40)]
+        lecture = "\n\n".join(paragraphs)
+        sections = plan_sections(lecture, "book " * 2000, max_chars=2000)
+
+        assert len(sections) > 1
+        assert all(s.size <= 2000 for s in sections)
+        assert [s.index for s in sections] == list(range(len(sections)))
+        for i in range(40):
+            assert sum(f"Paragraph {i} " in s.lecture for s in sections) == 1
+
+    def test_cue_parsers(self):
+        assert parse_timestamps("[01:02:03] Intro\n5:00 - Next") == {3723: "Intro", 300: "Next"}
+        assert parse_toc("1.1 Vectors ........ 12\n\nCh 2 Forces 40") == ["1.1 Vectors", "Ch 2 Forces"]
+
+
+class TestFuseContentMapReduce:
+    """Test cases for FusionService map-reduce mode."""
+
+    @pytest.fixture
+    def service(self, monkeypatch):
+        monkeypatch.delenv("OPENAI_API_KEY", raising=False)
+        service = FusionService(max_concurrency=2, section_chars=200)
+        service.openai_available = True
+        service.in_flight = 0
+        service.peak = 0
+
+        async def fake_call(prompt):
+            service.in_flight += 1
+            service.peak = max(service.peak, service.in_flight)
+            # Later parts answer first, so merging must not depend on completion order
+            part = int(re.search(r"PART: (\d+) of", prompt).group(1))
+            await asyncio.sleep(0.01 * (10 - part))
+            service.in_flight -= 1
+            return json.dumps({
+                "sections": [{"title": f"Notes {part}", "content": [], "estimated_study_time_minutes": 5}],
+                "summary": f"Summary {part}.",
+            })
+
+        service._call_openai = fake_call
+        return service
+
+    @pytest.mark.asyncio
+    async def test_sections_are_fused_concurrently_and_merged_in_order(self, service):
+        notes = await service.fuse_content(LECTURE, TEXTBOOK, "PHYS101", "2-3")
+
+        assert [s["title"] for s in notes["sections"]] == ["Notes 1", "Notes 2", "Notes 3", "Notes 4"]
+        assert [s["start_time"] for s in notes["sections"]] == ["00:00:05", "00:04:10", "00:20:00", "00:31:40"]
+        assert notes["summary"] == "Summary 1. Summary 2. Summary 3. Summary 4."
+        assert notes["total_estimated_study_time_minutes"] == 20
+        assert notes["fusion_mode"] == "map_reduce"
+        assert service.peak == 2
+
+    @pytest.mark.asyncio
+    async def test_single_mode_keeps_one_prompt(self, service):
+        calls = []
+
+        async def fake_call(prompt):
+            calls.append(prompt)
+            return json.dumps({"sections": [], "summary": "one"})
+
+        service._call_openai = fake_call
+        notes = await service.fuse_content(LECTURE, TEXTBOOK, "PHYS101", "2-3", mode="single")
+
+        assert len(calls) == 1 and notes["summary"] == "one"
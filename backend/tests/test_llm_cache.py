@@ -0,0 +1,166 @@
+"""
+Unit tests for the shared LLM response cache.
+"""
+import asyncio
+import sys
+import time
+from pathlib import Path
+
+import pytest
+
+# Add the project root to the Python path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.services.llm_cache import LLMResponseCache, SQLiteLLMCacheBackend, llm_cache_key
+
+
+MESSAGES = [
+    {"role": "system", "content": "You are an expert quiz creator."},
+    {"role": "user", "content": "Generate 5 questions about\n  entropy."},
+]
+
+
+class Completion:
+    """Counting stand-in for a chat completion call."""
+
+    def __init__(self, text="answer", delay=0.0, fail=False):
+        self.calls = 0
+        self.text = text
+        self.delay = delay
+        self.fail = fail
+
+    async def __call__(self):
+        self.calls += 1
+        await asyncio.sleep(self.delay)
+        if self.fail:
+            raise RuntimeError("rate limited")
+        return f"{self.text} {self.calls}"
+
+
+@pytest.fixture
+def cache(tmp_path):
+    cache = LLMResponseCache(SQLiteLLMCacheBackend(str(tmp_path / "llm.sqlite3"), ttl=60, max_entries=3))
+    yield cache
+    asyncio.run(cache.close())
+
+
+class TestLLMCacheKey:
+    """Test cases for llm_cache_key."""
+
+    def test_whitespace_does_not_change_the_key(self):
+        reformatted = [dict(m, content="  " + m["content"].replace("\n  ", " ") + "\n") for m in MESSAGES]
+
+        assert llm_cache_key("gpt-4", MESSAGES) == llm_cache_key("gpt-4", reformatted)
+
+    def test_sampling_parameters_change_the_key(self):
+        base = llm_cache_key("gpt-4", MESSAGES, 0.3, 4000)
+
+        assert base != llm_cache_key("gpt-4", MESSAGES, 0.7, 4000)
+        assert base != llm_cache_key("gpt-4", MESSAGES, 0.3, 1000)
+        assert base != llm_cache_key("gpt-3.5-turbo", MESSAGES, 0.3, 4000)
+
+
+class TestLLMResponseCache:
+    """Test cases for LLMResponseCache with the SQLite backend."""
+
+    @pytest.mark.asyncio
+    async def test_second_request_is_served_from_cache(self, cache):
+        create = Completion()
+
+        first = await cache.get_or_create("quiz", "gpt-4", MESSAGES, create)
+        second = await cache.get_or_create("quiz", "gpt-4", MESSAGES, create)
+
+        assert first == second == "answer 1"
+        assert create.calls == 1
+        assert cache.stats()["quiz"]["hits"] == 1
+        assert cache.stats()["quiz"]["hit_rate"] == 0.5
+
+    @pytest.mark.asyncio
+    async def test_concurrent_requests_make_one_call(self, cache):
+        create = Completion(delay=0.05)
+
+        results = await asyncio.gather(*[
+            cache.get_or_create("flashcards", "gpt-4", MESSAGES, create) for _ in range(5)
+        ])
+
+        assert results == ["answer 1"] * 5
+        assert create.calls == 1
+        assert cache.stats()["flashcards"]["coalesced"] == 4
+
+    @pytest.mark.asyncio
+    async def test_failures_reach_waiters_and_are_not_cached(self, cache):
+        failing = Completion(delay=0.02, fail=True)
+
+        results = await asyncio.gather(
+            *[cache.get_or_create("notes", "gpt-4", MESSAGES, failing) for _ in range(3)],
+            return_exceptions=True,
+        )
+
+        assert all(isinstance(r, RuntimeError) for r in results)
+        assert failing.calls == 1
+        assert await cache.get_or_create("notes", "gpt-4", MESSAGES, Completion("retry")) == "retry 1"
+        assert cache.stats()["notes"]["errors"] == 1
+
+    @pytest.mark.asyncio
+    async def test_cancelled_leader_hands_over_to_a_waiter(self, cache):
+        create = Completion(delay=0.05)
+        leader = asyncio.create_task(cache.get_or_create("quiz", "gpt-4", MESSAGES, create))
+        await asyncio.sleep(0.01)
+        waiters = [asyncio.create_task(cache.get_or_create("quiz", "gpt-4", MESSAGES, create)) for _ in range(3)]
+        await asyncio.sleep(0.01)
+
+        leader.cancel()
+        results = await asyncio.gather(*waiters)
+
+        assert leader.cancelled()
+        assert results == ["answer 2"] * 3
+        assert create.calls == 2
+
+    @pytest.mark.asyncio
+    async def test_cancelled_waiter_leaves_the_request_running(self, cache):
+        create = Completion(delay=0.05)
+        leader = asyncio.create_task(cache.get_or_create("quiz", "gpt-4", MESSAGES, create))
+        await asyncio.sleep(0.01)
+        waiter = asyncio.create_task(cache.get_or_create("quiz", "gpt-4", MESSAGES, create))
+        await asyncio.sleep(0.01)
+
+        waiter.cancel()
+
+        assert await leader == "answer 1"
+        assert waiter.cancelled()
+
+    @pytest.mark.asyncio
+    async def test_least_recently_used_entries_are_evicted(self, cache):
+        prompts = [f"prompt {i}" for i in range(4)]
+        for prompt in prompts[:3]:
+            await cache.get_or_create("quiz", "gpt-4", prompt, Completion(prompt))
+        # Touch the oldest entry so the second one becomes least recently used
+        await cache.get_or_create("quiz", "gpt-4", prompts[0], Completion("unused"))
+        await cache.get_or_create("quiz", "gpt-4", prompts[3], Completion(prompts[3]))
+
+        assert await cache.backend.get(llm_cache_key("gpt-4", prompts[0])) == "prompt 0 1"
+        assert await cache.backend.get(llm_cache_key("gpt-4", prompts[1])) is None
+        assert cache.stats()["quiz"]["evictions"] == 1
+
+    @pytest.mark.asyncio
+    async def test_expired_entries_are_recomputed(self, tmp_path):
+        cache = LLMResponseCache(SQLiteLLMCacheBackend(str(tmp_path / "ttl.sqlite3"), ttl=0.05))
+        create = Completion()
+
+        await cache.get_or_create("quiz", "gpt-4", MESSAGES, create)
+        time.sleep(0.1)
+        assert await cache.get_or_create("quiz", "gpt-4", MESSAGES, create) == "answer 2"
+        await cache.close()
+
+    @pytest.mark.asyncio
+    async def test_entries_survive_a_restart(self, tmp_path):
+        path = str(tmp_path / "persist.sqlite3")
+        first = LLMResponseCache(SQLiteLLMCacheBackend(path))
+        await first.get_or_create("quiz", "gpt-4", MESSAGES, Completion())
+        await first.close()
+
+        second = LLMResponseCache(SQLiteLLMCacheBackend(path))
+        create = Completion("fresh")
+        assert await second.get_or_create("quiz", "gpt-4", MESSAGES, create) == "answer 1"
+        assert create.calls == 0
+        await second.close()
@@ -0,0 +1,141 @@
+"""
+Unit tests for range and conditional requests on media files.
+"""
+import hashlib
+import os
+import sys
+from pathlib import Path
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+# Add the project root to the Python path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.services import media
+from app.services.blob_store import LocalBlobStore, blob_dir
+from app.services.media import MediaFileResponse, parse_range
+
+DATA = os.urandom(1000)
+
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    monkeypatch.setenv("BLOB_STORE_DIR", str(tmp_path / "blobs"))
+    store = LocalBlobStore(blob_dir())
+    # Small reads, so responses take several sends
+    monkeypatch.setattr(media, "CHUNK_SIZE", 64)
+    return store
+
+
+@pytest.fixture
+def client(tmp_path, store):
+    plain = tmp_path / "lecture.mp3"
+    plain.write_bytes(DATA)
+    blob = store.put_bytes(DATA)
+
+    app = FastAPI()
+
+    @app.get("/plain")
+    def get_plain():
+        return MediaFileResponse(plain, media_type="audio/mpeg")
+
+    @app.get("/blob")
+    def get_blob():
+        return MediaFileResponse(blob.path, media_type="audio/mpeg", filename="lecture.mp3")
+
+    return TestClient(app)
+
+
+def _hashed():
+    """Wait for background hashing of plain files to finish."""
+    for future in list(media._pending.values()):
+        future.result()
+
+
+class TestParseRange:
+    """Test cases for Range header parsing."""
+
+    @pytest.mark.parametrize("header,expected", [
+        ("bytes=0-99", (0, 100)),
+        ("bytes=900-", (900, 1000)),
+        ("bytes=-100", (900, 1000)),
+        ("bytes=990-2000", (990, 1000)),
+        ("bytes=-5000", (0, 1000)),
+        ("bytes=5-1", None),
+        ("bytes=0-1,5-9", None),
+        ("items=0-1", None),
+    ])
+    def test_ranges(self, header, expected):
+        assert parse_range(header, 1000) == expected
+
+    @pytest.mark.parametrize("header", ["bytes=1000-", "bytes=-0"])
+    def test_unsatisfiable(self, header):
+        with pytest.raises(ValueError):
+            parse_range(header, 1000)
+
+
+class TestMediaFileResponse:
+    """Test cases for serving media files."""
+
+    @pytest.mark.parametrize("path", ["/plain", "/blob"])
+    def test_full_and_partial_content(self, client, path):
+        full = client.get(path)
+        assert full.status_code == 200
+        assert full.content == DATA
+        assert full.headers["accept-ranges"] == "bytes"
+        _hashed()
+        assert client.get(path).headers["etag"] == f'"{hashlib.sha256(DATA).hexdigest()}"'
+
+        part = client.get(path, headers={"Range": "bytes=100-199"})
+        assert part.status_code == 206
+        assert part.content == DATA[100:200]
+        assert part.headers["content-range"] == "bytes 100-199/1000"
+        assert part.headers["content-length"] == "100"
+
+        past_end = client.get(path, headers={"Range": "bytes=5000-"})
+        assert past_end.status_code == 416
+        assert past_end.headers["content-range"] == "bytes */1000"
+
+    def test_conditional_requests(self, client):
+        first = client.get("/blob")
+        etag, last_modified = first.headers["etag"], first.headers["last-modified"]
+        assert first.headers["content-disposition"] == 'inline; filename="lecture.mp3"'
+
+        assert client.get("/blob", headers={"If-None-Match": f'W/{etag}'}).status_code == 304
+        assert client.get("/blob", headers={"If-Modified-Since": last_modified}).status_code == 304
+        # If-None-Match takes precedence over the date
+        changed = client.get("/blob", headers={"If-None-Match": '"other"', "If-Modified-Since": last_modified})
+        assert changed.status_code == 200
+
+        # A stale If-Range gets the whole file instead of a range of the wrong version
+        stale = client.get("/blob", headers={"Range": "bytes=0-9", "If-Range": '"other"'})
+        assert stale.status_code == 200 and stale.content == DATA
+        fresh = client.get("/blob", headers={"Range": "bytes=0-9", "If-Range": etag})
+        assert fresh.status_code == 206 and fresh.content == DATA[:10]
+
+    def test_plain_file_is_hashed_in_the_background(self, client):
+        weak = client.get("/plain", headers={"Range": "bytes=0-9"})
+        etag = weak.headers["etag"]
+        assert weak.status_code == 206 and weak.content == DATA[:10]
+        assert etag.startswith("W/")
+
+        assert client.get("/plain", headers={"If-None-Match": etag}).status_code == 304
+        # A weak ETag never satisfies If-Range
+        ranged = client.get("/plain", headers={"Range": "bytes=0-9", "If-Range": etag})
+        assert ranged.status_code == 200 and ranged.content == DATA
+
+    def test_plain_file_hash_is_cached_per_version(self, client, tmp_path):
+        client.get("/plain")
+        _hashed()
+        first = client.get("/plain").headers["etag"]
+        assert first == f'"{hashlib.sha256(DATA).hexdigest()}"'
+
+        (tmp_path / "lecture.mp3").write_bytes(DATA[::-1])
+        os.utime(tmp_path / "lecture.mp3", ns=(0, 10 ** 9))
+        assert client.get("/plain").headers["etag"].startswith("W/")
+        _hashed()
+
+        second = client.get("/plain").headers["etag"]
+        assert second == f'"{hashlib.sha256(DATA[::-1]).hexdigest()}"'
@@ -0,0 +1,123 @@
+"""
+Unit tests for the shared model registry.
+"""
+import sys
+import threading
+import time
+from pathlib import Path
+
+import pytest
+
+# Add the project root to the Python path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.services.model_registry import ModelKey, ModelRegistry
+
+
+class FakeModel:
+    def __init__(self, name, device, compute_type):
+        self.key = (name, device, compute_type)
+
+
+@pytest.fixture
+def loads():
+    return []
+
+
+@pytest.fixture
+def registry(loads):
+    registry = ModelRegistry()
+
+    def loader(name, device, compute_type):
+        loads.append((name, device, compute_type))
+        if name == "broken":
+            raise RuntimeError("no weights")
+        return FakeModel(name, device, compute_type)
+
+    registry.register_loader("whisper", loader)
+    return registry
+
+
+class TestModelRegistry:
+    """Test cases for ModelRegistry."""
+
+    def test_same_key_is_loaded_once_and_shared(self, registry, loads):
+        first = registry.acquire("whisper", "base")
+        second = registry.acquire("whisper", "base")
+
+        assert first is second
+        assert loads == [("base", "cpu", "float32")]
+        assert registry.resident()[0]["refcount"] == 2
+
+    def test_device_and_compute_type_are_part_of_the_key(self, registry, loads):
+        cpu = registry.acquire("whisper", "base")
+        gpu = registry.acquire("whisper", "base", device="cuda", compute_type="float16")
+
+        assert cpu is not gpu
+        assert len(loads) == 2
+
+    def test_last_release_unloads(self, registry, loads):
+        registry.acquire("whisper", "base")
+        registry.acquire("whisper", "base")
+        registry.release("whisper", "base")
+        assert len(registry.resident()) == 1
+
+        registry.release("whisper", "base")
+        assert registry.resident() == []
+
+        registry.acquire("whisper", "base")
+        assert len(loads) == 2
+
+    def test_lease_releases_on_exit(self, registry):
+        with registry.lease("whisper", "base") as model:
+            assert isinstance(model, FakeModel)
+        assert registry.resident() == []
+
+    def test_preloaded_models_stay_resident(self, registry, loads):
+        loaded = registry.preload(["whisper:base", "whisper:broken", "unknown:model"])
+
+        assert loaded == [ModelKey("whisper", "base")]
+        registry.acquire("whisper", "base")
+        registry.release("whisper", "base")
+
+        resident = registry.resident()
+        assert [(entry["name"], entry["pinned"]) for entry in resident] == [("base", True)]
+        assert loads.count(("base", "cpu", "float32")) == 1
+
+    def test_failed_load_does_not_leave_an_entry(self, registry):
+        with pytest.raises(RuntimeError):
+            registry.acquire("whisper", "broken")
+        with pytest.raises(KeyError):
+            registry.acquire("pyannote", "pipeline")
+
+        assert registry.resident() == []
+        assert registry._entries == {}
+
+    def test_concurrent_first_use_loads_once(self, loads):
+        registry = ModelRegistry()
+
+        def slow_loader(name, device, compute_type):
+            loads.append(name)
+            time.sleep(0.05)
+            return FakeModel(name, device, compute_type)
+
+        registry.register_loader("whisper", slow_loader)
+        models = []
+        threads = [
+            threading.Thread(target=lambda: models.append(registry.acquire("whisper", "small")))
+            for _ in range(8)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert loads == ["small"]
+        assert len({id(model) for model in models}) == 1
+        assert registry.resident()[0]["refcount"] == 8
+
+    def test_model_spec_parsing(self):
+        assert ModelKey.parse("whisper:base") == ModelKey("whisper", "base", "cpu", "float32")
+        assert ModelKey.parse("whisper:large:cuda:float16") == ModelKey("whisper", "large", "cuda", "float16")
+        with pytest.raises(ValueError):
+            ModelKey.parse("whisper")
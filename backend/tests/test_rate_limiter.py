@@ -0,0 +1,164 @@
+"""
+Unit tests for the shared GCRA rate limiter.
+"""
+import sys
+from pathlib import Path
+
+import pytest
+import redis.asyncio as redis
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+# Add the project root to the Python path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.security.rate_limiter import (
+    LocalBuckets,
+    RateLimit,
+    RateLimiter,
+    RateLimitMiddleware,
+    RateLimitPolicies,
+)
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+class FakeScriptRedis:
+    """Runs the GCRA script through LocalBuckets, recording each call as one round trip."""
+
+    def __init__(self, fail=False):
+        self.fail = fail
+        self.calls = []
+        self.buckets = LocalBuckets()
+
+    def register_script(self, script):
+        async def run(keys, args):
+            self.calls.append((keys, args))
+            if self.fail:
+                raise redis.ConnectionError("connection refused")
+            limit, period_ms, cost = args
+            result = self.buckets.hit(keys[0], RateLimit(limit, period_ms / 1000), cost)
+            return [int(result.allowed), result.remaining, int(result.reset * 1000), int(result.retry_after * 1000)]
+        return run
+
+
+class TestRateLimit:
+    """Test cases for limit parsing and policy resolution."""
+
+    def test_parse(self):
+        assert RateLimit.parse("100/minute") == RateLimit(100, 60)
+        assert RateLimit.parse("20/hour") == RateLimit(20, 3600)
+        assert RateLimit.parse("100 per 3600 seconds") == RateLimit(100, 3600)
+        assert RateLimit.parse(30) == RateLimit(30, 60)
+        with pytest.raises(ValueError):
+            RateLimit.parse("lots")
+
+    def test_routes_then_tiers(self):
+        policies = RateLimitPolicies(
+            "100/minute",
+            routes={"/api/v1/": "50/minute", "/api/v1/auth/": "20/hour",
+                    "/api/v1/ai/": {"pro": "1000/minute", "default": "10/minute"}},
+            tiers={"free": "30/minute"}
+        )
+
+        assert policies.resolve("/api/v1/auth/login") == ("/api/v1/auth/", RateLimit(20, 3600))
+        assert policies.resolve("/api/v1/ai/chat", "Pro") == ("/api/v1/ai/", RateLimit(1000, 60))
+        assert policies.resolve("/api/v1/ai/chat", "free") == ("/api/v1/ai/", RateLimit(10, 60))
+        assert policies.resolve("/health", "free") == ("*", RateLimit(30, 60))
+        assert policies.resolve("/health") == ("*", RateLimit(100, 60))
+
+
+class TestLocalBuckets:
+    """Test cases for the in-process GCRA."""
+
+    def test_burst_then_steady_rate(self):
+        clock = FakeClock()
+        buckets = LocalBuckets(clock=clock)
+        policy = RateLimit(5, 10)
+
+        results = [buckets.hit("k", policy) for _ in range(6)]
+        assert [r.allowed for r in results] == [True] * 5 + [False]
+        assert [r.remaining for r in results[:5]] == [4, 3, 2, 1, 0]
+        assert results[-1].retry_after == pytest.approx(2.0)
+
+        # One token refills every period / limit seconds
+        clock.now += 2.0
+        assert buckets.hit("k", policy).allowed
+        assert not buckets.hit("k", policy).allowed
+
+    def test_cost_and_key_bound(self):
+        buckets = LocalBuckets(max_keys=2, clock=FakeClock())
+        policy = RateLimit(10, 60)
+
+        assert buckets.hit("a", policy, cost=8).remaining == 2
+        assert not buckets.hit("a", policy, cost=3).allowed
+        buckets.hit("b", policy)
+        buckets.hit("c", policy)
+        assert "a" not in buckets._tats
+
+
+class TestRateLimiter:
+    """Test cases for the Redis-backed limiter."""
+
+    @pytest.mark.asyncio
+    async def test_one_script_call_per_check(self):
+        client = FakeScriptRedis()
+        limiter = RateLimiter(client)
+
+        results = [await limiter.hit("user-1", "3/minute") for _ in range(4)]
+
+        assert [r.allowed for r in results] == [True, True, True, False]
+        assert len(client.calls) == 4
+        assert client.calls[0] == (["rate_limit:user-1"], [3, 60000, 1])
+        assert results[-1].headers()["Retry-After"] == "20"
+
+    @pytest.mark.asyncio
+    async def test_falls_back_to_local_buckets(self):
+        client = FakeScriptRedis(fail=True)
+        limiter = RateLimiter(client, retry_interval=60)
+
+        results = [await limiter.hit("user-1", 2, 60) for _ in range(3)]
+
+        assert [r.allowed for r in results] == [True, True, False]
+        # Redis is not retried until the retry interval has passed
+        assert len(client.calls) == 1
+
+    @pytest.mark.asyncio
+    async def test_is_rate_limited(self):
+        limiter = RateLimiter()
+
+        assert not await limiter.is_rate_limited("ip", limit=1, window=60)
+        assert await limiter.is_rate_limited("ip", limit=1, window=60)
+
+
+class TestRateLimitMiddleware:
+    """Test cases for the HTTP middleware."""
+
+    def test_headers_and_429(self):
+        app = FastAPI()
+        app.middleware("http")(RateLimitMiddleware(
+            RateLimitPolicies("100/minute", routes={"/upload": "2/minute"}),
+            limiter=RateLimiter()
+        ))
+
+        @app.get("/upload")
+        async def upload():
+            return {"ok": True}
+
+        client = TestClient(app)
+        first = client.get("/upload")
+        client.get("/upload")
+        blocked = client.get("/upload")
+
+        assert first.status_code == 200
+        assert first.headers["X-RateLimit-Limit"] == "2"
+        assert first.headers["RateLimit-Remaining"] == "1"
+        assert blocked.status_code == 429
+        assert blocked.headers["Retry-After"] == "30"
+        assert blocked.json()["limit"] == 2
@@ -0,0 +1,114 @@
+"""
+Unit tests for the full-text search index (SQLite FTS5 backend).
+"""
+import sys
+from pathlib import Path
+
+import pytest
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import Session
+
+# Add the project root to the Python path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.services.search_index import fts5_query, install_search_index, search_sync
+
+
+@pytest.fixture
+def db(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'search.db'}")
+    with engine.begin() as conn:
+        conn.exec_driver_sql(
+            "CREATE TABLE sessions (session_id TEXT PRIMARY KEY, module_code TEXT, chapters TEXT,"
+            " detail_level TEXT, lecture_content TEXT, textbook_content TEXT, fused_notes TEXT,"
+            " created_at TIMESTAMP, updated_at TIMESTAMP)"
+        )
+        conn.exec_driver_sql(
+            "CREATE TABLE user_tasks (id TEXT PRIMARY KEY, user_id TEXT, title TEXT, description TEXT)"
+        )
+        # Written before the index exists: must be backfilled
+        conn.exec_driver_sql(
+            "INSERT INTO sessions (session_id, module_code, chapters, lecture_content, textbook_content, fused_notes)"
+            " VALUES ('s1', 'PHYS101', 'Mechanics', 'Newton''s second law relates force and acceleration.', '', '{}')"
+        )
+    with engine.begin() as conn:
+        install_search_index(conn)
+    with Session(engine) as session:
+        yield session
+
+
+def _add_session(db, session_id, module_code, lecture):
+    # Same upsert statement the sessions model uses
+    db.execute(
+        text(
+            "INSERT OR REPLACE INTO sessions (session_id, module_code, chapters, lecture_content,"
+            " textbook_content, fused_notes) VALUES (:id, :module, '', :lecture, '', '{}')"
+        ),
+        {"id": session_id, "module": module_code, "lecture": lecture},
+    )
+    db.commit()
+
+
+class TestFts5Query:
+    """Test cases for fts5_query."""
+
+    def test_operators_are_quoted(self):
+        assert fts5_query('force AND "mass" -(accel') == '"force" "AND" "mass" "accel"*'
+
+    def test_empty_query(self):
+        assert fts5_query("  ?! ") == ""
+
+
+class TestSearchIndex:
+    """Test cases for search_sync on SQLite."""
+
+    def test_backfilled_rows_are_found_with_highlights(self, db):
+        hits, total = search_sync(db, "acceleration")
+
+        assert total == 1
+        assert hits[0].doc_type == "session" and hits[0].doc_id == "s1"
+        assert "<mark>acceleration</mark>" in hits[0].snippet
+
+    def test_inserts_updates_and_deletes_are_indexed(self, db):
+        _add_session(db, "s2", "CHEM200", "Entropy always increases in an isolated system.")
+        assert search_sync(db, "entropy")[1] == 1
+
+        # INSERT OR REPLACE rewrites the row: the old text must leave the index
+        _add_session(db, "s2", "CHEM200", "Enthalpy of formation.")
+        assert search_sync(db, "entropy")[1] == 0
+        assert [hit.doc_id for hit in search_sync(db, "enthalpy")[0]] == ["s2"]
+
+        db.execute(text("DELETE FROM sessions WHERE session_id = 's2'"))
+        db.commit()
+        assert search_sync(db, "enthalpy")[1] == 0
+
+    def test_stemming_prefix_and_ranking(self, db):
+        _add_session(db, "s2", "PHYS102", "Forces: a force on a body changes its momentum. Force balance.")
+        _add_session(db, "s3", "HIST100", "The armed forces of Rome.")
+
+        hits, total = search_sync(db, "forc")
+
+        assert total == 3
+        # The session about forces ranks above a passing mention
+        assert hits[0].doc_id == "s2"
+
+    def test_filters_and_pagination(self, db):
+        for i in range(5):
+            _add_session(db, f"p{i}", "MATH", f"Integral number {i} of a polynomial.")
+        db.execute(
+            text(
+                "INSERT INTO user_tasks (id, user_id, title, description)"
+                " VALUES ('t1', 'u1', 'Polynomial homework', 'Due Friday'),"
+                " ('t2', 'u2', 'Polynomial quiz', '')"
+            )
+        )
+        db.commit()
+
+        first, total = search_sync(db, "polynomial", doc_type="session", limit=2)
+        second, _ = search_sync(db, "polynomial", doc_type="session", limit=2, offset=2)
+        tasks, task_total = search_sync(db, "polynomial", doc_type="task", owner_id="u1")
+
+        assert total == 5 and len(first) == 2 and len(second) == 2
+        assert not {hit.doc_id for hit in first} & {hit.doc_id for hit in second}
+        assert task_total == 1 and tasks[0].doc_id == "t1"
+        assert tasks[0].title == "Polynomial homework"
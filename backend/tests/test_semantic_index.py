@@ -0,0 +1,144 @@
+"""
+Unit tests for the semantic segment index.
+"""
+import random
+import sys
+import threading
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+# Add the project root to the Python path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.services.semantic_index import (
+    HashingEmbedder,
+    SemanticIndex,
+    Segment,
+    note_segments,
+    transcript_segments,
+)
+
+NOTES = {
+    "sections": [
+        {"title": "Newton's laws", "start_time": "00:01:10",
+         "content": "Force equals mass times acceleration. Every action has an equal and opposite reaction."},
+        {"title": "Energy", "content": ["Kinetic energy is one half m v squared.", "Energy is conserved."]},
+        {"title": "Empty", "content": ""},
+    ]
+}
+
+TRANSCRIPT = [
+    {"start": 0.0, "end": 4.0, "text": "Today we look at entropy."},
+    {"start": 4.0, "end": 9.0, "text": "Entropy measures the number of microstates."},
+    {"start": 65.0, "end": 70.0, "text": "Next, the Carnot cycle and heat engines."},
+]
+
+
+@pytest.fixture
+def index(tmp_path):
+    return SemanticIndex(str(tmp_path / "index"), embedder=HashingEmbedder(256), train_size=10_000)
+
+
+class TestSegments:
+    """Test cases for building segments from notes and transcripts."""
+
+    def test_note_sections(self):
+        segments = note_segments("fusion-1", NOTES)
+
+        assert [s.title for s in segments] == ["Newton's laws", "Energy"]
+        assert segments[0].start_time == "00:01:10"
+        assert "Energy is conserved." in segments[1].text
+
+    def test_transcript_windows(self):
+        segments = transcript_segments("lecture-1", TRANSCRIPT, window_chars=60)
+
+        assert [s.start_time for s in segments] == ["00:00:00", "00:01:05"]
+        assert segments[0].text.startswith("Today we look at entropy. Entropy measures")
+
+
+class TestSemanticIndex:
+    """Test cases for SemanticIndex."""
+
+    def test_finds_the_explaining_segment(self, index):
+        index.add(note_segments("fusion-1", NOTES) + transcript_segments("lecture-1", TRANSCRIPT, 60))
+
+        hits = index.search("where was acceleration and force explained", k=3)
+
+        assert hits[0].doc_id == "fusion-1" and hits[0].title == "Newton's laws"
+        assert hits[0].score > hits[-1].score
+        assert [h.kind for h in index.search("entropy", kind="transcript")] == ["transcript", "transcript"]
+        assert {h.doc_id for h in index.search("entropy", doc_id="fusion-1")} == {"fusion-1"}
+
+    def test_delete_and_replace(self, index):
+        index.add(note_segments("fusion-1", NOTES))
+        index.add(transcript_segments("lecture-1", TRANSCRIPT, 60))
+
+        assert index.delete("lecture-1") == 2
+        assert all(h.doc_id != "lecture-1" for h in index.search("entropy microstates"))
+
+        index.replace("fusion-1", "section", [Segment("fusion-1", "section", "Maxwell's equations", "EM")])
+        hits = index.search("maxwell equations")
+        assert index.size == 1 and hits[0].title == "EM"
+
+    def test_search_runs_while_a_replace_is_embedding(self, tmp_path):
+        class SlowEmbedder(HashingEmbedder):
+            """Blocks embedding the replacement text until released."""
+            started, release = threading.Event(), threading.Event()
+
+            def embed(self, texts):
+                if any("Maxwell" in text for text in texts):
+                    self.started.set()
+                    self.release.wait(5)
+                return super().embed(texts)
+
+        index = SemanticIndex(str(tmp_path / "index"), embedder=SlowEmbedder(256))
+        index.add(note_segments("fusion-1", NOTES))
+        replacing = threading.Thread(target=index.replace, args=(
+            "fusion-1", "section", [Segment("fusion-1", "section", "Maxwell's equations", "EM")]
+        ))
+        replacing.start()
+        assert SlowEmbedder.started.wait(5)
+
+        # The old sections stay searchable until the new ones are swapped in
+        assert index.search("kinetic energy")[0].title == "Energy"
+        SlowEmbedder.release.set()
+        replacing.join()
+        assert index.search("maxwell equations")[0].title == "EM"
+
+    def test_reopen_from_disk(self, index, tmp_path):
+        index.add(note_segments("fusion-1", NOTES))
+        reopened = SemanticIndex(str(tmp_path / "index"), embedder=HashingEmbedder(256))
+
+        assert reopened.size == 2
+        assert reopened.search("kinetic energy")[0].title == "Energy"
+        with pytest.raises(ValueError):
+            SemanticIndex(str(tmp_path / "index"), embedder=HashingEmbedder(128))
+
+    def test_ivf_matches_exact_search_when_probing_every_list(self, tmp_path):
+        rng = random.Random(0)
+        words = [f"w{i}" for i in range(400)]
+        segments = [
+            Segment(f"doc-{i}", "section", " ".join(rng.choice(words) for _ in range(12)))
+            for i in range(600)
+        ]
+        exact = SemanticIndex(str(tmp_path / "exact"), embedder=HashingEmbedder(64), train_size=10_000)
+        ivf = SemanticIndex(str(tmp_path / "ivf"), embedder=HashingEmbedder(64), train_size=500)
+        exact.add(segments)
+        ivf.add(segments[:500])
+        ivf.add(segments[500:])  # assigned to the trained lists
+
+        nlist = ivf.stats()["nlist"]
+        assert nlist and exact.stats()["nlist"] is None
+        for query in ("w1 w2 w3", "w17 w300", segments[550].text):
+            expected = [h.doc_id for h in exact.search(query, k=5)]
+            assert [h.doc_id for h in ivf.search(query, k=5, nprobe=nlist)] == expected
+        assert ivf.search(segments[550].text, k=1)[0].doc_id == "doc-550"
+
+    def test_hashing_embedder_is_deterministic(self):
+        a = HashingEmbedder(128).embed(["heat engines"])
+        b = HashingEmbedder(128).embed(["heat engines"])
+
+        assert np.array_equal(a, b)
+        assert np.isclose(np.linalg.norm(a), 1.0)
@@ -0,0 +1,61 @@
+"""
+Unit tests for the encoded slide segment cache.
+"""
+import os
+import sys
+from pathlib import Path
+
+# Add the project root to the Python path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.services.video.segment_cache import SlideSegmentCache
+
+
+def _segment(tmp_path, name, size):
+    path = tmp_path / name
+    path.write_bytes(b"x" * size)
+    return path
+
+
+class TestSlideSegmentCache:
+    """Test cases for SlideSegmentCache."""
+
+    def test_get_places_a_copy_that_outlives_eviction(self, tmp_path):
+        cache = SlideSegmentCache(str(tmp_path / "cache"), max_bytes=1000)
+        cache.put("a", _segment(tmp_path, "a.mp4", 600))
+
+        dest = tmp_path / "render_a.mp4"
+        assert cache.get("a", dest)
+        cache.put("b", _segment(tmp_path, "b.mp4", 600))
+
+        assert dest.read_bytes() == b"x" * 600
+        assert not cache.get("a", tmp_path / "again.mp4")
+
+    def test_least_recently_used_is_evicted_first(self, tmp_path):
+        cache = SlideSegmentCache(str(tmp_path / "cache"), max_bytes=1000)
+        for key in "abc":
+            cache.put(key, _segment(tmp_path, f"{key}.mp4", 300))
+        cache.get("a", tmp_path / "hit.mp4")
+
+        cache.put("d", _segment(tmp_path, "d.mp4", 300))
+
+        assert cache.get("a", tmp_path / "a2.mp4")
+        assert not cache.get("b", tmp_path / "b2.mp4")
+        assert cache.stats()["evictions"] == 1 and cache.stats()["bytes"] == 900
+
+    def test_entries_survive_restart(self, tmp_path):
+        SlideSegmentCache(str(tmp_path / "cache")).put("a", _segment(tmp_path, "a.mp4", 10))
+
+        reopened = SlideSegmentCache(str(tmp_path / "cache"))
+
+        assert reopened.stats()["entries"] == 1
+        assert reopened.get("a", tmp_path / "out.mp4")
+        assert not any(name.endswith(".tmp") for name in os.listdir(tmp_path / "cache"))
+
+    def test_key_depends_on_every_input(self):
+        key = SlideSegmentCache.make_key("text", ["color=c=red"], ["-preset", "veryfast"])
+
+        assert key == SlideSegmentCache.make_key("text", ["color=c=red"], ["-preset", "veryfast"])
+        assert key != SlideSegmentCache.make_key("text!", ["color=c=red"], ["-preset", "veryfast"])
+        assert key != SlideSegmentCache.make_key("text", ["color=c=blue"], ["-preset", "veryfast"])
+        assert key != SlideSegmentCache.make_key("text", ["color=c=red"], ["-preset", "medium"])
@@ -0,0 +1,118 @@
+"""
+Unit tests for the vectorized SM-2 scheduler.
+"""
+import sys
+from datetime import date, datetime, timedelta, timezone
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+# Add the project root to the Python path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.services.spaced_repetition import apply_review_session, simulate_workload, sm2_step
+
+
+def reference_step(ease_factor, interval, review_count, quality):
+    """Flashcard.update_spaced_repetition for a single card."""
+    ef = ease_factor / 100
+    if quality >= 3:
+        if review_count == 0:
+            interval = 1
+        elif review_count == 1:
+            interval = 6
+        else:
+            interval = int(round(interval * ef))
+        ef = max(1.3, min(ef + (0.1 - (5 - quality) * (0.08 + (5 - quality) * 0.02)), 2.5))
+        ease_factor = int(ef * 100)
+    else:
+        interval = 1
+    return ease_factor, interval, review_count + 1
+
+
+class TestSM2Step:
+    """Test cases for sm2_step."""
+
+    def test_matches_the_scalar_algorithm(self):
+        rng = np.random.default_rng(1)
+        ease = rng.integers(130, 251, 500)
+        interval = rng.integers(1, 200, 500)
+        count = rng.integers(0, 10, 500)
+        quality = rng.integers(0, 6, 500)
+
+        step = sm2_step(ease, interval, count, quality)
+
+        expected = [reference_step(*map(int, card)) for card in zip(ease, interval, count, quality)]
+        assert list(zip(step.ease_factor.tolist(), step.interval.tolist(), step.review_count.tolist())) == expected
+
+    def test_rejects_out_of_range_quality(self):
+        with pytest.raises(ValueError):
+            sm2_step([250], [1], [0], [6])
+
+
+class TestApplyReviewSession:
+    """Test cases for apply_review_session."""
+
+    def test_repeated_reviews_are_replayed_in_time_order(self):
+        t0 = datetime(2024, 1, 1, 9)
+        cards = {
+            "a": {"ease_factor": 250, "interval": 1, "review_count": 0},
+            "b": {"ease_factor": 200, "interval": 10, "review_count": 4},
+        }
+        reviews = [
+            {"card_id": "a", "quality": 5, "reviewed_at": t0 + timedelta(minutes=10)},
+            {"card_id": "a", "quality": 4, "reviewed_at": t0},
+            {"card_id": "b", "quality": 1, "reviewed_at": t0},
+            {"card_id": "missing", "quality": 5, "reviewed_at": t0},
+        ]
+
+        result = apply_review_session(cards, reviews)
+
+        # a: first review sets interval 1, second (later) review sets 6
+        assert result["a"]["interval"] == 6
+        assert result["a"]["review_count"] == 2
+        assert result["a"]["last_reviewed"] == t0 + timedelta(minutes=10)
+        assert result["a"]["due_date"] == t0 + timedelta(minutes=10, days=6)
+        assert result["b"]["interval"] == 1 and result["b"]["ease_factor"] == 200
+        assert "missing" not in result
+
+
+    def test_aware_and_naive_times_are_compared_as_utc(self):
+        t0 = datetime(2024, 1, 1, 9)
+        cards = {"a": {"ease_factor": 250, "interval": 1, "review_count": 0}}
+        # 09:30+02:00 is 07:30 UTC, before the naive 09:00
+        early = datetime(2024, 1, 1, 9, 30, tzinfo=timezone(timedelta(hours=2)))
+        reviews = [
+            {"card_id": "a", "quality": 1, "reviewed_at": t0},
+            {"card_id": "a", "quality": 5, "reviewed_at": early},
+        ]
+
+        result = apply_review_session(cards, reviews)
+
+        assert result["a"]["interval"] == 1
+        assert result["a"]["last_reviewed"] == t0
+        assert result["a"]["due_date"].tzinfo is None
+
+
+class TestSimulateWorkload:
+    """Test cases for simulate_workload."""
+
+    def test_forecast_counts_each_review(self):
+        start = date(2024, 1, 1)
+        due = [datetime(2023, 12, 20), datetime(2024, 1, 1), datetime(2024, 1, 3)]
+
+        forecast = simulate_workload([250] * 3, [1] * 3, [0] * 3, due, days=10, retention=1.0, start=start)
+
+        # Overdue and today's cards land on day 0, then return after 1 and 6 more days
+        assert [day["due"] for day in forecast] == [2, 2, 1, 1, 0, 0, 0, 2, 0, 1]
+        assert forecast[0]["date"] == start
+
+    def test_lower_retention_means_more_reviews(self):
+        due = [datetime(2024, 1, 1)] * 200
+        args = ([250] * 200, [10] * 200, [5] * 200, due)
+
+        good = simulate_workload(*args, days=60, retention=0.95, start=date(2024, 1, 1))
+        poor = simulate_workload(*args, days=60, retention=0.5, start=date(2024, 1, 1))
+
+        assert sum(day["due"] for day in poor) > sum(day["due"] for day in good)
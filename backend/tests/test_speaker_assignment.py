@@ -0,0 +1,94 @@
+"""
+Unit tests for interval-indexed speaker assignment.
+"""
+import random
+import sys
+from pathlib import Path
+
+import pytest
+
+# Add the project root to the Python path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.services.transcription import speakers
+from app.services.transcription.speakers import assign_speakers
+
+
+def reference_merge(whisper_segments, diarization_segments):
+    """The original O(N*M) TranscriptionService._merge_diarization."""
+    merged_segments = []
+    for whisper_seg in whisper_segments:
+        max_overlap = 0
+        assigned_speaker = "Speaker 1"
+        for diar_seg in diarization_segments:
+            overlap_start = max(whisper_seg["start"], diar_seg["start"])
+            overlap_end = min(whisper_seg["end"], diar_seg["end"])
+            if overlap_end > overlap_start:
+                overlap_duration = overlap_end - overlap_start
+                if overlap_duration > max_overlap:
+                    max_overlap = overlap_duration
+                    assigned_speaker = diar_seg["speaker"]
+        segment = whisper_seg.copy()
+        segment["speaker"] = assigned_speaker
+        merged_segments.append(segment)
+    return merged_segments
+
+
+def _random_segments(rng, count, max_length, with_speaker):
+    segments = []
+    for i in range(count):
+        # Mix integer and fractional boundaries so exact ties and touching edges occur
+        start = float(rng.randint(0, 60)) if rng.random() < 0.3 else rng.uniform(0, 60)
+        length = float(rng.randint(0, 5)) if rng.random() < 0.3 else rng.uniform(0, max_length)
+        segment = {"start": start, "end": start + length}
+        if with_speaker:
+            segment["speaker"] = f"SPEAKER_{i % 3}"
+        else:
+            segment["text"] = f"segment {i}"
+        segments.append(segment)
+    return segments
+
+
+class TestAssignSpeakers:
+    """Test cases for assign_speakers."""
+
+    def test_picks_max_overlap_speaker(self):
+        whisper = [{"start": 0.0, "end": 4.0, "text": "a"}, {"start": 4.0, "end": 10.0, "text": "b"}]
+        diarization = [
+            {"start": 0.0, "end": 5.0, "speaker": "A"},
+            {"start": 5.0, "end": 10.0, "speaker": "B"},
+        ]
+
+        assert [s["speaker"] for s in assign_speakers(whisper, diarization)] == ["A", "B"]
+
+    def test_defaults_without_overlap(self):
+        whisper = [{"start": 20.0, "end": 21.0, "text": "late"}]
+        diarization = [{"start": 0.0, "end": 5.0, "speaker": "A"}]
+
+        assert assign_speakers(whisper, diarization)[0]["speaker"] == "Speaker 1"
+        assert assign_speakers(whisper, [])[0]["speaker"] == "Speaker 1"
+
+    def test_ties_go_to_first_listed_turn(self):
+        whisper = [{"start": 0.0, "end": 2.0, "text": "x"}]
+        diarization = [
+            {"start": 1.0, "end": 3.0, "speaker": "LATER_START"},
+            {"start": -1.0, "end": 1.0, "speaker": "EARLIER_START"},
+        ]
+
+        assert assign_speakers(whisper, diarization)[0]["speaker"] == "LATER_START"
+
+    def test_does_not_mutate_input(self):
+        whisper = [{"start": 0.0, "end": 1.0, "text": "x"}]
+        assign_speakers(whisper, [{"start": 0.0, "end": 1.0, "speaker": "A"}])
+
+        assert "speaker" not in whisper[0]
+
+    @pytest.mark.parametrize("max_pairs", [speakers.MAX_PAIRS_PER_BATCH, 3])
+    def test_matches_reference_on_random_inputs(self, monkeypatch, max_pairs):
+        monkeypatch.setattr(speakers, "MAX_PAIRS_PER_BATCH", max_pairs)
+        rng = random.Random(1234)
+        for _ in range(200):
+            whisper = _random_segments(rng, rng.randint(0, 40), 8, with_speaker=False)
+            diarization = _random_segments(rng, rng.randint(0, 40), 25, with_speaker=True)
+
+            assert assign_speakers(whisper, diarization) == reference_merge(whisper, diarization)
@@ -0,0 +1,165 @@
+"""
+Unit tests for live streaming transcription sessions.
+"""
+import asyncio
+import sys
+from pathlib import Path
+
+import numpy as np
+import pytest
+from fastapi import FastAPI, WebSocket
+from fastapi.testclient import TestClient
+
+# Add the project root to the Python path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.services.transcription.streaming import StreamingSession
+from app.websocket import transcription_stream_endpoint
+
+SAMPLE_RATE = 16000
+
+
+def _pcm(*parts):
+    """Build s16le PCM from (seconds, amplitude) parts; amplitude 0 is silence."""
+    rng = np.random.default_rng(0)
+    audio = []
+    for seconds, amplitude in parts:
+        n = int(seconds * SAMPLE_RATE)
+        if amplitude:
+            audio.append(amplitude * np.sin(np.arange(n) * 2 * np.pi * 220 / SAMPLE_RATE))
+        else:
+            audio.append(rng.normal(0, 0.001, n))
+    return (np.concatenate(audio) * 32767).astype("<i2").tobytes()
+
+
+class Recorder:
+    def __init__(self):
+        self.messages = []
+        self.decoded = []
+        self.prompts = []
+
+    def transcribe(self, samples, initial_prompt):
+        self.decoded.append(len(samples))
+        self.prompts.append(initial_prompt)
+        seconds = len(samples) / SAMPLE_RATE
+        return {"text": f" {seconds:.2f}s", "segments": [{"start": 0.0, "end": seconds, "text": "x"}]}
+
+    async def emit(self, message):
+        self.messages.append(message)
+
+    def of_type(self, message_type):
+        return [m["payload"] for m in self.messages if m["type"] == message_type]
+
+
+async def _stream(session, pcm, frame_bytes=3200):
+    worker = asyncio.create_task(session.run())
+    for i in range(0, len(pcm), frame_bytes):
+        await session.push(pcm[i:i + frame_bytes])
+        # Let the session keep up, as it would between network frames
+        await asyncio.sleep(0)
+    await session.close()
+    await worker
+
+
+class TestStreamingSession:
+    """Test cases for StreamingSession."""
+
+    @pytest.mark.asyncio
+    async def test_emits_partials_then_final_with_stream_timestamps(self):
+        recorder = Recorder()
+        session = StreamingSession(recorder.transcribe, recorder.emit, session_id="s1")
+
+        await _stream(session, _pcm((1.0, 0), (2.0, 0.3), (1.0, 0)))
+
+        partials = recorder.of_type("transcription.partial")
+        finals = recorder.of_type("transcription.final")
+        assert len(partials) >= 2
+        assert len(finals) == 1
+        final = finals[0]
+        # Speech starts at 1.0 s; the utterance keeps 0.2 s of pre-roll
+        assert final["start"] == pytest.approx(0.8, abs=0.05)
+        assert final["end"] == pytest.approx(3.0, abs=0.1)
+        assert final["segments"][0]["start"] == final["start"]
+        assert {p["utterance_id"] for p in partials} == {final["utterance_id"]}
+        assert all(p["start"] == final["start"] for p in partials)
+        assert all(m["payload"]["session_id"] == "s1" for m in recorder.messages)
+
+    @pytest.mark.asyncio
+    async def test_previous_finals_become_the_prompt(self):
+        recorder = Recorder()
+        session = StreamingSession(recorder.transcribe, recorder.emit, partial_interval=60)
+
+        await _stream(session, _pcm((0.5, 0), (1.0, 0.3), (1.0, 0), (1.0, 0.3), (1.0, 0)))
+
+        finals = recorder.of_type("transcription.final")
+        assert [f["utterance_id"] for f in finals] == [1, 2]
+        assert recorder.prompts[0] is None
+        assert finals[0]["text"] in recorder.prompts[1]
+        assert finals[1]["start"] > finals[0]["end"]
+
+    @pytest.mark.asyncio
+    async def test_long_speech_is_cut_at_max_utterance(self):
+        recorder = Recorder()
+        session = StreamingSession(recorder.transcribe, recorder.emit, max_utterance=1.0, partial_interval=60)
+
+        await _stream(session, _pcm((3.0, 0.3)))
+
+        finals = recorder.of_type("transcription.final")
+        assert len(finals) >= 3
+        assert max(recorder.decoded) <= SAMPLE_RATE
+
+    @pytest.mark.asyncio
+    async def test_push_waits_when_buffer_is_full(self):
+        recorder = Recorder()
+        session = StreamingSession(recorder.transcribe, recorder.emit, max_pending_bytes=4000)
+
+        await session.push(b"\x00" * 3000)
+        blocked = asyncio.create_task(session.push(b"\x00" * 3000))
+        await asyncio.sleep(0.01)
+        assert not blocked.done()
+        assert recorder.of_type("transcription.backpressure") == [{"session_id": "", "pending_bytes": 3000, "max_pending_bytes": 4000}]
+
+        worker = asyncio.create_task(session.run())
+        await asyncio.wait_for(blocked, timeout=1)
+        await session.close()
+        await worker
+
+        with pytest.raises(ValueError):
+            await session.push(b"\x00" * 5000)
+
+    @pytest.mark.asyncio
+    async def test_decode_failure_stops_session(self):
+        recorder = Recorder()
+
+        def broken(samples, initial_prompt):
+            raise RuntimeError("Whisper model not available")
+
+        session = StreamingSession(broken, recorder.emit)
+        worker = asyncio.create_task(session.run())
+        await session.push(_pcm((1.0, 0.3)))
+        await asyncio.wait_for(worker, timeout=1)
+
+        assert recorder.of_type("transcription.error")[0]["error"] == "Whisper model not available"
+        with pytest.raises(RuntimeError):
+            await session.push(b"\x00\x00")
+
+
+class TestTranscriptionStreamEndpoint:
+    """Test cases for the control messages of the streaming endpoint."""
+
+    @pytest.mark.parametrize("text", ["not json", "[1, 2]", "\"stop\"", "null"])
+    def test_rejects_control_messages_that_are_not_objects(self, text):
+        app = FastAPI()
+
+        @app.websocket("/stream")
+        async def stream(websocket: WebSocket):
+            await transcription_stream_endpoint(websocket, "client-1", "user-1", Recorder().transcribe)
+
+        with TestClient(app).websocket_connect("/stream") as websocket:
+            assert websocket.receive_json()["type"] == "transcription.ready"
+            websocket.send_text(text)
+            assert websocket.receive_json() == {"type": "error", "payload": {"error": "Invalid JSON format"}}
+            websocket.send_text('{"type": "ping"}')
+            assert websocket.receive_json() == {"type": "pong"}
+            websocket.send_text('{"type": "stop"}')
+            assert websocket.receive_json()["type"] == "transcription.stopped"
@@ -0,0 +1,93 @@
+"""
+Unit tests for the content-addressed transcription cache.
+"""
+import sys
+from pathlib import Path
+
+import pytest
+
+# Add the project root to the Python path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.services.transcription.cache import TranscriptionCache, hash_audio_file
+
+RESULT = {"text": "hello world", "segments": [{"start": 0.0, "end": 1.0, "text": "hello world"}]}
+
+
+@pytest.fixture
+def cache(tmp_path):
+    cache = TranscriptionCache(db_path=str(tmp_path / "cache.sqlite3"))
+    yield cache
+    cache.close()
+
+
+class TestTranscriptionCache:
+    """Test cases for TranscriptionCache."""
+
+    def test_same_content_under_new_name_hits(self, cache, tmp_path):
+        first = tmp_path / "lecture.mp3"
+        second = tmp_path / "lecture (1).mp3"
+        first.write_bytes(b"audio bytes")
+        second.write_bytes(b"audio bytes")
+
+        cache.set(cache.make_key(hash_audio_file(str(first)), "base"), RESULT)
+
+        assert cache.get(cache.make_key(hash_audio_file(str(second)), "base")) == RESULT
+
+    def test_options_are_part_of_the_key(self, cache):
+        cache.set(cache.make_key("abc", "base", language="en"), RESULT)
+
+        assert cache.get(cache.make_key("abc", "small", language="en")) is None
+        assert cache.get(cache.make_key("abc", "base", language="fr")) is None
+        assert cache.get(cache.make_key("abc", "base", language="en", diarize=True)) is None
+
+    def test_survives_restart(self, tmp_path):
+        db_path = str(tmp_path / "cache.sqlite3")
+        cache = TranscriptionCache(db_path=db_path)
+        cache.set("key", RESULT)
+        cache.close()
+
+        reopened = TranscriptionCache(db_path=db_path)
+        try:
+            assert reopened.get("key") == RESULT
+            assert reopened.stats()["disk_hits"] == 1
+        finally:
+            reopened.close()
+
+    def test_memory_tier_respects_byte_budget(self, tmp_path):
+        cache = TranscriptionCache(db_path=str(tmp_path / "cache.sqlite3"), memory_budget_bytes=200)
+        try:
+            for i in range(5):
+                cache.set(f"key-{i}", {"text": "x" * 50, "i": i})
+
+            stats = cache.stats()
+            assert stats["memory_bytes"] <= 200
+            assert stats["memory_evictions"] > 0
+            # Evicted from memory, still served from disk
+            assert cache.get("key-0") == {"text": "x" * 50, "i": 0}
+        finally:
+            cache.close()
+
+    def test_disk_tier_evicts_least_recently_used(self, tmp_path):
+        cache = TranscriptionCache(
+            db_path=str(tmp_path / "cache.sqlite3"), memory_budget_bytes=0, disk_budget_bytes=150
+        )
+        try:
+            cache.set("old", {"text": "a" * 60})
+            cache.set("new", {"text": "b" * 60})
+            cache.set("newest", {"text": "c" * 60})
+
+            assert cache.get("old") is None
+            assert cache.get("newest") == {"text": "c" * 60}
+        finally:
+            cache.close()
+
+    def test_tracks_hits_and_misses(self, cache):
+        cache.set("key", RESULT)
+        cache.get("key")
+        cache.get("missing")
+
+        stats = cache.stats()
+        assert stats["memory_hits"] == 1
+        assert stats["misses"] == 1
+        assert stats["hit_rate"] == 0.5
@@ -0,0 +1,122 @@
+"""
+Unit tests for the staged transcription pipeline.
+"""
+import sys
+from pathlib import Path
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+
+# Add the project root to the Python path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.services.transcription.pipeline import (
+    STAGE_ENRICHMENT,
+    STAGE_MEDIA,
+    STAGE_TRANSCRIPTION,
+    TranscriptionPipeline,
+)
+
+
+class FakeRedis:
+    """Just enough of the redis.asyncio hash API for the pipeline."""
+
+    def __init__(self):
+        self.hashes = {}
+
+    async def hset(self, key, mapping):
+        self.hashes.setdefault(key, {}).update(mapping)
+
+    async def hget(self, key, field):
+        return self.hashes.get(key, {}).get(field)
+
+    async def hgetall(self, key):
+        return dict(self.hashes.get(key, {}))
+
+    async def expire(self, key, ttl):
+        return True
+
+
+@pytest.fixture
+def queue():
+    queue = MagicMock()
+    queue.redis = FakeRedis()
+    queue.namespace = "test"
+    queue.result_ttl = 60
+    queue.enqueued = []
+
+    async def enqueue(task):
+        queue.enqueued.append(task)
+        return task.id
+
+    queue.enqueue = enqueue
+    return queue
+
+
+@pytest.fixture
+def service():
+    service = MagicMock()
+    service.transcribe_stage = AsyncMock(return_value={"text": "hello", "segments": []})
+    service.enrichment_stage = AsyncMock(return_value={"diagrams": [], "topics": [{"title": "t"}]})
+    service.media_stage = AsyncMock(return_value={"presentation": {"slides": []}})
+    return service
+
+
+async def _run_next(queue):
+    """Run the oldest enqueued task through the handler the pipeline registered for it."""
+    task = queue.enqueued.pop(0)
+    handlers = {call.args[0]: call.args[1] for call in queue.register_handler.call_args_list}
+    return await handlers[task.name](**task.params)
+
+
+class TestTranscriptionPipeline:
+    """Test cases for TranscriptionPipeline."""
+
+    @pytest.mark.asyncio
+    async def test_stages_publish_partial_results_in_order(self, queue, service, tmp_path):
+        published = []
+
+        async def publisher(user_id, message):
+            published.append((user_id, message["type"], message["payload"]["stage"]))
+
+        pipeline = TranscriptionPipeline(service, publisher=publisher)
+        pipeline.attach(queue)
+        audio = tmp_path / "lecture.mp3"
+        audio.write_bytes(b"audio")
+
+        job_id = await pipeline.submit(str(audio), user_id="user-1", cleanup=True)
+
+        await _run_next(queue)
+        job = await pipeline.get_job(job_id)
+        assert job["status"] == "processing"
+        assert job["stage"] == STAGE_ENRICHMENT
+        assert job["results"] == {STAGE_TRANSCRIPTION: {"text": "hello", "segments": []}}
+        assert not audio.exists()
+
+        await _run_next(queue)
+        await _run_next(queue)
+
+        job = await pipeline.get_job(job_id)
+        assert job["status"] == "completed"
+        assert set(job["results"]) == {STAGE_TRANSCRIPTION, STAGE_ENRICHMENT, STAGE_MEDIA}
+        assert [stage for _, _, stage in published] == [STAGE_TRANSCRIPTION, STAGE_ENRICHMENT, STAGE_MEDIA]
+        assert all(user_id == "user-1" for user_id, _, _ in published)
+        # The media stage sees the transcript together with the enrichment output
+        enriched = service.media_stage.call_args.args[0]
+        assert enriched["text"] == "hello" and enriched["topics"] == [{"title": "t"}]
+        assert queue.enqueued == []
+
+    @pytest.mark.asyncio
+    async def test_transcription_error_fails_job_without_scheduling_more(self, queue, service):
+        service.transcribe_stage.return_value = {"error": "boom", "fallback": True, "text": ""}
+        pipeline = TranscriptionPipeline(service)
+        pipeline.attach(queue)
+
+        job_id = await pipeline.submit("missing.mp3")
+        with pytest.raises(RuntimeError):
+            await _run_next(queue)
+
+        job = await pipeline.get_job(job_id)
+        assert job["status"] == "failed"
+        assert job["error"] == "boom"
+        assert queue.enqueued == []
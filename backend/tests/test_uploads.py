@@ -0,0 +1,158 @@
+"""
+Unit tests for streamed and resumable uploads.
+"""
+import hashlib
+import io
+import os
+import sys
+import tempfile
+import tracemalloc
+from pathlib import Path
+
+import pytest
+from fastapi import HTTPException, UploadFile
+
+# Add the project root to the Python path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.services.file_upload import copy_to_path, save_upload
+from app.services.resumable_upload import ResumableUploadStore
+
+
+def _spooled(data: bytes, max_size: int) -> tempfile.SpooledTemporaryFile:
+    spool = tempfile.SpooledTemporaryFile(max_size=max_size)
+    spool.write(data)
+    spool.seek(0)
+    return spool
+
+
+async def _body(*chunks):
+    for chunk in chunks:
+        yield chunk
+
+
+class TestCopyToPath:
+    """Test cases for chunked copies."""
+
+    @pytest.mark.parametrize("max_size", [1, 1 << 30], ids=["on-disk", "in-memory"])
+    def test_copies_and_hashes(self, tmp_path, max_size):
+        data = os.urandom(300_000)
+        stored = copy_to_path(_spooled(data, max_size), tmp_path / "out", chunk_size=64 * 1024)
+
+        assert (tmp_path / "out").read_bytes() == data
+        assert stored.size == len(data)
+        assert stored.sha256 == hashlib.sha256(data).hexdigest()
+
+    @pytest.mark.parametrize("max_size", [1, 1 << 30], ids=["on-disk", "in-memory"])
+    def test_limit(self, tmp_path, max_size):
+        with pytest.raises(HTTPException) as exc:
+            copy_to_path(_spooled(b"x" * 1000, max_size), tmp_path / "out", max_bytes=999, chunk_size=100)
+
+        assert exc.value.status_code == 413
+        assert not (tmp_path / "out").exists()
+
+    def test_memory_stays_at_one_chunk(self, tmp_path):
+        spool = _spooled(os.urandom(32 * 1024 * 1024), 1)
+
+        tracemalloc.start()
+        copy_to_path(spool, tmp_path / "out", chunk_size=256 * 1024)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        assert peak < 2 * 1024 * 1024
+
+    @pytest.mark.asyncio
+    async def test_save_upload_checks_size_first(self, tmp_path):
+        upload = UploadFile(io.BytesIO(b"x" * 10), size=10, filename="a.wav")
+
+        with pytest.raises(HTTPException):
+            await save_upload(upload, tmp_path / "a.wav", max_bytes=5)
+        assert (await save_upload(upload, tmp_path / "a.wav")).size == 10
+
+
+class TestResumableUploadStore:
+    """Test cases for tus-style resumable uploads."""
+
+    @pytest.mark.asyncio
+    async def test_resume_after_interruption(self, tmp_path):
+        store = ResumableUploadStore(tmp_path)
+        upload = store.create(10, "user-1", {"filename": "lecture.m4a"})
+
+        async def interrupted():
+            yield b"0123"
+            raise ConnectionResetError()
+
+        with pytest.raises(ConnectionResetError):
+            await store.append(upload.id, 0, interrupted(), "user-1")
+        assert store.get(upload.id).offset == 4
+
+        with pytest.raises(HTTPException) as exc:
+            await store.append(upload.id, 0, _body(b"0123456789"), "user-1")
+        assert exc.value.status_code == 409
+
+        # A fresh store, as on another worker, rehashes what is already on disk
+        done = await ResumableUploadStore(tmp_path).append(upload.id, 4, _body(b"45", b"6789"), "user-1")
+        assert done.complete
+        assert done.sha256 == hashlib.sha256(b"0123456789").hexdigest()
+
+        stored = store.claim(upload.id, tmp_path / "notes" / "lecture.m4a", "user-1")
+        assert stored.path.read_bytes() == b"0123456789"
+        assert stored.sha256 == done.sha256
+        with pytest.raises(HTTPException):
+            store.get(upload.id)
+
+    @pytest.mark.asyncio
+    async def test_failed_write_does_not_reach_the_digest(self, tmp_path, monkeypatch):
+        class FullDisk:
+            def __init__(self, out):
+                self.out = out
+
+            def write(self, chunk):
+                raise OSError(28, "No space left on device")
+
+        write = ResumableUploadStore._write
+        monkeypatch.setattr(ResumableUploadStore, "_write", staticmethod(
+            lambda out, digest, chunk: write(FullDisk(out) if chunk == b"45" else out, digest, chunk)
+        ))
+        store = ResumableUploadStore(tmp_path)
+        upload = store.create(10, "user-1")
+
+        with pytest.raises(OSError):
+            await store.append(upload.id, 0, _body(b"0123", b"45"), "user-1")
+        assert store.get(upload.id).offset == 4
+
+        done = await store.append(upload.id, 4, _body(b"456789"), "user-1")
+        assert done.sha256 == hashlib.sha256(b"0123456789").hexdigest()
+
+    @pytest.mark.asyncio
+    async def test_limits_and_ownership(self, tmp_path):
+        store = ResumableUploadStore(tmp_path, max_bytes=100)
+
+        with pytest.raises(HTTPException) as exc:
+            store.create(101, "user-1")
+        assert exc.value.status_code == 413
+
+        upload = store.create(5, "user-1")
+        with pytest.raises(HTTPException) as exc:
+            await store.append(upload.id, 0, _body(b"012", b"345"), "user-1")
+        assert exc.value.status_code == 413
+        assert store.get(upload.id).offset == 3
+
+        for upload_id, user_id in [(upload.id, "user-2"), ("../" + upload.id, "user-1")]:
+            with pytest.raises(HTTPException) as exc:
+                store.get(upload_id, user_id)
+            assert exc.value.status_code == 404
+        with pytest.raises(HTTPException) as exc:
+            store.claim(upload.id, tmp_path / "out", "user-1")
+        assert exc.value.status_code == 409
+
+    def test_purge_expired(self, tmp_path):
+        store = ResumableUploadStore(tmp_path, expires_after=60)
+        old = store.create(5, "user-1")
+        new = store.create(5, "user-1")
+        for path in tmp_path.glob(f"{old.id}.*"):
+            os.utime(path, (0, 0))
+
+        assert store.purge_expired() == 1
+        assert not list(tmp_path.glob(f"{old.id}.*"))
+        assert store.get(new.id).offset == 0
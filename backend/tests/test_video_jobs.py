@@ -0,0 +1,164 @@
+"""
+Unit tests for checkpointed video generation jobs and throttled progress.
+"""
+import sys
+from pathlib import Path
+
+import pytest
+
+# Add the project root to the Python path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.models.task import TaskStatus
+from app.services.blob_store import LocalBlobStore
+from app.services.video import service as video_service
+from app.services.video.ffmpeg_service import FFmpegVideoService
+from app.services.video.progress import ThrottledProgress
+from app.services.video.service import VideoGenerationService
+
+
+class FakeTask:
+    def __init__(self, task_id):
+        self.task_id = task_id
+        self.user_id = "user-1"
+        self.status = TaskStatus.PROCESSING
+        self.result_data = {}
+
+
+class FakeTaskTable:
+    """In-memory stand-in for the task crud helpers."""
+
+    def __init__(self):
+        self.rows = {"job-1": FakeTask("job-1")}
+        self.writes = []
+
+    def get_task(self, db, task_id):
+        return self.rows.get(task_id)
+
+    def update_task_status(self, db, task_id, status, result_data=None, error_message=None):
+        self.writes.append(result_data)
+        self.rows[task_id].status = status
+        if result_data is not None:
+            self.rows[task_id].result_data = result_data
+
+
+@pytest.fixture
+def tasks(monkeypatch):
+    table = FakeTaskTable()
+    monkeypatch.setattr(video_service, "get_task", table.get_task)
+    monkeypatch.setattr(video_service, "update_task_status", table.update_task_status)
+    return table
+
+
+@pytest.fixture
+def service(tmp_path, monkeypatch):
+    monkeypatch.setattr(FFmpegVideoService, "_find_ffmpeg", lambda self: "ffmpeg")
+    monkeypatch.setattr(video_service.settings, "VIDEO_OUTPUT_DIR", str(tmp_path / "videos"), raising=False)
+    monkeypatch.setenv("VIDEO_SLIDE_CACHE_MAX_BYTES", "0")
+    return VideoGenerationService(db=None, blob_store=LocalBlobStore(tmp_path / "blobs"))
+
+
+def _encoder(encoded, fail_on=None):
+    """Stand-in for _run_ffmpeg that writes each slide's text as its "video"."""
+    def run(cmd, error_msg="", total_seconds=None, progress_callback=None):
+        output = Path(cmd[-1])
+        if "concat" in cmd:
+            parts = [line.split("'")[1] for line in Path(cmd[cmd.index("-i") + 1]).read_text().splitlines()]
+            output.write_text("|".join(Path(part).read_text() for part in parts))
+            return
+        text = Path(cmd[cmd.index("-vf") + 1].split("'")[1]).read_text()
+        if fail_on and fail_on(text):
+            raise RuntimeError(f"encode failed: {text}")
+        encoded.append(text)
+        output.write_text(text)
+    return run
+
+
+REQUEST = {
+    "script": "\n\n".join(f"Paragraph {i}" for i in range(6)),
+    "style": "professional",
+    "duration_per_slide": 2,
+    "include_narration": False,
+}
+
+
+class TestThrottledProgress:
+    """Test cases for rate-limited progress publishing."""
+
+    def test_drops_ticks_within_interval(self):
+        now = [0.0]
+        sent = []
+        progress = ThrottledProgress(sent.append, "job-1", "user-1", interval=1.0, clock=lambda: now[0])
+
+        for tick in range(10):
+            now[0] = tick * 0.1
+            progress(30 + tick, "encode")
+        now[0] = 1.2
+        progress(45, "encode")
+
+        assert [m["progress"] for m in sent] == [30, 45]
+        assert sent[0]["user_id"] == "user-1" and sent[0]["task_id"] == "job-1"
+
+    def test_stage_changes_and_completion_always_publish(self):
+        sent = []
+        progress = ThrottledProgress(sent.append, "job-1", interval=60, clock=lambda: 0.0)
+
+        progress(0, "slides")
+        progress(5, "narration")
+        progress(50, "narration")
+        progress(100, "narration")
+        progress(100, "narration")
+
+        assert [(m["stage"], m["progress"]) for m in sent] == [
+            ("slides", 0), ("narration", 5), ("narration", 100)
+        ]
+
+
+class TestResumableJob:
+    """Test cases for resuming a failed job from its checkpoint."""
+
+    def test_retry_skips_finished_stages_and_slides(self, service, tasks, monkeypatch):
+        encoded = []
+        monkeypatch.setattr(service.ffmpeg_service, "_run_ffmpeg", _encoder(encoded, lambda t: t == "Paragraph 5"))
+        with pytest.raises(RuntimeError):
+            service._process_video_generation("job-1", REQUEST, "user-1")
+
+        checkpoint = tasks.rows["job-1"].result_data["checkpoint"]
+        assert set(checkpoint) == {"slides", "narration", "encode"}
+        assert sorted(checkpoint["encode"]) == ["0", "1", "2", "3", "4"]
+
+        generated = []
+        monkeypatch.setattr(service, "_generate_slides", lambda **kwargs: generated.append(kwargs))
+        encoded.clear()
+        monkeypatch.setattr(service.ffmpeg_service, "_run_ffmpeg", _encoder(encoded))
+        result = service._process_video_generation("job-1", REQUEST, "user-1")
+
+        assert generated == [] and encoded == ["Paragraph 5"]
+        video = service.output_dir / result["video_path"]
+        assert video.read_text().split("|") == [f"Paragraph {i}" for i in range(6)]
+        assert not (service.output_dir / "work" / "job-1").exists()
+
+    def test_tampered_segment_is_re_encoded(self, service, tasks, monkeypatch):
+        encoded = []
+        monkeypatch.setattr(service.ffmpeg_service, "_run_ffmpeg", _encoder(encoded, lambda t: t == "Paragraph 5"))
+        with pytest.raises(RuntimeError):
+            service._process_video_generation("job-1", REQUEST, "user-1")
+        Path(tasks.rows["job-1"].result_data["checkpoint"]["encode"]["2"]["path"]).write_text("truncated")
+
+        encoded.clear()
+        monkeypatch.setattr(service.ffmpeg_service, "_run_ffmpeg", _encoder(encoded))
+        service._process_video_generation("job-1", REQUEST, "user-1")
+
+        assert sorted(encoded) == ["Paragraph 2", "Paragraph 5"]
+
+    def test_progress_is_not_written_per_tick(self, service, tasks, monkeypatch):
+        monkeypatch.setattr(service.ffmpeg_service, "_run_ffmpeg", _encoder([]))
+        reported = []
+
+        service._process_video_generation(
+            "job-1", REQUEST, "user-1", progress_callback=lambda p, stage: reported.append((p, stage))
+        )
+
+        assert len(reported) > len(tasks.writes)
+        assert reported[-1] == (100, "mux")
+        assert all("progress" not in write for write in tasks.writes)
@@ -0,0 +1,161 @@
+"""
+Unit tests for the micro-batching Whisper scheduler.
+"""
+import sys
+import threading
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+# Add the project root to the Python path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.services.whisper_batcher import SAMPLE_RATE, WINDOW_SAMPLES, WhisperBatcher, split_segments
+
+
+class FakeDecoder:
+    """Echo each window's marker value back as its text and record batch sizes."""
+
+    def __init__(self, fail=False):
+        self.batches = []
+        self.fail = fail
+
+    def __call__(self, mels, language):
+        if self.fail:
+            raise RuntimeError("decoder crashed")
+        self.batches.append((len(mels), language))
+        return [{"text": f" w{int(mel[0])} ", "language": language or "en"} for mel in mels]
+
+
+def _window(marker, seconds=1.0):
+    samples = np.zeros(int(seconds * SAMPLE_RATE), dtype=np.float32)
+    samples[0] = marker
+    return samples
+
+
+@pytest.fixture
+def decoder():
+    return FakeDecoder()
+
+
+@pytest.fixture
+def batcher(decoder):
+    batcher = WhisperBatcher(max_batch_size=8, max_wait_ms=200, decode_batch=decoder, featurize=lambda s: s)
+    yield batcher
+    batcher.shutdown()
+
+
+class TestWhisperBatcher:
+    """Test cases for WhisperBatcher."""
+
+    def test_concurrent_requests_share_a_batch(self, batcher, decoder):
+        results = {}
+
+        def client(marker):
+            results[marker] = batcher.transcribe(_window(marker))["text"]
+
+        threads = [threading.Thread(target=client, args=(marker,)) for marker in range(1, 9)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert results == {marker: f"w{marker}" for marker in range(1, 9)}
+        assert sum(size for size, _ in decoder.batches) == 8
+        assert len(decoder.batches) < 8
+        assert batcher.stats()["mean_batch_size"] > 1
+
+    def test_batch_size_is_capped(self, decoder):
+        batcher = WhisperBatcher(max_batch_size=3, max_wait_ms=50, decode_batch=decoder, featurize=lambda s: s)
+        futures = [batcher.submit(_window(marker)) for marker in range(1, 8)]
+        assert [future.result(timeout=5)["text"] for future in futures] == [f" w{m} " for m in range(1, 8)]
+        batcher.shutdown()
+
+        assert max(size for size, _ in decoder.batches) <= 3
+
+    def test_languages_are_decoded_separately(self, batcher, decoder):
+        futures = [
+            batcher.submit(_window(1), language="en"),
+            batcher.submit(_window(2), language="de"),
+            batcher.submit(_window(3), language="en"),
+        ]
+        results = [future.result(timeout=5) for future in futures]
+
+        assert [r["language"] for r in results] == ["en", "de", "en"]
+        assert sorted(decoder.batches) == [(1, "de"), (2, "en")]
+
+    def test_long_audio_is_split_into_windows(self, batcher):
+        samples = np.zeros(WINDOW_SAMPLES * 2 + SAMPLE_RATE * 5, dtype=np.float32)
+        samples[0], samples[WINDOW_SAMPLES], samples[2 * WINDOW_SAMPLES] = 1, 2, 3
+
+        result = batcher.transcribe(samples)
+
+        assert result["text"] == "w1 w2 w3"
+        assert [(s["start"], s["end"]) for s in result["segments"]] == [(0, 30), (30, 60), (60, 65)]
+
+    @pytest.mark.asyncio
+    async def test_async_callers(self, batcher):
+        result = await batcher.transcribe_async(_window(4))
+
+        assert result["text"] == "w4"
+
+    def test_decoder_errors_reach_every_caller(self):
+        batcher = WhisperBatcher(max_wait_ms=50, decode_batch=FakeDecoder(fail=True), featurize=lambda s: s)
+        futures = [batcher.submit(_window(marker)) for marker in (1, 2)]
+
+        for future in futures:
+            with pytest.raises(RuntimeError, match="decoder crashed"):
+                future.result(timeout=5)
+        batcher.shutdown()
+
+
+class TestSegments:
+    """Test cases for keeping Whisper's segment timestamps."""
+
+    TIMESTAMP_BEGIN = 1000
+
+    def _decode(self, tokens):
+        return "".join(f" t{token}" for token in tokens)
+
+    def test_split_on_timestamp_tokens(self):
+        # <|0.00|> 1 2 <|1.50|><|1.50|> 3 <|4.00|> 4
+        tokens = [1000, 1, 2, 1075, 1075, 3, 1200, 4]
+
+        segments = split_segments(tokens, self.TIMESTAMP_BEGIN, self._decode)
+
+        assert segments == [
+            {"start": 0.0, "end": 1.5, "text": " t1 t2"},
+            {"start": 1.5, "end": 4.0, "text": " t3"},
+            {"start": 4.0, "end": 30, "text": " t4"},
+        ]
+
+    def test_segments_are_offset_by_window(self):
+        samples = np.zeros(WINDOW_SAMPLES + SAMPLE_RATE * 10, dtype=np.float32)
+        results = [
+            {"text": "a b", "language": "en", "no_speech_prob": 0.1, "avg_logprob": -0.2,
+             "segments": [{"start": 0.0, "end": 2.0, "text": " a"}, {"start": 2.0, "end": 29.5, "text": " b"}]},
+            {"text": "c", "language": "en", "no_speech_prob": 0.2, "avg_logprob": -0.3,
+             "segments": [{"start": 1.0, "end": 30, "text": " c"}]},
+        ]
+
+        result = WhisperBatcher._combine(samples, results, None)
+
+        assert [(s["start"], s["end"], s["text"]) for s in result["segments"]] == [
+            (0.0, 2.0, "a"), (2.0, 29.5, "b"), (31.0, 40.0, "c"),
+        ]
+        assert result["segments"][2]["no_speech_prob"] == 0.2
+        assert result["text"] == "a b c"
+
+    def test_silent_windows_are_dropped(self):
+        samples = np.zeros(WINDOW_SAMPLES * 2, dtype=np.float32)
+        results = [
+            {"text": "hmm", "language": "en", "no_speech_prob": 0.9, "avg_logprob": -1.5,
+             "segments": [{"start": 0.0, "end": 30, "text": " hmm"}]},
+            {"text": "words", "language": "en", "no_speech_prob": 0.9, "avg_logprob": -0.2,
+             "segments": [{"start": 0.0, "end": 3.0, "text": " words"}]},
+        ]
+
+        result = WhisperBatcher._combine(samples, results, None)
+
+        assert result["text"] == "words"